@@ -0,0 +1,332 @@
+"""
+Headless HTTP API for the nutritionist workflow, so other clients can reach
+it from behind a load balancer. It is built on plain asyncio streams, with
+no web framework.
+
+    python api.py --host 0.0.0.0 --port 8080
+
+Endpoints:
+
+    GET  /health         {"status": "ok", "uptime_seconds", "in_flight", "requests"}
+    GET  /metrics        metrics.snapshot() as JSON
+    POST /query          {"query": "...", "session_id": "..."} -> the results as JSON
+    POST /query/stream   same body; Server-Sent Events: a "node" event per node
+                         update, then "done" with the results, or "error"
+
+session_id is optional. Requests that share one get the chat app's
+conversation memory (sessions.py), so follow-ups work.
+
+HTTP/1.1 connections stay open (event streams use chunked encoding) until
+the client sends "Connection: close" or stays idle for
+API_KEEPALIVE_TIMEOUT. A request still running after API_REQUEST_TIMEOUT
+gets a 504, or an "error" event if its stream has started. A node already
+running in a worker thread then finishes in the background, but nothing
+more is run for that request. At most API_MAX_CONCURRENCY workflows run at
+once. Sync nodes run on a thread pool of that size, since the loop's
+default pool has only a few threads and would cap throughput first.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from batch import serialize_results
+from metrics import metrics
+from sessions import SessionStore
+import config
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           408: "Request Timeout", 413: "Payload Too Large", 500: "Internal Server Error",
+           504: "Gateway Timeout"}
+
+class HTTPError(Exception):
+    """Error answered with `status` and a JSON {"error": message} body."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class Request:
+    __slots__ = ("method", "path", "version", "headers", "body")
+
+    def __init__(self, method: str, path: str, version: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        return connection == "keep-alive" if self.version == "HTTP/1.0" else connection != "close"
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            payload = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return payload
+
+async def read_request(reader: asyncio.StreamReader, idle_timeout: float, max_body: int) -> Optional[Request]:
+    """
+    Read one request. Returns None when the client closed the connection or
+    left it idle for idle_timeout seconds.
+
+    Raises:
+        HTTPError: Malformed, too large, or too slow to arrive (408)
+    """
+    try:
+        line = await asyncio.wait_for(reader.readline(), idle_timeout)
+    except asyncio.TimeoutError:
+        return None
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), idle_timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(400, "Chunked request bodies are not supported")
+        length = int(headers.get("content-length") or 0)
+        if length > max_body:
+            raise HTTPError(413, f"Body larger than {max_body} bytes")
+        body = await asyncio.wait_for(reader.readexactly(length), idle_timeout) if length else b""
+    except asyncio.TimeoutError:
+        raise HTTPError(408, "Request not received in time")
+    except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        raise HTTPError(400, "Malformed request")
+    return Request(method.upper(), target.split("?", 1)[0], version.upper(), headers, body)
+
+def _head(status: int, headers: Dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"] + [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+def _event(name: str, data: Dict[str, Any]) -> bytes:
+    """One Server-Sent Event, framed as an HTTP chunk."""
+    payload = f"event: {name}\ndata: {json.dumps(data)}\n\n".encode()
+    return f"{len(payload):x}\r\n".encode() + payload + b"\r\n"
+
+class NutritionistAPI:
+    """
+    Args:
+        workflow: Compiled workflow; create_nutritionist_workflow() by default
+        request_timeout: Seconds a request may take before a 504
+        keepalive_timeout: Seconds an idle connection is kept open
+        max_body: Largest accepted request body in bytes
+        max_concurrency: Workflows running at once; more requests wait
+        sessions: Conversation memory for requests with a session_id
+    """
+
+    ROUTES = {"/health": ("GET", "health"), "/metrics": ("GET", "metrics_snapshot"),
+              "/query": ("POST", "query"), "/query/stream": ("POST", "query_stream")}
+
+    def __init__(self, workflow=None, request_timeout: float = config.API_REQUEST_TIMEOUT,
+                 keepalive_timeout: float = config.API_KEEPALIVE_TIMEOUT, max_body: int = config.API_MAX_BODY,
+                 max_concurrency: int = config.API_MAX_CONCURRENCY, sessions: Optional[SessionStore] = None):
+        if workflow is None:
+            from main import create_nutritionist_workflow
+            workflow = create_nutritionist_workflow()
+        self.workflow = workflow
+        self.request_timeout = request_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body = max_body
+        self.max_concurrency = max_concurrency
+        self.sessions = sessions or SessionStore(config.SESSION_MAX, config.SESSION_IDLE_TTL)
+        self.started = time.monotonic()
+        self.in_flight = 0
+        self.requests = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        """Start listening on the running loop; returns the asyncio server."""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                     thread_name_prefix="workflow"))
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await self.start(host, port)
+        print(f"🚀 Nutritionist API listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one connection until it closes or goes idle."""
+        metrics.increment("api_connections")
+        try:
+            while True:
+                try:
+                    request = await read_request(reader, self.keepalive_timeout, self.max_body)
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None or not await self._dispatch(request, writer):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
+
+    async def _dispatch(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; returns whether the connection stays open."""
+        self.requests += 1
+        start = time.perf_counter()
+        route = self.ROUTES.get(request.path)
+        label = request.path if route else "unknown"
+        status = 200
+        try:
+            if route is None:
+                raise HTTPError(404, f"No route for {request.path}")
+            if request.method != route[0]:
+                raise HTTPError(405, f"{request.path} accepts {route[0]}")
+            handler = getattr(self, route[1])
+            if route[1] == "query_stream":
+                # Streams answer as they go; errors after the first event arrive as events
+                return await handler(request, writer)
+            payload = await handler(request)
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+        except asyncio.TimeoutError:
+            status, payload = 504, {"error": f"Request exceeded {self.request_timeout:g}s"}
+        except Exception as e:
+            print(f"❌ ERROR in api {request.path}: {e}")
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            metrics.observe("api_request_seconds", time.perf_counter() - start, route=label)
+        metrics.increment("api_requests", route=label, status=status)
+        await self._send_json(writer, status, payload, request.keep_alive)
+        return request.keep_alive
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode()
+        writer.write(_head(status, {
+            "Content-Type": "application/json",
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+        }) + body)
+        await writer.drain()
+
+    async def health(self, request: Request) -> Dict[str, Any]:
+        return {"status": "ok", "uptime_seconds": round(time.monotonic() - self.started, 1),
+                "in_flight": self.in_flight, "requests": self.requests}
+
+    async def metrics_snapshot(self, request: Request) -> Dict[str, Any]:
+        return metrics.snapshot()
+
+    async def query(self, request: Request) -> Dict[str, Any]:
+        result = None
+        async for name, data in self._events(*self._parse(request)):
+            if name == "done":
+                result = data
+        return result
+
+    async def query_stream(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        query, session_id = self._parse(request)  # a bad body is still a plain 400
+        writer.write(_head(200, {
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "Transfer-Encoding": "chunked",
+            "Connection": "keep-alive" if request.keep_alive else "close",
+        }))
+        status = 200
+        try:
+            async for name, data in self._events(query, session_id):
+                writer.write(_event(name, data))
+                await writer.drain()
+        except ConnectionError:
+            raise
+        except asyncio.TimeoutError:
+            status = 504
+            writer.write(_event("error", {"status": 504, "error": f"Request exceeded {self.request_timeout:g}s"}))
+        except Exception as e:
+            print(f"❌ ERROR in api stream: {e}")
+            status = 500
+            writer.write(_event("error", {"status": 500, "error": f"{type(e).__name__}: {e}"}))
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        metrics.increment("api_requests", route=request.path, status=status)
+        return request.keep_alive
+
+    def _parse(self, request: Request) -> Tuple[str, Optional[str]]:
+        """(query, session_id) from a query request's body."""
+        payload = request.json()
+        query, session_id = payload.get("query"), payload.get("session_id")
+        if not isinstance(query, str) or not query.strip():
+            raise HTTPError(400, 'Body needs a non-empty "query" string')
+        if session_id is not None and not isinstance(session_id, str):
+            raise HTTPError(400, '"session_id" must be a string')
+        return query, session_id
+
+    async def _events(self, query: str, session_id: Optional[str]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """_run's events, cut off with asyncio.TimeoutError at the request deadline."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.request_timeout
+        events = self._run(query, session_id)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.__anext__(), max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    return
+                yield event
+        finally:
+            await events.aclose()
+
+    async def _run(self, query: str, session_id: Optional[str]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Run the workflow for one request, yielding ("node", update) events and then ("done", results)."""
+        from langchain_core.messages import HumanMessage
+        from state import message_text
+        session = self.sessions.get(session_id) if session_id else None
+        inputs = (session.turn_inputs(query) if session
+                  else {"messages": [HumanMessage(content=query)], "original_query": query})
+        thread_id = f"api-{uuid.uuid4()}"
+        run_config = {"configurable": {"thread_id": thread_id}}
+        values: Dict[str, Any] = {}
+        start = last = time.perf_counter()
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                async for mode, chunk in self.workflow.astream(inputs, config=run_config,
+                                                               stream_mode=["updates", "values"]):
+                    if mode == "values":
+                        values = chunk
+                        continue
+                    now = time.perf_counter()
+                    for node, update in chunk.items():
+                        update = update or {}
+                        event = {"node": node, "seconds": round(now - last, 3), **serialize_results(update)}
+                        if update.get("messages"):
+                            event["messages"] = [message_text(message) for message in update["messages"]]
+                        yield "node", event
+                    last = now
+            finally:
+                self.in_flight -= 1
+                self.workflow.checkpointer.delete_thread(thread_id)
+        if session:
+            session.record_turn(query, values)
+        yield "done", {"query": query, "session_id": session_id, **serialize_results(values),
+                       "seconds": round(time.perf_counter() - start, 3)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Nutritionist HTTP API")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    args = parser.parse_args()
+    asyncio.run(NutritionistAPI().serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main()
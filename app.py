@@ -1,19 +1,20 @@
 import chainlit as cl
 from langchain_core.messages import HumanMessage, AIMessage
-import uuid
 import os
+import config
 from main import create_nutritionist_workflow
+from grocery import format_grocery_list
+from sessions import SessionStore
 
-# Store conversation context
-conversation_context = []
+# Conversation memory per Chainlit session, bounded and expired when idle
+sessions = SessionStore(config.SESSION_MAX, config.SESSION_IDLE_TTL)
 
 @cl.on_chat_start
 async def init_graph():
     """
     Initializes the workflow graph when the chat starts.
     """
-    global conversation_context
-    conversation_context = []  # Reset conversation context
+    sessions.discard(cl.context.session.id)  # A new chat starts without memory
     
     await cl.Message(content="""# 🍳 Welcome to Nutrisense AI!
 
@@ -66,24 +67,31 @@ async def send_chunked_message(content: str, max_length: int = 2000):
             await cl.Message(content=f"**Continued...**\n\n{chunk}").send()
 
 
+@cl.on_chat_end
+async def end_chat():
+    """Releases the session's conversation memory."""
+    sessions.discard(cl.context.session.id)
+
+
 @cl.on_message
 async def query(message: cl.Message):
     """
     Processes user input and streams responses from the enhanced workflow graph.
     """
-    global conversation_context
     try:
         print(f"🔍 DEBUG: Starting query processing for: {message.content}")
         
         # Create a fresh workflow for each request
         workflow = create_nutritionist_workflow()
         
-        # Use a unique thread ID for each request
-        thread_id = str(uuid.uuid4())
-        config = {"configurable": {"thread_id": thread_id}}
+        # Each turn runs on its own thread; what follow-ups need is kept in the session
+        session = sessions.get(cl.context.session.id)
+        thread_id = f"{session.session_id}:{session.turns}"
+        run_config = {"configurable": {"thread_id": thread_id}}
 
-        # Create input with the current user message
-        inputs = {"messages": [HumanMessage(content=message.content)]}
+        # The current user message, with the session's history and previous results
+        inputs = session.turn_inputs(message.content)
+        final_state = None
         
         # Add a processing message
         processing_msg = cl.Message(content="🔄 Analyzing your request and preparing response...")
@@ -95,7 +103,9 @@ async def query(message: cl.Message):
         displayed_diet_plan = False
         displayed_nutritional_info = False
         displayed_visualization = False
+        displayed_grocery_list = False
         displayed_blocked = False
+        shopping_list = []
         
         # Use a flag to control the loop instead of break/return
         clinical_blocked = False
@@ -103,8 +113,9 @@ async def query(message: cl.Message):
         print(f"🔍 DEBUG: Starting workflow stream...")
         
         # Stream messages from the workflow
-        async for chunk in workflow.astream(inputs, stream_mode="values", config=config):
+        async for chunk in workflow.astream(inputs, stream_mode="values", config=run_config):
             print(f"🔍 DEBUG: Received chunk with keys: {list(chunk.keys())}")
+            final_state = chunk
             
             # Handle clinical guardrail messages
             if "clinical_check" in chunk:
@@ -265,18 +276,8 @@ async def query(message: cl.Message):
                                             
                                             await send_chunked_message(recipe_content)
                         
-                        # Send shopping list as final section
-                        if hasattr(diet_plan_data, 'shopping_list') and diet_plan_data.shopping_list:
-                            shopping_content = f"## 🛒 Complete Shopping List\n\n"
-                            
-                            # Group items for better organization
-                            for i, item in enumerate(diet_plan_data.shopping_list[:25], 1):
-                                shopping_content += f"{i}. {item}\n"
-                            
-                            if len(diet_plan_data.shopping_list) > 25:
-                                shopping_content += f"\n*...and {len(diet_plan_data.shopping_list) - 25} more items*\n"
-                            
-                            await send_chunked_message(shopping_content)
+                        # The model's shopping list is only shown if no grocery list gets built
+                        shopping_list = getattr(diet_plan_data, 'shopping_list', None) or []
                     else:
                         await cl.Message(content=f"📅 **Diet Plan**:\n{str(diet_plan_data)[:1000]}...").send()
                     
@@ -332,6 +333,15 @@ async def query(message: cl.Message):
                     
                     displayed_nutritional_info = True
                 
+                # Handle the grocery list built from the recipe or diet plan
+                if "grocery_list" in chunk and chunk["grocery_list"] and not displayed_grocery_list:
+                    print(f"🔍 DEBUG: Processing grocery_list")
+                    grocery_list = chunk["grocery_list"]
+                    if grocery_list.items:
+                        grocery_content = f"## 🛒 Grocery List\n\n{format_grocery_list(grocery_list)}"
+                        await send_chunked_message(grocery_content)
+                    displayed_grocery_list = True
+                
                 # Handle visualization
                 if "visualization" in chunk and chunk["visualization"] and not displayed_visualization:
                     print(f"🔍 DEBUG: Processing visualization")
@@ -347,14 +357,22 @@ async def query(message: cl.Message):
                     displayed_visualization = True
         
         print(f"🔍 DEBUG: Workflow stream completed")
+        session.record_turn(message.content, final_state)
+        
+        # Fall back to the model's shopping list when no grocery list was built
+        if shopping_list and not displayed_grocery_list:
+            shopping_content = f"## 🛒 Complete Shopping List\n\n"
+            for i, item in enumerate(shopping_list[:25], 1):
+                shopping_content += f"{i}. {item}\n"
+            
+            if len(shopping_list) > 25:
+                shopping_content += f"\n*...and {len(shopping_list) - 25} more items*\n"
+            
+            await send_chunked_message(shopping_content)
         
         # Remove processing message if still there and not clinical
         if not clinical_blocked:
             await processing_msg.remove()
-        
-        # Keep conversation context manageable (last 6 entries)
-        if len(conversation_context) > 6:
-            conversation_context = conversation_context[-6:]
             
     except Exception as e:
         print(f"❌ ERROR in app.py: {e}")
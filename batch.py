@@ -0,0 +1,216 @@
+"""
+Batch processing of nutrition queries from a JSONL file, for generating
+content offline.
+
+    python batch.py queries.jsonl results.jsonl --concurrency 4
+
+Each input line is a JSON object with the query under "query" and an
+optional id under "id" (--query-field / --id-field; the line number is the
+id otherwise). Queries are read lazily and at most --concurrency run at
+once. Each result is appended to the output file as one JSON line as soon
+as it finishes, and flushed.
+
+Runs are resumable. Ids already in the output file are skipped, so after a
+crash or Ctrl-C the same command carries on where it stopped. A line left
+half-written by a crash is dropped first. --retry-errors also re-runs
+queries whose recorded status is "error".
+
+At the end it prints throughput, query latency and per-node latency.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+from metrics import metrics
+
+# Final-state fields written to the output; pydantic models are dumped to JSON
+RESULT_FIELDS = ("intent", "clinical_check", "recipe", "diet_plan", "nutritional_info", "grocery_list",
+                 "visualization")
+
+def read_queries(path: str, query_field: str = "query", id_field: str = "id") -> Iterator[Tuple[str, str]]:
+    """
+    Stream (id, query) pairs from a JSONL file, skipping blank lines.
+
+    Raises:
+        ValueError: A line is not JSON or has no query
+    """
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{number}: invalid JSON: {e}") from e
+            query = record.get(query_field)
+            if not isinstance(query, str) or not query.strip():
+                raise ValueError(f"{path}:{number}: no {query_field!r} string")
+            yield str(record.get(id_field, number)), query
+
+def completed_ids(path: str, retry_errors: bool = False) -> Set[str]:
+    """
+    Ids already recorded in an output file. A trailing partial line, left by
+    a crash mid-write, is truncated away so new results start on a fresh line.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            print(f"⚠️ DEBUG: Dropping a partial last line from {path}")
+            f.truncate(end)
+    done = set()
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not (retry_errors and record.get("status") == "error"):
+            done.add(str(record.get("id")))
+    return done
+
+def _dump(value: Any) -> Any:
+    return value.model_dump(mode="json") if hasattr(value, "model_dump") else value
+
+def serialize_results(values: Dict[str, Any]) -> Dict[str, Any]:
+    """The RESULT_FIELDS of a state or node update, as JSON-ready values."""
+    return {field: _dump(values[field]) for field in RESULT_FIELDS if values.get(field) is not None}
+
+def run_query(workflow, query_id: str, query: str) -> Dict[str, Any]:
+    """
+    Run one query and return its output record. Never raises: failures are
+    recorded with status "error". Node latency is the time between
+    consecutive node updates, observed as batch_node_seconds{node}.
+    """
+    thread = {"configurable": {"thread_id": f"batch-{query_id}"}}
+    record: Dict[str, Any] = {"id": query_id, "query": query}
+    node_seconds: Dict[str, float] = {}
+    start = last = time.perf_counter()
+    try:
+        from langchain_core.messages import HumanMessage
+        values = {}
+        for mode, chunk in workflow.stream({"messages": [HumanMessage(content=query)], "original_query": query},
+                                           config=thread, stream_mode=["updates", "values"]):
+            if mode == "values":
+                values = chunk
+                continue
+            now = time.perf_counter()
+            for node in chunk:
+                node_seconds[node] = node_seconds.get(node, 0.0) + now - last
+                metrics.observe("batch_node_seconds", now - last, node=node)
+            last = now
+        record.update(serialize_results(values))
+        record["status"] = "ok"
+    except Exception as e:
+        print(f"❌ ERROR in batch query {query_id}: {e}")
+        record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        # Checkpoints are only needed while the query runs
+        workflow.checkpointer.delete_thread(thread["configurable"]["thread_id"])
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    record["node_seconds"] = {node: round(seconds, 3) for node, seconds in node_seconds.items()}
+    metrics.observe("batch_query_seconds", record["seconds"])
+    metrics.increment("batch_queries", status=record["status"])
+    return record
+
+def run_batch(input_path: str, output_path: str, concurrency: int = 4, query_field: str = "query",
+              id_field: str = "id", retry_errors: bool = False, limit: Optional[int] = None,
+              workflow=None) -> Dict[str, Any]:
+    """
+    Process every query in input_path not yet in output_path.
+
+    Args:
+        input_path: JSONL file of queries
+        output_path: JSONL file results are appended to
+        concurrency: Queries in flight at once
+        query_field: Input field holding the query
+        id_field: Input field holding the id
+        retry_errors: Also re-run queries recorded with status "error"
+        limit: Stop after this many new queries
+        workflow: Compiled workflow; create_nutritionist_workflow() by default
+
+    Returns:
+        Run statistics: processed, ok, errors, skipped, wall seconds, queries per second
+    """
+    if workflow is None:
+        from main import create_nutritionist_workflow
+        workflow = create_nutritionist_workflow()
+    done = completed_ids(output_path, retry_errors)
+    stats = {"processed": 0, "ok": 0, "errors": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool, open(output_path, "a") as out:
+        def write(futures) -> None:
+            for future in futures:
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                stats["processed"] += 1
+                stats["ok" if record["status"] == "ok" else "errors"] += 1
+
+        pending = set()
+        submitted = 0
+        for query_id, query in read_queries(input_path, query_field, id_field):
+            if query_id in done:
+                stats["skipped"] += 1
+                continue
+            if limit is not None and submitted >= limit:
+                break
+            if len(pending) >= concurrency:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write(finished)
+            done.add(query_id)  # duplicates later in the file are skipped
+            pending.add(pool.submit(run_query, workflow, query_id, query))
+            submitted += 1
+        write(future for future in wait(pending).done)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["queries_per_second"] = stats["processed"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+def format_report(stats: Dict[str, Any]) -> str:
+    """Throughput, query latency and per-node latency for a finished run."""
+    summaries = metrics.snapshot()["summaries"]
+    lines = [
+        f"Processed {stats['processed']} queries ({stats['ok']} ok, {stats['errors']} errors), "
+        f"skipped {stats['skipped']} already done, in {stats['seconds']:.1f}s",
+        f"Throughput: {stats['queries_per_second']:.2f} queries/s ({stats['queries_per_second'] * 60:.1f}/min)",
+    ]
+    query = summaries.get("batch_query_seconds")
+    if query:
+        lines.append(f"Query latency: p50={query['p50']:.2f}s p95={query['p95']:.2f}s max={query['max']:.2f}s")
+    nodes = {series[len("batch_node_seconds{node="):-1]: s for series, s in summaries.items()
+             if series.startswith("batch_node_seconds{")}
+    if nodes:
+        lines.append(f"  {'node':<24}{'n':>6}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}")
+        for node, s in sorted(nodes.items(), key=lambda item: -item[1]["sum"]):
+            lines.append(f"  {node:<24}{s['count']:>6}{s['mean']:>8.2f}s{s['p50']:>8.2f}s"
+                         f"{s['p95']:>8.2f}s{s['max']:>8.2f}s")
+    return "\n".join(lines)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run nutrition queries from a JSONL file")
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("output", help="JSONL file results are appended to (resumable)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--query-field", default="query")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--retry-errors", action="store_true", help="re-run queries recorded as errors")
+    parser.add_argument("--limit", type=int, help="stop after this many new queries")
+    parser.add_argument("--quiet", action="store_true", help="hide the nodes' debug output")
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull, \
+            (contextlib.redirect_stdout(devnull) if args.quiet else contextlib.nullcontext()):
+        stats = run_batch(args.input, args.output, args.concurrency, args.query_field, args.id_field,
+                          args.retry_errors, args.limit)
+    print(format_report(stats))
+    sys.exit(1 if stats["errors"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Load test for api.py with the fake models (--latency seconds per model
+call): requests/s and latency at several client concurrency levels over
+keep-alive connections, time to the first Server-Sent Event, a request
+past its deadline, and /health answered while the workers are busy.
+
+Run from the repository root:
+
+    python benchmarks/bench_api.py --requests 64 --latency 0.1
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import NutritionistAPI
+from fakes import RoutedChatModel, install_fake_model
+from main import create_nutritionist_workflow
+from metrics import metrics
+
+QUERIES = ["How to make palak paneer", "How to make tahini dressing", "How to make dal tadka"]
+
+class Client:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, payload=None):
+        """Returns (status, body bytes, seconds to the first body chunk)."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        start = time.perf_counter()
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            chunks, first = [], None
+            while True:
+                size = int(await self.reader.readline(), 16)
+                data = await self.reader.readexactly(size + 2)
+                if first is None:
+                    first = time.perf_counter() - start
+                if not size:
+                    return status, b"".join(chunks), first
+                chunks.append(data[:-2])
+        data = await self.reader.readexactly(int(headers["content-length"]))
+        return status, data, time.perf_counter() - start
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            with contextlib.suppress(Exception):
+                await self.writer.wait_closed()
+
+async def load(port: int, requests: int, concurrency: int):
+    """requests POST /query calls from `concurrency` keep-alive clients; returns (wall, latencies, statuses)."""
+    latencies, statuses = [], []
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        client = Client(port)
+        for i in remaining:
+            start = time.perf_counter()
+            status, _, _ = await client.request("POST", "/query", {"query": QUERIES[i % len(QUERIES)]})
+            latencies.append(time.perf_counter() - start)
+            statuses.append(status)
+        await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, statuses
+
+def report(*args) -> None:
+    print(*args, file=sys.__stdout__, flush=True)
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+async def run(args) -> None:
+    workflow = create_nutritionist_workflow()
+    api = NutritionistAPI(workflow, request_timeout=30, max_concurrency=32)
+    server = await api.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    report(f"POST /query, {args.requests} recipe requests per level, "
+           f"{args.latency * 1000:.0f} ms per model call (6 calls per request)")
+    report(f"  {'clients':<10}{'wall':>8}{'req/s':>9}{'p50':>8}{'p95':>8}{'connections':>13}  statuses")
+    for concurrency in (1, 8, 32):
+        metrics.reset()
+        wall, latencies, statuses = await load(port, args.requests, concurrency)
+        connections = metrics.snapshot()["counters"].get("api_connections", 0)
+        report(f"  {concurrency:<10}{wall:>7.2f}s{len(latencies) / wall:>9.1f}{percentile(latencies, 0.5):>7.2f}s"
+              f"{percentile(latencies, 0.95):>7.2f}s{connections:>13}  "
+              f"{ {s: statuses.count(s) for s in set(statuses)} }")
+
+    client = Client(port)
+    status, body, first = await client.request("POST", "/query/stream", {"query": QUERIES[0]})
+    events = [block.split("\n", 1)[0][len("event: "):] for block in body.decode().split("\n\n") if block]
+    _, whole, _ = await client.request("POST", "/query", {"query": QUERIES[0]})
+    report(f"\nSSE: first event after {first * 1000:.0f} ms, {len(events)} events ({', '.join(events)}); "
+           f"POST /query answers after {json.loads(whole)['seconds'] * 1000:.0f} ms")
+
+    # /health while every worker is busy
+    health = Client(port)
+    busy = asyncio.ensure_future(load(port, 32, 32))
+    await asyncio.sleep(args.latency * 2)
+    health_times = []
+    for _ in range(20):
+        status, body, seconds = await health.request("GET", "/health")
+        health_times.append(seconds)
+    in_flight = json.loads(body)["in_flight"]
+    await busy
+    report(f"/health under load ({in_flight} in flight): p50 {statistics.median(health_times) * 1000:.2f} ms, "
+           f"max {max(health_times) * 1000:.2f} ms")
+
+    api.request_timeout = args.latency * 2
+    status, body, seconds = await client.request("POST", "/query", {"query": QUERIES[0]})
+    report(f"Deadline {api.request_timeout:g}s: {status} {json.loads(body)['error']!r} after {seconds:.2f}s")
+    status, body, _ = await client.request("POST", "/query", {"nope": 1})
+    report(f"Bad body: {status} {json.loads(body)['error']!r}")
+
+    await client.close()
+    await health.close()
+    await asyncio.sleep(0.1)  # let the handlers see the clients hang up
+    server.close()
+    await server.wait_closed()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP API load test")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per model call")
+    args = parser.parse_args()
+
+    model = RoutedChatModel(latency=args.latency)
+    install_fake_model(model)
+    # Silence the nodes' debug output; report() still writes to the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
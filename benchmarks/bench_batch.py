@@ -0,0 +1,70 @@
+"""
+Throughput of batch.py at several concurrency levels, and resuming after an
+interrupted run, using the fake models (--latency seconds per model call).
+
+Run from the repository root:
+
+    python benchmarks/bench_batch.py --queries 40 --latency 0.2
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+from fakes import RoutedChatModel, install_fake_model
+from main import create_nutritionist_workflow
+from metrics import metrics
+
+QUERIES = ["How to make palak paneer", "High-protein gluten-free breakfast under 500 calories",
+           "How to make tahini dressing", "I don't have eggs, what can I make for breakfast?"]
+
+def quiet_run(*args, **kwargs) -> dict:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return batch.run_batch(*args, **kwargs)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch CLI benchmark")
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per model call")
+    args = parser.parse_args()
+
+    model = RoutedChatModel(latency=args.latency)
+    install_fake_model(model)
+    workflow = create_nutritionist_workflow()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "queries.jsonl")
+        with open(source, "w") as f:
+            for i in range(args.queries):
+                f.write(json.dumps({"id": f"q{i}", "query": QUERIES[i % len(QUERIES)]}) + "\n")
+
+        print(f"{args.queries} recipe queries, {args.latency * 1000:.0f} ms per model call (6 calls per query)")
+        print(f"  {'concurrency':<14}{'wall':>8}{'queries/s':>11}{'p50':>8}{'p95':>8}")
+        for concurrency in (1, 4, 8, 16):
+            metrics.reset()
+            output = os.path.join(tmp, f"out-{concurrency}.jsonl")
+            stats = quiet_run(source, output, concurrency, workflow=workflow)
+            s = metrics.snapshot()["summaries"]["batch_query_seconds"]
+            print(f"  {concurrency:<14}{stats['seconds']:>7.2f}s{stats['queries_per_second']:>11.2f}"
+                  f"{s['p50']:>7.2f}s{s['p95']:>7.2f}s")
+
+        # Interrupted run: a crash after 15 results leaves a half-written line
+        output = os.path.join(tmp, "resume.jsonl")
+        quiet_run(source, output, 4, limit=15, workflow=workflow)
+        with open(output, "a") as f:
+            f.write('{"id": "q15", "query": "How to ma')
+        metrics.reset()
+        stats = quiet_run(source, output, 4, workflow=workflow)
+        with open(output) as f:
+            ids = [json.loads(line)["id"] for line in f]
+        print(f"\nResume after a crash at 15 results: skipped {stats['skipped']}, processed {stats['processed']}; "
+              f"output has {len(ids)} lines, {len(set(ids))} distinct ids")
+        print("\n" + batch.format_report(stats))
+
+if __name__ == "__main__":
+    main()
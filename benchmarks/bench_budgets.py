@@ -0,0 +1,79 @@
+"""
+Benchmark for budgets.NodeBudget: runs recipe_node with a fake model that
+keeps calling the search tool, against the fake search server, and compares
+an unbounded agent with tool-call and deadline budgets.
+
+Run from the repository root:
+
+    python benchmarks/bench_budgets.py --latency 0.1 --search-latency 0.2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+import config
+import recipe
+from fakes import FakeChatModel, FakeSearchServer, sample_instance
+from metrics import metrics
+from models import Intent
+from search_tool import CachedSearchTool, SearchService, SearxBackend
+from ttl_cache import TTLCache
+
+def run_node(intent: Intent, server: FakeSearchServer) -> tuple:
+    # The node's update keeps only the agent's answer, so count searches at the server
+    requests = server.requests
+    start = time.perf_counter()
+    update = recipe.recipe_node({"messages": [HumanMessage(content="How to make palak paneer")], "intent": intent})
+    wall = time.perf_counter() - start
+    return wall, server.requests - requests, update
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Agent budget benchmark")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per model call")
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    intent = sample_instance(Intent)
+    with FakeSearchServer(latency=args.search_latency) as server:
+        # No cache, so every search pays the upstream latency
+        service = SearchService(SearxBackend(server.url, 4, 4), TTLCache(0, 0), timeout=5, max_concurrency=4)
+        recipe.get_search_tool = lambda: CachedSearchTool(service=service)
+        recipe.get_llm = lambda node=None: FakeChatModel(latency=args.latency, tool_rounds=-1)
+        recipe.get_recipe_library = lambda: None  # time generation, not library hits
+
+        print(f"Model that never stops searching: {args.latency * 1000:.0f} ms per model call, "
+              f"{args.search_latency * 1000:.0f} ms per search")
+        print(f"  {'':<34}{'wall':>8}{'searches':>10}  result")
+
+        # Previous behaviour: no hook. LangGraph's default recursion limit is 10,000
+        # steps, effectively unbounded, so cap it at the older default of 25 here
+        agent = recipe.create_recipe_agent()
+        start = time.perf_counter()
+        try:
+            agent.invoke({"messages": [HumanMessage(content="How to make palak paneer")]},
+                         config={"recursion_limit": 25})
+            outcome = "structured response"
+        except Exception as e:
+            outcome = type(e).__name__
+        print(f"  {'no budget (recursion_limit=25)':<34}{time.perf_counter() - start:>7.2f}s{server.requests:>10}  {outcome}")
+
+        scenarios = [
+            ("max_tool_calls=3, deadline=60s", {"deadline": 60.0, "max_tool_calls": 3}),
+            ("max_tool_calls=50, deadline=1s", {"deadline": 1.0, "max_tool_calls": 50}),
+        ]
+        for label, budget in scenarios:
+            config.NODE_BUDGETS["recipe_node"] = budget
+            wall, searches, update = run_node(intent, server)
+            outcome = "structured response" if update.get("recipe") else f"error: {update.get('error')}"
+            print(f"  {label:<34}{wall:>7.2f}s{searches:>10}  {outcome}")
+
+    print("\nMetrics:")
+    print(metrics.format_summary())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare cold-start time and peak RSS of the chart backends used by visual_node.
+
+Each backend runs in a fresh interpreter so import costs are measured from a
+cold start. Run from the repository root:
+
+    python benchmarks/bench_chart_backends.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_INFO = (
+    "Calories: 693 kcal, Protein: 41.7 g, Fat: 34.1 g, Carbohydrates: 52.8 g, "
+    "Fiber: 11.1 g, Vitamin C: 81.2 mg"
+)
+
+CHILD_CODE = """
+import json, resource, sys, time
+sys.path.insert(0, {repo_root!r})
+start = time.perf_counter()
+import visualization
+imported = time.perf_counter()
+path = visualization.create_nutrition_chart({info!r}, "Benchmark Chart")
+rendered = time.perf_counter()
+path = visualization.create_nutrition_chart({info!r}, "Benchmark Chart")
+warm = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "first_render_ms": (rendered - imported) * 1000,
+    "warm_render_ms": (warm - rendered) * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "path": path,
+}}))
+"""
+
+def run_backend(backend: str) -> dict:
+    env = dict(os.environ, CHART_BACKEND=backend)
+    # Charts are written to the working directory, so keep them out of the repo
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = subprocess.run(
+            [sys.executable, "-c", CHILD_CODE.format(repo_root=REPO_ROOT, info=SAMPLE_INFO)],
+            cwd=workdir, env=env, capture_output=True, text=True, check=True,
+        )
+    # visualization prints DEBUG lines; the measurement is the last line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=["svg", "matplotlib"])
+    args = parser.parse_args()
+
+    print(f"{'backend':<12}{'import ms':>12}{'1st render ms':>15}{'warm ms':>10}{'max RSS MB':>12}")
+    for backend in args.backends:
+        results = [run_backend(backend) for _ in range(args.runs)]
+        median = lambda key: statistics.median(r[key] for r in results)
+        print(
+            f"{backend:<12}{median('import_ms'):>12.1f}{median('first_render_ms'):>15.1f}"
+            f"{median('warm_render_ms'):>10.1f}{median('max_rss_mb'):>12.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Local constraint checks (constraints.py) vs asking the model.
+
+First times ConstraintMatcher.scan() on growing batches of synthetic recipes
+under a vegan + nut-free + excluded-mushroom request, against checking each
+forbidden term with its own regex (one pass per term).
+
+Then repairs a 7-day plan (28 recipes) in which a few recipes break the
+request, with enforce_plan(), against regenerating the whole plan. The fake
+model's latency models output length: --latency seconds per recipe written,
+so a repair call costs one recipe and a whole plan costs 28.
+
+Run from the repository root:
+
+    python benchmarks/bench_constraints.py --latency 0.05
+"""
+import argparse
+import contextlib
+import gc
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from constraints import compile_constraints, enforce_plan
+from fakes import FakeChatModel, sample_instance
+from models import DietPlan, Intent, MealPlanDay, Recipe
+
+COMPLIANT = ["1 cup cooked quinoa", "200 g firm tofu, cubed", "1 cup coconut milk", "2 tbsp olive oil",
+             "1 onion, chopped", "2 cloves garlic", "1 can chickpeas, drained", "1 cup spinach", "1 tsp cumin",
+             "2 tbsp tahini", "1 cup brown rice", "1 tbsp maple syrup", "1 eggplant, diced", "1 cup oat milk",
+             "2 tbsp vegan butter", "1 cup rolled oats", "1 tsp turmeric", "1 cup red lentils"]
+VIOLATING = ["100 g paneer, cubed", "2 tbsp ghee", "2 eggs", "1/4 cup cashews", "1 cup button mushrooms",
+             "1 tbsp honey", "1 cup Greek yogurt", "150 g chicken breast"]
+MEALS = ["breakfast", "lunch", "dinner", "snack"]
+
+def make_intent() -> Intent:
+    return sample_instance(Intent).model_copy(update={
+        "primary_intent": "diet_plan", "dietary_restrictions": ["vegan", "nut-free"],
+        "excluded_ingredients": ["mushroom"], "specific_foods": [], "is_follow_up": False})
+
+def make_recipe(rng: random.Random, name: str, violating: bool) -> Recipe:
+    ingredients = rng.sample(COMPLIANT, 8)
+    if violating:
+        ingredients[rng.randrange(8)] = rng.choice(VIOLATING)
+    return Recipe(name=name, ingredients=ingredients, instructions=["Cook."], prep_time="10 minutes",
+                  cook_time="20 minutes", total_time="30 minutes", servings=2,
+                  nutritional_info="Calories: 420, Protein: 18g")
+
+def make_plan(rng: random.Random, violating: int) -> DietPlan:
+    bad = set(rng.sample(range(28), violating))
+    days = [MealPlanDay(day=f"Day {day + 1}",
+                        **{meal: [make_recipe(rng, f"Recipe {day * 4 + m}", day * 4 + m in bad)]
+                           for m, meal in enumerate(MEALS)})
+            for day in range(7)]
+    return DietPlan(plan_name="7-Day Vegan Plan", duration="1 week", daily_plans=days,
+                    total_nutritional_info="", shopping_list=[])
+
+def naive_scan(terms, recipes) -> int:
+    """One regex search per forbidden term per recipe."""
+    patterns = [re.compile(rf"\b{re.escape(term)}(?:e?s)?\b") for term in terms]
+    found = 0
+    for recipe in recipes:
+        text = "\n".join([recipe.name, *recipe.ingredients]).lower()
+        found += sum(1 for pattern in patterns if pattern.search(text))
+    return found
+
+def median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Constraint validation benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model seconds per recipe written")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    intent = make_intent()
+    matcher = compile_constraints(intent)
+    print(f"{len(matcher.terms)} forbidden terms; unchecked restrictions: {matcher.unchecked or 'none'}")
+    print("\nscan(): recipes checked, 10% violating")
+    print(f"  {'recipes':>8}{'matcher':>11}{'per-term regex':>16}{'recipes/s':>12}")
+    for size in (10, 100, 1_000, 10_000):
+        recipes = [make_recipe(rng, f"Recipe {i}", i % 10 == 0) for i in range(size)]
+        assert {v.recipe for v in matcher.scan(recipes)} == set(range(0, size, 10))
+        repeat = max(3, 2000 // size)
+        ours = median_ms(lambda: matcher.scan(recipes), repeat)
+        theirs = median_ms(lambda: naive_scan(matcher.terms, recipes), repeat)
+        print(f"  {size:>8}{ours:>9.2f}ms{theirs:>14.2f}ms{size / ours * 1000:>12,.0f}")
+
+    print(f"\n7-day plan (28 recipes), fake model at {args.latency * 1000:.0f} ms per recipe written")
+    print(f"  {'violating':>9}{'repair':>10}{'calls':>7}{'regenerate':>12}{'calls':>7}")
+    config.CONSTRAINT_REPAIR_ATTEMPTS = 1
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # warm-up
+        enforce_plan(make_plan(rng, 1), intent, lambda: FakeChatModel(latency=args.latency), "diet_plan_node")
+    for violating in (1, 3, 7):
+        plan = make_plan(rng, violating)
+        repair_model = FakeChatModel(latency=args.latency)
+        gc.collect()  # not the scan section's garbage
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            plan, repaired, dropped = enforce_plan(plan, intent, lambda: repair_model, "diet_plan_node")
+        repair_seconds = time.perf_counter() - start
+        assert (repaired, dropped) == (violating, 0) and not matcher.scan(
+            [recipe for day in plan.daily_plans for meal in MEALS for recipe in getattr(day, meal)])
+        plan_model = FakeChatModel(latency=args.latency * 28)
+        start = time.perf_counter()
+        plan_model.with_structured_output(DietPlan).invoke("Regenerate the whole plan")
+        regenerate_seconds = time.perf_counter() - start
+        print(f"  {violating:>9}{repair_seconds * 1000:>8.0f}ms{repair_model.calls:>7}"
+              f"{regenerate_seconds * 1000:>10.0f}ms{plan_model.calls:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Follow-ups answered locally (follow_up.py) vs regenerated by the workflow.
+
+A session has a previous recipe and grocery list. Each follow-up message
+runs through the compiled workflow twice: once with local follow-ups
+disabled, the previous behaviour, and once with them enabled. The models
+are fakes that take --latency seconds per call, so "model calls" counts
+what a real run would send to Gemini.
+
+Run from the repository root:
+
+    python benchmarks/bench_follow_up.py --latency 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import follow_up
+from fakes import RoutedChatModel, install_fake_model
+from grocery import build_recipe_grocery_list
+from main import create_nutritionist_workflow
+from models import Recipe
+from sessions import Session
+
+FOLLOW_UPS = ["Scale this to 6 servings", "double it", "give me the shopping list", "show the nutrition chart again"]
+
+PREVIOUS_RECIPE = Recipe(
+    name="Palak Paneer",
+    ingredients=["4 cups fresh spinach", "200 g paneer, cubed", "1 medium onion, chopped", "2 tomatoes, pureed",
+                 "1 tbsp ginger-garlic paste", "1 1/2 tsp cumin seeds", "½ tsp turmeric", "2 tbsp ghee",
+                 "1/4 cup cream", "salt to taste"],
+    instructions=["Blanch and blend the spinach.", "Fry the spices in ghee.", "Simmer with the paneer."],
+    prep_time="15 minutes", cook_time="25 minutes", total_time="40 minutes", servings=4,
+    nutritional_info="Per serving: 320 kcal, 16 g protein, 22 g fat, 12 g carbs, 4 g fiber",
+)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local follow-up benchmark")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per model call")
+    args = parser.parse_args()
+
+    model = RoutedChatModel(latency=args.latency)
+    install_fake_model(model)
+    detect = follow_up.detect_follow_up
+    workflow = create_nutritionist_workflow()
+
+    session = Session("bench", now=0.0)
+    session.results = {"recipe": PREVIOUS_RECIPE, "grocery_list": build_recipe_grocery_list(PREVIOUS_RECIPE)}
+
+    print(f"Follow-ups on a previous recipe, {args.latency * 1000:.0f} ms per model call")
+    print(f"  {'':<34}{'regenerated':>12}{'calls':>7}{'local':>10}{'calls':>7}  answer")
+    for turn, query in enumerate(FOLLOW_UPS):
+        row = []
+        for local in (False, True):
+            follow_up.detect_follow_up = detect if local else (lambda query, previous: None)
+            calls = model.calls
+            start = time.perf_counter()
+            final = workflow.invoke(session.turn_inputs(query),
+                                    config={"configurable": {"thread_id": f"{turn}-{local}"}})
+            row.append((time.perf_counter() - start, model.calls - calls, final))
+        (slow, slow_calls, _), (fast, fast_calls, final) = row
+        if final.get("recipe"):
+            answer = f"{final['recipe'].servings} servings, {final['recipe'].ingredients[0]}"
+        elif final.get("visualization"):
+            answer = final["visualization"]
+        else:
+            answer = f"{len(final['grocery_list'].items)} grocery items"
+        print(f"  {query:<34}{slow:>11.2f}s{slow_calls:>7}{fast * 1000:>8.1f}ms{fast_calls:>7}  {answer}")
+    follow_up.detect_follow_up = detect
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Nutrition questions answered from the food dataset (food_query.py) vs the
+nutritional info agent.
+
+Runs nutritional_info_node on a mix of questions, once with the dataset
+fast path and once without, using a fake model (--latency seconds per call,
+one search round per answer). Then times run_food_query on synthetic tables
+of growing size to show the vectorized filters and ranks scale.
+
+Run from the repository root:
+
+    python benchmarks/bench_food_query.py --latency 0.3
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import nutritional_info
+import numpy as np
+from fakes import FakeChatModel, sample_instance
+from food_query import NUTRIENTS, FoodTable, load_food_table, parse_food_query, run_food_query
+from langchain_core.messages import HumanMessage
+from metrics import metrics
+from models import Intent
+
+QUESTIONS = [
+    ("Which foods are highest in fiber and lowest in calories?", {}),
+    ("Top 5 protein-rich foods", {}),
+    ("Foods with more than 5 g protein under 100 calories", {}),
+    ("How much vitamin C is in an orange?", {"specific_foods": ["orange"]}),
+    ("Low calorie, high antioxidant foods per 100g", {}),
+    ("Best vitamin C sources without citrus", {"excluded_ingredients": ["orange", "lemon", "grapefruit"]}),
+    ("What are the most nutrient-dense foods?", {}),
+    ("Top 5 foods by protein per calorie", {}),
+    ("Which foods are rich in calcium?", {}),
+    ("High-iron vegetarian foods", {"dietary_restrictions": ["vegetarian"]}),
+    ("How much protein do I need per day?", {}),
+]
+
+def make_intent(**fields) -> Intent:
+    return sample_instance(Intent).model_copy(update={
+        "primary_intent": "nutritional_info", "dietary_restrictions": [], "excluded_ingredients": [],
+        "specific_foods": [], "nutritional_requirements": "", "is_follow_up": False, **fields})
+
+def synthetic_table(size: int, rng) -> FoodTable:
+    grams = rng.uniform(10, 300, size)
+    columns = {"calories": rng.uniform(5, 600, size), "protein": rng.gamma(1.5, 4, size),
+               "fiber": rng.gamma(1.2, 2, size), "vitamin c": rng.gamma(0.8, 15, size),
+               "antioxidants": rng.gamma(1.0, 3000, size)}
+    return FoodTable([f"Food {i}" for i in range(size)], columns, grams, ["1 serving"] * size)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Food dataset query benchmark")
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per model call")
+    args = parser.parse_args()
+
+    model = FakeChatModel(latency=args.latency, tool_rounds=1)
+    nutritional_info.get_llm = lambda node=None: model
+    print(f"nutritional_info_node, fake model at {args.latency * 1000:.0f} ms per call")
+    print(f"  {'question':<58}{'agent':>9}{'dataset':>10}{'calls':>7}  answered by")
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):  # warm-up: imports, agent build, dataset load
+            load_food_table()
+            nutritional_info.nutritional_info_node({"messages": [HumanMessage(content="hi")],
+                                                    "original_query": "hi", "intent": make_intent()})
+        totals = [0.0, 0.0]
+        for question, fields in QUESTIONS:
+            state = {"messages": [HumanMessage(content=question)], "original_query": question,
+                     "intent": make_intent(**fields)}
+            timings = []
+            for enabled in (False, True):
+                config.FOOD_QUERY_ENABLED = enabled
+                metrics.reset()
+                calls = model.calls
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(devnull):
+                    update = nutritional_info.nutritional_info_node(state)
+                timings.append(time.perf_counter() - start)
+                assert update.get("nutritional_info"), update
+            counters = metrics.snapshot()["counters"]
+            source = "dataset" if counters.get("food_query{result=dataset}") else "agent"
+            totals = [totals[0] + timings[0], totals[1] + timings[1]]
+            print(f"  {question:<58}{timings[0] * 1000:>7.0f}ms{timings[1] * 1000:>8.1f}ms"
+                  f"{model.calls - calls:>7}  {source}")
+        print(f"  {'total':<58}{totals[0] * 1000:>7.0f}ms{totals[1] * 1000:>8.0f}ms")
+
+    print("\nrun_food_query latency by table size (filters + two objectives + top 10)")
+    print(f"  {'foods':>8}{'p50':>10}{'p95':>10}")
+    rng = np.random.default_rng(0)
+    for size in (100, 10_000, 100_000, 1_000_000):
+        table = synthetic_table(size, rng)
+        food_query = parse_food_query("top 10 foods highest in fiber and lowest in calories with at least "
+                                      "3 g protein", make_intent(), table)
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            rows = run_food_query(table, food_query)
+            timings.append(time.perf_counter() - start)
+        assert len(rows) == 10 and all(table.columns["protein"][row] >= 3 for row in rows)
+        timings.sort()
+        print(f"  {size:>8}{statistics.median(timings) * 1000:>8.2f}ms{timings[18] * 1000:>8.2f}ms")
+    assert set(NUTRIENTS) == set(table.columns)
+
+if __name__ == "__main__":
+    main()
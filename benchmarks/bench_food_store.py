@@ -0,0 +1,97 @@
+"""
+Food dataset start-up: parsing the CSV vs mapping the columnar store
+(food_store.py).
+
+Writes synthetic food CSVs of growing size with --nutrients extra nutrient
+columns, ingests each into a store, then in a fresh process per case
+measures the time and resident memory (RSS, from /proc) to:
+
+- csv:   pandas.read_csv of the CSV (what start-up did before)
+- store: open the store and run a first food query (filter + rank on three
+         columns), paging in only those columns
+
+Run from the repository root:
+
+    python benchmarks/bench_food_store.py --sizes 1000 10000 100000 300000
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from food_store import SCHEMA, SERVING_GRAMS, ingest
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import numpy, pandas
+def rss():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS")) / 1024
+before, start = rss(), time.perf_counter()
+if {case!r} == "csv":
+    df = pandas.read_csv({csv!r})
+    rows = len(df)
+else:
+    from food_store import FoodStore
+    store = FoodStore({store!r})
+    fiber, calories = store["Fiber (g)"], store["Calories"]
+    mask = (store["Protein (g)"] >= 3) & (calories <= 300)
+    top = numpy.flatnonzero(mask)[numpy.argsort(-fiber[mask] / (calories[mask] + 1))[:10]]
+    names = [store["Food"][int(row)] for row in top]
+    rows = len(store)
+print(json.dumps({{"seconds": time.perf_counter() - start, "rss": rss() - before, "rows": rows}}))
+"""
+
+def write_csv(path: str, rows: int, nutrients: int, rng: random.Random) -> None:
+    extra = [f"Nutrient {i} (mg)" for i in range(nutrients)]
+    servings = list(SERVING_GRAMS)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Food", "Nutrition Value (per 100g)", "Quantity", "Originated From", "Calories",
+                         "Protein (g)", "Fiber (g)", "Vitamin C (mg)", "Antioxidant Score"] + extra)
+        for i in range(rows):
+            writer.writerow([f"Food {i}", "High in Nutrient 3", rng.choice(servings), "Somewhere",
+                             rng.randint(5, 600), round(rng.gammavariate(1.5, 4), 1),
+                             round(rng.gammavariate(1.2, 2), 1), round(rng.gammavariate(0.8, 15), 1),
+                             rng.randint(50, 20000)] + [round(rng.uniform(0, 100), 2) for _ in extra])
+
+def probe(case: str, csv_path: str, store: str) -> dict:
+    code = PROBE.format(root=ROOT, case=case, csv=csv_path, store=store)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Food store start-up benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 300_000])
+    parser.add_argument("--nutrients", type=int, default=30, help="extra nutrient columns")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{len(SCHEMA) + 1 + args.nutrients} columns ({args.nutrients} extra nutrients)")
+    print(f"  {'rows':>8}{'csv MB':>8}{'ingest':>9}{'csv load':>11}{'csv RSS':>10}"
+          f"{'store open+query':>18}{'store RSS':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            csv_path, store = os.path.join(tmp, f"foods-{size}.csv"), os.path.join(tmp, f"store-{size}")
+            write_csv(csv_path, size, args.nutrients, rng)
+            start = time.perf_counter()
+            report = ingest(csv_path, store)
+            ingested = time.perf_counter() - start
+            assert report.rows == size and not report.rejected, report
+            parsed, mapped = probe("csv", csv_path, store), probe("store", csv_path, store)
+            assert parsed["rows"] == mapped["rows"] == size
+            print(f"  {size:>8}{os.path.getsize(csv_path) / 2**20:>8.1f}{ingested:>8.2f}s"
+                  f"{parsed['seconds'] * 1000:>9.1f}ms{parsed['rss']:>8.1f}MB"
+                  f"{mapped['seconds'] * 1000:>16.2f}ms{mapped['rss']:>9.1f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark for grocery_columns.GroceryColumns against the Pydantic GroceryList:
+scaling, removing an item, grouping by category, and memory per list.
+
+Run from the repository root:
+
+    python benchmarks/bench_grocery_columns.py --items 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grocery_columns import GroceryColumns
+from ingredient_parser import CATEGORY_KEYWORDS
+from models import GroceryItem, GroceryList
+
+UNITS = ["cups", "tablespoons", "teaspoons", "grams", "milliliters", "cloves", ""]
+
+def make_items(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    foods = [(keyword, category) for category, keywords in CATEGORY_KEYWORDS.items() for keyword in keywords]
+    items = []
+    for index in range(count):
+        food, category = rng.choice(foods)
+        items.append(GroceryItem(
+            name=f"{food} {index % 500}", quantity=round(rng.uniform(0.25, 500), 2),
+            unit=rng.choice(UNITS), category=category, optional=rng.random() < 0.1,
+        ))
+    return items
+
+def timed(fn, setup=None, repeats: int = 5) -> float:
+    # Best of several runs; setup builds a fresh object outside the timed region
+    elapsed = float("inf")
+    for _ in range(repeats):
+        target = setup() if setup else None
+        start = time.perf_counter()
+        fn(target)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed * 1000
+
+def traced_bytes(build) -> int:
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return size
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Columnar grocery list benchmark")
+    parser.add_argument("--items", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    for count in args.items:
+        items = make_items(count)
+        grocery_list = GroceryList(items=items, servings=2)
+        columns = GroceryColumns.from_grocery_list(grocery_list)
+        assert columns.to_grocery_list() == grocery_list, "round trip must be lossless"
+        target = items[count // 2].name
+
+        def fresh_list():
+            return GroceryList(items=[item.model_copy() for item in items], servings=2)
+
+        def fresh_columns():
+            return GroceryColumns.from_grocery_list(grocery_list)
+
+        rows = [
+            ("scale_quantities", timed(lambda gl: gl.scale_quantities(4), fresh_list),
+             timed(lambda gc: gc.scale_quantities(4), fresh_columns)),
+            ("remove_item", timed(lambda gl: gl.remove_item(target), fresh_list),
+             timed(lambda gc: gc.remove_item(target), fresh_columns)),
+            ("get_by_category", timed(lambda gl: gl.get_by_category(), fresh_list),
+             timed(lambda gc: gc.get_by_category(), fresh_columns)),
+        ]
+        print(f"\n{count:,} items{'GroceryList ms':>26}{'columns ms':>12}{'speedup':>9}")
+        for label, list_ms, columns_ms in rows:
+            print(f"  {label:<24}{list_ms:>12.2f}{columns_ms:>12.3f}{list_ms / columns_ms:>8.0f}x")
+        print(f"  {'from_grocery_list':<24}{'':>12}{timed(lambda _: fresh_columns()):>12.2f}")
+        print(f"  {'to_grocery_list':<24}{'':>12}{timed(lambda _: columns.to_grocery_list()):>12.2f}")
+
+        list_bytes = traced_bytes(lambda: GroceryList(items=make_items(count), servings=2))
+        columns_bytes = traced_bytes(lambda: GroceryColumns.from_items(make_items(count)))
+        print(f"  memory: GroceryList {list_bytes / 1e6:.1f} MB, columns {columns_bytes / 1e6:.2f} MB "
+              f"({columns.nbytes / 1e6:.2f} MB arrays + vocabularies)")
+
+if __name__ == "__main__":
+    main()
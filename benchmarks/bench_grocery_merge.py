@@ -0,0 +1,93 @@
+"""
+Benchmark for grocery_merge against the previous name_unit keyed merge from
+grocery.merge_grocery_lists.
+
+Run from the repository root:
+
+    python benchmarks/bench_grocery_merge.py --recipes 100 500 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grocery_merge import merge_item_lists
+from ingredient_parser import parse_ingredients
+from models import GroceryItem
+
+# The same foods written the ways generated recipes write them
+VARIANTS = [
+    ["1 cup milk", "250 ml milk", "1/2 cup Milk", "200 g milk"],
+    ["2 cloves garlic, minced", "1 clove Garlic", "3 cloves garlic"],
+    ["1 tbsp olive oil", "2 tsp olive oil", "15 ml olive oil"],
+    ["2 large tomatoes", "1 Tomato", "3 tomatoes, chopped"],
+    ["200 g paneer", "1/2 cup paneer, cubed", "100 g Paneer"],
+    ["1 cup basmati rice", "200 g basmati rice", "1/2 cup basmati rice (rinsed)"],
+    ["1 tbsp honey (optional)", "2 tsp honey", "1 tbsp Honey"],
+    ["1 onion, diced", "2 medium onions", "1 large onion"],
+    ["2 cups baby spinach", "100 g baby spinach", "1 cup fresh baby spinach"],
+    ["1 cup rolled oats", "50 g rolled oats", "1/2 cup rolled oats"],
+    ["1 tsp ground cumin", "1/2 tsp ground cumin"],
+    ["Salt to taste", "1/2 tsp salt", "salt"],
+    ["1 lb chicken breast", "200 g chicken breast", "8 oz chicken breast"],
+    ["2 tbsp peanut butter", "30 g peanut butter"],
+    ["1/2 cup greek yogurt", "150 g greek yogurt", "1 cup Greek yogurt"],
+]
+
+def legacy_merge(lists: list) -> list:
+    """The merge previously in grocery.merge_grocery_lists."""
+    merged_items = {}
+    for items in lists:
+        for item in items:
+            key = f"{item.name}_{item.unit}"
+            if key in merged_items:
+                merged_items[key].quantity += item.quantity
+            else:
+                merged_items[key] = GroceryItem(
+                    name=item.name, quantity=item.quantity, unit=item.unit, category=item.category
+                )
+    return list(merged_items.values())
+
+def make_recipes(count: int, per_recipe: int = 12, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        parse_ingredients(rng.choice(rng.choice(VARIANTS)) for _ in range(per_recipe))
+        for _ in range(count)
+    ]
+
+def timed(fn, repeats: int = 5) -> float:
+    # Best of several runs, to keep scheduler noise out of the comparison
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Grocery merge benchmark")
+    parser.add_argument("--recipes", type=int, nargs="+", default=[100, 500, 2000])
+    args = parser.parse_args()
+
+    print(f"{'recipes':>8}{'items':>9}{'legacy ms':>11}{'lines':>7}{'merge ms':>10}{'lines':>7}{'items/s':>13}")
+    for count in args.recipes:
+        recipes = make_recipes(count)
+        items = sum(len(recipe) for recipe in recipes)
+        # legacy_merge mutates quantities, so it gets fresh copies each run
+        legacy_time = timed(lambda: legacy_merge([[item.model_copy() for item in r] for r in recipes]))
+        copy_time = timed(lambda: [[item.model_copy() for item in r] for r in recipes])
+        merge_time = timed(lambda: merge_item_lists(recipes))
+        legacy_lines = len(legacy_merge([[item.model_copy() for item in r] for r in recipes]))
+        merged_lines = len(merge_item_lists(recipes))
+        print(f"{count:>8}{items:>9}{(legacy_time - copy_time) * 1000:>11.1f}{legacy_lines:>7}"
+              f"{merge_time * 1000:>10.1f}{merged_lines:>7}{items / merge_time:>13,.0f}")
+
+    print("\nMerged list for 100 recipes:")
+    for item in merge_item_lists(make_recipes(100)):
+        print(f"  {item.quantity:>8g} {item.unit:<12} {item.name:<20} [{item.category}]")
+
+if __name__ == "__main__":
+    main()
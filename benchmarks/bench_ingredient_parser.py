@@ -0,0 +1,114 @@
+"""
+Micro-benchmark for ingredient_parser against the previous per-call parser
+from grocery.parse_ingredient.
+
+Run from the repository root:
+
+    python benchmarks/bench_ingredient_parser.py --ingredients 50000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingredient_parser import classify, parse_ingredient_fields, parse_ingredients
+
+INGREDIENTS = [
+    "{n} cups rolled oats", "{n} tbsp olive oil", "{n} tsp ground cumin", "{n} cloves garlic, minced",
+    "{n} g paneer, cubed", "{n} ml coconut milk", "{n} large tomatoes, chopped", "{n} lb chicken breast",
+    "{n} cup basmati rice (rinsed)", "{n} oz feta cheese", "{n} tbsp honey (optional)",
+    "{n} cups baby spinach", "{n} medium sweet potato", "{n} tbsp peanut butter", "{n} slices whole wheat bread",
+]
+QUANTITIES = ["1", "2", "3", "1/2", "1 1/2", "0.5", "2-3", "½", "1¼", "250"]
+
+# Inputs the previous parser got wrong
+EDGE_CASES = [
+    "1/2 cup rolled oats",
+    "1½ cups basmati rice",
+    "2-3 cloves garlic, minced",
+    "2 (14 oz) cans diced tomatoes",
+    "1 tbsp honey (optional)",
+    "2 cups boiled potatoes",
+    "1 tbsp garlic butter",
+]
+
+def legacy_parse(ingredient: str) -> tuple:
+    """The parser previously in grocery.parse_ingredient, minus the GroceryItem construction."""
+    units = {
+        'cup': 'cups', 'cups': 'cups',
+        'tbsp': 'tablespoons', 'tablespoon': 'tablespoons', 'tablespoons': 'tablespoons',
+        'tsp': 'teaspoons', 'teaspoon': 'teaspoons', 'teaspoons': 'teaspoons',
+        'oz': 'ounces', 'ounce': 'ounces', 'ounces': 'ounces',
+        'lb': 'pounds', 'pound': 'pounds', 'pounds': 'pounds',
+        'g': 'grams', 'gram': 'grams', 'grams': 'grams',
+        'ml': 'milliliters', 'milliliter': 'milliliters', 'milliliters': 'milliliters'
+    }
+    match = re.match(r'^(\d+(?:\.\d+)?)\s*([a-zA-Z]+)?\s+(.+)$', ingredient.strip())
+    if not match:
+        return ingredient.strip(), 1.0, "", "Other"
+    quantity = float(match.group(1))
+    unit = match.group(2).lower() if match.group(2) else ""
+    name = match.group(3)
+    unit = units.get(unit, unit) if unit else ""
+    categories = {
+        'produce': ['apple', 'banana', 'lettuce', 'tomato', 'onion', 'garlic', 'vegetable', 'fruit'],
+        'dairy': ['milk', 'cheese', 'yogurt', 'cream', 'butter'],
+        'meat': ['chicken', 'beef', 'pork', 'fish', 'meat'],
+        'pantry': ['flour', 'sugar', 'salt', 'oil', 'spice', 'herb'],
+        'grains': ['rice', 'pasta', 'bread', 'cereal']
+    }
+    category = "Other"
+    for cat, keywords in categories.items():
+        if any(keyword in name.lower() for keyword in keywords):
+            category = cat.capitalize()
+            break
+    return name, quantity, unit, category
+
+def make_ingredients(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [rng.choice(INGREDIENTS).format(n=rng.choice(QUANTITIES)) for _ in range(count)]
+
+def clear_caches() -> None:
+    parse_ingredient_fields.cache_clear()
+    classify.cache_clear()
+
+def timed(label: str, fn, count: int, repeats: int = 5, setup=None) -> None:
+    # Best of several runs, to keep scheduler noise out of the comparison
+    elapsed = float("inf")
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"  {label:<38}{elapsed * 1000:>9.1f} ms {count / elapsed:>12,.0f} lines/s")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingredient parser micro-benchmark")
+    parser.add_argument("--ingredients", type=int, default=50000)
+    args = parser.parse_args()
+
+    lines = make_ingredients(args.ingredients)
+    # Every line distinct, so the cold numbers show the parser without the cache
+    unique = [f"{line} #{index}" for index, line in enumerate(lines)]
+    print(f"Parsing {len(lines):,} ingredient lines ({len(set(lines)):,} distinct)")
+    timed("legacy parse", lambda: [legacy_parse(line) for line in lines], len(lines))
+    timed("parse_ingredient_fields (cold)", lambda: [parse_ingredient_fields(line) for line in unique],
+          len(unique), setup=clear_caches)
+    timed("parse_ingredient_fields (cached)", lambda: [parse_ingredient_fields(line) for line in lines], len(lines))
+    timed("parse_ingredients (GroceryItem)", lambda: parse_ingredients(lines), len(lines))
+
+    legacy_other = sum(legacy_parse(line)[3] == "Other" for line in lines)
+    new_other = sum(parse_ingredient_fields(line)[3] == "Other" for line in lines)
+    print(f"\nUncategorised lines: legacy {legacy_other:,}, new {new_other:,}")
+
+    print("\nEdge cases (legacy -> new):")
+    for text in EDGE_CASES:
+        print(f"  {text}\n    {legacy_parse(text)}\n    {parse_ingredient_fields(text)}")
+
+if __name__ == "__main__":
+    main()
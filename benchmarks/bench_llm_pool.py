@@ -0,0 +1,114 @@
+"""
+Per-call client construction vs the shared pooled client (llm_pool.py),
+using the real ChatGoogleGenerativeAI against FakeGeminiServer.
+
+"per-call client" builds a ChatGoogleGenerativeAI on every get_llm() call,
+which is what each node did before; "pooled" goes through utils.get_llm
+with LLM_BASE_URL pointed at the fake server. Each mode runs the
+guardrail -> intent -> handler calls of several sessions, sequentially and
+then from concurrent sessions.
+
+Run from the repository root:
+
+    python benchmarks/bench_llm_pool.py --sessions 20 --concurrency 8
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+from langchain_core.messages import HumanMessage
+
+import config
+from fakes import FakeGeminiServer
+
+NODES = ["clinical_guardrail_node", "intent_node", "recipe_node"]
+
+def per_call_llm(url: str):
+    def build(node: str = None):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        from llm_tiers import tier_for
+        tier = tier_for(node)
+        return ChatGoogleGenerativeAI(model=tier.model, temperature=tier.temperature,
+                                      max_output_tokens=tier.max_output_tokens, timeout=tier.timeout,
+                                      max_retries=1, base_url=url)
+    return build
+
+def pooled_llm(url: str):
+    import utils
+    config.LLM_BASE_URL = url
+    return utils.get_llm
+
+def run(build, sessions: int, concurrency: int) -> dict:
+    """Run `sessions` sessions of len(NODES) calls; returns setup and call latencies."""
+    setup, calls, lock = [], [], threading.Lock()
+
+    def session(i):
+        for node in NODES:
+            began = time.perf_counter()
+            llm = build(node)
+            built = time.perf_counter()
+            llm.invoke([HumanMessage(content=f"session {i} {node}")])
+            done = time.perf_counter()
+            with lock:
+                setup.append(built - began)
+                calls.append(done - built)
+
+    start = time.perf_counter()
+    pending = list(range(sessions))
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                i = pending.pop()
+            session(i)
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"wall": time.perf_counter() - start, "setup": setup, "calls": calls}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pooled LLM client benchmark")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake server response time (s)")
+    args = parser.parse_args()
+
+    # Keep the scheduler's quota out of the way; this measures the client only
+    config.LLM_RPM = config.LLM_TPM = 1e9
+    config.LLM_MAX_CONCURRENCY = max(config.LLM_MAX_CONCURRENCY, args.concurrency + config.LLM_RESERVED_SLOTS)
+
+    print(f"{args.sessions} sessions x {len(NODES)} calls, fake server latency {args.latency * 1000:.0f} ms")
+    print(f"  {'':<18}{'workers':>8}{'wall':>8}{'setup p50':>11}{'call p50':>10}{'call p95':>10}"
+          f"{'connections':>13}")
+    for label, factory in (("per-call client", per_call_llm), ("pooled", pooled_llm)):
+        for workers in (1, args.concurrency):
+            with FakeGeminiServer(latency=args.latency) as server:
+                build = factory(server.url)
+                if label == "pooled":
+                    from llm_pool import get_base_chat_model, get_chat_model
+                    get_base_chat_model.cache_clear()
+                    get_chat_model.cache_clear()
+                result = run(build, args.sessions, workers)
+                calls = sorted(result["calls"])
+                print(f"  {label:<18}{workers:>8}{result['wall']:>7.2f}s"
+                      f"{statistics.median(result['setup']) * 1000:>9.2f}ms"
+                      f"{statistics.median(calls) * 1000:>8.1f}ms"
+                      f"{calls[int(len(calls) * 0.95) - 1] * 1000:>8.1f}ms"
+                      f"{server.connections:>8} / {server.requests}")
+
+    from llm_pool import tracker
+    stats = tracker.stats()
+    print(f"\nPooled client hook, both pooled runs: {stats['requests']} requests over {stats['connections']} connections "
+          f"(reuse ratio {stats['reuse_ratio']:.2f}, pool size {config.LLM_POOL_SIZE})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark for llm_resilience against the fault-injecting FakeChatModel.
+
+Scenarios: transient 503s (retries), slow outliers (hedged requests), a full
+outage (circuit breaker and cached results), and intent_node end to end,
+which used to fall back to its hard-coded default Intent on any error.
+
+Run from the repository root:
+
+    python benchmarks/bench_llm_resilience.py --calls 200
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+import intent
+from fakes import FakeChatModel
+from llm_resilience import CircuitBreaker, ResilientCaller, ResilientChatModel
+from metrics import metrics
+from models import Intent
+from ttl_cache import TTLCache
+
+def prompts(count: int, prefix: str = "query") -> list:
+    return [[HumanMessage(content=f"{prefix} {i}: a high-protein breakfast")] for i in range(count)]
+
+def run(structured, inputs: list, threads: int = 8) -> tuple:
+    """Returns (successes, sorted latencies, wall seconds)."""
+    latencies = []
+
+    def one(messages):
+        start = time.perf_counter()
+        try:
+            structured.invoke(messages)
+            ok = True
+        except Exception:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        return ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        successes = sum(pool.map(one, inputs))
+    return successes, sorted(latencies), time.perf_counter() - start
+
+def pct(latencies: list, q: float) -> float:
+    return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+def resilient(fake: FakeChatModel, **options) -> ResilientChatModel:
+    options.setdefault("backoff_base", 0.01)
+    options.setdefault("breaker", CircuitBreaker(failures=50, cooldown=1.0))
+    return ResilientChatModel(model=fake, caller=ResilientCaller(**options))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LLM retry / hedging / circuit breaker benchmark")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"1. Transient 503 on every 4th call, {args.calls} structured calls")
+    fake = FakeChatModel(latency=0.02, fail_every=4)
+    ok, _, _ = run(fake.with_structured_output(Intent), prompts(args.calls))
+    print(f"  raw        {ok}/{args.calls} succeeded")
+    fake = FakeChatModel(latency=0.02, fail_every=4)
+    ok, latencies, _ = run(resilient(fake).with_structured_output(Intent), prompts(args.calls))
+    print(f"  resilient  {ok}/{args.calls} succeeded, {fake.failures} upstream failures retried, "
+          f"p95 {pct(latencies, 0.95):.0f} ms")
+
+    print(f"\n2. Slow outliers: 50 ms calls, every 25th takes 1 s")
+    print(f"  {'':<11}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}{'upstream calls':>16}")
+    for label, hedge in (("no hedge", False), ("hedged", True)):
+        fake = FakeChatModel(latency=0.05, slow_every=25, slow_latency=1.0)
+        model = resilient(fake, hedge=hedge, hedge_min_delay=0.05)
+        # Warm-up so the caller has a p95 to hedge after
+        run(model.with_structured_output(Intent), prompts(40, "warmup"), threads=4)
+        fake.calls = 0
+        _, latencies, _ = run(model.with_structured_output(Intent), prompts(args.calls), threads=4)
+        print(f"  {label:<11}{pct(latencies, 0.5):>6.0f}ms{pct(latencies, 0.95):>6.0f}ms"
+              f"{pct(latencies, 0.99):>6.0f}ms{latencies[-1] * 1000:>6.0f}ms{fake.calls:>16}")
+
+    print("\n3. Outage with a warm cache (breaker opens after 5 failures, 1 s cooldown)")
+    fake = FakeChatModel(latency=0.05)
+    caller = ResilientCaller(backoff_base=0.05, breaker=CircuitBreaker(failures=5, cooldown=1.0),
+                             cache=TTLCache(256, 3600))
+    structured = ResilientChatModel(model=fake, caller=caller).with_structured_output(Intent)
+    seen = prompts(20)
+    run(structured, seen)
+    fake.down = True
+    fake.calls = 0
+    metrics.reset()
+    ok, latencies, wall = run(structured, seen + prompts(20, "new"), threads=4)
+    counters = metrics.snapshot()["counters"]
+    print(f"  20 repeated + 20 new prompts: {ok}/40 answered from cache, the rest failed fast; "
+          f"{wall:.2f} s total, p50 {pct(latencies, 0.5):.0f} ms")
+    print(f"  upstream calls during the outage: {fake.calls}; fast failures "
+          f"{counters.get('llm_fast_failures{operation=structured:Intent}', 0):g}; "
+          f"served from cache {counters.get('llm_cache_served{operation=structured:Intent}', 0):g}; "
+          f"breaker {caller.breaker.state}")
+    fake.down = False
+    time.sleep(1.0)
+    ok, _, _ = run(structured, prompts(5, "after"), threads=1)
+    print(f"  after recovery + cooldown: {ok}/5 succeeded, breaker {caller.breaker.state}")
+
+    print("\n4. intent_node with a 503 on every 2nd call")
+    for label, make in (("raw model", lambda fake: fake), ("resilient", lambda fake: resilient(fake))):
+        fake = FakeChatModel(latency=0.02, fail_every=2)
+        intent.get_llm = lambda node=None: make(fake)
+        defaults = 0
+        for i in range(10):
+            update = intent.intent_node({"messages": [HumanMessage(content=f"breakfast idea {i}")]})
+            defaults += update["intent"].health_goals == []  # the fallback Intent has no goals
+        print(f"  {label:<11}{defaults}/10 requests fell back to the default Intent")
+
+if __name__ == "__main__":
+    main()
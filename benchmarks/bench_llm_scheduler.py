@@ -0,0 +1,111 @@
+"""
+Benchmark for llm_scheduler.LLMScheduler with the FakeChatModel: a burst of
+long diet-plan generations arrives, then guardrail checks from new sessions
+arrive while it is in progress.
+
+Compares no scheduler (everything goes upstream at once), a FIFO scheduler
+(rate limits only) and the priority scheduler.
+
+Run from the repository root:
+
+    python benchmarks/bench_llm_scheduler.py --plans 16 --guardrails 8 --rpm 600
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+from fakes import FakeChatModel
+from llm_resilience import ResilientCaller, ResilientChatModel
+from llm_scheduler import LLMScheduler
+from metrics import metrics
+from models import ClinicalGuardrail, DietPlan
+
+def peak_per_second(timestamps: list) -> int:
+    timestamps = sorted(timestamps)
+    peak, left = 0, 0
+    for right, stamp in enumerate(timestamps):
+        while stamp - timestamps[left] >= 1.0:
+            left += 1
+        peak = max(peak, right - left + 1)
+    return peak
+
+def scenario(scheduler, priorities: tuple, args) -> dict:
+    caller = ResilientCaller(timeout=None, scheduler=scheduler)
+    plan_fake = FakeChatModel(latency=args.plan_latency)
+    guard_fake = FakeChatModel(latency=0.05)
+    plans = ResilientChatModel(model=plan_fake, caller=caller, priority=priorities[1],
+                               expected_output_tokens=4000).with_structured_output(DietPlan)
+    guards = ResilientChatModel(model=guard_fake, caller=caller, priority=priorities[0],
+                                expected_output_tokens=100).with_structured_output(ClinicalGuardrail)
+    guard_latencies, plan_done = [], []
+    start = time.monotonic()
+
+    def plan(i):
+        plans.invoke([HumanMessage(content=f"7-day meal plan {i}")])
+        plan_done.append(time.monotonic() - start)
+
+    def guard(i):
+        began = time.monotonic()
+        guards.invoke([HumanMessage(content=f"is this clinical? {i}")])
+        guard_latencies.append(time.monotonic() - began)
+
+    threads = [threading.Thread(target=plan, args=(i,)) for i in range(args.plans)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    for i in range(args.guardrails):
+        thread = threading.Thread(target=guard, args=(i,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.1)
+    for thread in threads:
+        thread.join()
+    return {
+        "guard_p50": statistics.median(guard_latencies),
+        "guard_max": max(guard_latencies),
+        "plans_done": max(plan_done),
+        "peak_rps": peak_per_second(plan_fake.started + guard_fake.started),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LLM scheduler benchmark")
+    parser.add_argument("--plans", type=int, default=16)
+    parser.add_argument("--guardrails", type=int, default=8)
+    parser.add_argument("--plan-latency", type=float, default=1.0)
+    parser.add_argument("--rpm", type=float, default=600, help="provider quota, requests per minute")
+    parser.add_argument("--concurrency", type=int, default=4, help="one slot is reserved for priority 0")
+    args = parser.parse_args()
+
+    print(f"{args.plans} diet plans ({args.plan_latency:.1f} s each) at t=0, then {args.guardrails} guardrail "
+          f"checks (50 ms) every 100 ms; quota {args.rpm:g} RPM ({args.rpm / 60:g}/s), "
+          f"{args.concurrency} concurrent")
+    print(f"  {'':<22}{'guardrail p50':>14}{'guardrail max':>15}{'plans done':>12}{'peak req/s':>12}")
+
+    def make(reserved=0):
+        return LLMScheduler(rpm=args.rpm, tpm=10_000_000, max_concurrency=args.concurrency,
+                            reserved=reserved, burst_requests=args.concurrency)
+
+    for label, scheduler, priorities in (
+        ("no scheduler", None, (1, 1)),
+        ("FIFO scheduler", make(), (1, 1)),
+        ("priority scheduler", make(reserved=1), (0, 2)),
+    ):
+        metrics.reset()
+        result = scenario(scheduler, priorities, args)
+        print(f"  {label:<22}{result['guard_p50']:>13.2f}s{result['guard_max']:>14.2f}s"
+              f"{result['plans_done']:>11.2f}s{result['peak_rps']:>12}")
+
+    print("\nQueue metrics (priority scheduler):")
+    for series, s in sorted(metrics.snapshot()["summaries"].items()):
+        if series.startswith("llm_queue_wait_seconds"):
+            print(f"  {series}: n={s['count']} p50={s['p50']:.2f}s p95={s['p95']:.2f}s max={s['max']:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Latency and cost per model tier, on the offline harness.
+
+Input sizes are the real prompts each node sends (system prompt, dataset
+table, a typical query); output sizes are typical response lengths. Each
+call runs through ResilientChatModel with the tier's timeout against
+FakeChatModel, whose latency follows an assumed time-to-first-token and
+decode speed per tier (SPEEDS below; adjust to measured values). Costs use
+the prices in llm_tiers.json.
+
+Run from the repository root:
+
+    python benchmarks/bench_llm_tiers.py --time-scale 0.1
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+import config
+from fakes import FakeChatModel
+from llm_resilience import ResilientCaller, ResilientChatModel
+from llm_tiers import load_tiers
+from utils import get_food_dataset_markdown
+
+# Assumed (time to first token in seconds, output tokens per second) per tier
+SPEEDS = {"fast": (0.20, 350.0), "standard": (0.30, 220.0), "large": (0.90, 120.0)}
+
+# Typical output tokens of a node's structured response, and model calls per node:
+# react agents make an agent step (about AGENT_STEP_TOKENS) before the structured call
+AGENT_STEP_TOKENS = 100
+OUTPUT_TOKENS = {"clinical_guardrail_node": 60, "intent_node": 150, "recipe_node": 900,
+                 "nutritional_info_node": 700, "diet_plan_node": 6000}
+CALLS = {"clinical_guardrail_node": 1, "intent_node": 1, "recipe_node": 2,
+         "nutritional_info_node": 2, "diet_plan_node": 2}
+
+REQUESTS = {
+    "recipe": ["clinical_guardrail_node", "intent_node", "recipe_node"],
+    "nutrition info": ["clinical_guardrail_node", "intent_node", "nutritional_info_node"],
+    "diet plan": ["clinical_guardrail_node", "intent_node", "diet_plan_node"],
+}
+
+def prompt_tokens() -> dict:
+    from diet_plan import DIET_PLAN_PROMPT
+    from guardrail import CLINICAL_SYSTEM_PROMPT
+    from intent import INTENT_SYSTEM_PROMPT
+    from nutritional_info import NUTRITIONAL_INFO_PROMPT
+    from recipe import ENHANCED_RECIPE_PROMPT
+
+    table = get_food_dataset_markdown()
+    query = "I need a high-protein breakfast recipe that's gluten-free and under 500 calories" * 3
+    prompts = {
+        "clinical_guardrail_node": CLINICAL_SYSTEM_PROMPT + query,
+        "intent_node": INTENT_SYSTEM_PROMPT + query,
+        "recipe_node": ENHANCED_RECIPE_PROMPT.replace("{df_str}", table) + query,
+        "nutritional_info_node": NUTRITIONAL_INFO_PROMPT.replace("{df_str}", table) + query,
+        "diet_plan_node": DIET_PLAN_PROMPT.replace("{df_str}", table) + query,
+    }
+    return {node: len(text) // 4 for node, text in prompts.items()}
+
+def measure(tier_name: str, tier, node: str, inputs: int, scale: float) -> tuple:
+    """Returns (seconds, cost, output tokens, truncated) for one node's calls on one tier."""
+    outputs = [AGENT_STEP_TOKENS] * (CALLS[node] - 1) + [min(OUTPUT_TOKENS[node], tier.max_output_tokens)]
+    ttft, tps = SPEEDS.get(tier_name, SPEEDS["standard"])
+    caller = ResilientCaller(max_attempts=1)
+    start = time.perf_counter()
+    for call, output in enumerate(outputs):
+        fake = FakeChatModel(latency=(ttft + output / tps) * scale)
+        model = ResilientChatModel(model=fake, caller=caller, timeout=tier.timeout * scale)
+        model.invoke([HumanMessage(content=f"{node} {call}")])
+    seconds = (time.perf_counter() - start) / scale
+    cost = sum(tier.cost(inputs, output) for output in outputs)
+    return seconds, cost, sum(outputs), outputs[-1] < OUTPUT_TOKENS[node]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Model tier latency / cost benchmark")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="fraction of simulated time actually slept")
+    args = parser.parse_args()
+
+    tiers = load_tiers(config.LLM_TIERS_PATH)
+    inputs = prompt_tokens()
+    nodes = list(OUTPUT_TOKENS)
+
+    def tier_name(node: str) -> str:
+        entry = tiers.nodes.get(node, tiers.default)
+        return entry.get("tier", tiers.default) if isinstance(entry, dict) else entry
+
+    # (node, column) -> (seconds, cost); "configured" applies the node's overrides
+    results = {}
+    print(f"Per node and tier (latency simulated; cost at list prices from {config.LLM_TIERS_PATH})")
+    print(f"  {'node':<24}{'tier':<12}{'model':<24}{'in tok':>8}{'out tok':>8}{'latency':>9}{'cost':>10}")
+    for node in nodes:
+        columns = [(name, name, tier) for name, tier in tiers.tiers.items()]
+        columns.append(("configured", tier_name(node), tiers.for_node(node)))
+        for column, name, tier in columns:
+            seconds, cost, output, truncated = measure(name, tier, node, inputs[node], args.time_scale)
+            results[node, column] = (seconds, cost)
+            label = f"{name}*" if column == "configured" else name
+            flag = "  truncated at max_output_tokens" if truncated else ""
+            print(f"  {node:<24}{label:<12}{tier.model:<24}{inputs[node] * CALLS[node]:>8}"
+                  f"{output:>8}{seconds:>8.2f}s{cost * 1000:>9.3f}m${flag}")
+
+    plans = {"configured": {node: "configured" for node in nodes}}
+    plans.update({f"all {name}": {node: name for node in nodes} for name in tiers.tiers})
+
+    print("\nPer request (guardrail + intent + handler), sequential model latency and cost:")
+    print(f"  {'':<16}" + "".join(f"{name:>22}" for name in plans))
+    for request, path in REQUESTS.items():
+        cells = []
+        for mapping in plans.values():
+            seconds = sum(results[node, mapping[node]][0] for node in path)
+            cost = sum(results[node, mapping[node]][1] for node in path)
+            cells.append(f"{seconds:>9.2f}s {cost * 1000:>8.3f}m$")
+        print(f"  {request:<16}" + "".join(f"{cell:>22}" for cell in cells))
+    print("\n  (m$ = thousandths of a US dollar; * and 'configured' = the node's entry in the tiers file)")
+
+if __name__ == "__main__":
+    main()
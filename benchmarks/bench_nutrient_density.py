@@ -0,0 +1,81 @@
+"""
+Precomputed nutrient-density index (nutrient_density.py) vs ranking the
+table per query.
+
+For synthetic food tables of growing size: times precompute() and reports
+the Pareto frontier size, then compares answering "top 10 foods by protein
+per 100 kcal", "foods with at least 20 g protein per 100 kcal" and "what
+percentile is this food" from the index against computing the density and
+ranking every row (what food_query did before).
+
+Run from the repository root:
+
+    python benchmarks/bench_nutrient_density.py --sizes 1000 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import numpy as np
+from nutrient_density import PER_KCAL, DensityIndex, precompute
+
+def synthetic_columns(size: int, rng) -> dict:
+    return {"Calories": rng.integers(1, 600, size).astype(np.float64), "Quantity (g)": rng.uniform(3, 300, size),
+            "Protein (g)": rng.gamma(1.5, 4, size), "Fiber (g)": rng.gamma(1.2, 2, size),
+            "Vitamin C (mg)": rng.gamma(0.8, 15, size), "Antioxidant Score": rng.gamma(1.0, 3000, size)}
+
+def median_ms(fn, repeat: int = 50) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Nutrient density index benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    metric = PER_KCAL["protein"]
+    print(f"{'foods':>9}{'precompute':>12}{'pareto':>8}   {'top 10':>17}   {'>= 20 g':>17}   {'percentile':>17}")
+    print(f"{'':>29}   {'index / scan':>17}   {'index / scan':>17}   {'index / scan':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            columns = synthetic_columns(size, rng)
+            path = os.path.join(tmp, str(size))
+            start = time.perf_counter()
+            summary = precompute(columns, path)
+            built = time.perf_counter() - start
+            index = DensityIndex(path)
+            index.top(metric, 10)  # map the files
+
+            def scan_values():
+                return columns["Protein (g)"] / np.maximum(columns["Calories"], config.DENSITY_KCAL_FLOOR) * 100
+
+            def scan_top():
+                values = scan_values()
+                top = np.argpartition(-values, 9)[:10]
+                return top[np.argsort(-values[top])]
+
+            row = size // 2
+            assert list(scan_top()) == index.top(metric, 10)
+            assert len(index.at_least(metric, 20)) == int((scan_values() >= 20).sum())
+            cells = [
+                (median_ms(lambda: index.top(metric, 10)), median_ms(scan_top)),
+                (median_ms(lambda: index.at_least(metric, 20)), median_ms(lambda: np.flatnonzero(scan_values() >= 20))),
+                (median_ms(lambda: index.percentile(metric, row)),
+                 median_ms(lambda: float((scan_values() <= scan_values()[row]).mean()))),
+            ]
+            print(f"{size:>9}{built:>11.2f}s{summary['pareto']:>8}"
+                  + "".join(f"   {ours:>6.3f} /{theirs:>7.2f}ms" for ours, theirs in cells))
+
+if __name__ == "__main__":
+    main()
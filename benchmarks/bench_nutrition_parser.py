@@ -0,0 +1,107 @@
+"""
+Micro-benchmark for nutrition_parser against the previous comma-splitting parser.
+
+Run from the repository root:
+
+    python benchmarks/bench_nutrition_parser.py --strings 20000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nutrition_parser import parse_nutrition, parse_nutrition_batch
+
+TEMPLATES = [
+    "Calories: Approximately {cal} calories, Protein: {p}g, Fat: {f}g, Carbohydrates: {c}g",
+    "Calories: {cal} kcal, Protein: {p} g, Fat: {f} g, Carbohydrates: {c} g, Fiber: {fib} g, Vitamin C: {vc} mg",
+    "calories: {cal}, protein: {p}g, carbs: {c}g, fat: {f}g",
+    "Daily average: {cal} calories, {p}g protein, {c}g carbs, {f}g fat",
+    "Calories: {cal} kcal, Sodium: 1,{na:03d} mg, Fiber: {fib}-{fib2} g, Vitamin D: 400 IU, Vitamin B12: 2.4 µg",
+]
+
+# Tricky inputs the previous parser got wrong
+EDGE_CASES = [
+    "Sodium: 1,200 mg",
+    "Fiber: 5-7 g",
+    "Vitamin B12: 2.4 µg, Vitamin D: 400 IU",
+    "Iron: 15% DV",
+    "Daily average: 1450 calories, 80g protein, 180g carbs, 45g fat",
+]
+
+def legacy_parse(nutritional_info: str) -> dict:
+    """The comma-splitting parser previously in visualization.parse_nutritional_info."""
+    nutrition_data = {}
+    for nutrient in nutritional_info.split(','):
+        nutrient = nutrient.strip()
+        if ':' in nutrient:
+            name, value_unit = nutrient.split(':', 1)
+            name = name.strip().replace('Approximately', '').strip()
+            value_unit = value_unit.strip()
+            patterns = [
+                r'(?:approximately\s+)?([\d.]+)\s*([a-zA-Z]+)',
+                r'([\d.]+)\s*([a-zA-Z]+)',
+                r'([\d.]+)',
+            ]
+            match = None
+            for pattern in patterns:
+                match = re.search(pattern, value_unit.lower())
+                if match:
+                    break
+            if match:
+                value = float(match.group(1))
+                unit = match.group(2) if len(match.groups()) > 1 else 'g'
+                unit_mapping = {
+                    'calories': 'kcal', 'calorie': 'kcal', 'kcal': 'kcal',
+                    'grams': 'g', 'gram': 'g', 'g': 'g',
+                    'mg': 'mg', 'milligrams': 'mg', 'milligram': 'mg'
+                }
+                nutrition_data[name] = (value, unit_mapping.get(unit.lower(), unit))
+    return nutrition_data
+
+def make_strings(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    strings = []
+    for _ in range(count):
+        fib = rng.randint(1, 9)
+        strings.append(rng.choice(TEMPLATES).format(
+            cal=rng.randint(150, 900), p=round(rng.uniform(2, 60), 1), f=round(rng.uniform(1, 40), 1),
+            c=round(rng.uniform(5, 120), 1), fib=fib, fib2=fib + 2, vc=round(rng.uniform(0, 90), 1),
+            na=rng.randint(0, 999),
+        ))
+    return strings
+
+def timed(label: str, fn, count: int, repeats: int = 5) -> None:
+    # Best of several runs, to keep scheduler noise out of the comparison
+    elapsed = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"  {label:<34}{elapsed * 1000:>9.1f} ms {count / elapsed:>12,.0f} strings/s")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Nutrition parser micro-benchmark")
+    parser.add_argument("--strings", type=int, default=20000)
+    args = parser.parse_args()
+
+    strings = make_strings(args.strings)
+    print(f"Parsing {len(strings):,} nutrition strings")
+    timed("legacy parse (dict per string)", lambda: [legacy_parse(s) for s in strings], len(strings))
+    timed("parse_nutrition (dict per string)", lambda: [parse_nutrition(s) for s in strings], len(strings))
+    timed("parse_nutrition_batch (ndarray)", lambda: parse_nutrition_batch(strings), len(strings))
+
+    legacy_fields = sum(len(legacy_parse(s)) for s in strings)
+    new_fields = sum(len(parse_nutrition(s)) for s in strings)
+    print(f"\nFields extracted: legacy {legacy_fields:,}, new {new_fields:,}")
+
+    print("\nEdge cases (legacy -> new):")
+    for text in EDGE_CASES:
+        print(f"  {text}\n    {legacy_parse(text)}\n    {parse_nutrition(text)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Weekly diet plans composed from the recipe library (plan_composer.py) vs
+written by the diet plan agent.
+
+Fills a library with synthetic recipes (known calories and protein, some
+vegetarian, some with peanuts), then:
+
+- composes plans for several requests and checks them: daily calories
+  against the target, protein, exclusions, restrictions and variety
+- runs diet_plan_node at several library sizes with a fake model
+  (--latency seconds per call), counting the slots left to the model
+
+Run from the repository root:
+
+    python benchmarks/bench_plan_composer.py --latency 0.2
+"""
+import argparse
+import contextlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import diet_plan
+from fakes import FakeChatModel, sample_instance
+from langchain_core.messages import HumanMessage
+from metrics import metrics
+from models import Intent, Recipe
+from nutrition_parser import iter_plan_recipes
+from plan_composer import MEAL_SHARES, compose_plan
+from recipe_library import RecipeLibrary, calories_protein
+
+BASES = {"breakfast": ["oats", "poha", "chilla", "smoothie bowl", "upma", "idli", "toast", "pancakes"],
+         "lunch": ["dal", "rajma", "biryani", "quinoa bowl", "wrap", "salad", "khichdi", "curry"],
+         "dinner": ["stir fry", "soup", "pasta", "tikka", "risotto", "tacos", "stew", "bake"],
+         "snack": ["chaat", "hummus plate", "trail mix", "yogurt cup", "fruit salad", "energy balls"]}
+EXTRAS = ["spinach", "paneer", "chickpea", "lentil", "tofu", "mushroom", "peanut", "mango", "quinoa", "millet"]
+
+def fill_library(library: RecipeLibrary, per_meal: int, rng: random.Random) -> None:
+    for meal, bases in BASES.items():
+        for i in range(per_meal):
+            extra = rng.choice(EXTRAS)
+            calories = 2000 * MEAL_SHARES[meal] * rng.uniform(0.6, 1.4)
+            protein = calories * rng.uniform(0.05, 0.3) / 4
+            recipe = Recipe(name=f"{extra.title()} {rng.choice(bases).title()} No {i}",
+                            ingredients=[f"100 g {extra}", "1 tsp salt", "1 cup water"], instructions=["Cook."],
+                            prep_time="10 minutes", cook_time="20 minutes", total_time="30 minutes", servings=1,
+                            nutritional_info=f"Calories: {calories:.0f} kcal, Protein: {protein:.0f}g")
+            vegetarian = extra not in ("tofu",) and rng.random() < 0.7
+            library.add(recipe, ["vegetarian"] if vegetarian else [], meals=[meal])
+
+def make_intent(**fields) -> Intent:
+    return sample_instance(Intent).model_copy(update={
+        "primary_intent": "diet_plan", "meal_type": [], "dietary_restrictions": [], "excluded_ingredients": [],
+        "specific_foods": [], "health_goals": [], "nutritional_requirements": "", "time_context": "weekly_plan",
+        "is_follow_up": False, **fields})
+
+def check(plan, composition, intent) -> str:
+    targets = composition.targets
+    days = {}
+    names = []
+    for day, meal, recipe in iter_plan_recipes(plan):
+        calories, protein = calories_protein(recipe.nutritional_info)
+        total = days.setdefault(day, [0.0, 0.0])
+        total[0] += calories or 0
+        total[1] += protein or 0
+        names.append(recipe.name)
+        assert not any(term in " ".join(recipe.ingredients) for term in intent.excluded_ingredients), recipe
+    calories = [c for c, _ in days.values()]
+    protein = [p for _, p in days.values()]
+    deviation = max(abs(c - targets.calories) / targets.calories for c in calories)
+    consecutive = sum(bool(set(a) & set(b)) for a, b in zip(
+        [[r.name for d, _, r in iter_plan_recipes(plan) if d == day] for day in days],
+        [[r.name for d, _, r in iter_plan_recipes(plan) if d == day] for day in list(days)[1:]]))
+    return (f"kcal/day {min(calories):.0f}-{max(calories):.0f} (max dev {deviation:.1%}), "
+            f"protein/day {min(protein):.0f}-{max(protein):.0f}g, {len(set(names))}/{len(names)} distinct, "
+            f"{consecutive} repeats on consecutive days")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Diet plan composer benchmark")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per model call")
+    args = parser.parse_args()
+
+    requests = [
+        ("7-day plan at 1800 calories", make_intent()),
+        ("7-day vegetarian plan under 1600 calories", make_intent(dietary_restrictions=["vegetarian"])),
+        ("5-day high-protein plan, 2200 kcal, at least 110g protein", make_intent()),
+        ("14 day plan without peanuts", make_intent(excluded_ingredients=["peanut"])),
+    ]
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        library = RecipeLibrary(os.path.join(tmp, "library.db"))
+        fill_library(library, 40, random.Random(0))
+        print(f"Library: {len(library)} recipes (40 per meal)")
+        for query, intent in requests:
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                composition = compose_plan(library, query, intent)
+                timings.append(time.perf_counter() - start)
+            plan = composition.to_diet_plan(intent)
+            print(f"  {query!r}: {statistics.median(timings) * 1000:.1f} ms, {len(composition.gaps)} gaps; "
+                  f"{check(plan, composition, intent)}")
+
+        print(f"\ndiet_plan_node, '7-day plan at 1800 calories', fake model at {args.latency * 1000:.0f} ms per call")
+        print(f"  {'recipes/meal':<14}{'wall':>9}{'model calls':>13}{'from library':>14}{'gaps sent':>11}")
+        model = FakeChatModel(latency=args.latency)
+        diet_plan.get_llm = lambda node=None: model
+        query, intent = requests[0]
+        diet_plan.get_recipe_library = lambda: None
+        with contextlib.redirect_stdout(devnull):  # warm-up: first agent build pays for imports
+            diet_plan.diet_plan_node({"messages": [HumanMessage(content=query)], "original_query": query,
+                                      "intent": intent})
+        for per_meal in (None, 0, 1, 3, 40):
+            if per_meal is None:
+                diet_plan.get_recipe_library = lambda: None
+            else:
+                sized = RecipeLibrary(os.path.join(tmp, f"library-{per_meal}.db"))
+                fill_library(sized, per_meal, random.Random(1))
+                diet_plan.get_recipe_library = lambda sized=sized: sized
+            metrics.reset()
+            calls = model.calls
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(devnull):
+                update = diet_plan.diet_plan_node({"messages": [HumanMessage(content=query)], "original_query": query,
+                                                   "intent": intent})
+            wall = time.perf_counter() - start
+            assert update.get("diet_plan"), update
+            counters = metrics.snapshot()["counters"]
+            label = "no library" if per_meal is None else str(per_meal)
+            print(f"  {label:<14}{wall * 1000:>7.1f}ms{model.calls - calls:>13}"
+                  f"{counters.get('plan_slots{source=library}', 0):>14.0f}"
+                  f"{counters.get('plan_slots{source=model}', 0):>11.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark for recipe_index.RecipeIndex: build throughput, open (load) time,
+query latency, incremental adds and compaction, on a synthetic recipe corpus.
+
+Run from the repository root:
+
+    python benchmarks/bench_recipe_index.py --docs 20000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recipe_index import RecipeIndex, recipe_document
+
+DISHES = ["palak paneer", "chana masala", "tahini dressing", "lentil soup", "quinoa salad", "dal tadka",
+          "buddha bowl", "overnight oats", "vegetable curry", "tofu stir fry", "hummus", "shakshuka",
+          "minestrone", "poha", "idli sambar", "grilled salmon", "chicken tikka", "banana smoothie"]
+STYLES = ["classic", "quick", "vegan", "high protein", "spicy", "creamy", "low carb", "weeknight",
+          "restaurant style", "kerala", "punjabi", "mediterranean", "gluten free", "one pot"]
+INGREDIENTS = ["spinach", "paneer", "chickpeas", "tahini", "lemon", "garlic", "ginger", "onion", "tomato",
+               "cumin", "turmeric", "garam masala", "olive oil", "ghee", "rice", "quinoa", "lentils",
+               "yogurt", "coconut milk", "tofu", "kale", "oats", "banana", "almonds", "chia seeds"]
+QUERIES = ["palak paneer", "authentic chana masala recipe", "tahini dressing lemon garlic",
+           "high protein vegan lentil soup", "kerala vegetable curry coconut milk", "quick overnight oats chia",
+           "gluten free quinoa salad", "spicy tofu stir fry ginger"]
+
+def make_documents(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    documents = []
+    for index in range(count):
+        name = f"{rng.choice(STYLES).title()} {rng.choice(DISHES).title()}"
+        ingredients = [f"{rng.randint(1, 4)} tbsp {food}" for food in rng.sample(INGREDIENTS, 8)]
+        instructions = [f"Step {step}: cook the {rng.choice(INGREDIENTS)} with {rng.choice(INGREDIENTS)} "
+                        f"for {rng.randint(2, 20)} minutes." for step in range(1, 7)]
+        documents.append(recipe_document({
+            "name": name, "ingredients": ingredients, "instructions": instructions,
+            "nutritional_info": f"Calories: {rng.randint(150, 700)} kcal, Protein: {rng.randint(3, 40)} g",
+        }, source=f"synthetic/{index}"))
+    return documents
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline BM25 index benchmark")
+    parser.add_argument("--docs", type=int, nargs="+", default=[20000, 100000])
+    args = parser.parse_args()
+
+    for count in args.docs:
+        documents = make_documents(count)
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            RecipeIndex(tmp).add_documents(documents)
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index = RecipeIndex(tmp)
+            open_ms = (time.perf_counter() - start) * 1000
+
+            def query_latencies(rounds: int = 25) -> list:
+                latencies = []
+                for _ in range(rounds):
+                    for query in QUERIES:
+                        start = time.perf_counter()
+                        index.search(query, k=4)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                return sorted(latencies)
+
+            single = query_latencies()
+
+            start = time.perf_counter()
+            for batch in range(10):
+                index.add_documents(make_documents(100, seed=batch))
+            add_ms = (time.perf_counter() - start) * 1000 / 10
+            segmented = query_latencies()
+
+            start = time.perf_counter()
+            index.compact()
+            compact = time.perf_counter() - start
+            compacted = query_latencies()
+
+            size_mb = sum(os.path.getsize(os.path.join(root, name))
+                          for root, _, names in os.walk(tmp) for name in names) / 1e6
+            top = index.search("palak paneer", k=1)[0][1]["title"]
+
+        def summary(latencies: list) -> str:
+            return f"p50 {statistics.median(latencies):.2f} ms, p95 {latencies[int(len(latencies) * 0.95)]:.2f} ms"
+
+        print(f"\n{count:,} documents ({size_mb:.0f} MB on disk)")
+        print(f"  build          {build:.1f} s ({count / build:,.0f} docs/s)")
+        print(f"  open           {open_ms:.1f} ms (memory-mapped)")
+        print(f"  query          {summary(single)}")
+        print(f"  add 100 docs   {add_ms:.1f} ms per batch, new segment each")
+        print(f"  query, 11 seg  {summary(segmented)}")
+        print(f"  compact        {compact:.1f} s")
+        print(f"  query, 1 seg   {summary(compacted)}   top hit for 'palak paneer': {top}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Repeat dish requests served from the recipe library (recipe_library.py)
+instead of regenerated by the recipe agent.
+
+Runs recipe_node on a stream of specific-recipe requests whose dishes follow
+a Zipf distribution (a few popular dishes, a long tail), once with the
+library and once without, using a fake model (--latency seconds per call).
+Then times match() on libraries of growing size.
+
+Run from the repository root:
+
+    python benchmarks/bench_recipe_library.py --requests 300 --latency 0.05
+"""
+import argparse
+import contextlib
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recipe
+from fakes import FakeChatModel, sample_instance
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+from metrics import metrics
+from models import Intent, Recipe
+from recipe_library import RecipeLibrary
+
+DISHES = ["palak paneer", "tahini dressing", "dal tadka", "chana masala", "shakshuka", "mushroom risotto",
+          "pad thai", "lentil soup", "quinoa power bowl", "banana oat pancakes", "chicken tikka masala",
+          "greek salad", "vegetable biryani", "miso ramen", "black bean tacos", "aloo gobi", "hummus",
+          "minestrone", "falafel wrap", "overnight oats", "baingan bharta", "rajma", "tofu stir fry",
+          "caprese salad", "gazpacho", "egg fried rice", "pesto pasta", "moong dal chilla", "poha", "upma"]
+
+class DishChatModel(FakeChatModel):
+    """FakeChatModel whose recipes are named after the requested dish."""
+
+    def with_structured_output(self, schema, **kwargs):
+        def respond(messages):
+            self._call()
+            instance = sample_instance(schema)
+            if schema is Recipe:
+                request = next(m.content for m in messages if "RECIPE REQUEST:" in m.content)
+                dish = re.search(r"How to make (.+)", request).group(1)
+                instance.name = f"Classic {dish.title()}"
+                instance.total_time = "35 minutes"
+            return instance
+
+        return RunnableLambda(respond)
+
+def run(queries, intent, library) -> list:
+    recipe.get_recipe_library = lambda: library
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        update = recipe.recipe_node({"messages": [HumanMessage(content=query)], "original_query": query,
+                                     "intent": intent})
+        assert update.get("recipe"), update
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recipe library benchmark")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per model call")
+    args = parser.parse_args()
+
+    recipe.get_llm = lambda node=None: DishChatModel(latency=args.latency)
+    intent = sample_instance(Intent).model_copy(update={
+        "recipe_specificity": "specific_recipe", "dietary_restrictions": [], "excluded_ingredients": [],
+        "specific_foods": [], "is_follow_up": False})
+    rng = random.Random(0)
+    weights = [1 / rank ** 1.1 for rank in range(1, len(DISHES) + 1)]
+    queries = [f"How to make {dish}" for dish in rng.choices(DISHES, weights, k=args.requests)]
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        library = RecipeLibrary(os.path.join(tmp, "library.db"))
+        with contextlib.redirect_stdout(devnull):
+            baseline = run(queries, intent, None)
+            metrics.reset()
+            served = run(queries, intent, library)
+        counters = metrics.snapshot()["counters"]
+        hits = counters.get("recipe_library_lookups{result=hit}", 0)
+        misses = counters.get("recipe_library_lookups{result=miss}", 0)
+        hit_times = [t for t in served if t < args.latency]  # a miss makes at least one model call
+        print(f"{args.requests} specific-recipe requests over {len(DISHES)} dishes (Zipf), "
+              f"{args.latency * 1000:.0f} ms per model call")
+        print(f"  without library: {sum(baseline):6.2f}s total, p50 {statistics.median(baseline) * 1000:7.1f} ms")
+        print(f"  with library:    {sum(served):6.2f}s total, p50 {statistics.median(served) * 1000:7.1f} ms")
+        print(f"  hit ratio {hits / (hits + misses):.1%} ({hits} hits, {misses} misses, {len(library)} recipes "
+              f"stored); hit latency p50 {statistics.median(hit_times) * 1000:.2f} ms; generation time saved "
+              f"{counters.get('recipe_library_seconds_saved', 0):.2f}s")
+
+        print("\nmatch() latency by library size")
+        print(f"  {'recipes':>8}{'insert/s':>11}{'p50':>10}{'p95':>10}")
+        big = RecipeLibrary(os.path.join(tmp, "big.db"))
+        words = sorted({word for dish in DISHES for word in dish.split()})
+        template = sample_instance(Recipe)
+        size = 0
+        for target in (1_000, 10_000, 50_000):
+            added, start = target - size, time.perf_counter()
+            while size < target:
+                name = " ".join(rng.sample(words, 3)) + f" {size}"
+                big.add(template.model_copy(update={"name": name, "ingredients": rng.sample(words, 5)}))
+                size += 1
+            inserted = time.perf_counter() - start
+            metrics.reset()
+            with contextlib.redirect_stdout(devnull):
+                for dish in DISHES:
+                    for _ in range(10):
+                        big.match(f"How to make {dish}", intent)
+            s = metrics.snapshot()["summaries"]["recipe_library_seconds"]
+            print(f"  {size:>8}{added / inserted:>11.0f}{s['p50'] * 1000:>8.2f}ms{s['p95'] * 1000:>8.2f}ms")
+        big.close()
+        library.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark for search_tool.SearchService against uncached, unpooled searches,
+using the local FakeSearchServer (no network access needed).
+
+Scenarios: a concurrent workload of repeated dish searches, a slow upstream
+(per-call timeout), and a restart that is served from the disk tier.
+
+Run from the repository root:
+
+    python benchmarks/bench_search.py --queries 400 --threads 16 --latency 0.05
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from fakes import FakeSearchServer
+from search_tool import SearchService, SearxBackend
+from ttl_cache import TTLCache
+
+DISHES = [
+    "palak paneer", "tahini dressing", "chana masala", "overnight oats", "quinoa salad",
+    "lentil soup", "chicken tikka", "greek yogurt parfait", "avocado toast", "vegetable stir fry",
+    "dal tadka", "hummus", "shakshuka", "buddha bowl", "banana smoothie", "idli sambar",
+    "grilled salmon", "tofu scramble", "minestrone", "poha",
+]
+
+def make_queries(count: int, seed: int = 7) -> list:
+    # Users phrase the same search differently; normalisation maps these to one key
+    rng = random.Random(seed)
+    forms = ["{} recipe", "{} Recipe", "{} recipe?", "  {}   recipe ", "{} RECIPE!"]
+    return [rng.choice(forms).format(rng.choice(DISHES)) for _ in range(count)]
+
+def run(search, queries: list, threads: int) -> tuple:
+    latencies = []
+
+    def timed(query):
+        start = time.perf_counter()
+        search(query)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(timed, queries))
+    return time.perf_counter() - start, sorted(latencies)
+
+def report(label: str, wall: float, latencies: list, server: FakeSearchServer, extra: str = "") -> None:
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"  {label:<28}{wall:>8.2f} s{statistics.median(latencies) * 1000:>9.1f} ms{p95 * 1000:>9.1f} ms"
+          f"{server.requests:>10}{server.connections:>8}  {extra}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search cache / pooling benchmark")
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries)
+    print(f"{len(queries)} searches, {args.threads} threads, upstream latency {args.latency * 1000:.0f} ms")
+    print(f"  {'':<28}{'wall':>10}{'p50':>12}{'p95':>12}{'upstream':>10}{'conns':>8}")
+
+    # Previous behaviour: every call is a fresh request on a fresh connection
+    with FakeSearchServer(latency=args.latency) as server:
+        wall, latencies = run(
+            lambda q: requests.get(server.url, params={"q": q, "format": "json"}, timeout=10).json(),
+            queries, args.threads,
+        )
+        report("uncached, new connection", wall, latencies, server)
+
+    with FakeSearchServer(latency=args.latency) as server:
+        service = SearchService(
+            SearxBackend(server.url, max_results=4, pool_size=args.concurrency),
+            TTLCache(maxsize=512, ttl=3600), timeout=10, max_concurrency=args.concurrency,
+        )
+        wall, latencies = run(service.search, queries, args.threads)
+        stats = service.stats()
+        report("SearchService", wall, latencies, server,
+               f"hit ratio {stats['hit_ratio']:.0%}, coalesced {stats['coalesced']}")
+
+    print("\nSlow upstream (2 s) with a 0.25 s per-call timeout:")
+    with FakeSearchServer(latency=2.0) as server:
+        service = SearchService(SearxBackend(server.url, 4, 4), TTLCache(64, 3600), timeout=0.25, max_concurrency=4)
+        start = time.perf_counter()
+        answer = service.search("palak paneer recipe")
+        print(f"  returned after {time.perf_counter() - start:.2f} s: {answer!r}")
+
+    print("\nDisk tier across a restart:")
+    with tempfile.TemporaryDirectory() as tmp, FakeSearchServer(latency=args.latency) as server:
+        path = os.path.join(tmp, "search_cache.sqlite")
+        for run_number in (1, 2):
+            service = SearchService(SearxBackend(server.url, 4, 4), TTLCache(512, 3600, path),
+                                    timeout=10, max_concurrency=args.concurrency)
+            wall, _ = run(service.search, queries, args.threads)
+            stats = service.stats()
+            print(f"  process {run_number}: {wall:.2f} s, upstream requests so far {server.requests}, "
+                  f"disk hits {stats['disk_hits']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Memory per idle chat session, and SessionStore eviction.
+
+Each session is given a realistic history: --turns turns, each recording a
+recipe (or a 3-day diet plan) with its grocery list, the Intent and the
+node answers, as app.py does after a request. The retained memory per
+session is measured with tracemalloc. The eviction part replays sessions
+arriving over simulated time against the TTL and max-sessions bounds.
+
+Run from the repository root:
+
+    python benchmarks/bench_sessions.py --sessions 500 --turns 3
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import config
+from grocery import build_plan_grocery_list, build_recipe_grocery_list
+from metrics import metrics
+from models import DietPlan, Intent, MealPlanDay, Recipe
+from sessions import SessionStore
+
+INGREDIENTS = ["2 cups fresh spinach", "200 g paneer, cubed", "1 medium onion, chopped", "2 tomatoes, pureed",
+               "1 tbsp ginger-garlic paste", "2 green chillies", "1 tsp cumin seeds", "1/2 tsp turmeric",
+               "1 tsp garam masala", "2 tbsp ghee", "1/4 cup cream", "salt to taste"]
+
+def make_recipe(i: int) -> Recipe:
+    return Recipe(
+        name=f"Palak Paneer {i}", ingredients=list(INGREDIENTS),
+        instructions=[f"Step {n}: blanch, blend and simmer the spinach with the spices until thick." for n in range(8)],
+        prep_time="15 minutes", cook_time="25 minutes", total_time="40 minutes", servings=4,
+        nutritional_info="Per serving: 320 kcal, 16 g protein, 22 g fat, 12 g carbs, 4 g fiber, 380 mg calcium",
+    )
+
+def make_plan(i: int) -> DietPlan:
+    day = lambda d: MealPlanDay(day=f"Day {d}", breakfast=[make_recipe(i)], lunch=[make_recipe(i)],
+                                dinner=[make_recipe(i)], snack=[make_recipe(i)])
+    return DietPlan(plan_name=f"3-day plan {i}", duration="3 days", daily_plans=[day(d) for d in range(1, 4)],
+                    total_nutritional_info="1,800 kcal per day", shopping_list=list(INGREDIENTS))
+
+def make_intent() -> Intent:
+    return Intent(primary_intent="single_recipe", meal_type=["dinner"], dietary_restrictions=["vegetarian"],
+                  nutritional_requirements="high protein", health_goals=[], specific_foods=["paneer"],
+                  excluded_ingredients=[], time_context="single_meal", recipe_specificity="specific_recipe")
+
+def final_state(session, query: str, i: int, plan: bool) -> dict:
+    """What the workflow's last chunk looks like for one turn."""
+    inputs = session.turn_inputs(query)
+    answer = AIMessage(content="Here is the recipe you asked for, adapted to your preferences. " * 4, name="recipe_node")
+    state = {"messages": inputs["messages"] + [answer], "intent": make_intent()}
+    if plan:
+        state["diet_plan"] = make_plan(i)
+        state["grocery_list"] = build_plan_grocery_list(state["diet_plan"])
+    else:
+        state["recipe"] = make_recipe(i)
+        state["grocery_list"] = build_recipe_grocery_list(state["recipe"])
+    return state
+
+def per_session_bytes(sessions: int, turns: int, plan: bool) -> float:
+    store = SessionStore(max_sessions=sessions, idle_ttl=3600)
+    make_recipe(0), make_plan(0)  # warm caches (parsers, pydantic) outside the measurement
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(sessions):
+        session = store.get(f"session-{i}")
+        for turn in range(turns):
+            query = "How to make palak paneer" if turn == 0 else "Make it vegan"
+            session.record_turn(query, final_state(session, query, i, plan))
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(store) == sessions
+    return retained / sessions
+
+def eviction(args) -> None:
+    now = [0.0]
+    store = SessionStore(max_sessions=args.max_sessions, idle_ttl=args.idle_ttl, clock=lambda: now[0])
+    peak = 0
+    # One new session every `interval` seconds for two hours; each sends a second message a minute later
+    interval = 7200 / args.arrivals
+    for i in range(args.arrivals):
+        now[0] = i * interval
+        store.get(f"session-{i}")
+        if i * interval >= 60:
+            store.get(f"session-{int((now[0] - 60) / interval)}")
+        peak = max(peak, len(store))
+    snapshot = metrics.snapshot()["counters"]
+    print(f"\nEviction: {args.arrivals} sessions over 2 h, idle TTL {args.idle_ttl:g}s, max {args.max_sessions}")
+    print(f"  peak live sessions {peak}, live at end {len(store)}, "
+          f"evicted idle {snapshot.get('sessions_evicted{reason=idle}', 0):g}, "
+          f"evicted over max {snapshot.get('sessions_evicted{reason=max_sessions}', 0):g}")
+    now[0] += args.idle_ttl + 1
+    print(f"  after {args.idle_ttl:g}s of silence: {store.evict_idle()} evicted, {len(store)} live")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Session memory benchmark")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--arrivals", type=int, default=3000)
+    parser.add_argument("--idle-ttl", type=float, default=config.SESSION_IDLE_TTL)
+    parser.add_argument("--max-sessions", type=int, default=config.SESSION_MAX)
+    args = parser.parse_args()
+
+    print(f"Retained memory per idle session ({args.turns} turns, history capped at "
+          f"{config.SESSION_MAX_MESSAGES} messages, {args.sessions} sessions)")
+    for label, plan in (("recipe + grocery list", False), ("3-day plan + grocery list", True)):
+        print(f"  {label:<28}{per_session_bytes(args.sessions, args.turns, plan) / 1024:>8.1f} KiB")
+    eviction(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Startup-time budget for the package, measured with `python -X importtime`.
+
+Imports the given module (default: main, which pulls in every node) in fresh
+interpreters, reports the median cumulative import time and the heaviest
+imports, and exits non-zero when the budget is exceeded or when a module that
+must stay lazy (matplotlib, pandas, ...) is imported at startup. Run from the
+repository root:
+
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Startup budget for `import main`; override with --budget-ms or STARTUP_BUDGET_MS
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+# Packages that only specific code paths need and must never load at import time
+LAZY_MODULES = [
+    "matplotlib",
+    "seaborn",
+    "pandas",
+    "numpy",
+    "langchain_google_genai",
+    "langchain_community",
+    "langchain_experimental",
+    "duckduckgo_search",
+]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$")
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Parse `-X importtime` output into (module, self_us, cumulative_us, depth) rows.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)), depth))
+    return rows
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup-time budget based on python -X importtime")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    totals = []
+    self_times: Dict[str, List[int]] = {}
+    loaded = set()
+    for _ in range(args.runs):
+        rows = measure(args.module)
+        totals.append(next(cum for name, _, cum, _ in rows if name == args.module) / 1000)
+        for name, self_us, _, _ in rows:
+            self_times.setdefault(name.split(".")[0], []).append(self_us)
+            loaded.add(name)
+
+    median_ms = statistics.median(totals)
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}), budget {args.budget_ms:.0f} ms")
+
+    # Self time summed per top-level package, averaged over runs
+    by_package = sorted(
+        ((sum(times) / args.runs / 1000, package) for package, times in self_times.items()),
+        reverse=True,
+    )
+    print("\nHeaviest top-level packages (self time):")
+    for ms, package in by_package[:args.top]:
+        print(f"  {package:<32}{ms:>9.1f} ms")
+
+    failures = []
+    eager = sorted({name.split(".")[0] for name in loaded} & set(LAZY_MODULES))
+    if eager:
+        failures.append(f"lazy modules imported at startup: {', '.join(eager)}")
+    if median_ms > args.budget_ms:
+        failures.append(f"startup {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK: within startup budget")
+
+if __name__ == "__main__":
+    main()
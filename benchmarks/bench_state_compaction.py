@@ -0,0 +1,116 @@
+"""
+Checkpoint bytes per request, with and without state compaction
+(state.compact_messages).
+
+Runs the full workflow with fake models and a fake search backend that
+returns pages of --page-chars characters. The agents search --searches
+times before answering. "before" is the previous behaviour: each agent's
+whole transcript (its prompt, tool calls and raw search results) is kept in
+the state, and the agents inherit the workflow's checkpointer, so every
+agent step is checkpointed too. "compacted" keeps only each agent's final
+answer and runs the agents without checkpoints. The bytes
+are what MemorySaver serialised for the request's thread: checkpoints,
+channel blobs and pending writes.
+
+Run from the repository root:
+
+    python benchmarks/bench_state_compaction.py --searches 3 --page-chars 3000
+"""
+import argparse
+import os
+import sys
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+import config
+import diet_plan
+import guardrail
+import intent
+import nutritional_info
+import recipe
+from fakes import RoutedChatModel, install_fake_model
+from main import create_nutritionist_workflow
+from search_tool import CachedSearchTool, SearchService
+from ttl_cache import TTLCache
+
+AGENT_MODULES = (intent, recipe, nutritional_info, diet_plan)
+
+REQUESTS = {
+    "recipe": ("How to make palak paneer", "single_recipe"),
+    "nutrition info": ("What foods are high in calcium but don't contain dairy?", "nutritional_info"),
+    "diet plan": ("Make me a 3-day vegetarian plan", "diet_plan"),
+}
+
+class PageBackend:
+    """Search backend answering every query with one page of text, like a results page."""
+
+    def __init__(self, chars: int):
+        self.chars = chars
+
+    def search(self, query: str, timeout: float) -> str:
+        snippet = f"{query}: ingredients, method and nutrition per serving. "
+        return (snippet * (self.chars // len(snippet) + 1))[:self.chars]
+
+def checkpoint_bytes(saver, thread_id: str) -> int:
+    """Bytes MemorySaver holds for one thread."""
+    total = 0
+    for checkpoint, metadata, _ in (entry for ns in saver.storage[thread_id].values() for entry in ns.values()):
+        total += len(checkpoint[1]) + len(metadata[1])
+    total += sum(len(blob[1]) for key, blob in saver.blobs.items() if key[0] == thread_id)
+    total += sum(len(write[2][1]) for key, writes in saver.writes.items() if key[0] == thread_id
+                 for write in writes.values())
+    return total
+
+def run(compact: bool, args) -> Dict[str, tuple]:
+    modules = (guardrail, *AGENT_MODULES)
+    original = {module: (module.compact_messages, module.create_react_agent) for module in AGENT_MODULES}
+    original[guardrail] = (None, guardrail.create_react_agent)
+    if not compact:
+        for module in modules:
+            # checkpointer=None: inherit the workflow's checkpointer, as before
+            module.create_react_agent = lambda *a, _create=module.create_react_agent, **k: _create(
+                *a, **{**k, "checkpointer": None})
+        for module in AGENT_MODULES:
+            module.compact_messages = lambda messages, node: messages
+    try:
+        results = {}
+        for label, (query, primary_intent) in REQUESTS.items():
+            model = RoutedChatModel(tool_rounds=args.searches, primary_intent=primary_intent)
+            install_fake_model(model)
+            workflow = create_nutritionist_workflow()
+            thread = {"configurable": {"thread_id": label}}
+            final = workflow.invoke({"messages": [HumanMessage(content=query)], "original_query": query},
+                                    config=thread)
+            results[label] = (checkpoint_bytes(workflow.checkpointer, label), len(final["messages"]))
+        return results
+    finally:
+        for module, (compact_messages, create_react_agent) in original.items():
+            if compact_messages:
+                module.compact_messages = compact_messages
+            module.create_react_agent = create_react_agent
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="State compaction checkpoint-size benchmark")
+    parser.add_argument("--searches", type=int, default=3, help="searches per agent before answering")
+    parser.add_argument("--page-chars", type=int, default=3000, help="characters per search result")
+    args = parser.parse_args()
+
+    config.NODE_BUDGETS = {}
+    config.AGENT_MAX_TOOL_CALLS = max(config.AGENT_MAX_TOOL_CALLS, args.searches)
+    service = SearchService(PageBackend(args.page_chars), TTLCache(0, 0), timeout=5, max_concurrency=4)
+    for module in AGENT_MODULES:
+        if hasattr(module, "get_search_tool"):
+            module.get_search_tool = lambda: CachedSearchTool(service=service)
+
+    before, after = run(False, args), run(True, args)
+    print(f"Checkpoint bytes per request ({args.searches} searches per agent, {args.page_chars} chars per result)")
+    print(f"  {'':<16}{'before':>14}{'messages':>10}{'compacted':>12}{'messages':>10}{'saved':>8}")
+    for label in REQUESTS:
+        (old, old_messages), (new, new_messages) = before[label], after[label]
+        print(f"  {label:<16}{old:>14,}{old_messages:>10}{new:>12,}{new_messages:>10}{1 - new / old:>8.0%}")
+
+if __name__ == "__main__":
+    main()
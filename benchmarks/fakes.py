@@ -0,0 +1,301 @@
+"""
+Local stand-ins for external services, so benchmarks run offline and
+deterministically.
+
+FakeSearchServer speaks the SearxNG JSON API used by search_tool.SearxBackend
+(point SEARCH_URL at `server.url`), with configurable latency and failures,
+and counts requests and TCP connections so connection reuse is observable.
+
+FakeChatModel is a LangChain chat model that can stand in for get_llm() in
+the react agents: it makes a configurable number of search tool calls, then
+answers, and returns sample instances of whatever schema is passed to
+with_structured_output. It can inject faults: 503 errors on every Nth call,
+slow outliers, and full outages. RoutedChatModel drives the whole workflow:
+the guardrail never blocks and the Intent has a chosen primary_intent.
+
+FakeGeminiServer answers the Gemini REST generateContent call, so the real
+ChatGoogleGenerativeAI client can be benchmarked offline (pass `server.url`
+as base_url, or set LLM_BASE_URL), with request and connection counts.
+"""
+import json
+import socket
+import threading
+import time
+import typing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+from models import ClinicalGuardrail, Intent
+
+class FakeSearchServer:
+    """
+    Usage:
+
+        with FakeSearchServer(latency=0.05) as server:
+            backend = SearxBackend(server.url, max_results=4, pool_size=4)
+            ...
+            print(server.requests, server.connections)
+    """
+
+    def __init__(self, latency: float = 0.05, fail_every: int = 0, port: int = 0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.connections = 0
+        self.queries = []
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse sockets
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+                with fake._lock:
+                    fake.requests += 1
+                    fake.queries.append(query)
+                    failing = fake.fail_every and fake.requests % fake.fail_every == 0
+                time.sleep(fake.latency)
+                if failing:
+                    body = b'{"error": "upstream failure"}'
+                    self.send_response(502)
+                else:
+                    body = json.dumps({"query": query, "results": [
+                        {"title": f"{query} result {rank}", "url": f"https://example.com/{rank}",
+                         "content": f"Snippet {rank} about {query}: ingredients and method."}
+                        for rank in range(1, 6)
+                    ]}).encode()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/search"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeSearchServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+class FakeGeminiServer:
+    """
+    Usage:
+
+        with FakeGeminiServer(latency=0.05) as server:
+            llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-001", base_url=server.url, api_key="x")
+            ...
+            print(server.requests, server.connections, server.models)
+    """
+
+    def __init__(self, latency: float = 0.05, port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.models = {}
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; without this, Nagle and
+                # delayed ACKs add ~40 ms to every response on a kept-alive connection
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                # /v1beta/models/<model>:generateContent
+                model = self.path.rsplit("/", 1)[-1].split(":", 1)[0]
+                with fake._lock:
+                    fake.requests += 1
+                    fake.models[model] = fake.models.get(model, 0) + 1
+                time.sleep(fake.latency)
+                body = json.dumps({
+                    "candidates": [{"content": {"parts": [{"text": f"Answer from {model}."}], "role": "model"},
+                                    "finishReason": "STOP", "index": 0}],
+                    "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": 4, "totalTokenCount": 16},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeGeminiServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+def sample_instance(schema: type) -> BaseModel:
+    """A valid instance of a pydantic schema, filled with placeholder values."""
+    def value(annotation, name):
+        origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+        if origin is typing.Literal:
+            return args[0]
+        if origin is typing.Union:
+            return value(next(arg for arg in args if arg is not type(None)), name)
+        if origin in (list, List):
+            return [value(args[0], name) for _ in range(2)]
+        if origin is dict:
+            return {f"{name} {i}": value(args[1], name) for i in range(1, 3)}
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return sample_instance(annotation)
+        return {bool: False, int: 2, float: 0.9}.get(annotation, f"sample {name}")
+
+    return schema(**{name: value(field.annotation, name) for name, field in schema.model_fields.items()})
+
+class FakeUpstreamError(Exception):
+    """Injected model failure; `code` mirrors the status on google.genai API errors."""
+
+    code = 503
+
+_FAKE_LOCK = threading.Lock()
+
+class FakeChatModel(BaseChatModel):
+    """
+    Usage:
+
+        llm = FakeChatModel(latency=0.2, tool_rounds=-1)   # searches until stopped
+        agent = create_react_agent(llm, [search_tool], response_format=Recipe)
+
+    Args:
+        latency: Seconds slept per model call
+        tool_rounds: Search calls made before answering; -1 never stops on its own
+        tool_name: Name of the tool it calls
+        fail_every: Every Nth call raises FakeUpstreamError (HTTP 503); 0 never
+        slow_every: Every Nth call takes slow_latency seconds instead; 0 never
+        down: While True every call fails, as in an outage
+    """
+
+    latency: float = 0.0
+    tool_rounds: int = 0
+    tool_name: str = "duckduckgo_search"
+    fail_every: int = 0
+    slow_every: int = 0
+    slow_latency: float = 2.0
+    down: bool = False
+    calls: int = 0
+    failures: int = 0
+    started: List[float] = []  # time.monotonic() at the start of each call
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _call(self) -> None:
+        # Counted under the class lock: hedged requests call concurrently
+        with _FAKE_LOCK:
+            self.calls += 1
+            self.started.append(time.monotonic())
+            calls = self.calls
+            failing = self.down or (self.fail_every and calls % self.fail_every == 0)
+            if failing:
+                self.failures += 1
+        slow = self.slow_every and calls % self.slow_every == 0
+        time.sleep(self.slow_latency if slow else self.latency)
+        if failing:
+            raise FakeUpstreamError("503 Service Unavailable: the model is overloaded")
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> RunnableLambda:
+        def respond(messages: Any) -> BaseModel:
+            self._call()
+            return sample_instance(schema)
+
+        return RunnableLambda(respond)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._call()
+        searches = sum(isinstance(message, ToolMessage) for message in messages)
+        if self.tool_rounds < 0 or searches < self.tool_rounds:
+            message = AIMessage(content="", tool_calls=[{
+                "name": self.tool_name, "args": {"query": f"palak paneer recipe {searches}"},
+                "id": f"call_{self.calls}", "type": "tool_call",
+            }])
+        else:
+            message = AIMessage(content="I have enough information to answer.")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+class RoutedChatModel(FakeChatModel):
+    """
+    FakeChatModel for whole-workflow runs: its structured output routes the
+    request, with a fixed primary_intent and never clinical.
+    """
+
+    primary_intent: str = "single_recipe"
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> RunnableLambda:
+        def respond(messages: Any):
+            self._call()
+            instance = sample_instance(schema)
+            if schema is Intent:
+                instance.primary_intent = self.primary_intent
+            if schema is ClinicalGuardrail:
+                instance.is_clinical = False
+            return instance
+
+        return RunnableLambda(respond)
+
+# Workflow modules that call get_llm()
+WORKFLOW_NODES = ("guardrail", "intent", "recipe", "nutritional_info", "diet_plan")
+
+def install_fake_model(model: BaseChatModel, local_answers: bool = False, patch=setattr) -> None:
+    """
+    Make every workflow node call model instead of Gemini.
+
+    Args:
+        model: What get_llm() returns, for every node
+        local_answers: Keep the answers that skip the model (recipe library,
+            plan composition, food dataset queries). Off by default, so a
+            run times the model path every time
+        patch: setattr-like function used for every change; tests pass
+            pytest's monkeypatch.setattr so the changes are undone
+    """
+    import importlib
+    import config
+    for name in WORKFLOW_NODES:
+        patch(importlib.import_module(name), "get_llm", lambda node=None: model)
+    if not local_answers:
+        for name in ("recipe", "diet_plan"):
+            patch(importlib.import_module(name), "get_recipe_library", lambda: None)
+        patch(config, "FOOD_QUERY_ENABLED", False)
@@ -0,0 +1,105 @@
+"""
+Per-node deadlines and tool-call budgets for the react agents.
+
+A NodeBudget is created when a node starts and installed as the agent's
+post_model_hook. After every model step it checks the elapsed time and the
+number of tool calls already made; once either limit is reached it strips
+the pending tool calls from the model's message and asks it to answer, so the
+agent goes straight to its structured response with what it has gathered.
+
+The deadline is checked between model steps, so a single model or search call
+can overrun it by that call's own duration (searches are bounded by
+SEARCH_TIMEOUT). The recursion limit is a backstop for models that ignore the
+stripped tool calls.
+"""
+import time
+from typing import Any, Dict
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from metrics import metrics
+import config
+
+BUDGET_REACHED = (
+    "Budget reached ({reason}): do not call any more tools. "
+    "Answer now with the information you already have."
+)
+
+class NodeBudget:
+    """
+    Args:
+        node: Node name, used for metrics labels
+        deadline: Wall-clock seconds allowed from construction
+        max_tool_calls: Tool calls allowed across the whole agent run
+    """
+
+    def __init__(self, node: str, deadline: float, max_tool_calls: int):
+        self.node = node
+        self.deadline = deadline
+        self.max_tool_calls = max_tool_calls
+        self.started = time.monotonic()
+        self.exhausted = None  # "deadline" or "tool_calls" once the budget has run out
+
+    @classmethod
+    def for_node(cls, node: str) -> "NodeBudget":
+        """Budget from config.NODE_BUDGETS, falling back to the global defaults."""
+        limits = config.NODE_BUDGETS.get(node, {})
+        return cls(
+            node,
+            deadline=limits.get("deadline", config.AGENT_DEADLINE),
+            max_tool_calls=limits.get("max_tool_calls", config.AGENT_MAX_TOOL_CALLS),
+        )
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - self.elapsed())
+
+    @property
+    def recursion_limit(self) -> int:
+        # Each tool round is agent -> post_model_hook -> tools; the final round
+        # adds post_model_hook -> generate_structured_response
+        return 3 * (self.max_tool_calls + 1) + 3
+
+    def post_model_hook(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Strip tool calls beyond the budget from the latest model message."""
+        messages = state["messages"]
+        last = messages[-1]
+        if not isinstance(last, AIMessage) or not last.tool_calls:
+            return {}
+
+        used = sum(isinstance(message, ToolMessage) for message in messages)
+        allowed = self.max_tool_calls - used
+        if self.remaining() <= 0:
+            reason, allowed = "deadline", 0
+        elif len(last.tool_calls) > allowed:
+            reason = "tool_calls"
+        else:
+            return {}
+
+        allowed = max(0, allowed)
+        self.exhausted = reason
+        metrics.increment("agent_budget_exhausted", node=self.node, reason=reason)
+        print(f"⏱️ DEBUG: {self.node} budget reached ({reason}) after {used} tool calls "
+              f"and {self.elapsed():.1f}s; keeping {allowed} of {len(last.tool_calls)} pending calls")
+
+        kept = last.tool_calls[:allowed]
+        additional_kwargs = {k: v for k, v in last.additional_kwargs.items()
+                             if k not in ("function_call", "tool_calls")}
+        # Same id, so the message replaces the model's original in the agent state
+        trimmed = AIMessage(
+            content=last.content or ("" if kept else "Gathering stopped: budget reached."),
+            tool_calls=kept,
+            additional_kwargs=additional_kwargs,
+            response_metadata=last.response_metadata,
+            id=last.id,
+            name=last.name,
+        )
+        if kept:
+            return {"messages": [trimmed]}
+        return {"messages": [trimmed, HumanMessage(content=BUDGET_REACHED.format(reason=reason))]}
+
+def record_tool_calls(node: str, result: Dict[str, Any]) -> int:
+    """Observe how many tool calls an agent run made; returns the count."""
+    calls = sum(isinstance(message, ToolMessage) for message in result.get("messages", []))
+    metrics.observe("agent_tool_calls", calls, node=node)
+    return calls
@@ -1,4 +1,143 @@
-MODEL = "gemini-1.5-pro"
+import os
+import tempfile
+
+# Model used when no tiers file is present; per-node models, output limits,
+# temperatures and timeouts are configured in LLM_TIERS_PATH (see llm_tiers.py)
+MODEL = os.getenv("MODEL", "gemini-2.0-flash-001")
+LLM_TIERS_PATH = os.getenv("LLM_TIERS_PATH", "llm_tiers.json")
+
+# Shared Gemini client (see llm_pool.py): keep-alive connections kept open for
+# all nodes and sessions. LLM_BASE_URL points the client at another endpoint,
+# such as a proxy or a local test server
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_BASE_URL = os.getenv("LLM_BASE_URL")
+
+# Chat sessions (see sessions.py): at most SESSION_MAX are kept, each dropped
+# after SESSION_IDLE_TTL seconds without a message; a session remembers its
+# last SESSION_MAX_MESSAGES messages plus the previous Intent and results
+SESSION_MAX = int(os.getenv("SESSION_MAX", "1000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "12"))
+
+# Headless HTTP API (see api.py). Requests running longer than
+# API_REQUEST_TIMEOUT seconds get a 504; keep-alive connections idle for
+# API_KEEPALIVE_TIMEOUT seconds are closed; at most API_MAX_CONCURRENCY
+# workflows run at once and the rest wait for a slot
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8080"))
+API_REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", "120"))
+API_KEEPALIVE_TIMEOUT = float(os.getenv("API_KEEPALIVE_TIMEOUT", "15"))
+API_MAX_BODY = int(os.getenv("API_MAX_BODY", str(64 * 1024)))
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "32"))
+
+# Chart backend used by visual_node: "svg" renders without importing matplotlib/seaborn,
+# "matplotlib" keeps the high-resolution (300 dpi) PNG export
+CHART_BACKEND = os.getenv("CHART_BACKEND", "svg")
+# Directory the SVG backend writes charts to, one new file per chart so
+# concurrent sessions never overwrite each other; outside the working tree by default
+CHART_DIR = os.getenv("CHART_DIR", tempfile.gettempdir())
+
+# Library of generated recipes (see recipe_library.py): a SQLite file that
+# specific-recipe requests are served from when it holds a close match.
+# RECIPE_LIBRARY_MIN_COVERAGE is the share of a stored recipe name the request
+# must cover; an empty RECIPE_LIBRARY_PATH disables the library
+RECIPE_LIBRARY_PATH = os.getenv("RECIPE_LIBRARY_PATH", "recipe_library.db")
+RECIPE_LIBRARY_MIN_COVERAGE = float(os.getenv("RECIPE_LIBRARY_MIN_COVERAGE", "0.6"))
+
+# Diet plans composed from the recipe library (see plan_composer.py): daily
+# calories within PLAN_CALORIE_TOLERANCE of the target (PLAN_DEFAULT_CALORIES
+# when the request names none), a beam of PLAN_BEAM_WIDTH partial days, and
+# PLAN_REUSE_PENALTY per earlier use of a recipe in the plan
+PLAN_DEFAULT_CALORIES = float(os.getenv("PLAN_DEFAULT_CALORIES", "2000"))
+PLAN_CALORIE_TOLERANCE = float(os.getenv("PLAN_CALORIE_TOLERANCE", "0.1"))
+PLAN_BEAM_WIDTH = int(os.getenv("PLAN_BEAM_WIDTH", "16"))
+PLAN_REUSE_PENALTY = float(os.getenv("PLAN_REUSE_PENALTY", "0.05"))
+PLAN_MAX_DAYS = int(os.getenv("PLAN_MAX_DAYS", "14"))
+
+# Nutrition questions answered from the food dataset's columns without the
+# agent (see food_query.py); FOOD_QUERY_TOP_K foods unless the user asks for
+# a number. FOOD_QUERY_ENABLED=false always uses the agent
+FOOD_QUERY_ENABLED = os.getenv("FOOD_QUERY_ENABLED", "true").lower() == "true"
+FOOD_QUERY_TOP_K = int(os.getenv("FOOD_QUERY_TOP_K", "10"))
+
+# The food dataset: FOOD_DATASET_PATH is ingested into the memory-mapped
+# columnar store at FOOD_STORE_PATH (see food_store.py), rebuilt when the CSV
+# changes. Agent prompts embed at most FOOD_PROMPT_MAX_ROWS of its rows
+FOOD_DATASET_PATH = os.getenv("FOOD_DATASET_PATH", "clean-food.csv")
+FOOD_STORE_PATH = os.getenv("FOOD_STORE_PATH", "food_store")
+FOOD_PROMPT_MAX_ROWS = int(os.getenv("FOOD_PROMPT_MAX_ROWS", "200"))
+
+# Nutrient density precomputed at ingest (see nutrient_density.py): calories
+# per serving are floored at DENSITY_KCAL_FLOOR before dividing, and recipe /
+# diet plan requests name the DENSITY_HINT_FOODS densest foods for their focus
+DENSITY_KCAL_FLOOR = float(os.getenv("DENSITY_KCAL_FLOOR", "10"))
+DENSITY_HINT_FOODS = int(os.getenv("DENSITY_HINT_FOODS", "8"))
+
+# Generated recipes and plans are checked against the request's exclusions
+# and dietary restrictions (see constraints.py); a violating recipe is sent
+# back for repair up to CONSTRAINT_REPAIR_ATTEMPTS times (0 only reports)
+CONSTRAINT_REPAIR_ATTEMPTS = int(os.getenv("CONSTRAINT_REPAIR_ATTEMPTS", "1"))
+
+# Web search shared by every agent (see search_tool.py). SEARCH_BACKEND "local"
+# serves searches from the offline BM25 index at RECIPE_INDEX_PATH (see
+# recipe_index.py); otherwise SEARCH_URL points at a SearxNG-compatible JSON
+# endpoint instead of DuckDuckGo. SEARCH_CACHE_PATH enables the on-disk cache tier
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "duckduckgo")
+RECIPE_INDEX_PATH = os.getenv("RECIPE_INDEX_PATH", "recipe_index")
+SEARCH_URL = os.getenv("SEARCH_URL")
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "8"))
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "4"))
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "4"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH")
+
+# Per-node budgets for the react agents (see budgets.py): a wall-clock deadline in
+# seconds and a maximum number of search tool calls. When either runs out the
+# agent stops calling tools and writes its structured response from what it has
+AGENT_DEADLINE = float(os.getenv("AGENT_DEADLINE", "60"))
+AGENT_MAX_TOOL_CALLS = int(os.getenv("AGENT_MAX_TOOL_CALLS", "3"))
+NODE_BUDGETS = {
+    "recipe_node": {"deadline": 45.0, "max_tool_calls": 3},
+    "diet_plan_node": {"deadline": 90.0, "max_tool_calls": 4},
+    "nutritional_info_node": {"deadline": 45.0, "max_tool_calls": 3},
+}
+
+# Resilient model calls (see llm_resilience.py): retries with exponential backoff,
+# a per-attempt timeout, optional hedged requests after the p95 latency
+# (LLM_HEDGE=1), a circuit breaker, and a cache of results served while the
+# upstream is degraded
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(3600)))
+
+# Process-wide model call scheduler (see llm_scheduler.py): provider rate limits,
+# concurrent requests (LLM_RESERVED_SLOTS of them kept for priority-0 calls), and
+# node priorities (lower runs first). A waiting call moves up one priority level
+# every LLM_PRIORITY_AGING seconds
+LLM_RPM = float(os.getenv("LLM_RPM", "60"))
+LLM_TPM = float(os.getenv("LLM_TPM", "1000000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_PRIORITY_AGING = float(os.getenv("LLM_PRIORITY_AGING", "30"))
+LLM_RESERVED_SLOTS = int(os.getenv("LLM_RESERVED_SLOTS", "2"))
+LLM_DEFAULT_PRIORITY = 1
+LLM_PRIORITIES = {
+    "clinical_guardrail_node": 0,
+    "intent_node": 0,
+    "fallback_node": 0,
+    "recipe_node": 1,
+    "nutritional_info_node": 1,
+    "diet_plan_node": 2,
+}
+
 AGENT_PROMPT_TRIAL = """
 You are a skilled culinary and nutrition expert, adept at creating delicious and nutritious recipes. Your task is to provide:
 
@@ -0,0 +1,420 @@
+"""
+Local checks that generated recipes and plans respect the user's
+constraints, with targeted repair of the ones that don't.
+
+An Intent's excluded_ingredients and dietary_restrictions compile into a
+ConstraintMatcher: one KeywordAutomaton holding every forbidden term. A
+category in TAXONOMY stands for all of its members, so excluding "dairy"
+forbids milk, paneer, ghee, ... and "vegan" forbids RESTRICTIONS["vegan"].
+Plant-based look-alikes are allowed: "coconut milk" and "peanut butter"
+are not dairy (SAFE_TERMS), and a modifier such as "vegan" or "gluten-free"
+clears the rest of its ingredient line for its categories (MODIFIERS). A
+term must end at a word end (plurals allowed), so "egg" doesn't match
+"eggplant".
+
+scan() checks the names and ingredients of any number of recipes in a
+single pass over their concatenated text. enforce_recipe() and
+enforce_plan() send only the violating recipes back to the model, each in
+one structured-output call with the offending lines named. A plan recipe
+is dropped only when its last repair still violates; with no repair
+attempts, or when the repair call fails, the original recipe is kept and
+its violations are reported, as for a single recipe.
+
+Restrictions that ingredients can't decide ("keto", "low sodium") are
+reported as unchecked and left to the prompts.
+"""
+import bisect
+import re
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from keyword_automaton import KeywordAutomaton
+from metrics import metrics
+from models import DietPlan, Intent, Recipe
+import config
+
+# Ingredient categories a restriction or exclusion can name
+TAXONOMY = {
+    "meat": ["meat", "chicken", "beef", "pork", "lamb", "mutton", "goat", "veal", "venison", "turkey", "duck",
+             "bacon", "ham", "sausage", "salami", "pepperoni", "prosciutto", "pancetta", "chorizo", "lard",
+             "keema", "mince", "steak", "chicken stock", "chicken broth", "beef stock", "bone broth"],
+    "seafood": ["fish", "salmon", "tuna", "cod", "tilapia", "trout", "sardine", "anchovy", "anchovies",
+                "mackerel", "halibut", "haddock", "herring", "shrimp", "prawn", "crab", "lobster", "clam",
+                "mussel", "oyster", "scallop", "squid", "calamari", "octopus", "fish sauce", "worcestershire",
+                "bonito", "dashi"],
+    "shellfish": ["shrimp", "prawn", "crab", "lobster", "clam", "mussel", "oyster", "scallop", "squid",
+                  "calamari", "octopus"],
+    "pork": ["pork", "bacon", "ham", "lard", "prosciutto", "pancetta", "chorizo", "salami", "pepperoni"],
+    "dairy": ["milk", "cheese", "paneer", "ghee", "butter", "buttermilk", "cream", "sour cream", "yogurt",
+              "yoghurt", "curd", "dahi", "whey", "casein", "kefir", "khoya", "khoa", "malai", "lassi", "feta",
+              "mozzarella", "parmesan", "ricotta", "cheddar", "halloumi", "mascarpone", "custard", "ice cream",
+              "raita", "labneh", "quark"],
+    "egg": ["egg", "egg white", "egg yolk", "mayonnaise", "mayo", "meringue", "aioli"],
+    "gluten": ["wheat", "flour", "maida", "atta", "semolina", "sooji", "suji", "rava", "bread", "breadcrumbs",
+               "panko", "pasta", "spaghetti", "macaroni", "noodles", "couscous", "bulgur", "barley", "rye",
+               "seitan", "soy sauce", "spelt", "farro", "pita", "tortilla", "naan", "roti", "chapati",
+               "paratha", "cracker", "croutons", "malt", "beer"],
+    "tree nuts": ["almond", "cashew", "walnut", "pecan", "pistachio", "hazelnut", "macadamia", "brazil nut",
+                  "pine nut", "nut", "nut butter"],
+    "peanut": ["peanut", "groundnut"],
+    "soy": ["soy", "soya", "tofu", "tempeh", "edamame", "miso", "soy sauce", "tamari"],
+    "honey": ["honey"],
+    "gelatin": ["gelatin", "gelatine"],
+    "alcohol": ["wine", "beer", "rum", "vodka", "brandy", "sake", "mirin", "whiskey", "whisky", "bourbon"],
+    "root vegetables": ["onion", "garlic", "potato", "sweet potato", "carrot", "beet", "beetroot", "radish",
+                        "ginger", "turnip", "shallot", "yam"],
+}
+# Other names users give the categories ("no nuts", "exclude poultry")
+CATEGORY_ALIASES = {
+    "meats": ["meat"], "red meat": ["meat"], "poultry": ["meat"], "fish": ["seafood"], "seafoods": ["seafood"],
+    "shell fish": ["shellfish"], "milk products": ["dairy"], "lactose": ["dairy"], "eggs": ["egg"],
+    "wheat": ["gluten"], "nuts": ["tree nuts", "peanut"], "tree nut": ["tree nuts"], "peanuts": ["peanut"],
+    "soya": ["soy"], "gelatine": ["gelatin"], "onion and garlic": ["root vegetables"],
+}
+# Restriction -> categories it forbids
+RESTRICTIONS = {
+    "vegetarian": ["meat", "seafood", "gelatin"],
+    "lacto-vegetarian": ["meat", "seafood", "gelatin", "egg"],
+    "ovo-vegetarian": ["meat", "seafood", "gelatin", "dairy"],
+    "pescatarian": ["meat", "gelatin"],
+    "vegan": ["meat", "seafood", "dairy", "egg", "honey", "gelatin"],
+    "plant-based": ["meat", "seafood", "dairy", "egg", "honey", "gelatin"],
+    "dairy-free": ["dairy"],
+    "lactose-free": ["dairy"],
+    "gluten-free": ["gluten"],
+    "celiac": ["gluten"],
+    "nut-free": ["tree nuts", "peanut"],
+    "tree-nut-free": ["tree nuts"],
+    "peanut-free": ["peanut"],
+    "egg-free": ["egg"],
+    "soy-free": ["soy"],
+    "shellfish-free": ["shellfish"],
+    "jain": ["meat", "seafood", "egg", "gelatin", "root vegetables"],
+    "halal": ["pork", "alcohol", "gelatin"],
+    "kosher": ["pork", "shellfish"],
+}
+ANIMAL = ["meat", "seafood", "shellfish", "pork", "dairy", "egg", "honey", "gelatin"]
+# Terms containing a forbidden word that don't belong to its category
+SAFE_TERMS = {
+    "dairy": ["coconut milk", "almond milk", "oat milk", "soy milk", "rice milk", "cashew milk", "coconut cream",
+              "coconut yogurt", "soy yogurt", "coconut butter", "peanut butter", "almond butter", "cashew butter",
+              "nut butter", "seed butter", "sunflower butter", "cocoa butter", "shea butter", "apple butter",
+              "butter beans", "butter lettuce", "cream of tartar"],
+    "gluten": ["almond flour", "rice flour", "coconut flour", "chickpea flour", "gram flour", "besan flour",
+               "buckwheat flour", "corn flour", "cornflour", "tapioca flour", "oat flour", "rice noodles",
+               "glass noodles", "rice paper", "corn tortilla", "corn tortillas", "tamari"],
+    "meat": ["coconut meat"],
+    "root vegetables": ["ginger ale"],
+}
+# Modifiers that clear the rest of their ingredient line for these categories
+MODIFIERS = {
+    "vegan": ANIMAL, "plant-based": ANIMAL, "plant based": ANIMAL,
+    "dairy-free": ["dairy"], "dairy free": ["dairy"], "non-dairy": ["dairy"], "lactose-free": ["dairy"],
+    "gluten-free": ["gluten"], "gluten free": ["gluten"],
+    "egg-free": ["egg"], "eggless": ["egg"], "egg free": ["egg"],
+    "meatless": ["meat"], "meat-free": ["meat"], "vegetarian": ["meat", "seafood", "gelatin"],
+    "nut-free": ["tree nuts", "peanut"], "soy-free": ["soy"],
+}
+
+class Violation(NamedTuple):
+    recipe: int  # index of the recipe among those scanned
+    line: str  # the offending ingredient (or the recipe name)
+    term: str  # the forbidden word found
+    rule: str  # why it is forbidden: "vegan (dairy)" or "excluded: peanuts"
+
+def _categories(name: str) -> List[str]:
+    """The TAXONOMY categories a name stands for ("nuts" -> tree nuts and peanut), if any."""
+    return CATEGORY_ALIASES.get(name) or ([name] if name in TAXONOMY else [])
+
+def _restriction_key(restriction: str) -> str:
+    key = re.sub(r"[\s_]+", "-", restriction.strip().lower())
+    return re.sub(r"-(?:diet|friendly|only)$", "", key)
+
+def _plural_forms(term: str) -> List[str]:
+    forms = [term]
+    if term.endswith("ies"):
+        forms.append(term[:-3] + "y")
+    elif term.endswith("es") and term[:-2].endswith(("ch", "sh", "o", "x")):
+        forms.append(term[:-2])
+    elif term.endswith("s") and not term.endswith("ss"):
+        forms.append(term[:-1])
+    return forms
+
+class ConstraintMatcher:
+    """
+    The compiled constraints of one Intent.
+
+    Args:
+        excluded: Excluded ingredients; a TAXONOMY category name excludes its members
+        restrictions: Dietary restrictions; those in RESTRICTIONS forbid their categories
+    """
+
+    def __init__(self, excluded: Iterable[str] = (), restrictions: Iterable[str] = ()):
+        self.unchecked: List[str] = []
+        forbidden: Dict[str, Tuple[Optional[str], str]] = {}  # term -> (category, rule)
+
+        def forbid_category(category: str, rule: str) -> None:
+            for member in TAXONOMY[category]:
+                forbidden.setdefault(member, (category, rule))
+
+        for restriction in restrictions:
+            key = _restriction_key(restriction)
+            if not key:
+                continue
+            no = re.match(r"(?:no|without|avoid)-(.+)", key)
+            named = _categories(no.group(1).replace("-", " ")) if no else []
+            if key in RESTRICTIONS:
+                for category in RESTRICTIONS[key]:
+                    forbid_category(category, f"{restriction.strip()} ({category})")
+            elif named:
+                for category in named:
+                    forbid_category(category, restriction.strip())
+            else:
+                self.unchecked.append(restriction.strip())
+        for term in excluded:
+            term = term.strip().lower()
+            if not term:
+                continue
+            if _categories(term):
+                for category in _categories(term):
+                    forbid_category(category, f"excluded: {term}")
+                continue
+            for form in _plural_forms(term):
+                # A member of a category keeps it, so "peanut butter" isn't excluded "butter"
+                member_of = next((name for name, members in TAXONOMY.items() if form in members), None)
+                forbidden.setdefault(form, (member_of, f"excluded: {term}"))
+
+        self.terms = forbidden
+        categories = {category for category, _ in forbidden.values() if category}
+        keywords: List[Tuple[str, tuple]] = [(term, ("forbid", category, rule))
+                                             for term, (category, rule) in forbidden.items()]
+        keywords += [(safe, ("safe", category)) for category in categories for safe in SAFE_TERMS.get(category, [])]
+        keywords += [(modifier, ("modifier", tuple(cleared))) for modifier, cleared in MODIFIERS.items()
+                     if categories & set(cleared)]
+        self._automaton = KeywordAutomaton(keywords) if forbidden else None
+
+    @property
+    def empty(self) -> bool:
+        """True when nothing is forbidden."""
+        return self._automaton is None
+
+    def _violations(self, text: str) -> Iterable[Tuple[int, str, str]]:
+        """(offset, term, rule) of every forbidden term in text, after safe terms and modifiers."""
+        if self._automaton is None:
+            return []
+        lower = text.lower()
+        safe: List[Tuple[int, int, Tuple[str, ...]]] = []
+        found: List[Tuple[int, int, str, Optional[str], str]] = []
+
+        def settle() -> Iterable[Tuple[int, str, str]]:
+            for start, end, term, category, rule in found:
+                if not category or not any(s <= start and end <= e and category in cleared for s, e, cleared in safe):
+                    yield start, term, rule
+
+        line_end = -1
+        # Safe spans never cross a line, so each line is settled on its own
+        for start, keyword, value in self._automaton.iter_matches(lower):
+            if start > line_end:
+                yield from settle()
+                safe, found = [], []
+                line_end = lower.find("\n", start)
+                line_end = line_end if line_end >= 0 else len(lower)
+            end = start + len(keyword)
+            if not _ends_word(lower, end):
+                continue
+            if value[0] == "safe":
+                safe.append((start, end, (value[1],)))
+            elif value[0] == "modifier":
+                safe.append((start, line_end, value[1]))
+            else:
+                found.append((start, end, keyword, value[1], value[2]))
+        yield from settle()
+
+    def allows(self, text: str) -> bool:
+        """True when text (a food or ingredient name) has no forbidden term."""
+        return next(iter(self._violations(text)), None) is None
+
+    def _line_violations(self, lines: Sequence[str]) -> Iterable[Tuple[int, str, str]]:
+        """(line index, term, rule) of every violation in lines, in one pass over their joined text."""
+        offsets, position = [], 0
+        for line in lines:
+            offsets.append(position)
+            position += len(line) + 1
+        for offset, term, rule in self._violations("\n".join(lines)):
+            yield bisect.bisect_right(offsets, offset) - 1, term, rule
+
+    def rejected(self, names: Sequence[str]) -> List[int]:
+        """Indexes of the names (foods from the dataset) that have a forbidden term."""
+        if self._automaton is None:
+            return []
+        lines = [name.replace("\n", " ") for name in names]
+        return sorted({index for index, _, _ in self._line_violations(lines)})
+
+    def scan(self, recipes: Sequence[Recipe]) -> List[Violation]:
+        """
+        Every violation in the names and ingredients of recipes, found in one
+        pass over their text.
+        """
+        if self._automaton is None or not recipes:
+            return []
+        start_time = time.perf_counter()
+        lines, owners = [], []
+        for index, recipe in enumerate(recipes):
+            for line in [recipe.name, *recipe.ingredients]:
+                lines.append(line.replace("\n", " "))
+                owners.append(index)
+        violations = [Violation(owners[line], lines[line], term, rule)
+                      for line, term, rule in self._line_violations(lines)]
+        metrics.observe("constraint_check_seconds", time.perf_counter() - start_time)
+        return violations
+
+def _ends_word(text: str, end: int) -> bool:
+    """True when a match ending at end is a whole word, allowing plural "s" / "es"."""
+    for suffix in ("", "s", "es"):
+        stop = end + len(suffix)
+        if text.startswith(suffix, end) and (stop >= len(text) or not text[stop].isalpha()):
+            return True
+    return False
+
+@lru_cache(maxsize=256)
+def _compile(excluded: Tuple[str, ...], restrictions: Tuple[str, ...]) -> ConstraintMatcher:
+    return ConstraintMatcher(excluded, restrictions)
+
+def compile_constraints(intent: Optional[Intent]) -> Optional[ConstraintMatcher]:
+    """The ConstraintMatcher for an Intent (cached per constraint set), or None without constraints."""
+    if intent is None:
+        return None
+    excluded = tuple(sorted({term.strip().lower() for term in intent.excluded_ingredients if term.strip()}))
+    restrictions = tuple(sorted({r.strip().lower() for r in intent.dietary_restrictions if r.strip()}))
+    if not excluded and not restrictions:
+        return None
+    return _compile(excluded, restrictions)
+
+def _repair_message(recipe: Recipe, violations: List[Violation], intent: Intent, context: str = "") -> str:
+    problems = "\n".join(f"- {v.line!r} contains {v.term!r} ({v.rule})" for v in violations)
+    constraints = []
+    if intent.excluded_ingredients:
+        constraints.append(f"excluded ingredients: {', '.join(intent.excluded_ingredients)}")
+    if intent.dietary_restrictions:
+        constraints.append(f"dietary restrictions: {', '.join(intent.dietary_restrictions)}")
+    return (f"🔧 REPAIR: This recipe{context} breaks the user's constraints ({'; '.join(constraints)}):\n"
+            f"{problems}\n\n"
+            "Return the recipe with each offending ingredient replaced by a compliant alternative. Adjust the "
+            "name, instructions and nutritional info to match, and keep everything else (dish, servings, "
+            "timing, calories) as close to the original as possible.\n\n"
+            f"{recipe.model_dump_json()}")
+
+def enforce_recipe(recipe: Recipe, intent: Optional[Intent], get_llm: Callable[[], object],
+                   node: str) -> Tuple[Recipe, List[Violation]]:
+    """
+    Check a generated recipe and have the model repair it if it breaks the
+    Intent's constraints.
+
+    Args:
+        recipe: The recipe to check
+        intent: The request's Intent
+        get_llm: Returns the chat model for repairs; only called when needed
+        node: Calling node, for metrics
+
+    Returns:
+        (the recipe, repaired if it had to be, violations it still has)
+    """
+    matcher = compile_constraints(intent)
+    if matcher is None:
+        return recipe, []
+    violations = matcher.scan([recipe])
+    if not violations:
+        return recipe, []
+    metrics.increment("constraint_violations", len(violations), node=node)
+    for _ in range(config.CONSTRAINT_REPAIR_ATTEMPTS):
+        print(f"🔧 DEBUG: {recipe.name!r} breaks constraints: {[v.term for v in violations]}; repairing")
+        try:
+            repaired = get_llm().with_structured_output(Recipe).invoke(_repair_message(recipe, violations, intent))
+        except Exception as e:
+            print(f"⚠️ DEBUG: Recipe repair failed: {e}")
+            break
+        recipe, violations = repaired, matcher.scan([repaired])
+        if not violations:
+            break
+    metrics.increment("constraint_repairs", node=node, result="failed" if violations else "repaired")
+    if violations:
+        print(f"⚠️ DEBUG: {recipe.name!r} still breaks constraints: {[v.rule for v in violations]}")
+    return recipe, violations
+
+def enforce_plan(plan: DietPlan, intent: Optional[Intent], get_llm: Callable[[], object],
+                 node: str) -> Tuple[DietPlan, int, int]:
+    """
+    Check every recipe of a plan in one pass and regenerate only the ones
+    that break the Intent's constraints, all in one batch of model calls.
+    A recipe whose last repair still violates is dropped; one that was
+    never repaired (CONSTRAINT_REPAIR_ATTEMPTS is 0, or the repair call
+    failed) is kept as it was and reported. The plan is changed in place;
+    its shopping list is rebuilt if any recipe changed.
+
+    Returns:
+        (the plan, recipes repaired, recipes dropped)
+    """
+    matcher = compile_constraints(intent)
+    if matcher is None:
+        return plan, 0, 0
+    slots = [(day_plan, meal, position, recipe)
+             for day_plan in plan.daily_plans
+             for meal in ("breakfast", "lunch", "dinner", "snack")
+             for position, recipe in enumerate(getattr(day_plan, meal) or [])]
+    by_recipe: Dict[int, List[Violation]] = {}
+    for violation in matcher.scan([recipe for *_, recipe in slots]):
+        by_recipe.setdefault(violation.recipe, []).append(violation)
+    if not by_recipe:
+        return plan, 0, 0
+    metrics.increment("constraint_violations", sum(map(len, by_recipe.values())), node=node)
+    print(f"🔧 DEBUG: {len(by_recipe)} of {len(slots)} plan recipes break constraints; repairing only those")
+
+    pending = dict(by_recipe)
+    replacements: Dict[int, Recipe] = {}
+    for _ in range(config.CONSTRAINT_REPAIR_ATTEMPTS):
+        indexes = list(pending)
+        messages = [_repair_message(replacements.get(i, slots[i][3]), pending[i], intent,
+                                    f" ({slots[i][1]} of {slots[i][0].day})") for i in indexes]
+        try:
+            repaired = get_llm().with_structured_output(Recipe).batch(messages, return_exceptions=True)
+        except Exception as e:
+            print(f"⚠️ DEBUG: Plan repair failed: {e}")
+            break
+        # Recipes that failed to generate keep their old violations and stay pending
+        answered = [(i, recipe) for i, recipe in zip(indexes, repaired) if isinstance(recipe, Recipe)]
+        left: Dict[int, List[Violation]] = {}
+        for violation in matcher.scan([recipe for _, recipe in answered]):
+            left.setdefault(answered[violation.recipe][0], []).append(violation)
+        for i, recipe in answered:
+            replacements[i] = recipe
+            if i in left:
+                pending[i] = left[i]
+            else:
+                del pending[i]
+        if not pending:
+            break
+
+    # Only a repair that came back still violating drops a recipe; the rest keep the original
+    dropped = {i for i in pending if i in replacements}
+    unrepaired = [i for i in pending if i not in replacements]
+    for i in sorted(by_recipe, reverse=True):
+        day_plan, meal, position, _ = slots[i]
+        recipes = getattr(day_plan, meal)
+        if i in dropped:
+            del recipes[position]
+        elif i in replacements:
+            recipes[position] = replacements[i]
+    repaired_count = len(by_recipe) - len(pending)
+    metrics.increment("constraint_repairs", repaired_count, node=node, result="repaired")
+    if dropped:
+        metrics.increment("constraint_repairs", len(dropped), node=node, result="dropped")
+        print(f"⚠️ DEBUG: Dropped {len(dropped)} plan recipes that still break constraints")
+    if unrepaired:
+        metrics.increment("constraint_repairs", len(unrepaired), node=node, result="failed")
+        print(f"⚠️ DEBUG: Kept {len(unrepaired)} plan recipes that break constraints: "
+              f"{[v.rule for i in unrepaired for v in pending[i]]}")
+    if not replacements:
+        return plan, 0, 0
+    from grocery import plan_shopping_list
+    plan.shopping_list = plan_shopping_list(plan)
+    return plan, repaired_count, len(dropped)
@@ -1,13 +1,16 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.prebuilt import create_react_agent
-from langchain_community.tools import DuckDuckGoSearchRun
-import pandas as pd
-import config
-from utils import get_llm
+from utils import get_llm, get_search_tool, get_food_dataset_markdown, get_recipe_library
 from langchain_core.messages import AIMessage, HumanMessage
 from models import DietPlan, MealPlanDay, Recipe
-from state import NutritionistState
-from typing import Dict, Any
+from state import NutritionistState, compact_messages, get_original_query
+from typing import Dict, Any, Optional
+from budgets import NodeBudget, record_tool_calls
+from constraints import enforce_plan
+from metrics import metrics
+from nutrient_density import density_hints
+from nutrition_parser import iter_plan_recipes
+from plan_composer import compose_plan, requested_days
 
 DIET_PLAN_PROMPT = """You are a nutrition expert specializing in creating comprehensive diet plans and meal prep guidance.
 
@@ -80,24 +83,24 @@ Guidelines:
 REMEMBER: If user asks for 3 days, create exactly 3 daily_plans, not 7!
 """
 
-def create_diet_plan_agent():
+def create_diet_plan_agent(budget: Optional[NodeBudget] = None):
     """Create a diet plan agent"""
     print(f"🔍 DEBUG: Creating diet plan agent...")
-    df = pd.read_csv("clean-food.csv")
-    
     diet_plan_prompt = ChatPromptTemplate(
         [
             ("system", DIET_PLAN_PROMPT),
             ("placeholder", "{messages}"),
         ],
-        partial_variables={"df_str": df.to_markdown(index=True)}
+        partial_variables={"df_str": get_food_dataset_markdown()}
     )
     
     diet_plan_agent = create_react_agent(
-        model=get_llm(),
-        tools=[DuckDuckGoSearchRun()],
+        model=get_llm("diet_plan_node"),
+        tools=[get_search_tool()],
         prompt=diet_plan_prompt,
-        response_format=DietPlan
+        response_format=DietPlan,
+        post_model_hook=budget.post_model_hook if budget else None,
+        checkpointer=False,
     )
     
     print(f"✅ DEBUG: Diet plan agent created successfully")
@@ -111,24 +114,43 @@ def diet_plan_node(state: NutritionistState) -> Dict[str, Any]:
     intent = state["intent"]
     print(f"🔍 DEBUG: Intent received: {intent}")
     
-    diet_plan_agent = create_diet_plan_agent()
-    
-    # Build comprehensive message
-    original_message = state["messages"][-1].content if state["messages"] else ""
+    original_message = get_original_query(state)
     print(f"🔍 DEBUG: Original message: {original_message}")
     
+    # Assemble the plan from known recipes first; the model only fills the gaps.
+    # The library is only a cache: when it or the composer fails, the agent
+    # writes the whole plan
+    library = None
+    composition = None
+    try:
+        library = get_recipe_library()
+        if library is not None and intent and not intent.is_follow_up:
+            composition = compose_plan(library, original_message, intent)
+            if composition and not composition.gaps:
+                diet_plan_data = composition.to_diet_plan(intent)
+                print(f"📚 DEBUG: Composed {diet_plan_data.plan_name} from {composition.from_library} known recipes")
+                return {
+                    "diet_plan": diet_plan_data,
+                    "messages": [AIMessage(content=f"Here is your {diet_plan_data.plan_name}, composed from "
+                                                   f"{composition.from_library} recipes in the recipe library.",
+                                           name="diet_plan_node")]
+                }
+    except Exception as e:
+        print(f"⚠️ DEBUG: Plan composition failed, using the agent for the whole plan: {e}")
+        composition = None
+    
+    budget = NodeBudget.for_node("diet_plan_node")
+    diet_plan_agent = create_diet_plan_agent(budget)
+    
     # Detect the exact number of days requested
-    days_requested = None
-    if "3-day" in original_message.lower() or "3 day" in original_message.lower():
-        days_requested = 3
-    elif "5-day" in original_message.lower() or "5 day" in original_message.lower():
-        days_requested = 5
-    elif "week" in original_message.lower() or "7-day" in original_message.lower() or "7 day" in original_message.lower():
-        days_requested = 7
+    days_requested = requested_days(original_message)
     
     enhanced_message_parts = [f"DIET PLAN REQUEST: {original_message}"]
     
-    if days_requested:
+    if composition:
+        # The gap instructions below replace the whole-plan length instructions
+        days_requested = None
+    elif days_requested:
         enhanced_message_parts.append(f"\n⚠️ CRITICAL: Create EXACTLY {days_requested} days of meal plans!")
         enhanced_message_parts.append(f"The user specifically asked for {days_requested} days, so create exactly {days_requested} daily_plans.")
     
@@ -151,8 +173,23 @@ def diet_plan_node(state: NutritionistState) -> Dict[str, Any]:
         
         if intent.specific_foods:
             enhanced_message_parts.append(f"✅ Include these foods: {', '.join(intent.specific_foods)}")
+        
+        # The dataset's densest foods for the plan's focus, ranked locally
+        if not intent.is_follow_up:
+            hints = density_hints(intent)
+            if hints:
+                enhanced_message_parts.append(hints)
+        
+        previous_plan = (state.get("previous_results") or {}).get("diet_plan")
+        if intent.is_follow_up and previous_plan:
+            enhanced_message_parts.append(f"\n🔁 FOLLOW-UP: Revise this previous plan, changing only what the request asks for:")
+            enhanced_message_parts.append(previous_plan.model_dump_json())
     
-    enhanced_message_parts.append(f"""
+    if composition:
+        enhanced_message_parts.append("\n" + composition.gap_request())
+        enhanced_message_parts.append("\nCRITICAL: Return the exact JSON structure specified in the system prompt.")
+    else:
+        enhanced_message_parts.append(f"""
 📝 DIET PLAN REQUIREMENTS:
 1. Create EXACTLY {days_requested if days_requested else 'the requested number of'} days
 2. Each day must have breakfast, lunch, dinner, and snack arrays
@@ -171,17 +208,38 @@ CRITICAL: Return the exact JSON structure specified in the system prompt.
     
     try:
         print(f"🔍 DEBUG: Invoking diet plan agent...")
-        result = diet_plan_agent.invoke({
-            "messages": [HumanMessage(content=enhanced_message)]
-        })
+        with metrics.timer("node_seconds", node="diet_plan_node"):
+            result = diet_plan_agent.invoke(
+                {"messages": [HumanMessage(content=enhanced_message)]},
+                config={"recursion_limit": budget.recursion_limit},
+            )
+        record_tool_calls("diet_plan_node", result)
         
         print(f"🔍 DEBUG: Agent result received")
         diet_plan_data = result['structured_response']
         print(f"🔍 DEBUG: Diet plan has {len(diet_plan_data.daily_plans)} days")
         
+        # Only the recipes that break the constraints go back to the model
+        diet_plan_data, _, _ = enforce_plan(diet_plan_data, intent, lambda: get_llm("diet_plan_node"), "diet_plan_node")
+        
+        restrictions = intent.dietary_restrictions if intent else []
+        if composition:
+            generated = composition.fill(diet_plan_data)
+            print(f"🔍 DEBUG: Filled {len(generated)} of the plan's gaps, {len(composition.gaps)} left")
+            diet_plan_data = composition.to_diet_plan(intent)
+        else:
+            generated = [(meal, recipe) for _, meal, recipe in iter_plan_recipes(diet_plan_data)]
+        if library is not None:
+            # Every generated recipe widens what later plans can be composed from
+            for meal, recipe in generated:
+                try:
+                    library.add(recipe, restrictions, meals=[meal])
+                except Exception as e:
+                    print(f"⚠️ DEBUG: Could not store recipe in the library: {e}")
+        
         return {
             "diet_plan": diet_plan_data,
-            "messages": result.get("messages", [])
+            "messages": compact_messages(result.get("messages", []), "diet_plan_node")
         }
     except Exception as e:
         print(f"❌ ERROR in diet_plan_node: {e}")
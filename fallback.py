@@ -50,10 +50,11 @@ def create_fallback_agent():
     )
     
     fallback_agent = create_react_agent(
-        model=get_llm(),
+        model=get_llm("fallback_node"),
         tools=[],  # No tools needed for clarification
         prompt=fallback_prompt,
         name="fallback_agent",
+        checkpointer=False,
     )
     
     return fallback_agent
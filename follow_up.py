@@ -0,0 +1,152 @@
+"""
+Follow-ups answered from the session's previous results, without a model call.
+
+"Scale this to 4 servings", "give me the shopping list" or "show the
+nutrition chart again" only transform what the previous turn produced
+(state["previous_results"], see sessions.py). detect_follow_up recognises
+them and the workflow routes them straight to follow_up_node, skipping the
+guardrail, intent and generation agents.
+
+A message counts as a local follow-up only if it is nothing but the
+operation plus filler words. "Make it vegan for 4 people" also asks for a
+change, so it goes through the full workflow.
+"""
+import re
+from typing import Any, Dict, NamedTuple, Optional
+from langchain_core.messages import AIMessage
+from grocery import build_plan_grocery_list, build_recipe_grocery_list, format_grocery_list
+from ingredient_parser import scale_ingredient_line
+from metrics import metrics
+from state import NutritionistState, get_original_query
+
+class FollowUp(NamedTuple):
+    kind: str  # "scale", "shopping_list" or "chart"
+    servings: Optional[int] = None  # target servings for "scale"
+    factor: Optional[float] = None  # or a multiplier ("double it")
+
+_NUMBERS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+            "nine": 9, "ten": 10, "eleven": 11, "twelve": 12}
+_MULTIPLIERS = {"double": 2.0, "triple": 3.0, "quadruple": 4.0, "halve": 0.5, "half": 0.5}
+_NUMBER = r"\d+|" + "|".join(_NUMBERS)
+
+_SCALE = re.compile(
+    rf"\b(?:scale|scaled|adjust|resize|serve|serves|servings?|portions?|for|to)\s+(?:(?:it|this|up|down)\s+)?"
+    rf"(?:(?:to|for)\s+)?(?P<servings>{_NUMBER})(?:\s+(?:servings?|people|persons?|portions?|guests?))?\b"
+)
+_MULTIPLY = re.compile(
+    rf"\b(?P<multiplier>{'|'.join(_MULTIPLIERS)})\b"
+    r"(?:\s+(?:the\s+)?(?:quantities|amounts|portions?|servings?|ingredients|recipe))?"
+)
+_SHOPPING = re.compile(
+    r"\b(?:shopping|grocery|groceries|ingredients?)(?:\s+list)?\b|\bwhat\s+(?:do|should)\s+i\s+(?:need\s+to\s+)?buy\b"
+)
+_CHART = re.compile(
+    r"\b(?:(?:nutrition|nutritional|nutrient)\s+)?(?:chart|graph|plot|visuali[sz]ation)\b"
+    r"|\bvisuali[sz]e\b(?:\s+(?:the\s+)?(?:nutrition|nutritional)?(?:\s+info(?:rmation)?)?)?"
+)
+# Words that may surround an operation without asking for anything else
+_FILLER = re.compile(
+    r"\b(?:please|pls|can|could|would|will|you|i|me|us|my|we|the|this|that|these|it|its|recipe|dish|meal|"
+    r"plan|again|now|just|a|an|of|and|so|show|give|get|send|display|make|want|need|like|see|what|do|"
+    r"to|for|with|in|also|then|ok|okay|thanks|thank|version|list|up|out|quantities|amounts)\b"
+)
+
+def _only(pattern: re.Pattern, text: str) -> Optional[re.Match]:
+    """The pattern's match if the rest of the message is filler, else None."""
+    match = pattern.search(text)
+    if match and not _FILLER.sub(" ", pattern.sub(" ", text)).strip():
+        return match
+    return None
+
+def detect_follow_up(query: str, previous_results: Optional[Dict[str, Any]]) -> Optional[FollowUp]:
+    """
+    Recognise a follow-up that can be answered from the previous results.
+
+    Args:
+        query: The user's message
+        previous_results: The session's previous recipe / diet_plan / nutritional_info / grocery_list
+
+    Returns:
+        The FollowUp to apply, or None if the message needs the full workflow
+    """
+    if not previous_results or not query:
+        return None
+    text = re.sub(r"[^a-z0-9 ]+", " ", query.lower())
+    if len(text.split()) > 12:
+        return None
+    has_recipe = bool(previous_results.get("recipe"))
+    if has_recipe and (match := _only(_SCALE, text)):
+        servings = match.group("servings")
+        servings = int(servings) if servings.isdigit() else _NUMBERS[servings]
+        if servings > 0:
+            return FollowUp("scale", servings=servings)
+    if has_recipe and (match := _only(_MULTIPLY, text)):
+        return FollowUp("scale", factor=_MULTIPLIERS[match.group("multiplier")])
+    if _only(_SHOPPING, text) and any(previous_results.get(key) for key in ("grocery_list", "recipe", "diet_plan")):
+        return FollowUp("shopping_list")
+    if _only(_CHART, text) and any(previous_results.get(key) for key in ("recipe", "diet_plan", "nutritional_info")):
+        return FollowUp("chart")
+    return None
+
+def route_follow_up(state: NutritionistState) -> str:
+    """Workflow entry: local follow-ups go to follow_up_node, everything else to the guardrail."""
+    if detect_follow_up(get_original_query(state), state.get("previous_results")):
+        print(f"⚡ DEBUG: Local follow-up, skipping the model")
+        return "follow_up_node"
+    return "clinical_guardrail"
+
+def _scale(previous: Dict[str, Any], follow_up: FollowUp) -> Dict[str, Any]:
+    recipe = previous["recipe"]
+    servings = follow_up.servings or max(1, round(recipe.servings * follow_up.factor))
+    factor = servings / recipe.servings if recipe.servings else 1.0
+    scaled = recipe.model_copy(update={
+        "servings": servings,
+        "ingredients": [scale_ingredient_line(line, factor) for line in recipe.ingredients],
+    })
+    grocery_list = previous.get("grocery_list")
+    grocery_list = grocery_list.model_copy(deep=True) if grocery_list else build_recipe_grocery_list(recipe)
+    grocery_list.scale_quantities(servings)
+    return {
+        "recipe": scaled,
+        "grocery_list": grocery_list,
+        "messages": [AIMessage(content=f"Scaled {recipe.name} from {recipe.servings} to {servings} servings.",
+                               name="follow_up_node")],
+    }
+
+def _shopping_list(previous: Dict[str, Any]) -> Dict[str, Any]:
+    grocery_list = previous.get("grocery_list")
+    if grocery_list is None:
+        grocery_list = (build_plan_grocery_list(previous["diet_plan"]) if previous.get("diet_plan")
+                        else build_recipe_grocery_list(previous["recipe"]))
+    return {
+        "grocery_list": grocery_list,
+        "messages": [AIMessage(content=format_grocery_list(grocery_list), name="follow_up_node")],
+    }
+
+def _chart(previous: Dict[str, Any]) -> Dict[str, Any]:
+    from visualization import visual_node
+    # visual_node reads the results from the state, so hand it the previous ones
+    update = visual_node({key: previous[key] for key in ("recipe", "diet_plan", "nutritional_info") if key in previous})
+    update.pop("error", None)
+    return update
+
+def follow_up_node(state: NutritionistState) -> Dict[str, Any]:
+    """
+    Answer a follow-up from the session's previous results: scale the recipe
+    (quantities and grocery list), return the shopping list, or re-render
+    the nutrition chart. No model calls.
+    """
+    previous = state.get("previous_results") or {}
+    follow_up = detect_follow_up(get_original_query(state), previous)
+    if follow_up is None:
+        return {}
+    print(f"🔍 DEBUG: Answering follow-up locally: {follow_up}")
+    with metrics.timer("node_seconds", node="follow_up_node"):
+        if follow_up.kind == "scale":
+            update = _scale(previous, follow_up)
+        elif follow_up.kind == "shopping_list":
+            update = _shopping_list(previous)
+        else:
+            update = _chart(previous)
+    metrics.increment("follow_ups_local", kind=follow_up.kind)
+    return update
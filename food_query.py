@@ -0,0 +1,394 @@
+"""
+Nutrition questions answered straight from the food dataset.
+
+"Which foods are highest in fiber and lowest in calories?" or "foods with
+more than 5 g protein under 100 calories" only need the dataset's columns
+(Calories, Protein, Fiber, Vitamin C, Antioxidant Score). parse_food_query
+turns the request into a FoodQuery: objectives to rank by, numeric
+filters, foods to look up and a result count. run_food_query then applies
+it to the columns with vectorized NumPy filters and ranks, and builds the
+NutritionalInfo without a model call. nutritional_info_node only falls back
+to its agent for nutrients the dataset lacks (calcium, iron, ...), for
+dietary restrictions it can't check, and for questions it can't parse.
+
+With several objectives, foods are ranked by their average percentile
+across them, so "high fiber, low calorie" balances both rather than
+sorting by one and breaking ties with the other. Questions about nutrient
+density ("nutrient-dense foods", "most protein per calorie", "best
+trade-offs") read the precomputed index (see nutrient_density.py): a single
+objective is its top k, read in O(k) instead of ranking the table.
+"""
+import re
+import time
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from constraints import ConstraintMatcher, compile_constraints
+from metrics import metrics
+from models import Intent, NutritionalInfo
+from nutrient_density import PER_GRAM, PER_KCAL, SCORE
+import config
+
+# Nutrient -> (dataset column, unit, pattern matching its mentions)
+NUTRIENTS = {
+    "calories": ("Calories", "kcal", r"calori\w*|kcal|energy"),
+    "protein": ("Protein (g)", "g", r"proteins?"),
+    "fiber": ("Fiber (g)", "g", r"fib(?:er|re)s?"),
+    "vitamin c": ("Vitamin C (mg)", "mg", r"vitamin\s*c\b|vit\.?\s*c\b|ascorbic acid"),
+    "antioxidants": ("Antioxidant Score", "", r"antioxidants?|orac"),
+}
+_MENTION = re.compile("|".join(f"(?P<n{i}>{pattern})" for i, (_, _, pattern) in enumerate(NUTRIENTS.values())))
+_NAMES = list(NUTRIENTS)
+
+# Nutrients the dataset has no column for; questions about them go to the agent
+_MISSING = re.compile(
+    r"\b(?:calcium|iron|potassium|magnesium|zinc|sodium|salt|sugars?|fats?|carb\w*|omega|folate|folic|"
+    r"vitamin\s*(?:a|b\d*|d|e|k)\b|cholesterol|selenium|iodine|b12)\b"
+)
+_MAXIMIZE = re.compile(r"\b(?:high|higher|highest|rich|richest|most|more|best|good|great|top|packed|loaded|"
+                       r"max|maximum|maximi[sz]e|plenty|lots)\b")
+_MINIMIZE = re.compile(r"\b(?:low|lower|lowest|least|less|fewest|fewer|minimal|light|min|minimum|minimi[sz]e)\b")
+_COMPARE = r"(?P<op>under|below|less than|fewer than|at most|no more than|max(?:imum)?|<|over|above|more than|at least|min(?:imum)?|>)"
+_NUMBER = r"(?P<value>\d+(?:\.\d+)?)\s*(?:g|grams?|mg|kcal|cal)?"
+_TOP = re.compile(r"\btop\s+(\d+)\b|\b(\d+)\s+(?:foods?|items|options|sources|picks)\b")
+_PER_100G = re.compile(r"\bper\s*100\s*g|\bper\s+gram\b|\bby\s+weight\b")
+_PER_KCAL = re.compile(r"\bper\s*(?:100\s*)?(?:kcal|calories?|cal)\b|\bcalorie for calorie\b")
+_DENSE = re.compile(r"\bnutrient[\s-]*dens\w*|\bnutritional(?:ly)? dens\w*|\bmost nutritious\b|\bhealthiest\b")
+_PARETO = re.compile(r"\bpareto\b|\btrade[\s-]*offs?\b|\bdominated\b|\ball[\s-]*round\w*")
+BASIS_LABELS = {"serving": "per serving", "100g": "per 100 g", "kcal": "per 100 kcal"}
+_UPPER = {"under", "below", "less than", "fewer than", "at most", "no more than", "max", "maximum", "<"}
+
+class FoodTable:
+    """
+    Column-oriented food dataset.
+
+    Args:
+        names: Food names
+        columns: Nutrient name (see NUTRIENTS) -> float array, one value per food and serving
+        grams: Serving size in grams per food
+        servings: Serving description per food ("1 cup, chopped")
+        density: The store's DensityIndex, or None to compute densities on the fly
+    """
+
+    def __init__(self, names: List[str], columns: Dict[str, "np.ndarray"], grams: "np.ndarray",
+                 servings: List[str], density=None):
+        self.names = names
+        self.columns = columns
+        self.grams = grams
+        self.servings = servings
+        self.density = density
+        self._lookup = None
+        self._allowed = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def allowed(self, matcher: Optional[ConstraintMatcher]) -> "np.ndarray":
+        """Whether each food passes a request's constraints, computed once per constraint set."""
+        import numpy as np
+        if matcher not in self._allowed:
+            allowed = np.ones(len(self), dtype=bool)
+            if matcher is not None:
+                allowed[matcher.rejected(self.names)] = False
+            self._allowed[matcher] = allowed
+        return self._allowed[matcher]
+
+    def values(self, nutrient: str, basis: str = "serving") -> "np.ndarray":
+        """
+        A nutrient per serving, per 100 g or per 100 kcal (see BASIS_LABELS)
+        for every food. "density" is the overall density score; calories
+        stay per serving on the per-kcal basis.
+        """
+        import numpy as np
+        metric = SCORE if nutrient == "density" else \
+            (PER_KCAL if basis == "kcal" else PER_GRAM if basis == "100g" else {}).get(nutrient)
+        if metric and self.density is not None:
+            return self.density.values(metric)
+        if basis == "kcal" and nutrient != "calories":
+            return self.columns[nutrient] / np.maximum(self.columns["calories"], config.DENSITY_KCAL_FLOOR) * 100
+        if basis == "100g":
+            return self.columns[nutrient] * 100.0 / np.where(self.grams > 0, self.grams, np.nan)
+        return self.columns[nutrient]
+
+    def find(self, text: str) -> List[int]:
+        """Rows of the foods named in a text (singular or plural), in order of mention."""
+        if self._lookup is None:
+            # Name words -> row, with and without a plural "s", for n-gram lookups
+            lookup = {}
+            for row, name in enumerate(self.names):
+                words = tuple(re.findall(r"[a-z]+", name.lower()))
+                if words:
+                    lookup.setdefault(words, row)
+                    last = words[-1][:-1] if words[-1].endswith("s") else words[-1] + "s"
+                    lookup.setdefault(words[:-1] + (last,), row)
+            self._longest = max((len(words) for words in lookup), default=0)
+            self._lookup = lookup
+        words = re.findall(r"[a-z]+", text.lower())
+        rows = []
+        for start in range(len(words)):
+            for length in range(min(self._longest, len(words) - start), 0, -1):
+                row = self._lookup.get(tuple(words[start:start + length]))
+                if row is not None:
+                    if row not in rows:
+                        rows.append(row)
+                    break
+        return rows
+
+@lru_cache(maxsize=1)
+def load_food_table() -> FoodTable:
+    """The food dataset as a FoodTable over the memory-mapped food store and its density index."""
+    import numpy as np
+    from food_store import GRAMS_COLUMN, open_food_store
+    from nutrient_density import DensityIndex
+    store = open_food_store()
+    # Float columns stay memory-mapped; whole-number columns are converted once
+    columns = {name: np.asarray(store[column], dtype=np.float64) for name, (column, _, _) in NUTRIENTS.items()}
+    return FoodTable(store["Food"], columns, np.asarray(store[GRAMS_COLUMN], dtype=np.float64), store["Quantity"],
+                     DensityIndex(store.path))
+
+class FoodQuery(NamedTuple):
+    objectives: List[Tuple[str, int]]  # (nutrient or "density", +1 to maximize / -1 to minimize)
+    filters: List[Tuple[str, str, float]]  # (nutrient, "<=" or ">=", value), on the basis
+    foods: List[int]  # rows named in the question, to look up
+    nutrients: List[str]  # nutrients mentioned, shown for a lookup
+    k: int
+    basis: str  # "serving", "100g" or "kcal" (see BASIS_LABELS)
+    pareto: bool  # only foods on the density Pareto frontier
+
+def _mentions(text: str) -> List[Tuple[str, int, int]]:
+    """(nutrient, start, end) for every nutrient mentioned, in order."""
+    return [(_NAMES[int(match.lastgroup[1:])], match.start(), match.end()) for match in _MENTION.finditer(text)]
+
+def parse_food_query(query: str, intent: Optional[Intent], table: FoodTable) -> Optional[FoodQuery]:
+    """
+    Read a nutrition question as a query over the dataset.
+
+    Returns:
+        The FoodQuery, or None when the dataset can't answer it: a nutrient
+        it lacks, a dietary restriction food names can't decide ("keto"),
+        or nothing to rank or look up. A question only mentioning a
+        nutrient ("how much protein do I need?") is advice for the agent:
+        the question itself must name a direction, a threshold, a top N,
+        nutrient density or a food in the dataset
+    """
+    text = f"{query} {intent.nutritional_requirements if intent else ''}".lower()
+    matcher = compile_constraints(intent)
+    if _MISSING.search(text) or (matcher is not None and matcher.unchecked):
+        return None
+    mentions = _mentions(text)
+
+    filters = []
+    directed = []  # starts of the mentions carrying a threshold or direction
+    for nutrient, start, end in mentions:
+        # "under 100 calories" / "more than 5 g of protein" / "protein over 5 g"
+        before = re.search(rf"{_COMPARE}\s*{_NUMBER}\s*(?:of\s+)?$", text[max(0, start - 30):start])
+        after = re.match(rf"\s*(?:of\s+)?{_COMPARE}\s*{_NUMBER}", text[end:end + 30])
+        match = before or after
+        if match:
+            filters.append((nutrient, "<=" if match.group("op") in _UPPER else ">=", float(match.group("value"))))
+            directed.append(start)
+
+    objectives = []
+    previous_end = 0
+    for nutrient, start, end in mentions:
+        # The direction word closest before the mention, after the previous one
+        window = text[max(previous_end, start - 30):start]
+        suffix = text[end:end + 8]
+        words = [(m.start(), +1) for m in _MAXIMIZE.finditer(window)] + [(m.start(), -1) for m in _MINIMIZE.finditer(window)]
+        if words:
+            direction = max(words)[1]
+        elif re.match(r"[\s-]*(?:rich|dense|packed|loaded)", suffix):
+            direction = +1
+        elif re.match(r"[\s-]*(?:free|light)", suffix):
+            direction = -1
+        else:
+            direction = 0
+        previous_end = end
+        if direction:
+            directed.append(start)
+        if direction and nutrient not in [n for n, _ in objectives]:
+            objectives.append((nutrient, direction))
+
+    foods = table.find(query)
+    if intent:
+        for food in intent.specific_foods:
+            rows = table.find(food)
+            if not rows:
+                return None  # a food outside the dataset needs the agent's search
+            foods.extend(row for row in rows if row not in foods)
+    dense, pareto = bool(_DENSE.search(text)), bool(_PARETO.search(text))
+    basis = "100g" if _PER_100G.search(text) else "kcal" if (dense or pareto or _PER_KCAL.search(text)) else "serving"
+    if basis == "kcal":
+        # Per-kcal densities already weigh calories; "under 300 calories" still filters servings
+        objectives = [(nutrient, direction) for nutrient, direction in objectives if nutrient != "calories"]
+        if dense or pareto:
+            # "trade-offs for vitamin C and fiber": every nutrient named counts up
+            objectives += [(nutrient, +1) for nutrient in dict.fromkeys(n for n, _, _ in mentions)
+                           if nutrient != "calories" and nutrient not in dict(objectives)]
+        if not objectives and (dense or pareto):
+            objectives = [("density", +1)]
+    top = _TOP.search(text)
+    # The question itself has to ask for a ranking, not only the Intent's requirements
+    asked = query.lower()
+    if not (foods or _TOP.search(asked) or _DENSE.search(asked) or _PARETO.search(asked)
+            or any(start < len(asked) for start in directed)):
+        return None
+    if not objectives and not foods:
+        if filters:
+            # "foods under 50 calories": rank by the filtered nutrients
+            objectives = [(nutrient, -1 if op == "<=" else +1) for nutrient, op, _ in filters]
+        elif mentions and top:
+            # "top 5 protein foods": the richest sources
+            objectives = [(mentions[0][0], +1)]
+        else:
+            return None
+    k = int(top.group(1) or top.group(2)) if top else config.FOOD_QUERY_TOP_K
+    nutrients = list(dict.fromkeys(nutrient for nutrient, _, _ in mentions))
+    return FoodQuery(objectives, filters, foods, nutrients, max(1, k), basis, pareto)
+
+def run_food_query(table: FoodTable, food_query: FoodQuery, matcher: Optional[ConstraintMatcher] = None) -> List[int]:
+    """
+    Rows answering a FoodQuery, best first: the named foods for a lookup,
+    else the top k foods that pass every filter and the request's
+    constraints (see constraints.py), ranked by their mean percentile
+    across the objectives.
+    """
+    import numpy as np
+    if food_query.foods and not food_query.objectives:
+        return food_query.foods
+    allowed = table.allowed(matcher)
+    (nutrient, direction), = food_query.objectives[:1] or [(None, 0)]
+    if (table.density is not None and len(food_query.objectives) == 1 and direction > 0
+            and not food_query.filters and not food_query.pareto
+            and (nutrient == "density" or (food_query.basis == "kcal" and nutrient in PER_KCAL)
+                 or (food_query.basis == "100g" and nutrient in PER_GRAM))):
+        # One density to maximize: the head of its precomputed order
+        metric = SCORE if nutrient == "density" else (PER_KCAL if food_query.basis == "kcal" else PER_GRAM)[nutrient]
+        return table.density.top(metric, food_query.k, skip=lambda row: not allowed[row])
+
+    def values(nutrient: str) -> "np.ndarray":
+        return table.values(nutrient, "serving" if nutrient == "calories" and food_query.basis == "kcal"
+                            else food_query.basis)
+
+    mask = allowed.copy()
+    for nutrient, op, value in food_query.filters:
+        column = values(nutrient)
+        mask &= (column <= value) if op == "<=" else (column >= value)
+    for nutrient, _ in food_query.objectives:
+        mask &= ~np.isnan(values(nutrient))
+    if food_query.pareto:
+        frontier = np.zeros(len(table), dtype=bool)
+        if table.density is not None:
+            frontier[table.density.pareto()] = True
+        mask &= frontier
+    candidates = np.flatnonzero(mask)
+    if not len(candidates):
+        return []
+    # Percentile rank per objective (1.0 is best), averaged
+    score = np.zeros(len(candidates))
+    ranks = np.empty(len(candidates))
+    for nutrient, direction in food_query.objectives:
+        ranks[np.argsort(values(nutrient)[candidates] * direction)] = np.arange(len(candidates))
+        score += ranks / max(1, len(candidates) - 1)
+    k = min(food_query.k, len(candidates))
+    top = np.argpartition(-score, k - 1)[:k]
+    return [int(candidates[i]) for i in top[np.argsort(-score[top], kind="stable")]]
+
+def _value(table: FoodTable, nutrient: str, row: int, basis: str) -> str:
+    if nutrient == "calories":
+        if basis == "kcal":
+            return f"{table.values(nutrient)[row]:.0f} kcal per serving"
+        return f"{table.values(nutrient, basis)[row]:.0f} kcal"
+    value = table.values(nutrient, basis)[row]
+    unit = NUTRIENTS[nutrient][1]
+    return f"{value:.{0 if nutrient == 'antioxidants' else 1}f}{' ' + unit if unit else ''} {nutrient}"
+
+def build_nutritional_info(table: FoodTable, food_query: FoodQuery, rows: List[int],
+                           matcher: Optional[ConstraintMatcher] = None) -> NutritionalInfo:
+    """The NutritionalInfo for a query's result rows; its food sources fit the matcher's constraints."""
+    import numpy as np
+    allowed = table.allowed(matcher)
+    basis = BASIS_LABELS[food_query.basis]
+    shown = [nutrient for nutrient, _ in food_query.objectives] + \
+            [nutrient for nutrient, _, _ in food_query.filters if nutrient not in dict(food_query.objectives)]
+    shown = shown or food_query.nutrients or list(NUTRIENTS)
+    if "density" in shown:
+        shown = [nutrient for nutrient in shown if nutrient != "density"] + \
+                [nutrient for nutrient in PER_KCAL if nutrient not in shown]
+    if food_query.objectives:
+        wanted = ", ".join("highest overall nutrient density" if nutrient == "density" else
+                           f"{'highest' if direction > 0 else 'lowest'} {nutrient}"
+                           + (f" {basis}" if food_query.basis != "serving" else "")
+                           for nutrient, direction in food_query.objectives)
+        summary = f"Foods from the dataset with the {wanted}"
+    else:
+        summary = f"Nutrition facts for {', '.join(table.names[row] for row in rows)}"
+    if food_query.pareto:
+        summary += ", among foods on the nutrient-density Pareto frontier"
+    if food_query.filters:
+        summary += " (" + ", ".join(f"{nutrient} {'at most' if op == '<=' else 'at least'} {value:g}"
+                                    for nutrient, op, value in food_query.filters) + ")"
+
+    recommendations = [
+        f"{table.names[row]}: " + ", ".join(_value(table, nutrient, row, food_query.basis) for nutrient in shown)
+        + (f" per serving ({table.servings[row]})" if food_query.basis == "serving" else f" {basis}")
+        for row in rows
+    ]
+    breakdown, sources = {}, {}
+    for nutrient in shown:
+        nutrient_basis = "serving" if nutrient == "calories" and food_query.basis == "kcal" else food_query.basis
+        column = table.values(nutrient, nutrient_basis)
+        unit = NUTRIENTS[nutrient][1]
+        picked = column[rows] if rows else column
+        low, high = np.nanmin(picked), np.nanmax(picked)
+        span = f"{low:.1f}" if low == high else f"{low:.1f}-{high:.1f}"
+        breakdown[nutrient.title()] = (f"{span}{' ' + unit if unit else ''} {BASIS_LABELS[nutrient_basis]} "
+                                       f"{'in these foods' if rows else 'across the dataset'}; "
+                                       f"dataset median {np.nanmedian(column):.1f}")
+        if nutrient == "calories":
+            continue  # the most caloric foods are no recommendation
+        metric = (PER_KCAL if nutrient_basis == "kcal" else PER_GRAM if nutrient_basis == "100g" else {}).get(nutrient)
+        if metric and table.density is not None:
+            best = table.density.top(metric, 5, skip=lambda row: not allowed[row])
+        else:
+            best = [row for row in np.argsort(-np.where(allowed, np.nan_to_num(column, nan=-np.inf), -np.inf))[:5]
+                    if allowed[row]]
+        sources[f"Richest in {nutrient}" + (f" {BASIS_LABELS[nutrient_basis]}" if nutrient_basis != "serving" else "")] = \
+            [table.names[i] for i in best]
+    if food_query.basis == "kcal" and table.density is not None:
+        sources["Nutrient-density Pareto frontier"] = [table.names[i] for i in table.density.pareto() if allowed[i]][:8]
+    notes = (f"Values are {basis} as listed in the food dataset ({len(table)} foods). "
+             + (f"Per-kcal densities count servings under {config.DENSITY_KCAL_FLOOR:g} kcal as "
+                f"{config.DENSITY_KCAL_FLOOR:g} kcal, so spices don't dominate. " if food_query.basis == "kcal" else "")
+             + ("Overall nutrient density is the average percentile of protein, fiber, vitamin C and "
+                "antioxidants per calorie. " if any(n == "density" for n, _ in food_query.objectives) else "")
+             + ("The Pareto frontier lists foods no other food beats on all four densities at once. "
+                if food_query.pareto else "")
+             + ("Foods are ranked by their average percentile across the criteria, so every criterion counts. "
+                if len(food_query.objectives) > 1 else "")
+             + ("No food in the dataset meets every criterion. " if not rows else ""))
+    return NutritionalInfo(query_summary=summary, food_recommendations=recommendations,
+                           nutritional_breakdown=breakdown, food_sources=sources, additional_notes=notes.strip())
+
+def answer_from_dataset(query: str, intent: Optional[Intent]) -> Optional[NutritionalInfo]:
+    """
+    NutritionalInfo for a question the dataset can answer on its own.
+
+    Args:
+        query: The user's question
+        intent: Its Intent, for constraints, specific foods and requirements
+
+    Returns:
+        The answer, or None when the agent is needed
+    """
+    start = time.perf_counter()
+    table = load_food_table()
+    food_query = parse_food_query(query, intent, table)
+    if food_query is None:
+        metrics.increment("food_query", result="agent")
+        return None
+    matcher = compile_constraints(intent)
+    rows = run_food_query(table, food_query, matcher)
+    info = build_nutritional_info(table, food_query, rows, matcher)
+    metrics.observe("food_query_seconds", time.perf_counter() - start)
+    metrics.increment("food_query", result="dataset")
+    return info
@@ -0,0 +1,407 @@
+"""
+Columnar, memory-mapped storage for the food dataset.
+
+cleaning_visualization.ipynb turned "Top 100 Healthiest Food in the World.csv"
+into clean-food.csv by hand: it checked for missing values and mapped each
+serving description ("1 cup, chopped") to grams. ingest() runs the same
+steps as a repeatable pipeline over CSVs of any size and nutrient count.
+It streams the rows, validates them against SCHEMA, and writes one .npy
+file per column. FoodStore maps those files lazily, so start-up reads a
+small manifest instead of parsing CSV, and a column is only paged in when
+a query touches it.
+
+The store path is a symlink to a versioned directory beside it
+(<path>.v<timestamp>). ingest() writes a new version and swaps the symlink
+with one os.replace(), so readers see the old store or the new one, never
+a mix. Rebuilds hold an exclusive lock on <path>.lock, so processes
+starting together build the store once.
+
+Store layout (a versioned directory):
+
+    manifest.json           schema, row count, rejected rows, source size/mtime
+    density/                nutrient-density metrics and Pareto frontier (see nutrient_density.py)
+    <column>.npy            numeric column: int64 when every value is whole, else float64
+    <column>.str.npy        string column as UTF-8 bytes ...
+    <column>.off.npy        ... with int64 offsets, one more than the rows
+
+    python food_store.py ingest "Top 100 Healthiest Food in the World.csv"
+    python food_store.py info
+"""
+import argparse
+import csv
+import fcntl
+import glob
+import json
+import math
+import os
+import re
+import shutil
+import time
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from metrics import metrics
+import config
+
+FORMAT_VERSION = 2
+
+# Required columns and their kinds; other columns are numeric when their
+# first INFER_ROWS values all parse as numbers, else text
+SCHEMA = {
+    "Food": "str",
+    "Quantity": "str",
+    "Calories": "number",
+    "Protein (g)": "number",
+    "Fiber (g)": "number",
+    "Vitamin C (mg)": "number",
+    "Antioxidant Score": "number",
+}
+GRAMS_COLUMN = "Quantity (g)"
+INFER_ROWS = 1000
+
+# Serving sizes mapped by hand in cleaning_visualization.ipynb
+SERVING_GRAMS = {
+    "1 cup, chopped": 150, "1 cup": 240, "3 oz": 85, "1 clove": 5, "1 cup, raw": 240, "1 oz (23 nuts)": 28,
+    "1 medium": 182, "1 cup, cooked": 250, "1 cup, brewed": 240, "1 tsp, ground": 5, "1 large": 200, "1 oz": 28,
+    "6 oz": 170, "1 oz (14 halves)": 28, "1 tbsp, grated": 6, "1 tbsp": 14, "3.75 oz, canned": 106,
+    "1 tbsp, ground": 5, "1 sheet, nori": 3, "1 cup, with pits": 150, "1 cup, sliced": 150,
+    "1 oz (49 kernels)": 28, "1 cup, cubed": 165, "1 oz (6-8 nuts)": 28, "1 cup, shelled": 140, "3 tbsp": 42,
+    "1 cup, chunks": 180, "1/2 medium": 91, "2 cups": 480, "3 oz, cooked": 85, "100g, pulp": 100,
+    "1/4 cup, chopped": 37, "1 cup, diced": 150, "1 cup, shredded": 85, "3 oz, canned in water": 85,
+    "1 cup, whole": 240, "1/4 cup": 60, "1/2 cup": 120, "1 cup, sections": 150,
+}
+# Grams per unit for serving descriptions not in SERVING_GRAMS
+UNIT_GRAMS = {"g": 1, "gram": 1, "grams": 1, "kg": 1000, "ml": 1, "l": 1000, "oz": 28.35, "lb": 453.6,
+              "cup": 240, "cups": 240, "tbsp": 14, "tsp": 5, "medium": 182, "large": 200, "small": 120}
+_SERVING = re.compile(r"^\s*(\d+(?:\.\d+)?|\d+/\d+)\s*(g|grams?|kg|ml|l|oz|lb|cups?|tbsp|tsp|medium|large|small)\b")
+
+def serving_grams(quantity: str) -> float:
+    """Grams in a serving description such as "1 cup, sliced" or "3.5 oz"; NaN when unknown."""
+    quantity = quantity.strip()
+    if quantity in SERVING_GRAMS:
+        return float(SERVING_GRAMS[quantity])
+    match = _SERVING.match(quantity.lower())
+    if not match:
+        return math.nan
+    amount, unit = match.groups()
+    numerator, _, denominator = amount.partition("/")
+    return float(numerator) / float(denominator or 1) * UNIT_GRAMS[unit]
+
+def _file_stem(column: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", column.lower()).strip("_")
+
+def _source_stamp(path: str) -> Dict[str, int]:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+@contextmanager
+def _build_lock(path: str) -> Iterator[None]:
+    """Exclusive lock on <path>.lock, held while the store is rebuilt."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _swap(path: str, version: str) -> None:
+    """Point the store symlink at a new version directory in one rename."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        # A store from before versioned directories: move it aside once
+        os.rename(path, f"{path}.v0")
+        os.symlink(os.path.basename(f"{path}.v0"), path)
+    link = f"{path}.link-{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(version), link)
+    os.replace(link, path)
+
+def _prune(path: str, keep: int = 2) -> None:
+    """Remove old versions, keeping the newest `keep` so stores already open can still map their columns."""
+    current = os.path.realpath(path)
+    versions = sorted(glob.glob(f"{glob.escape(path)}.v*"), key=os.path.getmtime, reverse=True)
+    for version in versions[keep:]:
+        if os.path.realpath(version) != current:
+            shutil.rmtree(version, ignore_errors=True)
+
+class IngestReport(NamedTuple):
+    rows: int
+    rejected: Dict[str, int]  # reason -> rows
+    columns: Dict[str, str]  # column -> "int", "float" or "str"
+    seconds: float
+
+def ingest(source: str, path: str = config.FOOD_STORE_PATH) -> IngestReport:
+    """
+    Clean and validate a food CSV and write it as a store.
+
+    Rows are rejected, and counted by reason, when the food name is missing
+    or repeated (case-insensitively), or a numeric cell is not a finite,
+    non-negative number. Empty cells are rejected in required columns and
+    stored as NaN in the others. The "Quantity (g)" column is derived from
+    "Quantity" when the CSV has none, or where its cell is empty.
+
+    The new version is swapped in with a single symlink rename while the
+    build lock is held (see the module docstring).
+
+    Args:
+        source: CSV with at least the SCHEMA columns
+        path: Store path (a symlink to the current version)
+
+    Returns:
+        What was written and rejected
+
+    Raises:
+        ValueError: A required column is missing or not numeric
+    """
+    with _build_lock(path):
+        return _ingest(source, path)
+
+def _ingest(source: str, path: str) -> IngestReport:
+    import numpy as np
+    start = time.perf_counter()
+    with open(source, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        missing = [name for name in SCHEMA if name not in header]
+        if missing:
+            raise ValueError(f"{source}: missing required columns {missing}")
+        head = [row for _, row in zip(range(INFER_ROWS), reader)]
+        kinds = {}
+        for i, name in enumerate(header):
+            if SCHEMA.get(name) == "str":
+                kinds[name] = "str"
+                continue
+            numeric = True
+            for row in head:
+                cell = row[i].strip() if i < len(row) else ""
+                try:
+                    float(cell) if cell else None
+                except ValueError:
+                    numeric = False
+                    break
+            if not numeric and (SCHEMA.get(name) == "number" or name == GRAMS_COLUMN):
+                raise ValueError(f"{source}: column {name!r} is not numeric")
+            kinds[name] = "number" if numeric else "str"
+        if GRAMS_COLUMN not in kinds:
+            kinds[GRAMS_COLUMN] = "number"
+
+        numbers = {name: array("d") for name, kind in kinds.items() if kind == "number"}
+        whole = {name: True for name in numbers}
+        texts = {name: (bytearray(), array("q", [0])) for name, kind in kinds.items() if kind == "str"}
+        positions = {name: header.index(name) for name in kinds if name in header}
+        required = [name for name, kind in SCHEMA.items() if kind == "number"]
+        rejected: Dict[str, int] = {}
+        seen = set()
+
+        def reject(reason: str) -> None:
+            rejected[reason] = rejected.get(reason, 0) + 1
+
+        for row in _chain(head, reader):
+            cells = {name: (row[i].strip() if i < len(row) else "") for name, i in positions.items()}
+            key = cells["Food"].lower()
+            if not key:
+                reject("missing Food")
+                continue
+            if key in seen:
+                reject("duplicate Food")
+                continue
+            values, reason = {}, None
+            for name in numbers:
+                cell = cells.get(name, "")
+                if not cell:
+                    if name in required:
+                        reason = f"missing {name}"
+                        break
+                    values[name] = math.nan
+                    continue
+                try:
+                    value = float(cell)
+                except ValueError:
+                    reason = f"non-numeric {name}"
+                    break
+                if not math.isfinite(value) or value < 0:
+                    reason = f"invalid {name}"
+                    break
+                values[name] = value
+            if reason:
+                reject(reason)
+                continue
+            if math.isnan(values[GRAMS_COLUMN]):
+                values[GRAMS_COLUMN] = serving_grams(cells["Quantity"])
+            seen.add(key)
+            for name, value in values.items():
+                numbers[name].append(value)
+                if whole[name] and not value.is_integer():
+                    whole[name] = False
+            for name, (data, offsets) in texts.items():
+                data += cells[name].encode("utf-8")
+                offsets.append(len(data))
+
+    # Written to a new version directory, then swapped in, so readers never see half a store
+    tmp = f"{path}.v{time.time_ns()}"
+    os.makedirs(tmp)
+    columns = {}
+    for name in kinds:
+        stem = _file_stem(name)
+        if name in numbers:
+            values = np.frombuffer(numbers[name], dtype=np.float64)
+            if whole[name]:
+                values = values.astype(np.int64)
+            np.save(os.path.join(tmp, f"{stem}.npy"), values)
+            columns[name] = {"kind": "int" if whole[name] else "float", "file": f"{stem}.npy"}
+        else:
+            data, offsets = texts[name]
+            np.save(os.path.join(tmp, f"{stem}.str.npy"), np.frombuffer(bytes(data), dtype=np.uint8))
+            np.save(os.path.join(tmp, f"{stem}.off.npy"), np.frombuffer(offsets, dtype=np.int64))
+            columns[name] = {"kind": "str", "file": f"{stem}.str.npy", "offsets": f"{stem}.off.npy"}
+    rows = len(seen)
+    from nutrient_density import precompute
+    density = precompute({name: np.frombuffer(values, dtype=np.float64) for name, values in numbers.items()}, tmp)
+    manifest = {"version": FORMAT_VERSION, "rows": rows, "columns": columns, "rejected": rejected,
+                "density": density, "source": {"path": os.path.abspath(source), **_source_stamp(source)}}
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    _swap(path, tmp)
+    _prune(path)
+
+    seconds = time.perf_counter() - start
+    metrics.observe("food_store_seconds", seconds, stage="ingest")
+    if rejected:
+        print(f"⚠️ DEBUG: Food store: rejected {sum(rejected.values())} rows of {source}: {rejected}")
+    return IngestReport(rows, rejected, {name: spec["kind"] for name, spec in columns.items()}, seconds)
+
+def _chain(first: List[list], rest):
+    yield from first
+    yield from rest
+
+class StringColumn:
+    """A text column read from memory-mapped UTF-8 bytes, one value at a time."""
+
+    def __init__(self, data: "np.ndarray", offsets: "np.ndarray"):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        if row < 0:
+            row += len(self)
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return self._data[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        data = self._data
+        offsets = self._offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield data[start:end].tobytes().decode("utf-8")
+
+    def tolist(self) -> List[str]:
+        return list(self)
+
+class FoodStore:
+    """
+    A store written by ingest(), mapped column by column on first access.
+
+    Args:
+        path: Store path; the version it points to when opened is the one read
+
+    Raises:
+        ValueError: The store is from another format version or lacks a SCHEMA column
+    """
+
+    def __init__(self, path: str = config.FOOD_STORE_PATH):
+        start = time.perf_counter()
+        # Resolved once, so a rebuild swapping the symlink cannot mix versions
+        self.path = os.path.realpath(path)
+        with open(os.path.join(self.path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: store format {self.manifest.get('version')}, expected {FORMAT_VERSION}")
+        missing = [name for name in list(SCHEMA) + [GRAMS_COLUMN] if name not in self.manifest["columns"]]
+        if missing:
+            raise ValueError(f"{path}: store lacks columns {missing}")
+        self.rows = self.manifest["rows"]
+        self._columns = {}
+        metrics.observe("food_store_seconds", time.perf_counter() - start, stage="open")
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.manifest["columns"]
+
+    @property
+    def columns(self) -> List[str]:
+        """Column names in source order."""
+        return list(self.manifest["columns"])
+
+    def kind(self, column: str) -> str:
+        """"int", "float" or "str"."""
+        return self.manifest["columns"][column]["kind"]
+
+    def __getitem__(self, column: str):
+        """A column as a read-only memory-mapped array, or a StringColumn for text."""
+        if column not in self._columns:
+            import numpy as np
+            spec = self.manifest["columns"][column]
+            data = np.load(os.path.join(self.path, spec["file"]), mmap_mode="r")
+            if spec["kind"] == "str":
+                offsets = np.load(os.path.join(self.path, spec["offsets"]), mmap_mode="r")
+                if len(offsets) != self.rows + 1 or offsets[-1] != len(data):
+                    raise ValueError(f"{self.path}: column {column!r} is corrupt")
+                self._columns[column] = StringColumn(data, offsets)
+            else:
+                if len(data) != self.rows:
+                    raise ValueError(f"{self.path}: column {column!r} has {len(data)} rows, expected {self.rows}")
+                self._columns[column] = data
+        return self._columns[column]
+
+@lru_cache(maxsize=1)
+def open_food_store(path: str = config.FOOD_STORE_PATH, source: str = config.FOOD_DATASET_PATH) -> FoodStore:
+    """
+    The process-wide FoodStore, ingesting the source CSV first when the
+    store is missing, from another format version, or older than the CSV.
+    """
+    if _stale(path, source):
+        with _build_lock(path):
+            # Another process may have rebuilt it while this one waited
+            if _stale(path, source):
+                print(f"🔍 DEBUG: Building food store {path} from {source}")
+                _ingest(source, path)
+    return FoodStore(path)
+
+def _stale(path: str, source: str) -> bool:
+    try:
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        return manifest.get("version") != FORMAT_VERSION or (
+            os.path.exists(source) and {k: manifest["source"].get(k) for k in ("size", "mtime_ns")} != _source_stamp(source))
+    except (OSError, ValueError, KeyError):
+        return True
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Columnar food dataset store")
+    parser.add_argument("--path", default=config.FOOD_STORE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("ingest", help="clean, validate and store a food CSV")
+    build.add_argument("csv", nargs="?", default=config.FOOD_DATASET_PATH)
+    commands.add_parser("info", help="rows, columns and rejected rows of the store")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        report = ingest(args.csv, args.path)
+        print(f"{report.rows} rows, {len(report.columns)} columns in {report.seconds:.2f}s; "
+              f"rejected {sum(report.rejected.values())} {report.rejected or ''}")
+    else:
+        store = FoodStore(args.path)
+        print(f"{len(store)} rows from {store.manifest['source']['path']}")
+        for column in store.columns:
+            print(f"  {store.kind(column):<6}{column}")
+        for reason, count in store.manifest["rejected"].items():
+            print(f"  rejected {count}: {reason}")
+
+if __name__ == "__main__":
+    main()
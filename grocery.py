@@ -1,228 +1,121 @@
-from typing import Dict, List, Optional, Union
-from pydantic import BaseModel
-from models import Recipe, GroceryItem
-import re
-from collections import defaultdict
-from langchain_core.prompts import ChatPromptTemplate
-from langgraph.prebuilt import create_react_agent
-from langchain_core.messages import AIMessage
-from langgraph.types import Command
-from utils import get_llm
+from typing import Any, Dict, List, Optional
+from models import Recipe, DietPlan, GroceryItem, GroceryList
+from ingredient_parser import parse_ingredient_line, parse_ingredients, plan_ingredients
+from grocery_merge import merge_item_lists, merge_items
 from state import NutritionistState
-from langchain.tools import tool
-
-    
-class GroceryList(BaseModel):
-    """Represents a complete grocery list"""
-    items: List[GroceryItem]
-    recipe_source: Optional[str] = None  # Name of the recipe this list is for
-    servings: int = 1
-    
-    def add_item(self, item: GroceryItem) -> None:
-        """Add a single item to the grocery list"""
-        self.items.append(item)
-    
-    def remove_item(self, item_name: str) -> None:
-        """Remove an item from the grocery list by name"""
-        self.items = [item for item in self.items if item.name != item_name]
-    
-    def get_by_category(self) -> Dict[str, List[GroceryItem]]:
-        """Group items by their category"""
-        categorized = defaultdict(list)
-        for item in self.items:
-            categorized[item.category].append(item)
-        return dict(categorized)
-    
-    def scale_quantities(self, servings: int) -> None:
-        """Scale quantities based on desired number of servings"""
-        factor = servings / self.servings
-        for item in self.items:
-            item.quantity *= factor
-        self.servings = servings
+from langchain_core.tools import tool
+
+def build_recipe_grocery_list(recipe: Recipe, servings: Optional[int] = None) -> GroceryList:
+    """
+    Build the grocery list for one recipe, merging repeated ingredients.
+
+    Args:
+        recipe: Recipe object containing ingredients
+        servings: Optional number of servings to scale the recipe to
+
+    Returns:
+        GroceryList object containing all needed ingredients
+    """
+    grocery_list = GroceryList(
+        items=merge_items(parse_ingredients(recipe.ingredients)),
+        recipe_source=recipe.name,
+        servings=recipe.servings
+    )
+
+    # Scale quantities if different number of servings requested
+    if servings and servings != recipe.servings:
+        grocery_list.scale_quantities(servings)
+
+    return grocery_list
+
+def build_plan_grocery_list(diet_plan: DietPlan) -> GroceryList:
+    """Build one merged grocery list covering every recipe of a DietPlan."""
+    return GroceryList(
+        items=merge_items(parse_ingredients(plan_ingredients(diet_plan))),
+        recipe_source=diet_plan.plan_name
+    )
+
+def plan_shopping_list(diet_plan: DietPlan) -> List[str]:
+    """A DietPlan's shopping_list lines, derived from its recipes' ingredients."""
+    return [f"{item.quantity:g} {item.unit} {item.name}".replace("  ", " ").strip()
+            for item in build_plan_grocery_list(diet_plan).items]
+
+def format_grocery_list(grocery_list: GroceryList) -> str:
+    """Render a GroceryList as markdown, grouped by category."""
+    lines = []
+    for category, items in grocery_list.get_by_category().items():
+        lines.append(f"**{category}**")
+        for item in items:
+            amount = f"{item.quantity:g} {item.unit}".strip()
+            optional = " *(optional)*" if item.optional else ""
+            lines.append(f"• {amount} {item.name}{optional}")
+        lines.append("")
+    return "\n".join(lines).strip()
 
 @tool
 def parse_ingredient(ingredient: str) -> GroceryItem:
     """
     Parse an ingredient string into a GroceryItem.
     Example: "2 cups milk" -> GroceryItem(name="milk", quantity=2, unit="cups")
-    
+
     Args:
         ingredient: String containing ingredient information
-        
+
     Returns:
         GroceryItem object with parsed information
     """
-    # Common units of measurement
-    units = {
-        'cup': 'cups', 'cups': 'cups',
-        'tbsp': 'tablespoons', 'tablespoon': 'tablespoons', 'tablespoons': 'tablespoons',
-        'tsp': 'teaspoons', 'teaspoon': 'teaspoons', 'teaspoons': 'teaspoons',
-        'oz': 'ounces', 'ounce': 'ounces', 'ounces': 'ounces',
-        'lb': 'pounds', 'pound': 'pounds', 'pounds': 'pounds',
-        'g': 'grams', 'gram': 'grams', 'grams': 'grams',
-        'ml': 'milliliters', 'milliliter': 'milliliters', 'milliliters': 'milliliters'
-    }
-    
-    # Regular expression to match quantity, unit, and ingredient name
-    pattern = r'^(\d+(?:\.\d+)?)\s*([a-zA-Z]+)?\s+(.+)$'
-    match = re.match(pattern, ingredient.strip())
-    
-    if match:
-        quantity = float(match.group(1))
-        unit = match.group(2).lower() if match.group(2) else ""
-        name = match.group(3)
-        
-        # Standardize unit
-        unit = units.get(unit, unit) if unit else ""
-        
-        # Determine category based on common ingredients (can be expanded)
-        categories = {
-            'produce': ['apple', 'banana', 'lettuce', 'tomato', 'onion', 'garlic', 'vegetable', 'fruit'],
-            'dairy': ['milk', 'cheese', 'yogurt', 'cream', 'butter'],
-            'meat': ['chicken', 'beef', 'pork', 'fish', 'meat'],
-            'pantry': ['flour', 'sugar', 'salt', 'oil', 'spice', 'herb'],
-            'grains': ['rice', 'pasta', 'bread', 'cereal']
-        }
-        
-        category = "Other"
-        for cat, keywords in categories.items():
-            if any(keyword in name.lower() for keyword in keywords):
-                category = cat.capitalize()
-                break
-                
-        return GroceryItem(
-            name=name,
-            quantity=quantity,
-            unit=unit,
-            category=category
-        )
-    else:
-        # If no quantity/unit found, treat as just the item name
-        return GroceryItem(
-            name=ingredient.strip(),
-            quantity=1,
-            unit="",
-            category="Other"
-        )
+    return parse_ingredient_line(ingredient)
 
 @tool
 def create_grocery_list(recipe: Recipe, servings: Optional[int] = None) -> GroceryList:
     """
     Create a grocery list from a recipe.
-    
+
     Args:
         recipe: Recipe object containing ingredients
         servings: Optional number of servings to scale the recipe to
-    
+
     Returns:
         GroceryList object containing all needed ingredients
     """
-    items = [parse_ingredient(ingredient) for ingredient in recipe.ingredients]
-    grocery_list = GroceryList(
-        items=items,
-        recipe_source=recipe.name,
-        servings=recipe.servings
-    )
-    
-    # Scale quantities if different number of servings requested
-    if servings and servings != recipe.servings:
-        grocery_list.scale_quantities(servings)
-    
-    return grocery_list
+    return build_recipe_grocery_list(recipe, servings)
 
 @tool
 def merge_grocery_lists(lists: List[GroceryList]) -> GroceryList:
     """
     Merge multiple grocery lists into one, combining similar items.
-    
+    Names are canonicalised and units converted, so "1 cup milk" and
+    "250 ml milk" become a single line.
+
     Args:
         lists: List of GroceryList objects to merge
-    
+
     Returns:
         Combined GroceryList object
     """
-    merged_items: Dict[str, GroceryItem] = {}
-    
-    for grocery_list in lists:
-        for item in grocery_list.items:
-            key = f"{item.name}_{item.unit}"
-            if key in merged_items:
-                # If item exists, add quantities
-                merged_items[key].quantity += item.quantity
-            else:
-                # If new item, add to merged items
-                merged_items[key] = GroceryItem(
-                    name=item.name,
-                    quantity=item.quantity,
-                    unit=item.unit,
-                    category=item.category
-                )
-    
     return GroceryList(
-        items=list(merged_items.values()),
+        items=merge_item_lists(grocery_list.items for grocery_list in lists),
         recipe_source="Multiple Recipes"
     )
 
-GROCERY_SYSTEM_PROMPT = """You are an expert at creating and managing grocery lists based on recipes.
-Your task is to:
-1. Parse recipe ingredients into structured grocery items
-2. Categorize ingredients appropriately (Produce, Dairy, Meat, Pantry, etc.)
-3. Handle unit conversions and quantity scaling
-4. Combine items when merging multiple lists
-5. Ensure all necessary ingredients are included
-
-For each recipe:
-- Extract all ingredients and their quantities
-- Standardize units where possible
-- Categorize items for shopping convenience
-- Account for serving size adjustments
-- Combine similar items when appropriate
-
-Always maintain organization by:
-- Grouping items by category
-- Standardizing units
-- Combining duplicate items
-- Maintaining clear quantities
-"""
-
-def create_grocery_agent():
-    """Creates an agent for managing grocery lists."""
-    grocery_prompt = ChatPromptTemplate(
-        [
-            ("system", GROCERY_SYSTEM_PROMPT),
-            ("placeholder", "{messages}"),
-        ]
-    )
-    
-    grocery_agent = create_react_agent(
-        model=get_llm(),
-        tools=[parse_ingredient, create_grocery_list, merge_grocery_lists],
-        prompt=grocery_prompt,
-        response_format=GroceryList
-    )
-    
-    return grocery_agent
-
-def grocery_node(state: NutritionistState) -> Command:
-    """Node function for generating grocery lists with state management."""
-    grocery_agent = create_grocery_agent()
-    result = grocery_agent.invoke({
-        "messages": state["messages"],
-        "recipe": state["recipe"]
-    })
-    
-    grocery_list = result["output"]
-    metadata = state["metadata"].copy()
-    metadata["grocery_list"] = grocery_list
-    
-    return Command(
-        update={
-            "messages": [
-                AIMessage(
-                    content=str(grocery_list),
-                    name="grocery_node"
-                )
-            ],
-            "metadata": metadata
-        }
-    ) 
\ No newline at end of file
+def grocery_node(state: NutritionistState) -> Dict[str, Any]:
+    """
+    Build the grocery list for the generated recipe or diet plan without using LLM.
+    Parsing and merging are plain Python, so this adds no model calls.
+    """
+    print(f"🔍 DEBUG: Starting grocery_node...")
+    try:
+        if state.get("diet_plan"):
+            grocery_list = build_plan_grocery_list(state["diet_plan"])
+        elif state.get("recipe"):
+            grocery_list = build_recipe_grocery_list(state["recipe"])
+        else:
+            print(f"🔍 DEBUG: No recipe or diet plan to build a grocery list from")
+            return {}
+
+        print(f"✅ DEBUG: Grocery list built with {len(grocery_list.items)} items")
+        return {"grocery_list": grocery_list}
+    except Exception as e:
+        # A missing grocery list should never fail the recipe or plan itself
+        print(f"❌ ERROR in grocery_node: {e}")
+        return {}
@@ -0,0 +1,136 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from models import GroceryItem, GroceryList
+
+def _encode(values: Iterable[str], size: int):
+    """Intern strings into (int32 codes, vocabulary in order of first appearance)."""
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), np.int32, size)
+    return codes, list(index)
+
+class GroceryColumns:
+    """
+    Array-backed grocery list for large lists (merged weekly plans, batch runs).
+
+    Quantities are a float64 array and names, units and categories are int32
+    codes into interned vocabularies, so scaling, filtering and grouping run
+    as NumPy operations instead of per-item Python loops. Converts losslessly
+    to and from GroceryList / GroceryItem, which stay the API-facing models.
+    """
+    __slots__ = ('name_codes', 'names', 'quantities', 'unit_codes', 'units',
+                 'category_codes', 'categories', 'optional', 'recipe_source', 'servings')
+
+    def __init__(self, name_codes: np.ndarray, names: List[str], quantities: np.ndarray,
+                 unit_codes: np.ndarray, units: List[str], category_codes: np.ndarray,
+                 categories: List[str], optional: np.ndarray,
+                 recipe_source: Optional[str] = None, servings: int = 1):
+        self.name_codes = name_codes
+        self.names = names
+        self.quantities = quantities
+        self.unit_codes = unit_codes
+        self.units = units
+        self.category_codes = category_codes
+        self.categories = categories
+        self.optional = optional
+        self.recipe_source = recipe_source
+        self.servings = servings
+
+    @classmethod
+    def from_items(cls, items: Sequence[GroceryItem], recipe_source: Optional[str] = None,
+                   servings: int = 1) -> "GroceryColumns":
+        """Build the columns from GroceryItem objects."""
+        size = len(items)
+        name_codes, names = _encode((item.name for item in items), size)
+        unit_codes, units = _encode((item.unit for item in items), size)
+        category_codes, categories = _encode((item.category for item in items), size)
+        return cls(
+            name_codes, names,
+            np.fromiter((item.quantity for item in items), np.float64, size),
+            unit_codes, units, category_codes, categories,
+            np.fromiter((item.optional for item in items), np.bool_, size),
+            recipe_source, servings,
+        )
+
+    @classmethod
+    def from_grocery_list(cls, grocery_list: GroceryList) -> "GroceryColumns":
+        return cls.from_items(grocery_list.items, grocery_list.recipe_source, grocery_list.servings)
+
+    def __len__(self) -> int:
+        return len(self.quantities)
+
+    def to_items(self) -> List[GroceryItem]:
+        """Convert back to GroceryItem objects, in the original order."""
+        names, units, categories = self.names, self.units, self.categories
+        # Values are already validated types, so construction skips validation
+        construct = GroceryItem.model_construct
+        return [
+            construct(name=names[name], quantity=quantity, unit=units[unit],
+                      category=categories[category], optional=optional)
+            for name, quantity, unit, category, optional in zip(
+                self.name_codes.tolist(), self.quantities.tolist(), self.unit_codes.tolist(),
+                self.category_codes.tolist(), self.optional.tolist(),
+            )
+        ]
+
+    def to_grocery_list(self) -> GroceryList:
+        return GroceryList(items=self.to_items(), recipe_source=self.recipe_source, servings=self.servings)
+
+    def _take(self, rows) -> "GroceryColumns":
+        # Vocabularies are shared; codes that no longer occur are harmless
+        return GroceryColumns(
+            self.name_codes[rows], self.names, self.quantities[rows],
+            self.unit_codes[rows], self.units, self.category_codes[rows], self.categories,
+            self.optional[rows], self.recipe_source, self.servings,
+        )
+
+    def filter(self, mask: np.ndarray) -> "GroceryColumns":
+        """Return the rows where the boolean mask is True."""
+        return self._take(mask)
+
+    def remove_item(self, item_name: str) -> None:
+        """Remove every row with this name, like GroceryList.remove_item."""
+        if item_name not in self.names:
+            return
+        keep = self.name_codes != self.names.index(item_name)
+        kept = self._take(keep)
+        for attr in ('name_codes', 'quantities', 'unit_codes', 'category_codes', 'optional'):
+            setattr(self, attr, getattr(kept, attr))
+
+    def scale_quantities(self, servings: int) -> None:
+        """Scale quantities based on desired number of servings"""
+        self.quantities *= servings / self.servings
+        self.servings = servings
+
+    def get_by_category(self) -> Dict[str, "GroceryColumns"]:
+        """
+        Group rows by category with one stable argsort, keeping categories in
+        order of first appearance and rows in their original order.
+        """
+        order = np.argsort(self.category_codes, kind='stable')
+        counts = np.bincount(self.category_codes, minlength=len(self.categories))
+        groups = {}
+        start = 0
+        for code, count in enumerate(counts.tolist()):
+            if count:
+                groups[self.categories[code]] = self._take(order[start:start + count])
+                start += count
+        return groups
+
+    def totals_by_category(self) -> Dict[str, Dict[str, float]]:
+        """Sum quantities per (category, unit) with one bincount."""
+        keys = self.category_codes.astype(np.int64) * len(self.units) + self.unit_codes
+        sums = np.bincount(keys, weights=self.quantities,
+                           minlength=len(self.categories) * len(self.units))
+        present = np.bincount(keys, minlength=len(sums)) > 0
+        totals: Dict[str, Dict[str, float]] = {}
+        for key in np.flatnonzero(present).tolist():
+            category, unit = divmod(key, len(self.units))
+            totals.setdefault(self.categories[category], {})[self.units[unit]] = float(sums[key])
+        return totals
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the arrays (vocabularies excluded)."""
+        return sum(array.nbytes for array in (
+            self.name_codes, self.quantities, self.unit_codes, self.category_codes, self.optional
+        ))
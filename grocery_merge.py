@@ -0,0 +1,192 @@
+import math
+import re
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+from ingredient_parser import UNIT_ALIASES
+from keyword_automaton import KeywordAutomaton
+from models import GroceryItem
+from plurals import singular
+
+# Units are converted to one base unit per dimension: grams for mass and
+# milliliters for volume. Anything else (cloves, cans, bare counts) is a
+# count and only merges with the same unit.
+UNIT_BASES: Dict[str, Tuple[str, float]] = {
+    'grams': ('mass', 1.0),
+    'kilograms': ('mass', 1000.0),
+    'milligrams': ('mass', 0.001),
+    'ounces': ('mass', 28.349523),
+    'pounds': ('mass', 453.59237),
+    'milliliters': ('volume', 1.0),
+    'liters': ('volume', 1000.0),
+    'teaspoons': ('volume', 4.928922),
+    'tablespoons': ('volume', 14.786765),
+    'fluid ounces': ('volume', 29.573530),
+    'cups': ('volume', 236.588237),
+}
+
+US_UNITS = {'ounces', 'pounds', 'teaspoons', 'tablespoons', 'fluid ounces', 'cups'}
+
+# Grams per milliliter, matched on the last keyword in the name like the
+# category matcher ("almond milk" -> milk, "olive oil" -> oil)
+DENSITIES = {
+    'water': 1.0, 'milk': 1.03, 'cream': 1.01, 'yogurt': 1.03, 'yoghurt': 1.03, 'curd': 1.03,
+    'buttermilk': 1.03, 'broth': 1.0, 'stock': 1.0, 'juice': 1.04, 'vinegar': 1.01,
+    'oil': 0.92, 'ghee': 0.91, 'butter': 0.96, 'honey': 1.42, 'syrup': 1.33, 'tahini': 0.96,
+    'peanut butter': 1.09, 'flour': 0.53, 'sugar': 0.85, 'brown sugar': 0.93, 'salt': 1.2,
+    'rice': 0.85, 'oat': 0.41, 'quinoa': 0.72, 'lentil': 0.82, 'dal': 0.82, 'chickpea': 0.75,
+    'bean': 0.75, 'semolina': 0.67, 'couscous': 0.73, 'cocoa': 0.42, 'cheese': 0.45,
+    'parmesan': 0.42, 'paneer': 0.55, 'spinach': 0.13, 'almond': 0.6, 'walnut': 0.5,
+    'cashew': 0.55, 'peanut': 0.6, 'seed': 0.6, 'chia': 0.65, 'tomato puree': 1.05,
+}
+
+DENSITY_MATCHER = KeywordAutomaton(DENSITIES.items())
+
+# Size and preparation words that do not change what is bought
+_DESCRIPTORS = re.compile(
+    r"\b(?:fresh|freshly|chopped|diced|minced|sliced|grated|shredded|crushed|peeled|cubed"
+    r"|finely|roughly|thinly|large|medium|small|ripe|organic|boneless|skinless|raw"
+    r"|to\s+taste|as\s+needed|for\s+garnish(?:ing)?)\b",
+    re.IGNORECASE,
+)
+_NON_WORD = re.compile(r"[^a-z0-9%&\s-]+")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=4096)
+def canonical_name(name: str) -> str:
+    """
+    Canonical merge key for an ingredient name, e.g.
+    "Fresh Tomatoes" -> "tomato", "large  onions" -> "onion".
+    """
+    text = _NON_WORD.sub(' ', _DESCRIPTORS.sub(' ', name.lower()))
+    words = _WHITESPACE.sub(' ', text).strip().split(' ')
+    if not words[0]:
+        return name.strip().lower()
+    words[-1] = singular(words[-1])
+    return ' '.join(words)
+
+@lru_cache(maxsize=1024)
+def density(name: str) -> Optional[float]:
+    """Density in g/ml of a canonical ingredient name, or None when unknown."""
+    best = None
+    for start, keyword, value in DENSITY_MATCHER.iter_matches(name):
+        candidate = (start + len(keyword), len(keyword), value)
+        if best is None or candidate > best:
+            best = candidate
+    return best[2] if best else None
+
+@lru_cache(maxsize=4096)
+def _merge_key(name: str, unit: str) -> Tuple[str, str, float, Optional[bool]]:
+    """
+    Resolve (name, unit) into (canonical name, dimension, factor to the base
+    unit, whether the unit is a US one); the last is None for count units.
+    """
+    unit = UNIT_ALIASES.get(unit.strip().lower(), unit.strip().lower())
+    if unit not in UNIT_BASES:
+        return canonical_name(name), unit, 1.0, None
+    dimension, factor = UNIT_BASES[unit]
+    return canonical_name(name), dimension, factor, unit in US_UNITS
+
+def _round_up(value: float, step: float) -> float:
+    # Round up so the shopping list always covers the recipes
+    return round(math.ceil(value / step - 1e-6) * step, 3)
+
+def humanize(amount: float, dimension: str, us: bool) -> Tuple[float, str]:
+    """
+    Express a base-unit amount (g, ml or a count) as a rounded, readable quantity.
+
+    Args:
+        amount: Quantity in grams, milliliters or counted units
+        dimension: 'mass', 'volume', or the count unit itself ('cloves', '')
+        us: Prefer cups/spoons and ounces/pounds over metric units
+
+    Returns:
+        (quantity, unit) tuple, e.g. (1.25, 'cups') or (450.0, 'grams')
+    """
+    if dimension == 'mass':
+        if us:
+            if amount >= UNIT_BASES['pounds'][1]:
+                return _round_up(amount / UNIT_BASES['pounds'][1], 0.25), 'pounds'
+            return _round_up(amount / UNIT_BASES['ounces'][1], 0.5), 'ounces'
+        if amount >= 1000:
+            return _round_up(amount / 1000, 0.05), 'kilograms'
+        return _round_up(amount, 1 if amount < 10 else 5 if amount < 100 else 25), 'grams'
+    if dimension == 'volume':
+        if us:
+            if amount >= UNIT_BASES['cups'][1] / 4:
+                return _round_up(amount / UNIT_BASES['cups'][1], 0.25), 'cups'
+            if amount >= UNIT_BASES['tablespoons'][1]:
+                return _round_up(amount / UNIT_BASES['tablespoons'][1], 0.5), 'tablespoons'
+            return _round_up(amount / UNIT_BASES['teaspoons'][1], 0.25), 'teaspoons'
+        if amount >= 1000:
+            return _round_up(amount / 1000, 0.05), 'liters'
+        return _round_up(amount, 1 if amount < 10 else 5 if amount < 100 else 25), 'milliliters'
+    return _round_up(amount, 0.25 if amount < 1 else 1), dimension
+
+class _Entry:
+    """Running totals for one canonical ingredient while merging."""
+    __slots__ = ('name', 'category', 'optional', 'us', 'measure', 'totals')
+
+    def __init__(self, item: GroceryItem):
+        self.name = _WHITESPACE.sub(' ', _DESCRIPTORS.sub(' ', item.name)).strip() or item.name
+        self.category = item.category
+        self.optional = item.optional
+        self.us: Optional[bool] = None
+        self.measure: Optional[str] = None  # 'mass' or 'volume', whichever was listed first
+        self.totals: Dict[str, float] = {}
+
+def merge_items(items: Iterable[GroceryItem]) -> List[GroceryItem]:
+    """
+    Merge grocery items in a single linear pass.
+
+    Names are canonicalised ("Garlic" and "garlic", "tomatoes" and "fresh
+    tomato" merge) and quantities are summed in grams, milliliters or counts.
+    When an ingredient appears both by volume and by weight and its density
+    is known, it is converted to the one it was first listed by, so "1 cup
+    milk" and "250 g milk" give one line. Quantities are rounded up to readable steps, in US units when
+    the ingredient was first listed in US units.
+
+    Args:
+        items: GroceryItem objects from any number of recipes or lists
+
+    Returns:
+        Merged GroceryItem objects, in order of first appearance
+    """
+    entries: Dict[str, _Entry] = {}
+    for item in items:
+        key, dimension, factor, us = _merge_key(item.name, item.unit)
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = _Entry(item)
+        elif entry.optional and not item.optional:
+            entry.optional = False
+        if entry.us is None:
+            entry.us = us
+        if entry.measure is None and us is not None:
+            entry.measure = dimension
+        entry.totals[dimension] = entry.totals.get(dimension, 0.0) + item.quantity * factor
+
+    merged = []
+    for key, entry in entries.items():
+        totals = entry.totals
+        if 'mass' in totals and 'volume' in totals:
+            grams_per_ml = density(key)
+            # Fold into whichever of weight or volume the ingredient was first listed by
+            if grams_per_ml and entry.measure == 'volume':
+                totals['volume'] += totals.pop('mass') / grams_per_ml
+            elif grams_per_ml:
+                totals['mass'] += totals.pop('volume') * grams_per_ml
+        for dimension, amount in totals.items():
+            quantity, unit = humanize(amount, dimension, bool(entry.us))
+            merged.append(GroceryItem(
+                name=entry.name,
+                quantity=quantity,
+                unit=unit,
+                category=entry.category,
+                optional=entry.optional,
+            ))
+    return merged
+
+def merge_item_lists(lists: Iterable[Iterable[GroceryItem]]) -> List[GroceryItem]:
+    """Merge the items of N grocery lists in one pass; see merge_items."""
+    return merge_items(chain.from_iterable(lists))
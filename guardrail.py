@@ -1,11 +1,9 @@
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langgraph.graph import MessagesState, END
-from langgraph.types import Command
 from utils import get_llm
 from langgraph.prebuilt import create_react_agent
 from models import ClinicalGuardrail
-from state import NutritionistState
+from state import NutritionistState, get_original_query
 from typing import Dict, Any
 
 CLINICAL_SYSTEM_PROMPT = """You are an expert at detecting clinical and diagnostic medical queries that should be redirected to healthcare professionals.
@@ -48,11 +46,12 @@ def create_clinical_guardrail_agent():
     )
     
     clinical_agent = create_react_agent(
-        model=get_llm(),
+        model=get_llm("clinical_guardrail_node"),
         tools=[],  # No tools needed for clinical detection
         prompt=clinical_prompt,
         response_format=ClinicalGuardrail,
-        name="clinical_guardrail"
+        name="clinical_guardrail",
+        checkpointer=False,
     )
     
     return clinical_agent
@@ -60,8 +59,9 @@ def create_clinical_guardrail_agent():
 def clinical_guardrail_node(state: NutritionistState) -> Dict[str, Any]:
     """Node function for clinical guardrail with state management."""
     try:
-        # Ensure we have messages to process
-        if not state["messages"] or not state["messages"][-1].content.strip():
+        # Ensure we have a query to process
+        query = get_original_query(state)
+        if not query.strip():
             return {
                 "messages": [AIMessage(content="⚠️ Please provide a valid question.", name="clinical_guardrail")],
                 "blocked": "Empty or invalid query"
@@ -88,9 +88,10 @@ def clinical_guardrail_node(state: NutritionistState) -> Dict[str, Any]:
                 "clinical_check": clinical_check
             }
         
-        # Allow the request to proceed
+        # Allow the request to proceed; later nodes read the query from original_query
         return {
-            "clinical_check": clinical_check
+            "clinical_check": clinical_check,
+            "original_query": query
         }
         
     except Exception as e:
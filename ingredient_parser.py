@@ -0,0 +1,206 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+from keyword_automaton import KeywordAutomaton
+from models import GroceryItem
+from nutrition_parser import iter_plan_recipes
+
+# Standardised unit names, kept identical to the ones grocery lists always used
+UNIT_ALIASES = {
+    'cup': 'cups', 'cups': 'cups', 'c': 'cups',
+    'tbsp': 'tablespoons', 'tbs': 'tablespoons', 'tablespoon': 'tablespoons', 'tablespoons': 'tablespoons',
+    'tsp': 'teaspoons', 'teaspoon': 'teaspoons', 'teaspoons': 'teaspoons',
+    'oz': 'ounces', 'ounce': 'ounces', 'ounces': 'ounces',
+    'fl oz': 'fluid ounces', 'fluid ounce': 'fluid ounces', 'fluid ounces': 'fluid ounces',
+    'lb': 'pounds', 'lbs': 'pounds', 'pound': 'pounds', 'pounds': 'pounds',
+    'g': 'grams', 'gram': 'grams', 'grams': 'grams', 'gm': 'grams', 'gms': 'grams',
+    'kg': 'kilograms', 'kilogram': 'kilograms', 'kilograms': 'kilograms',
+    'mg': 'milligrams', 'milligram': 'milligrams', 'milligrams': 'milligrams',
+    'ml': 'milliliters', 'milliliter': 'milliliters', 'milliliters': 'milliliters',
+    'millilitre': 'milliliters', 'millilitres': 'milliliters',
+    'l': 'liters', 'liter': 'liters', 'liters': 'liters', 'litre': 'liters', 'litres': 'liters',
+    'pinch': 'pinches', 'pinches': 'pinches', 'dash': 'dashes', 'dashes': 'dashes',
+    'clove': 'cloves', 'cloves': 'cloves',
+    'slice': 'slices', 'slices': 'slices',
+    'can': 'cans', 'cans': 'cans', 'tin': 'cans', 'tins': 'cans',
+    'bunch': 'bunches', 'bunches': 'bunches',
+    'sprig': 'sprigs', 'sprigs': 'sprigs',
+    'piece': 'pieces', 'pieces': 'pieces',
+    'stalk': 'stalks', 'stalks': 'stalks',
+    'head': 'heads', 'heads': 'heads',
+    'handful': 'handfuls', 'handfuls': 'handfuls',
+    'package': 'packages', 'packages': 'packages', 'pkg': 'packages',
+}
+
+# Categories in priority order; when keywords of several categories match,
+# the one matching last in the name wins ("garlic butter" is Dairy), then the
+# longest keyword ("coconut milk" over "milk"), then this order
+CATEGORY_KEYWORDS = {
+    'Produce': ['apple', 'banana', 'lettuce', 'tomato', 'onion', 'garlic', 'vegetable', 'fruit',
+                'spinach', 'kale', 'carrot', 'potato', 'cucumber', 'broccoli', 'cauliflower',
+                'zucchini', 'mushroom', 'avocado', 'lemon', 'lime', 'orange', 'berry', 'berries',
+                'ginger', 'cilantro', 'parsley', 'basil', 'mint', 'celery', 'cabbage', 'peas',
+                'bell pepper', 'chili', 'chilli', 'eggplant', 'squash', 'mango', 'fig', 'dates',
+                'greens', 'arugula', 'sweet potato', 'beet', 'scallion', 'shallot', 'leek'],
+    'Dairy': ['milk', 'cheese', 'yogurt', 'yoghurt', 'cream', 'butter', 'paneer', 'ghee',
+              'curd', 'feta', 'mozzarella', 'parmesan', 'ricotta', 'egg'],
+    'Meat': ['chicken', 'beef', 'pork', 'fish', 'meat', 'turkey', 'lamb', 'mutton', 'bacon',
+             'sausage', 'ham', 'salmon', 'tuna', 'shrimp', 'prawn', 'cod', 'tilapia'],
+    'Pantry': ['flour', 'sugar', 'salt', 'oil', 'spice', 'herb', 'honey', 'vinegar', 'sauce',
+               'tahini', 'nut', 'almond', 'walnut', 'cashew', 'peanut', 'seed', 'chia', 'flax',
+               'lentil', 'dal', 'chickpea', 'bean', 'tofu', 'tempeh', 'stock', 'broth', 'cumin',
+               'turmeric', 'paprika', 'cinnamon', 'masala', 'garam', 'pepper', 'syrup',
+               'baking powder', 'baking soda', 'yeast', 'vanilla', 'cocoa', 'coconut',
+               'coconut milk', 'almond milk', 'oat milk', 'soy milk', 'peanut butter'],
+    'Grains': ['rice', 'pasta', 'bread', 'cereal', 'oat', 'quinoa', 'barley', 'couscous',
+               'noodle', 'tortilla', 'wrap', 'pita', 'bulgur', 'millet', 'semolina'],
+}
+
+CATEGORY_PRIORITY = {category: rank for rank, category in enumerate(CATEGORY_KEYWORDS)}
+
+CATEGORY_MATCHER = KeywordAutomaton(
+    (keyword, category) for category, keywords in CATEGORY_KEYWORDS.items() for keyword in keywords
+)
+
+# Unicode vulgar fractions, rewritten as " n/d" so "1½" reads as "1 1/2"
+_VULGAR_FRACTIONS = str.maketrans({
+    '½': ' 1/2', '⅓': ' 1/3', '⅔': ' 2/3', '¼': ' 1/4', '¾': ' 3/4',
+    '⅕': ' 1/5', '⅖': ' 2/5', '⅗': ' 3/5', '⅘': ' 4/5', '⅙': ' 1/6',
+    '⅚': ' 5/6', '⅛': ' 1/8', '⅜': ' 3/8', '⅝': ' 5/8', '⅞': ' 7/8',
+    '⅐': ' 1/7', '⅑': ' 1/9', '⅒': ' 1/10', '⁄': '/', '–': '-', '—': '-',
+})
+
+# Mixed numbers ("1 1/2"), fractions ("1/2") and decimals ("0.5", ".5")
+_QTY = r"\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|\.\d+"
+_UNIT = "|".join(re.escape(unit) for unit in sorted(UNIT_ALIASES, key=len, reverse=True))
+
+_INGREDIENT_PATTERN = re.compile(
+    rf"""
+    ^\s*(?P<qty>{_QTY})
+    (?:\s*(?:-|to)\s*(?P<qty_high>{_QTY}))?                 # ranges: "2-3", "2 to 3"
+    (?:\s*\(\s*(?P<inner_qty>{_QTY})\s*(?P<inner_unit>{_UNIT})\.?\s*\))?  # "1 (14 oz) can"
+    (?:\s*(?P<unit>{_UNIT})\.?(?![A-Za-z]))?
+    \s+(?:of\s+)?(?P<name>.+?)\s*$
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+_OPTIONAL_PATTERN = re.compile(r"\(?\s*\boptional\b\s*\)?,?", re.IGNORECASE)
+_NOTE_PATTERN = re.compile(r"\s*\([^)]*\)")
+
+def _quantity(text: str) -> float:
+    """Convert "1 1/2", "3/4" or "2.5" into a float."""
+    total = 0.0
+    for part in text.split():
+        if '/' in part:
+            numerator, denominator = part.split('/')
+            total += float(numerator) / float(denominator) if float(denominator) else 0.0
+        else:
+            total += float(part)
+    return total
+
+def _strip_notes(name: str) -> str:
+    """Drop preparation notes: "garlic, minced" -> "garlic", "rice (rinsed)" -> "rice"."""
+    stripped = _NOTE_PATTERN.sub('', name) if '(' in name else name
+    return stripped.split(',', 1)[0].strip() or name
+
+@lru_cache(maxsize=4096)
+def classify(name: str) -> str:
+    """
+    Categorise an ingredient name with the precompiled keyword automaton.
+    The keyword matching last in the name wins, since that is usually the
+    head noun ("tomato sauce" -> Pantry, "garlic butter" -> Dairy). Cached,
+    since the same names recur under different quantities.
+    """
+    best: Optional[Tuple[int, int, int, str]] = None
+    for start, keyword, category in CATEGORY_MATCHER.iter_matches(name):
+        candidate = (start + len(keyword), len(keyword), -CATEGORY_PRIORITY[category], category)
+        if best is None or candidate > best:
+            best = candidate
+    return best[3] if best else "Other"
+
+@lru_cache(maxsize=4096)
+def parse_ingredient_fields(ingredient: str) -> Tuple[str, float, str, str, bool]:
+    """
+    Parse an ingredient string into (name, quantity, unit, category, optional).
+
+    Handles fractions ("1/2 cup"), unicode vulgar fractions ("½ tsp", "1½ cups"),
+    ranges ("2-3 cloves", the upper bound is kept so the shopping list covers
+    the recipe), parenthesised package weights ("2 (14 oz) cans tomatoes" ->
+    28 ounces) and "(optional)" markers. Results are cached, since plans repeat
+    the same ingredient lines.
+    """
+    # Cheap substring checks guard the slower passes, which most lines skip
+    text = ingredient.strip() if ingredient.isascii() else ingredient.translate(_VULGAR_FRACTIONS).strip()
+    optional = 'ptional' in text and bool(_OPTIONAL_PATTERN.search(text))
+    if optional:
+        text = _OPTIONAL_PATTERN.sub('', text).strip()
+
+    match = _INGREDIENT_PATTERN.match(text)
+    if not match:
+        # If no quantity found, treat as just the item name
+        name = _strip_notes(text)
+        return name, 1.0, "", classify(name), optional
+
+    quantity = _quantity(match.group('qty'))
+    if match.group('qty_high'):
+        quantity = max(quantity, _quantity(match.group('qty_high')))
+    unit = UNIT_ALIASES.get(match.group('unit').lower(), "") if match.group('unit') else ""
+    if match.group('inner_qty'):
+        # "2 (14 oz) cans" is bought by weight: 2 x 14 ounces
+        quantity *= _quantity(match.group('inner_qty'))
+        unit = UNIT_ALIASES[match.group('inner_unit').lower()]
+
+    name = _strip_notes(match.group('name'))
+    return name, quantity, unit, classify(name), optional
+
+_LEADING_QTY = re.compile(rf"^(\s*)({_QTY})(?:(\s*(?:-|to)\s*)({_QTY}))?")
+_FRACTIONS = ((1 / 8, "1/8"), (1 / 4, "1/4"), (1 / 3, "1/3"), (1 / 2, "1/2"), (2 / 3, "2/3"), (3 / 4, "3/4"))
+
+def format_quantity(quantity: float) -> str:
+    """Render a quantity the way recipes write it: 1.5 -> "1 1/2", 0.25 -> "1/4", 266.7 -> "267"."""
+    if quantity >= 10:
+        return str(round(quantity))
+    whole, rest = int(quantity), quantity - int(quantity)
+    for value, text in _FRACTIONS:
+        if abs(rest - value) < 0.01:
+            return f"{whole} {text}" if whole else text
+    if rest > 0.99:
+        return str(whole + 1)
+    return f"{round(quantity, 2):g}"
+
+def scale_ingredient_line(ingredient: str, factor: float) -> str:
+    """
+    Scale the leading quantity (or range) of an ingredient string, keeping the
+    rest of the line: "1 1/2 cups rice, rinsed" x2 -> "3 cups rice, rinsed".
+    Package sizes in parentheses and lines without a quantity are unchanged.
+    """
+    text = ingredient if ingredient.isascii() else ingredient.translate(_VULGAR_FRACTIONS).strip()
+    match = _LEADING_QTY.match(text)
+    if not match or factor == 1:
+        return ingredient
+    scaled = match.group(1) + format_quantity(_quantity(match.group(2)) * factor)
+    if match.group(4):
+        scaled += match.group(3) + format_quantity(_quantity(match.group(4)) * factor)
+    return scaled + text[match.end():]
+
+def parse_ingredient_line(ingredient: str) -> GroceryItem:
+    """Parse a single ingredient string into a GroceryItem."""
+    name, quantity, unit, category, optional = parse_ingredient_fields(ingredient)
+    return GroceryItem(name=name, quantity=quantity, unit=unit, category=category, optional=optional)
+
+def parse_ingredients(ingredients: Iterable[str]) -> List[GroceryItem]:
+    """
+    Parse a whole ingredient list (e.g. every ingredient of a DietPlan) in one call.
+
+    Args:
+        ingredients: Ingredient strings such as "1/2 cup rolled oats"
+
+    Returns:
+        List of GroceryItem objects, one per ingredient string
+    """
+    return [parse_ingredient_line(ingredient) for ingredient in ingredients]
+
+def plan_ingredients(diet_plan) -> List[str]:
+    """Collect the ingredient strings of every recipe in a DietPlan."""
+    return [ingredient for _, _, recipe in iter_plan_recipes(diet_plan) for ingredient in recipe.ingredients]
@@ -1,8 +1,6 @@
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langgraph.graph import MessagesState
-from langgraph.types import Command
-from state import NutritionistState
+from state import NutritionistState, compact_messages
 from utils import get_llm
 from langgraph.prebuilt import create_react_agent
 from models import Intent
@@ -60,6 +58,11 @@ Response Schema (use exactly these field names):
 - recipe_specificity: "specific_recipe" | "general_dish" | "food_category"
 
 IMPORTANT: For "3-day" requests, ALWAYS use time_context: "daily_plan", NOT "weekly_plan"!
+
+**Follow-ups**: When the analysis of the previous request is given and the new message refines it
+(e.g. "make it vegan", "without nuts", "for 4 people", "now a dinner version"), set is_follow_up: true,
+start from the previous fields and change only what the new message asks for. Otherwise set
+is_follow_up: false and ignore the previous analysis.
 """
 
 def create_intent_agent():
@@ -72,11 +75,12 @@ def create_intent_agent():
     )
     
     intent_agent = create_react_agent(
-        model=get_llm(),
+        model=get_llm("intent_node"),
         tools=[],  # No tools needed for intent extraction
         prompt=intent_prompt,
         response_format=Intent,   
-        name="intent_agent"
+        name="intent_agent",
+        checkpointer=False,
     )
     
     return intent_agent
@@ -88,7 +92,13 @@ def intent_node(state: NutritionistState) -> Dict[str, Any]:
         intent_agent = create_intent_agent()
         print(f"🔍 DEBUG: Intent agent created successfully")
         
-        result = intent_agent.invoke({"messages": state["messages"]})
+        messages = list(state["messages"])
+        previous_intent = state.get("previous_intent")
+        if previous_intent:
+            # Just before the new message, so the agent can treat it as a refinement
+            context = HumanMessage(content=f"Analysis of my previous request: {previous_intent.model_dump_json()}")
+            messages.insert(len(messages) - 1, context)
+        result = intent_agent.invoke({"messages": messages})
         print(f"🔍 DEBUG: Intent agent invoked successfully")
         
         # Extract the structured response and return state update
@@ -97,14 +107,14 @@ def intent_node(state: NutritionistState) -> Dict[str, Any]:
         
         return {
             "intent": intent_data,
-            "messages": result.get("messages", [])
+            "messages": compact_messages(result.get("messages", []), "intent_node")
         }
     except Exception as e:
         print(f"❌ ERROR in intent_node: {e}")
         print(f"🔍 DEBUG: Exception type: {type(e)}")
-        # Return a default intent on error
+        # On error keep the session's previous intent, or fall back to a default
         from models import Intent
-        default_intent = Intent(
+        default_intent = state.get("previous_intent") or Intent(
             primary_intent="single_recipe",
             meal_type=["breakfast"],
             dietary_restrictions=[],
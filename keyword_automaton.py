@@ -0,0 +1,71 @@
+from collections import deque
+from typing import Dict, Generic, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+class KeywordAutomaton(Generic[T]):
+    """
+    Aho-Corasick automaton matching many keywords against a text in one pass.
+
+    Keywords are lower-cased and must start at a word boundary in the text, so
+    "oil" matches "olive oil" and "oils" but not "boiled". Each keyword carries
+    a value (e.g. a grocery category) returned with its matches.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, T]]):
+        # Trie as parallel lists: goto transitions, failure links and outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, T]]] = [[]]
+
+        for keyword, value in keywords:
+            state = 0
+            for char in keyword.lower():
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((keyword.lower(), value))
+
+        # Breadth-first pass to compute failure links, merge outputs and fold
+        # the failure links into a full transition table, so matching does a
+        # single dict lookup per character and never backtracks
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._delta[state] = {**self._goto[0], **self._goto[state]}
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                fail_state = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = fail_state
+                self._output[next_state] = self._output[next_state] + self._output[fail_state]
+                self._delta[next_state] = {**self._delta[fail_state], **self._goto[next_state]}
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str, T]]:
+        """
+        Yield (start offset, keyword, value) for every keyword occurrence that
+        starts at a word boundary, scanning the lower-cased text once.
+        """
+        text = text.lower()
+        delta, output = self._delta, self._output
+        state = 0
+        for index, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if output[state]:
+                for keyword, value in output[state]:
+                    start = index - len(keyword) + 1
+                    if start == 0 or not text[start - 1].isalnum():
+                        yield start, keyword, value
+
+    def find_all(self, text: str) -> List[Tuple[int, str, T]]:
+        """Return all word-boundary matches as a list, in order of their end offset."""
+        return list(self.iter_matches(text))
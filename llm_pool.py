@@ -0,0 +1,89 @@
+"""
+One pooled Gemini client shared by every node and session.
+
+ChatGoogleGenerativeAI builds a google.genai Client, with its own HTTP
+connection pool, in its constructor. Building one per get_llm() call meant
+every node call paid client setup and opened new connections. Here a single
+base model owns the client. The per-tier variants are pydantic copies of it
+(model_copy skips the constructor), so they all share one keep-alive pool
+of LLM_POOL_SIZE connections. Each variant is built once per process.
+
+An httpx response hook counts requests and the connections they used, so
+reuse shows up in metrics as llm_http_requests and llm_http_connections.
+"""
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from metrics import metrics
+import config
+
+class _Done:
+    """Completed awaitable: lets one hook serve both the sync and async httpx clients."""
+
+    def __await__(self):
+        return iter(())
+
+class ConnectionTracker:
+    """httpx response hook recording whether each request opened a new connection."""
+
+    def __init__(self):
+        self._seen = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def __call__(self, response: Any) -> _Done:
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self.requests += 1
+            new = stream is None or stream not in self._seen
+            if new:
+                self.connections += 1
+                if stream is not None:
+                    self._seen.add(stream)
+        metrics.increment("llm_http_requests")
+        if new:
+            metrics.increment("llm_http_connections")
+        return _Done()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            reused = self.requests - self.connections
+            return {"requests": self.requests, "connections": self.connections,
+                    "reuse_ratio": reused / self.requests if self.requests else 0.0}
+
+tracker = ConnectionTracker()
+
+@lru_cache(maxsize=1)
+def get_base_chat_model(base_url: Optional[str] = None):
+    """The process-wide ChatGoogleGenerativeAI that owns the pooled client."""
+    import httpx
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    limits = httpx.Limits(
+        max_connections=config.LLM_POOL_SIZE,
+        max_keepalive_connections=config.LLM_POOL_SIZE,
+        keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY,
+    )
+    options = {"base_url": base_url} if base_url else {}
+    return ChatGoogleGenerativeAI(
+        model=config.MODEL,
+        max_retries=1,  # a single attempt; llm_resilience does the retrying
+        client_args={"limits": limits, "event_hooks": {"response": [tracker]}},
+        **options,
+    )
+
+@lru_cache(maxsize=32)
+def get_chat_model(model: str, temperature: float, max_output_tokens: int, timeout: float,
+                   base_url: Optional[str] = None):
+    """
+    A ChatGoogleGenerativeAI for one tier's parameters that shares the base
+    model's client and connections. Cached, so repeated calls are free.
+    """
+    return get_base_chat_model(base_url).model_copy(update={
+        "model": model,
+        "temperature": temperature,
+        "max_output_tokens": max_output_tokens,
+        "timeout": timeout,
+    })
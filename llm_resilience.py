@@ -0,0 +1,394 @@
+"""
+Resilient calls to the chat model: retries, hedging and a circuit breaker.
+
+get_llm() wraps the Gemini client in ResilientChatModel, which routes every
+model call (tool-calling steps and structured output) through one shared
+ResilientCaller:
+
+- transient errors (timeouts, 429, 5xx, dropped connections) are retried
+  with exponential backoff and full jitter; other errors raise immediately
+- a call still running after the p95 latency of its operation can be hedged
+  with a duplicate request, and the first success wins (LLM_HEDGE=1)
+- after LLM_BREAKER_FAILURES consecutive failed calls the circuit opens and
+  calls fail fast for LLM_BREAKER_COOLDOWN seconds; then one trial call is
+  let through, and the circuit closes again if it succeeds
+- successful results are cached by prompt, and served when the upstream is
+  failing or the circuit is open
+
+Each attempt is admitted by the process-wide llm_scheduler.LLMScheduler,
+which applies the rate limits and orders waiting calls by node priority.
+"""
+import contextvars
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from llm_scheduler import estimate_tokens, get_llm_scheduler
+from metrics import metrics
+from ttl_cache import TTLCache
+import config
+
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+TRANSIENT_MARKERS = ("timeout", "timed out", "unavailable", "resource_exhausted", "resource exhausted",
+                     "deadline_exceeded", "deadline exceeded", "too many requests", "connection", "servererror",
+                     "internal error", "overloaded")
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the model while the circuit breaker is open."""
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed model call is worth retrying."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUS
+    text = f"{type(error).__name__} {error}".lower()
+    return any(str(code) in text for code in TRANSIENT_STATUS) or any(m in text for m in TRANSIENT_MARKERS)
+
+def _as_messages(value: Any) -> Any:
+    return value.to_messages() if hasattr(value, "to_messages") else value
+
+def prompt_chars(value: Any) -> int:
+    """Characters of prompt text in a model input, for token estimates."""
+    value = _as_messages(value)
+    if isinstance(value, list):
+        return sum(len(str(m.content)) if isinstance(m, BaseMessage) else len(str(m)) for m in value)
+    return len(str(value))
+
+def usage_tokens(result: Any) -> Optional[int]:
+    """Total tokens reported on an AIMessage, if the provider sent usage metadata."""
+    usage = getattr(result, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+def prompt_key(operation: str, value: Any) -> str:
+    """Cache key for a model input: messages, a prompt value or a plain string."""
+    value = _as_messages(value)
+    if isinstance(value, list):
+        value = [
+            [m.type, m.content, getattr(m, "tool_calls", None), getattr(m, "tool_call_id", None)]
+            if isinstance(m, BaseMessage) else m
+            for m in value
+        ]
+    body = json.dumps([operation, value], sort_keys=True, default=str)
+    return hashlib.sha1(body.encode()).hexdigest()
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Args:
+        failures: Consecutive failed calls that open the circuit
+        cooldown: Seconds the circuit stays open before a trial call
+    """
+
+    def __init__(self, failures: int, cooldown: float, clock: Callable[[], float] = time.monotonic):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.clock() - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+                self._trial = False
+            if self.state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+            if self.state != "closed":
+                print("✅ DEBUG: LLM circuit closed")
+            self.state = "closed"
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive += 1
+            if self.state == "half_open" or (self.state == "closed" and self._consecutive >= self.failures):
+                if self.state == "closed":
+                    metrics.increment("llm_circuit_opened")
+                    print(f"⚠️ DEBUG: LLM circuit opened after {self._consecutive} consecutive failures")
+                self.state = "open"
+                self._opened_at = self.clock()
+
+class ResilientCaller:
+    """
+    Runs model calls with retries, optional hedging, a circuit breaker and a
+    fallback cache. One instance is shared by every agent (see get_llm_caller).
+
+    Args:
+        max_attempts: Attempts per call, including the first
+        backoff_base, backoff_max: Exponential backoff bounds in seconds
+        timeout: Seconds to wait for one attempt (and its hedge) before retrying
+        hedge: Send a duplicate request when an attempt outlives the p95 latency
+        hedge_min_delay: Lower bound on the hedge delay, in seconds
+        breaker: CircuitBreaker shared by all operations
+        cache: TTLCache of successful results, served when the upstream is degraded
+        scheduler: LLMScheduler that admits each attempt; None calls straight away
+        max_workers: Requests running at once in worker threads (timed or
+            hedged attempts run there). A timed-out attempt keeps its worker
+            until the upstream answers; when every worker is held, new
+            attempts fail at once with a TimeoutError instead of queueing
+    """
+
+    # Latency samples needed before an operation's p95 is trusted for hedging
+    HEDGE_MIN_SAMPLES = 20
+
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 timeout: Optional[float] = 60.0, hedge: bool = False, hedge_min_delay: float = 1.0,
+                 breaker: Optional[CircuitBreaker] = None, cache: Optional[TTLCache] = None,
+                 scheduler: Any = None, max_workers: int = 32):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker(failures=5, cooldown=30.0)
+        self.cache = cache
+        self.scheduler = scheduler
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self.max_workers = max_workers
+        self._running = 0  # attempts submitted to the pool and not finished, abandoned ones included
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="llm")
+
+    def hedge_delay(self, operation: str) -> Optional[float]:
+        """p95 latency of recent successful calls, or None until enough are seen."""
+        with self._lock:
+            samples = sorted(self._latencies.get(operation, ()))
+        if len(samples) < self.HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.hedge_min_delay, samples[int(0.95 * (len(samples) - 1))])
+
+    def _record_latency(self, operation: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(operation, deque(maxlen=256)).append(seconds)
+        metrics.observe("llm_seconds", seconds, operation=operation)
+
+    def _submit(self, operation: str, fn: Callable[[], Any]) -> Future:
+        """
+        Run fn in a worker with the caller's contextvars (LangChain callbacks
+        and run config), or raise TimeoutError when abandoned attempts hold
+        every worker: a queued attempt would time out without being sent.
+        """
+        with self._lock:
+            if self._running >= self.max_workers:
+                metrics.increment("llm_pool_exhausted", operation=operation)
+                raise TimeoutError(f"LLM {operation} not sent: all {self.max_workers} workers are busy "
+                                   "with earlier calls still waiting for the upstream")
+            self._running += 1
+        future = self._executor.submit(contextvars.copy_context().run, fn)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future: Future) -> None:
+        with self._lock:
+            self._running -= 1
+
+    def call(self, operation: str, fn: Callable[[], Any], key: Optional[str] = None,
+             priority: int = 1, tokens: int = 0, timeout: Optional[float] = None) -> Any:
+        """
+        Call fn() resiliently.
+
+        Args:
+            operation: Label for latency tracking and metrics, e.g. "chat" or "structured:Recipe"
+            fn: The model call
+            key: Cache key for the input; None disables the fallback cache
+            priority: Scheduling priority, lower first (see llm_scheduler.node_priority)
+            tokens: Estimated token cost, for the scheduler's tokens-per-minute limit
+            timeout: Per-attempt timeout for this call, overriding the caller's
+
+        Returns:
+            fn()'s result, or a cached result for the same key when the upstream is degraded
+        """
+        metrics.increment("llm_calls", operation=operation)
+        last_error: Optional[BaseException] = None
+        for attempt in range(self.max_attempts):
+            if not self.breaker.allow():
+                metrics.increment("llm_fast_failures", operation=operation)
+                last_error = CircuitOpenError("LLM circuit open; upstream is failing")
+                break
+            try:
+                result = self._attempt(operation, fn, priority, tokens, timeout)
+            except Exception as e:
+                last_error = e
+                if not is_transient(e):
+                    # The upstream answered (e.g. a 400), so this says nothing about its health
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                metrics.increment("llm_errors", operation=operation)
+                if attempt + 1 < self.max_attempts:
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                    metrics.increment("llm_retries", operation=operation)
+                    print(f"⚠️ DEBUG: LLM {operation} attempt {attempt + 1} failed ({type(e).__name__}: {e}); "
+                          f"retrying in {delay:.2f}s")
+                    time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            if self.cache is not None and key is not None:
+                self.cache.set(key, result)
+            return result
+
+        if self.cache is not None and key is not None:
+            cached, tier = self.cache.get(key)
+            if tier:
+                metrics.increment("llm_cache_served", operation=operation)
+                print(f"⚠️ DEBUG: LLM {operation} degraded ({type(last_error).__name__}); serving cached result")
+                return cached.model_copy(deep=True) if hasattr(cached, "model_copy") else cached
+        raise last_error
+
+    def _attempt(self, operation: str, fn: Callable[[], Any], priority: int = 1, tokens: int = 0,
+                 timeout: Optional[float] = None) -> Any:
+        """
+        One attempt, hedged with a duplicate request if it runs past the hedge
+        delay. Each request holds its scheduler slot until fn() returns, even
+        after the attempt has timed out, so in_flight counts what the upstream
+        is really serving.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        def timed(ticket: Any) -> Any:
+            began = time.monotonic()
+            actual = None
+            try:
+                value = fn()
+                actual = usage_tokens(value)
+            finally:
+                if ticket is not None:
+                    self.scheduler.release(ticket, actual)
+            self._record_latency(operation, time.monotonic() - began)
+            return value
+
+        def launch(ticket: Any) -> Future:
+            try:
+                return self._submit(operation, lambda: timed(ticket))
+            except BaseException:
+                if ticket is not None:
+                    self.scheduler.release(ticket)
+                raise
+
+        ticket = self.scheduler.acquire(priority, tokens) if self.scheduler is not None else None
+        delay = self.hedge_delay(operation) if self.hedge else None
+        if delay is None and not timeout:
+            return timed(ticket)
+
+        start = time.monotonic()
+        deadline = start + timeout if timeout else None
+        hedge_at = start + delay if delay is not None else None
+        hedge = None
+        pending = {launch(ticket)}
+        error: Optional[BaseException] = None
+        while pending:
+            checkpoints = [t for t in (hedge_at, deadline) if t is not None]
+            wait_for = max(0.0, min(checkpoints) - time.monotonic()) if checkpoints else None
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if hedge is not None:
+                        metrics.increment("llm_hedge_wins" if future is hedge else "llm_hedge_losses",
+                                          operation=operation)
+                    return future.result()
+                error = future.exception()
+            now = time.monotonic()
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                if pending and self._running < self.max_workers:
+                    # The first request is slow: race it against a duplicate, if
+                    # the scheduler has a slot free for it right now
+                    hedge_ticket = None
+                    if self.scheduler is not None:
+                        hedge_ticket = self.scheduler.try_acquire(priority, tokens)
+                    if self.scheduler is None or hedge_ticket is not None:
+                        metrics.increment("llm_hedges", operation=operation)
+                        hedge = launch(hedge_ticket)
+                        pending.add(hedge)
+            elif deadline is not None and now >= deadline:
+                break
+        if not pending:
+            raise error
+        # Abandoned requests finish in the background, holding their workers and
+        # scheduler slots; results are dropped
+        metrics.increment("llm_timeouts", operation=operation)
+        raise TimeoutError(f"LLM {operation} call exceeded {timeout:g}s")
+
+class ResilientChatModel(BaseChatModel):
+    """
+    Chat model wrapper that sends every call through a ResilientCaller. Works
+    with create_react_agent: bind_tools and with_structured_output return
+    wrapped runnables that share the same caller.
+    """
+
+    model: Any
+    caller: Any
+    bound: Any = None  # model.bind_tools(...) result, when tools are bound
+    priority: int = 1  # scheduling priority of the node using this model
+    expected_output_tokens: int = 1024
+    timeout: Optional[float] = None  # per-attempt timeout; None uses the caller's
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{getattr(self.model, '_llm_type', 'chat')}"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ResilientChatModel":
+        return self.model_copy(update={"bound": self.model.bind_tools(tools, **kwargs)})
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> RunnableLambda:
+        structured = self.model.with_structured_output(schema, **kwargs)
+        operation = f"structured:{getattr(schema, '__name__', 'schema')}"
+
+        def invoke(value: Any, config: Any = None) -> Any:
+            return self.caller.call(operation, lambda: structured.invoke(value, config),
+                                    key=prompt_key(operation, value), priority=self.priority,
+                                    tokens=estimate_tokens(prompt_chars(value), self.expected_output_tokens),
+                                    timeout=self.timeout)
+
+        return RunnableLambda(invoke, name=operation)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        runnable = self.bound or self.model
+        operation = "chat_tools" if self.bound is not None else "chat"
+        message: AIMessage = self.caller.call(
+            operation, lambda: runnable.invoke(messages, stop=stop, **kwargs), key=prompt_key(operation, messages),
+            priority=self.priority, tokens=estimate_tokens(prompt_chars(messages), self.expected_output_tokens),
+            timeout=self.timeout,
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+@lru_cache(maxsize=1)
+def get_llm_caller() -> ResilientCaller:
+    """Process-wide ResilientCaller configured from config.py, so the breaker sees every call."""
+    return ResilientCaller(
+        max_attempts=config.LLM_MAX_ATTEMPTS,
+        backoff_base=config.LLM_BACKOFF_BASE,
+        backoff_max=config.LLM_BACKOFF_MAX,
+        timeout=config.LLM_TIMEOUT,
+        hedge=config.LLM_HEDGE,
+        hedge_min_delay=config.LLM_HEDGE_MIN_DELAY,
+        breaker=CircuitBreaker(config.LLM_BREAKER_FAILURES, config.LLM_BREAKER_COOLDOWN),
+        cache=TTLCache(config.LLM_CACHE_SIZE, config.LLM_CACHE_TTL),
+        scheduler=get_llm_scheduler(),
+        # Every running request holds a scheduler slot, so this many workers never queue
+        max_workers=config.LLM_MAX_CONCURRENCY,
+    )
@@ -0,0 +1,208 @@
+"""
+Process-wide admission control for model calls.
+
+Every attempt made by llm_resilience.ResilientCaller first takes a slot
+from the shared LLMScheduler, which enforces:
+
+- token-bucket limits on requests per minute and tokens per minute, so a
+  burst of sessions cannot exhaust the provider quota
+- a cap on concurrent in-flight requests, with a few slots reserved for
+  priority-0 calls so they never wait for a long generation to finish
+- priority order among waiting calls: guardrail and intent calls (priority 0)
+  go ahead of recipe and nutrition calls (1) and diet plan generation (2).
+  Waiting time ages a call's priority, so long generations are delayed but
+  never starved.
+
+Token costs are estimated before the call (prompt characters / 4 plus the
+expected output) and corrected from the response's usage metadata.
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional
+from metrics import metrics
+import config
+
+def estimate_tokens(text_chars: int, expected_output: int) -> int:
+    """Rough token cost of a call: about 4 characters per prompt token."""
+    return text_chars // 4 + expected_output
+
+class TokenBucket:
+    """
+    Args:
+        per_minute: Sustained refill rate
+        burst: Bucket capacity; defaults to one minute's worth
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else per_minute
+        self.clock = clock
+        self.level = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available; 0 if it is now. Costs above capacity wait for a full bucket."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Debit the bucket; may go negative, e.g. for hedges or usage corrections."""
+        self._refill()
+        self.level -= amount
+
+class Ticket:
+    """A waiting or admitted call; `tokens` is the current cost estimate."""
+
+    __slots__ = ("priority", "tokens", "enqueued", "seq")
+
+    def __init__(self, priority: int, tokens: int, enqueued: float, seq: int):
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = enqueued
+        self.seq = seq
+
+class LLMScheduler:
+    """
+    Args:
+        rpm, tpm: Requests and tokens per minute
+        max_concurrency: Requests in flight at once
+        aging: Seconds of waiting that raise a call by one priority level
+        reserved: Concurrency slots only priority-0 calls may use
+        burst_requests, burst_tokens: Bucket capacities (default one minute's worth)
+    """
+
+    def __init__(self, rpm: float, tpm: float, max_concurrency: int, aging: float = 30.0, reserved: int = 0,
+                 burst_requests: Optional[float] = None, burst_tokens: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.requests = TokenBucket(rpm, burst_requests, clock)
+        self.tokens = TokenBucket(tpm, burst_tokens, clock)
+        self.max_concurrency = max_concurrency
+        self.aging = aging
+        self.reserved = min(reserved, max_concurrency - 1)
+        self.clock = clock
+        self.in_flight = 0
+        self._waiting: List[Ticket] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _rank(self, ticket: Ticket, now: float) -> tuple:
+        return (ticket.priority - (now - ticket.enqueued) / self.aging, ticket.seq)
+
+    def _has_slot(self, ticket: Ticket) -> bool:
+        limit = self.max_concurrency if ticket.priority == 0 else self.max_concurrency - self.reserved
+        return self.in_flight < limit
+
+    def _publish(self) -> None:
+        metrics.set_gauge("llm_queue_depth", len(self._waiting))
+        metrics.set_gauge("llm_in_flight", self.in_flight)
+
+    def acquire(self, priority: int, tokens: int) -> Ticket:
+        """Block until the call may go upstream, then debit its request and token cost."""
+        with self._cond:
+            now = self.clock()
+            ticket = Ticket(priority, tokens, now, next(self._seq))
+            self._waiting.append(ticket)
+            self._publish()
+            while True:
+                now = self.clock()
+                # The best-ranked waiter that has a free slot; a priority-0 call can
+                # pass lower-priority waiters that are only blocked on concurrency
+                eligible = [t for t in self._waiting if self._has_slot(t)]
+                head = min(eligible, key=lambda t: self._rank(t, now)) if eligible else None
+                wait_for = None
+                if head is ticket:
+                    wait_for = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                    if wait_for == 0:
+                        break
+                # Woken on release; a timed wait covers bucket refills and aging
+                self._cond.wait(timeout=wait_for if wait_for is not None else 1.0)
+            self._waiting.remove(ticket)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            self._publish()
+            # The next head may be admissible too
+            self._cond.notify_all()
+        waited = self.clock() - ticket.enqueued
+        metrics.observe("llm_queue_wait_seconds", waited, priority=priority)
+        return ticket
+
+    def release(self, ticket: Ticket, actual_tokens: Optional[int] = None) -> None:
+        """Free the slot; if the real token usage is known, settle the difference."""
+        with self._cond:
+            self.in_flight -= 1
+            if actual_tokens is not None:
+                self.tokens.take(actual_tokens - ticket.tokens)
+                metrics.increment("llm_tokens", actual_tokens, priority=ticket.priority)
+            self._publish()
+            self._cond.notify_all()
+
+    def try_acquire(self, priority: int, tokens: int) -> Optional[Ticket]:
+        """
+        Admit a call only if it can go upstream now without passing a waiting
+        call, e.g. a hedged duplicate; None otherwise. Release it as usual.
+        """
+        with self._cond:
+            ticket = Ticket(priority, tokens, self.clock(), next(self._seq))
+            if (self._waiting or not self._has_slot(ticket)
+                    or self.requests.wait_time(1) or self.tokens.wait_time(tokens)):
+                return None
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            self._publish()
+        return ticket
+
+    @contextmanager
+    def slot(self, priority: int, tokens: int) -> Iterator[Ticket]:
+        """
+        Usage:
+
+            with scheduler.slot(priority=0, tokens=800) as ticket:
+                response = model.invoke(messages)
+                ticket.tokens = response.usage_metadata["total_tokens"]
+        """
+        ticket = self.acquire(priority, tokens)
+        estimate = ticket.tokens
+        try:
+            yield ticket
+        finally:
+            actual = ticket.tokens
+            ticket.tokens = estimate
+            self.release(ticket, actual if actual != estimate else None)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queue_depth": len(self._waiting),
+                "in_flight": self.in_flight,
+                "requests_available": self.requests.level,
+                "tokens_available": self.tokens.level,
+            }
+
+def node_priority(node: Optional[str]) -> int:
+    """Scheduling priority for a node's model calls (lower runs first)."""
+    return config.LLM_PRIORITIES.get(node, config.LLM_DEFAULT_PRIORITY)
+
+@lru_cache(maxsize=1)
+def get_llm_scheduler() -> LLMScheduler:
+    """Process-wide scheduler configured from config.py."""
+    return LLMScheduler(
+        rpm=config.LLM_RPM,
+        tpm=config.LLM_TPM,
+        max_concurrency=config.LLM_MAX_CONCURRENCY,
+        aging=config.LLM_PRIORITY_AGING,
+        reserved=config.LLM_RESERVED_SLOTS,
+    )
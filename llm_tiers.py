@@ -0,0 +1,67 @@
+"""
+Per-node model tiers loaded from a JSON file (config.LLM_TIERS_PATH,
+llm_tiers.json by default):
+
+    {
+      "default": "standard",
+      "tiers": {"fast": {"model": "gemini-2.0-flash-lite", "max_output_tokens": 512,
+                         "temperature": 0, "timeout": 15, ...}, ...},
+      "nodes": {"intent_node": "fast",
+                "diet_plan_node": {"tier": "standard", "max_output_tokens": 8192}}
+    }
+
+A node maps to a tier name, or to a tier plus overrides. Nodes not listed use
+the default tier. Without the file every node gets config.MODEL with the
+defaults below, which is the previous behaviour.
+"""
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Optional
+from pydantic import BaseModel
+import config
+
+class ModelTier(BaseModel):
+    """Model and call parameters for one tier; prices are USD per million tokens."""
+    model: str = config.MODEL
+    max_output_tokens: int = 4096
+    temperature: float = 0.0
+    timeout: float = config.LLM_TIMEOUT
+    input_usd_per_mtok: float = 0.0
+    output_usd_per_mtok: float = 0.0
+
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        """Estimated USD cost of one call."""
+        return (input_tokens * self.input_usd_per_mtok + output_tokens * self.output_usd_per_mtok) / 1e6
+
+class TierConfig(BaseModel):
+    default: str = "standard"
+    tiers: Dict[str, ModelTier] = {}
+    nodes: Dict[str, object] = {}
+
+    def for_node(self, node: Optional[str]) -> ModelTier:
+        entry = self.nodes.get(node, self.default) if node else self.default
+        overrides = {}
+        if isinstance(entry, dict):
+            overrides = {key: value for key, value in entry.items() if key != "tier"}
+            entry = entry.get("tier", self.default)
+        if entry not in self.tiers:
+            raise ValueError(f"Unknown model tier {entry!r} for {node or 'default'}; "
+                             f"known tiers: {', '.join(self.tiers) or 'none'}")
+        return ModelTier.model_validate({**self.tiers[entry].model_dump(), **overrides})
+
+@lru_cache(maxsize=4)
+def load_tiers(path: str = config.LLM_TIERS_PATH) -> TierConfig:
+    """Parse and validate the tiers file; a missing file gives a single default tier."""
+    if not os.path.exists(path):
+        return TierConfig(tiers={"standard": ModelTier()})
+    with open(path) as f:
+        tier_config = TierConfig.model_validate(json.load(f))
+    # Fail at startup on a bad reference rather than on the first request
+    for node in [None, *tier_config.nodes]:
+        tier_config.for_node(node)
+    return tier_config
+
+def tier_for(node: Optional[str]) -> ModelTier:
+    """Model tier configured for a node."""
+    return load_tiers(config.LLM_TIERS_PATH).for_node(node)
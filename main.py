@@ -1,5 +1,6 @@
 from typing import Dict, List, Tuple, Any
 from langchain_core.messages import HumanMessage
+from metrics import metrics
 from langgraph.graph import StateGraph
 from intent import intent_node
 from recipe import recipe_node
@@ -10,9 +11,8 @@ from grocery import grocery_node
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END
 from guardrail import clinical_guardrail_node
+from follow_up import follow_up_node, route_follow_up
 from state import NutritionistState
-from fallback import fallback_node
-import json
 from datetime import datetime
 
 def pretty_print_chunk(chunk: Dict[str, Any]) -> None:
@@ -74,6 +74,7 @@ def create_nutritionist_workflow():
     graph.add_node("nutritional_info_node", nutritional_info_node)
     graph.add_node("visualization_node", visual_node)
     graph.add_node("grocery_node", grocery_node)
+    graph.add_node("follow_up_node", follow_up_node)
     
     # Define conditional logic for clinical guardrail
     def should_continue_after_guardrail(state: NutritionistState):
@@ -147,18 +148,13 @@ def create_nutritionist_workflow():
         }
     )
     
-    # Route from content generation to visualization
-    graph.add_conditional_edges(
-        "recipe_node",
-        route_to_visualization,
-        {
-            "visualization_node": "visualization_node",
-            "__end__": END
-        }
-    )
+    # Recipes and diet plans get their grocery list built before visualization
+    graph.add_edge("recipe_node", "grocery_node")
+    graph.add_edge("diet_plan_node", "grocery_node")
     
+    # Route from content generation to visualization
     graph.add_conditional_edges(
-        "diet_plan_node",
+        "grocery_node",
         route_to_visualization,
         {
             "visualization_node": "visualization_node",
@@ -175,11 +171,19 @@ def create_nutritionist_workflow():
         }
     )
     
-    # End after visualization
+    # End after visualization or a local follow-up
     graph.add_edge("visualization_node", END)
+    graph.add_edge("follow_up_node", END)
     
-    # Set entry point to clinical guardrail
-    graph.set_entry_point("clinical_guardrail")
+    # Follow-ups on the previous results are answered locally; everything
+    # else starts at the clinical guardrail
+    graph.set_conditional_entry_point(
+        route_follow_up,
+        {
+            "follow_up_node": "follow_up_node",
+            "clinical_guardrail": "clinical_guardrail"
+        }
+    )
     
     # Compile the graph
     workflow = graph.compile(checkpointer=memory)
@@ -201,7 +205,7 @@ def process_user_query(query: str) -> Dict[str, Any]:
     workflow = create_nutritionist_workflow()
     
     # Create the initial state
-    state = NutritionistState(messages=[HumanMessage(content=query)])
+    state = NutritionistState(messages=[HumanMessage(content=query)], original_query=query)
     
     # Run the workflow with pretty printing
     thread_id = "1"
@@ -221,6 +225,7 @@ def process_user_query(query: str) -> Dict[str, Any]:
         final_result = chunk
     
     print(f"\n✅ Workflow completed successfully!")
+    print(f"📊 Metrics:\n{metrics.format_summary()}")
     return final_result
 
 if __name__ == "__main__":
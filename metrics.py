@@ -0,0 +1,124 @@
+"""
+Process-wide counters and latency summaries for the workflow.
+
+    from metrics import metrics
+
+    metrics.increment("agent_budget_exhausted", node="recipe_node", reason="deadline")
+    with metrics.timer("node_seconds", node="recipe_node"):
+        ...
+    print(metrics.format_summary())
+
+Series are keyed by name plus labels. Gauges hold the latest value.
+Observations keep count, sum and max exactly and a bounded window of recent
+values for percentiles.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+WINDOW = 2048
+
+def _key(name: str, labels: dict) -> Tuple:
+    return (name,) + tuple(sorted(labels.items()))
+
+def _label(key: Tuple) -> str:
+    name, labels = key[0], key[1:]
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+class _Summary:
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=WINDOW)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def percentile(self, q: float) -> float:
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+class Metrics:
+    """Thread-safe counters, gauges and summaries; use the shared `metrics` instance."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple, float] = {}
+        self._gauges: Dict[Tuple, float] = {}
+        self._summaries: Dict[Tuple, _Summary] = {}
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = _Summary()
+            summary.add(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the wall-clock seconds spent in the block, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Returns:
+            {"counters": {series: value}, "gauges": {series: value},
+             "summaries": {series: {count, sum, mean, p50, p95, max}}}
+        """
+        with self._lock:
+            counters = {_label(key): value for key, value in self._counters.items()}
+            gauges = {_label(key): value for key, value in self._gauges.items()}
+            summaries = {
+                _label(key): {
+                    "count": s.count, "sum": s.total, "mean": s.total / s.count,
+                    "p50": s.percentile(0.5), "p95": s.percentile(0.95), "max": s.max,
+                }
+                for key, s in self._summaries.items()
+            }
+        return {"counters": counters, "gauges": gauges, "summaries": summaries}
+
+    def format_summary(self) -> str:
+        snapshot = self.snapshot()
+        lines = [f"{series}: {value:g}" for series, value in sorted(snapshot["counters"].items())]
+        lines += [f"{series}: {value:g}" for series, value in sorted(snapshot["gauges"].items())]
+        lines += [
+            f"{series}: n={s['count']} mean={s['mean']:.3g} p50={s['p50']:.3g} p95={s['p95']:.3g} max={s['max']:.3g}"
+            for series, s in sorted(snapshot["summaries"].items())
+        ]
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+metrics = Metrics()
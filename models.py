@@ -1,3 +1,4 @@
+from collections import defaultdict
 from typing import Dict, List, Literal, Optional, Tuple, Union
 from pydantic import BaseModel, Field
 
@@ -16,6 +17,7 @@ class Intent(BaseModel):
     excluded_ingredients: List[str]  # Foods/ingredients user doesn't have or wants to avoid
     time_context: Literal["single_meal", "daily_plan", "weekly_plan", "meal_prep", "none"]
     recipe_specificity: Literal["specific_recipe", "general_dish", "food_category"]  # New field
+    is_follow_up: bool = False  # Refines the previous request in the session ("make it vegan")
 
 class Recipe(BaseModel):
     name: str
@@ -59,5 +61,38 @@ class GroceryItem(BaseModel):
     category: str = "Other"  # e.g., Produce, Dairy, Meat, Pantry, etc.
     optional: bool = False
 
+class GroceryList(BaseModel):
+    """Represents a complete grocery list"""
+    items: List[GroceryItem]
+    recipe_source: Optional[str] = None  # Name of the recipe this list is for
+    servings: int = 1
+    
+    def add_item(self, item: GroceryItem) -> None:
+        """Add a single item to the grocery list"""
+        self.items.append(item)
+    
+    def remove_item(self, item_name: str) -> None:
+        """Remove an item from the grocery list by name"""
+        self.items = [item for item in self.items if item.name != item_name]
+    
+    def get_by_category(self) -> Dict[str, List[GroceryItem]]:
+        """Group items by their category"""
+        categorized = defaultdict(list)
+        for item in self.items:
+            categorized[item.category].append(item)
+        return dict(categorized)
+    
+    def scale_quantities(self, servings: int) -> None:
+        """Scale quantities based on desired number of servings"""
+        factor = servings / self.servings
+        for item in self.items:
+            item.quantity *= factor
+        self.servings = servings
+    
+    def to_columns(self):
+        """Array-backed copy for large lists; see grocery_columns.GroceryColumns"""
+        from grocery_columns import GroceryColumns  # NumPy stays out of startup
+        return GroceryColumns.from_grocery_list(self)
+
 class Visualization(BaseModel):
     plot_path: str
@@ -0,0 +1,229 @@
+"""
+Precomputed nutrient-density scores and Pareto frontier for the food dataset.
+
+The README's key insight is nutrient density against calories. precompute()
+derives it once per ingest (food_store.ingest calls it), and stores the
+result in the store's density/ directory:
+
+- protein, fiber, vitamin C and antioxidants per 100 kcal and per 100 g
+- density_score: a food's mean percentile across the four per-kcal densities
+- the Pareto frontier over the four per-kcal densities: foods no other food
+  beats on every one of them
+
+Each metric is stored as its values by row plus the rows sorted by value,
+so DensityIndex answers top-k in O(k), thresholds and percentiles in
+O(log n), without scanning the table. food_query ranks with it, and the
+recipe and diet plan nodes put density_hints() in their requests instead of
+leaving the ranking to the model.
+
+Calories are floored at DENSITY_KCAL_FLOOR per serving, so a pinch of
+cinnamon (6 kcal) doesn't rank on dividing by almost nothing.
+"""
+import json
+import os
+import time
+from typing import Dict, List, Optional
+from metrics import metrics
+import config
+
+# Density nutrient -> dataset column and unit
+DENSITY_NUTRIENTS = {
+    "protein": ("Protein (g)", "g"),
+    "fiber": ("Fiber (g)", "g"),
+    "vitamin c": ("Vitamin C (mg)", "mg"),
+    "antioxidants": ("Antioxidant Score", ""),
+}
+PER_KCAL = {nutrient: f"{nutrient.replace(' ', '_')}_per_100kcal" for nutrient in DENSITY_NUTRIENTS}
+PER_GRAM = {nutrient: f"{nutrient.replace(' ', '_')}_per_100g" for nutrient in DENSITY_NUTRIENTS}
+SCORE = "density_score"
+METRICS = list(PER_KCAL.values()) + list(PER_GRAM.values()) + [SCORE]
+DIRECTORY = "density"
+
+def _percentiles(values: "np.ndarray") -> "np.ndarray":
+    """
+    Percentile rank in [0, 1] of each value, NaN lowest. Ties share the
+    lowest rank, so a value at least as large never ranks lower.
+    """
+    import numpy as np
+    values = np.nan_to_num(values, nan=-np.inf)
+    return np.searchsorted(np.sort(values), values, side="left") / max(1, len(values) - 1)
+
+def pareto_frontier(points: "np.ndarray", order: "np.ndarray", block: int = 8192) -> "np.ndarray":
+    """
+    Rows of points (n x d, larger is better, NaN counts as worst) that no
+    other row dominates.
+
+    Args:
+        points: One row per food
+        order: Rows by a score that is larger for a dominating row than for
+            any row it dominates (the summed percentile ranks), best first
+
+    Returns:
+        Frontier rows, in the given order
+    """
+    import numpy as np
+    points = np.nan_to_num(points, nan=-np.inf)
+    frontier: List["np.ndarray"] = []
+    rows_kept: List["np.ndarray"] = []
+    for start in range(0, len(order), block):
+        rows = order[start:start + block]
+        chunk = points[rows]
+        # In score order only earlier rows can dominate: first the frontier so
+        # far, which removes most of a block, then earlier rows of the block
+        for best in frontier:
+            keep = ~((chunk <= best).all(axis=1) & (chunk < best).any(axis=1))
+            rows, chunk = rows[keep], chunk[keep]
+            if not len(rows):
+                break
+        i = 0
+        while i < len(rows):
+            best = chunk[i]
+            keep = ~((chunk <= best).all(axis=1) & (chunk < best).any(axis=1))
+            rows, chunk = rows[keep], chunk[keep]
+            i += 1
+        rows_kept.append(rows)
+        frontier.extend(chunk)
+    return np.concatenate(rows_kept) if rows_kept else np.empty(0, dtype=np.int64)
+
+def precompute(columns: Dict[str, "np.ndarray"], path: str) -> Dict[str, int]:
+    """
+    Compute and write the density metrics and Pareto frontier of a store.
+
+    Args:
+        columns: Store columns by name (at least Calories, Quantity (g) and
+            the DENSITY_NUTRIENTS columns)
+        path: Store directory; results go to its density/ directory
+
+    Returns:
+        The summary written to density/manifest.json
+    """
+    import numpy as np
+    start = time.perf_counter()
+    directory = os.path.join(path, DIRECTORY)
+    os.makedirs(directory, exist_ok=True)
+    calories = np.maximum(np.asarray(columns["Calories"], dtype=np.float64), config.DENSITY_KCAL_FLOOR)
+    grams = np.asarray(columns["Quantity (g)"], dtype=np.float64)
+    grams = np.where(grams > 0, grams, np.nan)
+    values = {}
+    for nutrient, (column, _) in DENSITY_NUTRIENTS.items():
+        amount = np.asarray(columns[column], dtype=np.float64)
+        values[PER_KCAL[nutrient]] = amount / calories * 100
+        values[PER_GRAM[nutrient]] = amount / grams * 100
+    ranks = [_percentiles(values[metric]) for metric in PER_KCAL.values()]
+    values[SCORE] = np.mean(ranks, axis=0)
+
+    for metric, array in values.items():
+        # Rows by ascending value with NaN dropped: searchsorted on the sorted
+        # values finds thresholds, the tail read backwards is the top k
+        known = np.flatnonzero(~np.isnan(array))
+        order = known[np.argsort(array[known], kind="stable")]
+        np.save(os.path.join(directory, f"{metric}.npy"), array)
+        np.save(os.path.join(directory, f"{metric}.order.npy"), order)
+        np.save(os.path.join(directory, f"{metric}.sorted.npy"), array[order])
+    score_order = np.argsort(-values[SCORE], kind="stable")
+    frontier = pareto_frontier(np.column_stack([values[metric] for metric in PER_KCAL.values()]), score_order)
+    np.save(os.path.join(directory, "pareto.npy"), frontier.astype(np.int64))
+    summary = {"rows": len(calories), "pareto": len(frontier), "kcal_floor": config.DENSITY_KCAL_FLOOR}
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    metrics.observe("food_store_seconds", time.perf_counter() - start, stage="density")
+    return summary
+
+class DensityIndex:
+    """
+    The density/ directory of a food store, memory-mapped on first use.
+
+    Args:
+        path: Store directory
+    """
+
+    def __init__(self, path: str):
+        self.directory = os.path.join(path, DIRECTORY)
+        with open(os.path.join(self.directory, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self._arrays = {}
+
+    def _load(self, name: str) -> "np.ndarray":
+        if name not in self._arrays:
+            import numpy as np
+            self._arrays[name] = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+        return self._arrays[name]
+
+    def values(self, metric: str) -> "np.ndarray":
+        """A metric for every row (NaN where it is unknown)."""
+        return self._load(metric)
+
+    def top(self, metric: str, k: int, skip=None) -> List[int]:
+        """
+        The k rows with the highest value of a metric, best first.
+
+        Args:
+            metric: One of METRICS
+            k: Rows wanted
+            skip: Optional predicate on a row; rows it accepts are passed over
+        """
+        order = self._load(f"{metric}.order")
+        rows = []
+        for position in range(len(order) - 1, -1, -1):
+            row = int(order[position])
+            if skip is None or not skip(row):
+                rows.append(row)
+                if len(rows) == k:
+                    break
+        return rows
+
+    def at_least(self, metric: str, value: float) -> "np.ndarray":
+        """Rows whose metric is at least value, best first."""
+        import numpy as np
+        position = np.searchsorted(self._load(f"{metric}.sorted"), value, side="left")
+        return self._load(f"{metric}.order")[position:][::-1]
+
+    def percentile(self, metric: str, row: int) -> Optional[float]:
+        """Share of foods whose metric is at most this row's, or None when unknown."""
+        import numpy as np
+        value = self.values(metric)[row]
+        if np.isnan(value):
+            return None
+        sorted_values = self._load(f"{metric}.sorted")
+        return float(np.searchsorted(sorted_values, value, side="right")) / len(sorted_values)
+
+    def pareto(self) -> "np.ndarray":
+        """Rows on the Pareto frontier, by density score."""
+        return self._load("pareto")
+
+def focus_metric(text: str) -> str:
+    """The per-kcal metric for the nutrient a request focuses on, else the density score."""
+    text = text.lower()
+    for nutrient, keywords in (("protein", ("protein",)), ("fiber", ("fiber", "fibre")),
+                               ("vitamin c", ("vitamin c", "immun")), ("antioxidants", ("antioxidant",))):
+        if any(keyword in text for keyword in keywords):
+            return PER_KCAL[nutrient]
+    return SCORE
+
+def density_hints(intent, k: int = config.DENSITY_HINT_FOODS) -> str:
+    """
+    One line naming the dataset's most nutrient-dense foods for a request's
+    focus that fit its constraints, for the recipe and diet plan
+    agents. Empty when the food store is unavailable.
+    """
+    try:
+        from constraints import compile_constraints
+        from food_query import load_food_table
+        table = load_food_table()
+    except Exception as e:
+        print(f"⚠️ DEBUG: No density hints: {e}")
+        return ""
+    focus = " ".join([intent.nutritional_requirements or "", *intent.health_goals]) if intent else ""
+    metric = focus_metric(focus)
+    allowed = table.allowed(compile_constraints(intent))
+    rows = table.density.top(metric, k, skip=lambda row: not allowed[row])
+    if metric == SCORE:
+        label = "overall nutrient density per calorie"
+        picks = [table.names[row] for row in rows]
+    else:
+        nutrient = next(n for n, m in PER_KCAL.items() if m == metric)
+        unit = DENSITY_NUTRIENTS[nutrient][1]
+        label = f"{nutrient} per 100 kcal"
+        picks = [f"{table.names[row]} ({table.density.values(metric)[row]:.1f}{' ' + unit if unit else ''})"
+                 for row in rows]
+    return f"🥦 NUTRIENT-DENSE FOODS ({label}, from the food dataset): {', '.join(picks)}" if picks else ""
@@ -0,0 +1,210 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Numbers with optional thousand separators ("1,200") or decimals ("38.15", ".5")
+_NUM = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+"
+
+# Longer spellings first so "mg" is not read as "m" + "g"; the lookahead stops
+# "g" from matching the start of a word such as "grape"
+_UNIT = (
+    r"kilocalories|kcals?|calories|calorie|cals?|kilojoules|kj"
+    r"|milligrams?|mg|micrograms?|mcg|µg|μg|ug|grams?|gm|g"
+    r"|iu|%\s*(?:dv|daily\s+value)|%"
+)
+
+_RANGE_SEP = r"\s*(?:-|–|to)\s*"
+
+# One precompiled pattern read with findall, so a string is tokenized in a single
+# C-level pass. Either "Name: [approximately] value[-value] [unit]" (the gap
+# after the colon may hold qualifiers but no digits or delimiters) or
+# "value[-value] unit name" as in "80g protein" from diet plan summaries.
+_FIELD_PATTERN = re.compile(
+    rf"""
+    (?P<name>[A-Za-z][^:,;\n]*):[^\d,;:\n]*?(?<![\w.])
+        (?P<low>{_NUM})(?:{_RANGE_SEP}(?P<high>{_NUM}))?
+        (?:\s*(?P<unit>{_UNIT})(?![A-Za-z]))?
+    |
+    (?<![\w.,])(?P<low2>{_NUM})(?:{_RANGE_SEP}(?P<high2>{_NUM}))?
+        \s*(?P<unit2>{_UNIT})(?![A-Za-z])\s+(?:of\s+)?(?!(?:dv|daily\s+value)\b)
+        (?P<name2>[A-Za-z][A-Za-z0-9 \-]*?)(?=\s*(?:[,;.\n)]|\band\b|$))
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_NAME_NOISE = re.compile(r"\b(?:approximately|approx|about|around|per\s+serving)\b", re.IGNORECASE)
+
+UNIT_ALIASES = {
+    'kilocalories': 'kcal', 'kcal': 'kcal', 'kcals': 'kcal', 'calories': 'kcal',
+    'calorie': 'kcal', 'cal': 'kcal', 'cals': 'kcal',
+    'kilojoules': 'kJ', 'kj': 'kJ',
+    'grams': 'g', 'gram': 'g', 'gm': 'g', 'g': 'g',
+    'milligrams': 'mg', 'milligram': 'mg', 'mg': 'mg',
+    'micrograms': 'µg', 'microgram': 'µg', 'mcg': 'µg', 'µg': 'µg', 'μg': 'µg', 'ug': 'µg',
+    'iu': 'IU',
+    '%': '%',
+}
+
+# Factors to the base unit of each dimension (kcal for energy, g for mass)
+UNIT_FACTORS = {
+    'kcal': ('energy', 1.0),
+    'kJ': ('energy', 1 / 4.184),
+    'g': ('mass', 1.0),
+    'mg': ('mass', 1e-3),
+    'µg': ('mass', 1e-6),
+    'IU': ('IU', 1.0),
+    '% DV': ('% DV', 1.0),
+    '%': ('% DV', 1.0),
+}
+
+NUTRIENT_ALIASES = {
+    'calories': 'calories', 'calorie': 'calories', 'energy': 'calories', 'kcal': 'calories',
+    'protein': 'protein', 'proteins': 'protein',
+    'fat': 'fat', 'fats': 'fat', 'total fat': 'fat',
+    'saturated fat': 'saturated fat', 'sat fat': 'saturated fat',
+    'carbohydrates': 'carbohydrates', 'carbohydrate': 'carbohydrates', 'carbs': 'carbohydrates',
+    'carb': 'carbohydrates', 'total carbohydrates': 'carbohydrates', 'total carbs': 'carbohydrates',
+    'fiber': 'fiber', 'fibre': 'fiber', 'dietary fiber': 'fiber', 'dietary fibre': 'fiber',
+    'sugar': 'sugar', 'sugars': 'sugar', 'total sugars': 'sugar',
+    'sodium': 'sodium', 'salt': 'sodium',
+    'cholesterol': 'cholesterol',
+    'calcium': 'calcium', 'iron': 'iron', 'potassium': 'potassium',
+    'vitamin c': 'vitamin c', 'vit c': 'vitamin c',
+}
+
+# Columns of the batch array and the unit each column is expressed in
+DEFAULT_NUTRIENTS: Tuple[Tuple[str, str], ...] = (
+    ('calories', 'kcal'),
+    ('protein', 'g'),
+    ('fat', 'g'),
+    ('carbohydrates', 'g'),
+    ('fiber', 'g'),
+    ('sugar', 'g'),
+    ('sodium', 'mg'),
+)
+
+@lru_cache(maxsize=256)
+def _normalize_unit(unit: Optional[str]) -> Optional[str]:
+    if not unit:
+        return None
+    unit = _WHITESPACE.sub(' ', unit.lower())
+    if unit.startswith('%') and len(unit) > 1:
+        return '% DV'
+    return UNIT_ALIASES.get(unit, unit)
+
+@lru_cache(maxsize=1024)
+def canonical_nutrient(name: str) -> str:
+    """
+    Map a nutrient label to its canonical name, e.g. "Total Carbs" -> "carbohydrates".
+    Unknown labels are returned lower-cased with whitespace collapsed.
+    """
+    key = _WHITESPACE.sub(' ', _NAME_NOISE.sub('', name.lower())).strip(' ()')
+    return NUTRIENT_ALIASES.get(key, key)
+
+@lru_cache(maxsize=4096)
+def _field_info(raw_name: str, raw_unit: str) -> Tuple[str, str, str, float]:
+    """
+    Resolve a raw label and unit into (display name, canonical name, unit, value factor).
+    Labels and units repeat across strings, so this is computed once per pair.
+    """
+    name = _WHITESPACE.sub(' ', _NAME_NOISE.sub('', raw_name)).strip()
+    canonical = canonical_nutrient(name)
+    unit = _normalize_unit(raw_unit)
+    factor = 1.0
+    if unit == 'kJ':
+        unit, factor = 'kcal', 1 / 4.184
+    if unit == 'kcal' and canonical != 'calories':
+        # "Daily average: 1450 calories" is an energy value whatever the label says
+        name, canonical = 'Calories', 'calories'
+    elif unit is None:
+        # Bare numbers are grams unless the label says they are calories
+        unit = 'kcal' if canonical == 'calories' else 'g'
+    return name, canonical, unit, factor
+
+def _iter_fields(text: str) -> Iterable[Tuple[str, str, float, str]]:
+    """Yield (display name, canonical name, value, unit) for every nutrient field."""
+    for name, low, high, unit, low2, high2, unit2, name2 in _FIELD_PATTERN.findall(text):
+        if not low:
+            name, low, high, unit = name2, low2, high2, unit2
+        name, canonical, unit, factor = _field_info(name, unit)
+        value = float(low.replace(',', '')) if ',' in low else float(low)
+        if high:
+            # Ranges such as "5-7 g" are reported at their midpoint
+            value = (value + (float(high.replace(',', '')) if ',' in high else float(high))) / 2
+        yield name, canonical, value * factor, unit
+
+def parse_nutrition(text: str) -> Dict[str, Tuple[float, str]]:
+    """
+    Parse a free-form nutrition string in a single pass.
+
+    Handles "Name: value unit" and "value unit name" fields, qualifiers such as
+    "Approximately", thousand separators ("1,200 mg"), ranges ("5-7 g", reported
+    at the midpoint) and kcal/kJ, g/mg/µg, IU and % DV units.
+
+    Args:
+        text: String like "Calories: Approximately 476 calories, Protein: 38.15g, ..."
+
+    Returns:
+        Dict mapping nutrient names (as written) to (value, unit) tuples
+    """
+    return {name: (value, unit) for name, _, value, unit in _iter_fields(text)}
+
+def parse_nutrition_batch(texts: Sequence[str],
+                          nutrients: Sequence[Tuple[str, str]] = DEFAULT_NUTRIENTS):
+    """
+    Parse many nutrition strings into a dense NumPy array.
+
+    Args:
+        texts: Nutrition strings, e.g. Recipe.nutritional_info for every recipe in a plan
+        nutrients: (canonical name, unit) pairs defining the columns; values are
+            converted to that unit when the dimensions match
+
+    Returns:
+        np.ndarray of shape (len(texts), len(nutrients)); missing values are NaN
+    """
+    import numpy as np
+
+    # (canonical name, unit) -> (column, conversion factor) for every compatible unit
+    targets = {}
+    for column, (name, target_unit) in enumerate(nutrients):
+        dimension, target_factor = UNIT_FACTORS.get(target_unit, (target_unit, 1.0))
+        for unit, (unit_dimension, factor) in UNIT_FACTORS.items():
+            if unit_dimension == dimension:
+                targets[(name, unit)] = (column, factor / target_factor)
+        targets.setdefault((name, target_unit), (column, 1.0))
+
+    # Collect coordinates and write them with one vectorized assignment
+    rows, columns, values = [], [], []
+    for row, text in enumerate(texts):
+        for _, canonical, value, unit in _iter_fields(text):
+            target = targets.get((canonical, unit))
+            if target is not None:
+                rows.append(row)
+                columns.append(target[0])
+                values.append(value * target[1])
+
+    result = np.full((len(texts), len(nutrients)), np.nan)
+    result[rows, columns] = values
+    return result
+
+def iter_plan_recipes(diet_plan) -> Iterable[Tuple[str, str, object]]:
+    """Yield (day, meal, recipe) for every recipe in a DietPlan."""
+    for day_plan in diet_plan.daily_plans:
+        for meal in ("breakfast", "lunch", "dinner", "snack"):
+            for recipe in getattr(day_plan, meal) or []:
+                yield day_plan.day, meal, recipe
+
+def parse_diet_plan(diet_plan, nutrients: Sequence[Tuple[str, str]] = DEFAULT_NUTRIENTS):
+    """
+    Parse the nutritional info of every recipe in a DietPlan in one call.
+
+    Returns:
+        Tuple of ([(day, meal, recipe name), ...], array of shape (n_recipes, len(nutrients)))
+    """
+    labels: List[Tuple[str, str, str]] = []
+    texts: List[str] = []
+    for day, meal, recipe in iter_plan_recipes(diet_plan):
+        labels.append((day, meal, recipe.name))
+        texts.append(recipe.nutritional_info)
+    return labels, parse_nutrition_batch(texts, nutrients)
@@ -1,13 +1,13 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.prebuilt import create_react_agent
-from langchain_community.tools import DuckDuckGoSearchRun
-import pandas as pd
-import config
-from utils import get_llm
+from utils import get_llm, get_search_tool, get_food_dataset_markdown
 from langchain_core.messages import AIMessage, HumanMessage
 from models import NutritionalInfo
-from state import NutritionistState
-from typing import Dict, Any
+from state import NutritionistState, compact_messages, get_original_query
+from typing import Dict, Any, Optional
+from budgets import NodeBudget, record_tool_calls
+from metrics import metrics
+import config
 
 NUTRITIONAL_INFO_PROMPT = """You are a nutrition expert specializing in providing detailed nutritional information about foods and nutrients.
 
@@ -38,23 +38,23 @@ Response Format:
 - additional_notes: Important nutritional context or tips
 """
 
-def create_nutritional_info_agent():
+def create_nutritional_info_agent(budget: Optional[NodeBudget] = None):
     """Create a nutritional information agent"""
-    df = pd.read_csv("clean-food.csv")
-    
     nutritional_prompt = ChatPromptTemplate(
         [
             ("system", NUTRITIONAL_INFO_PROMPT),
             ("placeholder", "{messages}"),
         ],
-        partial_variables={"df_str": df.to_markdown(index=True)}
+        partial_variables={"df_str": get_food_dataset_markdown()}
     )
     
     nutritional_agent = create_react_agent(
-        model=get_llm(),
-        tools=[DuckDuckGoSearchRun()],
+        model=get_llm("nutritional_info_node"),
+        tools=[get_search_tool()],
         prompt=nutritional_prompt,
-        response_format=NutritionalInfo
+        response_format=NutritionalInfo,
+        post_model_hook=budget.post_model_hook if budget else None,
+        checkpointer=False,
     )
     
     return nutritional_agent
@@ -64,10 +64,27 @@ def nutritional_info_node(state: NutritionistState) -> Dict[str, Any]:
     Nutritional information node that provides food recommendations and nutritional data.
     """
     intent = state["intent"]
-    nutritional_agent = create_nutritional_info_agent()
+    original_message = get_original_query(state)
+
+    # Questions over the dataset's own columns are answered without the agent
+    if config.FOOD_QUERY_ENABLED and not (intent and intent.is_follow_up):
+        try:
+            from food_query import answer_from_dataset
+            with metrics.timer("node_seconds", node="nutritional_info_node"):
+                info = answer_from_dataset(original_message, intent)
+            if info is not None:
+                print(f"🔍 DEBUG: Answered from the food dataset: {info.query_summary}")
+                return {
+                    "nutritional_info": info,
+                    "messages": [AIMessage(content=info.query_summary, name="nutritional_info_node")]
+                }
+        except Exception as e:
+            print(f"⚠️ DEBUG: Food dataset query failed, using the agent: {e}")
+
+    budget = NodeBudget.for_node("nutritional_info_node")
+    nutritional_agent = create_nutritional_info_agent(budget)
     
     # Build message with intent context
-    original_message = state["messages"][-1].content if state["messages"] else ""
     
     enhanced_message_parts = [f"Original query: {original_message}"]
     
@@ -93,15 +110,18 @@ Please provide:
     enhanced_message = "\n".join(enhanced_message_parts)
     
     try:
-        result = nutritional_agent.invoke({
-            "messages": [HumanMessage(content=enhanced_message)]
-        })
+        with metrics.timer("node_seconds", node="nutritional_info_node"):
+            result = nutritional_agent.invoke(
+                {"messages": [HumanMessage(content=enhanced_message)]},
+                config={"recursion_limit": budget.recursion_limit},
+            )
+        record_tool_calls("nutritional_info_node", result)
         
         nutritional_data = result['structured_response']
         
         return {
             "nutritional_info": nutritional_data,
-            "messages": result.get("messages", [])
+            "messages": compact_messages(result.get("messages", []), "nutritional_info_node")
         }
     except Exception as e:
         print(f"Error in nutritional_info_node: {e}")
@@ -0,0 +1,289 @@
+"""
+Diet plans composed from the recipe library instead of written by the model.
+
+compose_plan() fills every (day, meal) slot of a plan with a stored recipe
+whose calories are known (RecipeLibrary.candidates), with a beam search
+per day:
+
+- the day's calories land within PLAN_CALORIE_TOLERANCE of the target
+  ("1800 calories a day"), or between the tolerance and the cap for a cap
+  ("under 1500 calories"); without a number the target is
+  PLAN_DEFAULT_CALORIES
+- a protein minimum ("at least 120g protein") must be met, and "high
+  protein" without a number prefers recipes with a higher protein share
+- a recipe is used at most once a day and not on consecutive days, and
+  every earlier use in the plan makes it cost PLAN_REUSE_PENALTY more
+
+Slots without candidates, and days no combination fits, are gaps.
+diet_plan_node asks the model for only those meals (gap_request) and merges
+its answer back (fill), so a plan the library covers needs no model call.
+"""
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from metrics import metrics
+from models import DietPlan, Intent, MealPlanDay, Recipe
+from recipe_library import Candidate, RecipeLibrary, calories_protein
+import config
+
+MEALS = ("breakfast", "lunch", "dinner", "snack")
+# Share of the day's calories each meal is expected to carry
+MEAL_SHARES = {"breakfast": 0.25, "lunch": 0.35, "dinner": 0.3, "snack": 0.1}
+
+_NUMBERS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "ten": 10, "fourteen": 14}
+_DAYS = re.compile(rf"\b(\d+|{'|'.join(_NUMBERS)})[\s-]*days?\b")
+_WEEKS = re.compile(rf"\b(?:(\d+|{'|'.join(_NUMBERS)})[\s-]*)?weeks?\b|\bweekly\b")
+_CALORIES = re.compile(
+    r"(?P<cap>under|below|less than|at most|max(?:imum)?|up to|no more than|within|<)?\s*"
+    r"(?P<value>\d{1,2},\d{3}|\d{3,4})\s*-?\s*(?:kcal|calories?|cals?)\b"
+)
+_PROTEIN = re.compile(r"(?P<value>\d{2,3})\s*g(?:rams?)?\s*(?:of\s+)?protein|protein[^\d,.;]{0,20}(?P<value2>\d{2,3})\s*g\b")
+_HIGH_PROTEIN = re.compile(r"\b(?:high|more|extra|rich)[\s-]*(?:in\s+)?protein\b|\bprotein[\s-]*rich\b")
+
+def _count(word: Optional[str]) -> int:
+    if not word:
+        return 1
+    return int(word) if word.isdigit() else _NUMBERS[word]
+
+def requested_days(text: str) -> Optional[int]:
+    """Days asked for in a request: "3-day", "five days", "a week", "2 weeks"."""
+    text = text.lower()
+    if match := _DAYS.search(text):
+        return _count(match.group(1))
+    if match := _WEEKS.search(text):
+        return 7 * _count(match.group(1))
+    return None
+
+class PlanTargets(NamedTuple):
+    days: int
+    meals: Tuple[str, ...]
+    calories: float  # per day
+    calorie_cap: bool  # calories is an upper bound rather than a target
+    meal_cap: Optional[float]  # per-meal calorie limit ("meals under 500 calories")
+    min_protein: Optional[float]  # grams per day
+    prefer_protein: bool
+
+def plan_targets(query: str, intent: Intent) -> Optional[PlanTargets]:
+    """
+    The plan's shape and nutrition targets, from the request and its Intent.
+
+    Returns:
+        PlanTargets, or None when the number of days is not stated or implied
+    """
+    text = f"{query} {intent.nutritional_requirements}".lower()
+    days = requested_days(text) or {"weekly_plan": 7, "daily_plan": 1}.get(intent.time_context)
+    if not days or days > config.PLAN_MAX_DAYS:
+        return None
+    meals = tuple(meal for meal in MEALS if meal in intent.meal_type) or MEALS
+    calories, calorie_cap, meal_cap = float(config.PLAN_DEFAULT_CALORIES), False, None
+    if match := _CALORIES.search(text):
+        value = float(match.group("value").replace(",", ""))
+        if value < 1000:
+            # Too little for a day: a limit per meal
+            meal_cap = value
+            calories = min(calories, value * len(meals))
+        else:
+            calories, calorie_cap = value, bool(match.group("cap"))
+    min_protein = None
+    if match := _PROTEIN.search(text):
+        min_protein = float(match.group("value") or match.group("value2"))
+    prefer_protein = bool(_HIGH_PROTEIN.search(text)) or any("protein" in goal.lower() for goal in intent.health_goals)
+    return PlanTargets(days, meals, calories, calorie_cap, meal_cap, min_protein, prefer_protein)
+
+class Composition:
+    """
+    A plan being assembled: one recipe (or None, a gap) per day and meal.
+
+    Args:
+        targets: What the plan has to meet
+        days: Per day, meal -> Candidate, or None where the model must fill in
+    """
+
+    def __init__(self, targets: PlanTargets, days: List[Dict[str, Optional[Candidate]]]):
+        self.targets = targets
+        self.days = days
+
+    @property
+    def gaps(self) -> List[Tuple[int, str]]:
+        """(day index, meal) of every slot without a recipe."""
+        return [(day, meal) for day, slots in enumerate(self.days) for meal in self.targets.meals
+                if slots.get(meal) is None]
+
+    @property
+    def from_library(self) -> int:
+        return sum(candidate is not None for slots in self.days for candidate in slots.values())
+
+    def slot_calories(self, day: int, meal: str) -> float:
+        """Calories left for a gap: what the day's filled meals don't use, split by meal share."""
+        slots = self.days[day]
+        used = sum(candidate.calories for candidate in slots.values() if candidate is not None)
+        open_meals = [m for m in self.targets.meals if slots.get(m) is None]
+        share = MEAL_SHARES[meal] / sum(MEAL_SHARES[m] for m in open_meals)
+        return max(0.0, self.targets.calories - used) * share
+
+    def gap_request(self) -> str:
+        """Instructions asking the model for the gap meals only."""
+        lines = ["🧩 PARTIAL PLAN: these meals are already planned from known recipes:"]
+        for day, slots in enumerate(self.days):
+            for meal in self.targets.meals:
+                if slots.get(meal) is not None:
+                    lines.append(f"   - Day {day + 1} {meal}: {slots[meal].recipe.name} "
+                                 f"({slots[meal].calories:.0f} kcal)")
+        lines.append("Create recipes ONLY for these missing meals, each with complete ingredients, instructions, "
+                     "timing and nutritional info:")
+        for day, meal in self.gaps:
+            lines.append(f"   - Day {day + 1} {meal}: about {self.slot_calories(day, meal):.0f} kcal")
+        lines.append("Return a DietPlan whose daily_plans contain only those days (keep their \"Day N\" labels) "
+                     "and only those meals; leave every other meal list empty. Avoid the recipes listed above.")
+        return "\n".join(lines)
+
+    def fill(self, plan: DietPlan) -> List[Tuple[str, Recipe]]:
+        """
+        Put the model's recipes into the gaps, matching days by their "Day N"
+        label. Gaps the model left empty stay empty.
+
+        Returns:
+            (meal, recipe) for every gap filled
+        """
+        filled = []
+        for position, day_plan in enumerate(plan.daily_plans):
+            number = re.search(r"\d+", day_plan.day or "")
+            day = int(number.group()) - 1 if number else position
+            if not 0 <= day < len(self.days):
+                continue
+            for meal in self.targets.meals:
+                recipes = getattr(day_plan, meal) or []
+                if self.days[day].get(meal) is None and recipes:
+                    calories, protein = calories_protein(recipes[0].nutritional_info)
+                    self.days[day][meal] = Candidate(-1, recipes[0], calories or 0.0, protein or 0.0)
+                    filled.append((meal, recipes[0]))
+        return filled
+
+    def to_diet_plan(self, intent: Optional[Intent] = None) -> DietPlan:
+        """The composed plan as a DietPlan, with its average daily nutrition and shopping list."""
+        from grocery import plan_shopping_list
+        days = len(self.days)
+        daily_plans = [
+            MealPlanDay(day=f"Day {day + 1}",
+                        **{meal: [slots[meal].recipe] if slots.get(meal) is not None else [] for meal in MEALS})
+            for day, slots in enumerate(self.days)
+        ]
+        candidates = [candidate for slots in self.days for candidate in slots.values() if candidate is not None]
+        restrictions = " ".join(restriction.title() for restriction in (intent.dietary_restrictions if intent else []))
+        plan = DietPlan(
+            plan_name=f"{days}-Day {restrictions + ' ' if restrictions else ''}Plan",
+            duration="1 week" if days == 7 else f"{days} day{'s' if days != 1 else ''}",
+            daily_plans=daily_plans,
+            total_nutritional_info=(f"Daily average: {sum(c.calories for c in candidates) / days:.0f} calories, "
+                                    f"{sum(c.protein for c in candidates) / days:.0f}g protein"),
+            shopping_list=[],
+        )
+        plan.shopping_list = plan_shopping_list(plan)
+        return plan
+
+def _day_score(targets: PlanTargets, calories: float, protein: float) -> Tuple[float, bool]:
+    """(score, feasible) of a complete day; lower scores are better."""
+    tolerance = config.PLAN_CALORIE_TOLERANCE
+    deviation = (calories - targets.calories) / targets.calories
+    if targets.calorie_cap:
+        feasible = -2 * tolerance <= deviation <= 0
+        score = max(0.0, -deviation - tolerance) + (10.0 if deviation > 0 else 0.0)
+    else:
+        feasible = abs(deviation) <= tolerance
+        score = abs(deviation)
+    if targets.min_protein:
+        shortfall = max(0.0, targets.min_protein - protein) / targets.min_protein
+        feasible = feasible and not shortfall
+        score += shortfall
+    if targets.prefer_protein and calories:
+        score -= 0.5 * protein * 4 / calories  # share of energy from protein
+    return score, feasible
+
+def _compose_day(targets: PlanTargets, options: Dict[str, List[Candidate]], used: Dict[int, int],
+                 yesterday: set) -> Optional[Dict[str, Candidate]]:
+    """Beam search over the day's meals; the best feasible day, or None."""
+    meals = [meal for meal in targets.meals if options.get(meal)]
+    if not meals:
+        return None
+    total_share = sum(MEAL_SHARES[meal] for meal in targets.meals)
+    # Steer partial days toward the middle of the feasible range
+    aim = targets.calories * (1 - config.PLAN_CALORIE_TOLERANCE if targets.calorie_cap else 1)
+    beam: List[Tuple[float, Tuple[Candidate, ...], float, float]] = [(0.0, (), 0.0, 0.0)]
+    share = 0.0
+    for meal in meals:
+        share += MEAL_SHARES[meal] / total_share
+        expected = aim * share
+        expanded = []
+        for _, chosen, calories, protein in beam:
+            ids = {candidate.recipe_id for candidate in chosen}
+            fresh = [c for c in options[meal] if c.recipe_id not in ids and c.recipe_id not in yesterday]
+            for candidate in fresh or [c for c in options[meal] if c.recipe_id not in ids]:
+                total = calories + candidate.calories
+                reuse = sum(used.get(c.recipe_id, 0) for c in chosen) + used.get(candidate.recipe_id, 0)
+                score = abs(total - expected) / targets.calories + config.PLAN_REUSE_PENALTY * reuse
+                if targets.min_protein:
+                    score += max(0.0, targets.min_protein * share - protein - candidate.protein) / targets.min_protein
+                expanded.append((score, chosen + (candidate,), total, protein + candidate.protein))
+        expanded.sort(key=lambda entry: entry[0])
+        beam = expanded[:config.PLAN_BEAM_WIDTH]
+        if not beam:
+            return None
+
+    # Scale the target to the meals that have candidates; the rest are gaps
+    covered = sum(MEAL_SHARES[meal] for meal in meals) / total_share
+    scaled = targets._replace(calories=targets.calories * covered,
+                              min_protein=targets.min_protein * covered if targets.min_protein else None)
+    best = None
+    for _, chosen, calories, protein in beam:
+        score, feasible = _day_score(scaled, calories, protein)
+        score += config.PLAN_REUSE_PENALTY * sum(used.get(c.recipe_id, 0) for c in chosen)
+        if feasible and (best is None or score < best[0]):
+            best = (score, chosen)
+    return dict(zip(meals, best[1])) if best else None
+
+def compose_plan(library: RecipeLibrary, query: str, intent: Intent) -> Optional[Composition]:
+    """
+    Assemble a plan for the request from the library's recipes.
+
+    Args:
+        library: Recipes to compose from
+        query: The user's request, for the number of days and the targets
+        intent: Its Intent: meals, restrictions, exclusions, goals
+
+    Returns:
+        A Composition, possibly with gaps for the model to fill, or None when
+        the plan's length is unknown, nothing could be placed, or a food the
+        user asked for is in none of the chosen recipes
+    """
+    start = time.perf_counter()
+    targets = plan_targets(query, intent)
+    if targets is None:
+        return None
+    options = {}
+    for meal in targets.meals:
+        candidates = library.candidates(meal, intent)
+        if targets.meal_cap:
+            candidates = [c for c in candidates if c.calories <= targets.meal_cap]
+        options[meal] = candidates
+
+    used: Dict[int, int] = {}
+    yesterday: set = set()
+    days = []
+    for _ in range(targets.days):
+        slots = _compose_day(targets, options, used, yesterday) or {}
+        for candidate in slots.values():
+            used[candidate.recipe_id] = used.get(candidate.recipe_id, 0) + 1
+        yesterday = {candidate.recipe_id for candidate in slots.values()}
+        days.append(dict(slots))
+    composition = Composition(targets, days)
+
+    metrics.observe("plan_compose_seconds", time.perf_counter() - start)
+    if not composition.from_library:
+        return None
+    text = "\n".join(c.recipe.name + "\n" + "\n".join(c.recipe.ingredients)
+                     for slots in days for c in slots.values()).lower()
+    if not all(food.lower() in text for food in intent.specific_foods if food.strip()):
+        return None
+    metrics.increment("plan_slots", composition.from_library, source="library")
+    metrics.increment("plan_slots", len(composition.gaps), source="model")
+    return composition
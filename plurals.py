@@ -0,0 +1,19 @@
+"""
+The plural-folding rule shared by grocery merging (grocery_merge), search
+tokens (recipe_index) and recipe-name matching (recipe_library), so a word
+folds the same way everywhere: "tomatoes" -> "tomato", "berries" -> "berry".
+"""
+from functools import lru_cache
+
+@lru_cache(maxsize=65536)
+def singular(word: str) -> str:
+    """A lower-case word with a regular English plural ending removed; short words and -ss/-us/-is are kept."""
+    if len(word) <= 3 or word.endswith(('ss', 'us', 'is')):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'xes')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
@@ -1,15 +1,15 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.prebuilt import create_react_agent
-from langchain_community.tools import DuckDuckGoSearchRun
-import pandas as pd
-import config
-from utils import get_llm
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langgraph.types import Command
+from utils import get_llm, get_search_tool, get_food_dataset_markdown, get_recipe_library
+from langchain_core.messages import AIMessage, HumanMessage
 from models import Recipe
-from state import NutritionistState
-from typing import Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
+from state import NutritionistState, compact_messages, get_original_query
+from typing import Dict, Any, Optional
+import time
+from budgets import NodeBudget, record_tool_calls
+from constraints import enforce_recipe
+from metrics import metrics
+from nutrient_density import density_hints
 
 ENHANCED_RECIPE_PROMPT = """You are a culinary expert specializing in creating detailed, specific recipes that exactly match user requests.
 
@@ -43,21 +43,24 @@ Dataset Reference for nutritional values:
 IMPORTANT: Always create the exact type of dish requested. Don't substitute a salad for a power bowl, or a dish for a dressing.
 """
 
-def create_recipe_agent():
+def create_recipe_agent(budget: Optional[NodeBudget] = None):
     """Create a recipe agent with enhanced prompt for better specificity handling"""
-    df = pd.read_csv("clean-food.csv")
     recipe_prompt = ChatPromptTemplate(
         [
             ("system", ENHANCED_RECIPE_PROMPT),
             ("placeholder", "{messages}"),
         ],
-        partial_variables={"df_str": df.to_markdown(index=True)}
+        partial_variables={"df_str": get_food_dataset_markdown()}
     )
     recipe_agent = create_react_agent(
-        model=get_llm(),
-        tools=[DuckDuckGoSearchRun()],
+        model=get_llm("recipe_node"),
+        tools=[get_search_tool()],
         prompt=recipe_prompt,
-        response_format=Recipe
+        response_format=Recipe,
+        post_model_hook=budget.post_model_hook if budget else None,
+        # Run without checkpoints: otherwise the agent inherits the workflow's
+        # checkpointer and stores its whole transcript under the node's namespace
+        checkpointer=False,
     )
     return recipe_agent
 
@@ -66,10 +69,27 @@ def recipe_node(state: NutritionistState) -> Dict[str, Any]:
     Enhanced recipe generation node that handles specific recipes and ingredient constraints.
     """
     intent = state["intent"]
-    recipe_agent = create_recipe_agent()
+    original_message = get_original_query(state) or "Create a recipe"
+    
+    # A dish generated before is served from the library instead of regenerated.
+    # The library is only a cache: when it fails, the recipe is generated
+    library = None
+    try:
+        library = get_recipe_library()
+        if library is not None and intent and intent.recipe_specificity == "specific_recipe" and not intent.is_follow_up:
+            stored = library.match(original_message, intent)
+            if stored:
+                return {
+                    "recipe": stored,
+                    "messages": [AIMessage(content=f"Here is {stored.name}, from the recipe library.", name="recipe_node")]
+                }
+    except Exception as e:
+        print(f"⚠️ DEBUG: Recipe library unavailable, generating: {e}")
+    
+    budget = NodeBudget.for_node("recipe_node")
+    recipe_agent = create_recipe_agent(budget)
     
     # Build enhanced message with better context
-    original_message = state["messages"][-1].content if state["messages"] else "Create a recipe"
     
     user_message_parts = [f"RECIPE REQUEST: {original_message}"]
     
@@ -99,6 +119,18 @@ def recipe_node(state: NutritionistState) -> Dict[str, Any]:
         
         if intent.meal_type:
             user_message_parts.append(f"🍽️ MEAL TYPE: {', '.join(intent.meal_type)}")
+        
+        # Dish-agnostic requests get the dataset's densest foods, ranked locally
+        if intent.recipe_specificity != "specific_recipe" and not intent.is_follow_up:
+            hints = density_hints(intent)
+            if hints:
+                user_message_parts.append(hints)
+        
+        # Follow-ups adapt the session's previous recipe rather than starting over
+        previous_recipe = (state.get("previous_results") or {}).get("recipe")
+        if intent.is_follow_up and previous_recipe:
+            user_message_parts.append(f"\n🔁 FOLLOW-UP: Adapt this previous recipe to the request, changing only what it asks for:")
+            user_message_parts.append(previous_recipe.model_dump_json())
     
     user_message_parts.append("""
 📝 RECIPE REQUIREMENTS:
@@ -115,15 +147,26 @@ def recipe_node(state: NutritionistState) -> Dict[str, Any]:
     enhanced_user_message = "\n".join(user_message_parts)
     
     try:
-        result = recipe_agent.invoke({
-            "messages": [HumanMessage(content=enhanced_user_message)]
-        })
+        start = time.perf_counter()
+        with metrics.timer("node_seconds", node="recipe_node"):
+            result = recipe_agent.invoke(
+                {"messages": [HumanMessage(content=enhanced_user_message)]},
+                config={"recursion_limit": budget.recursion_limit},
+            )
+        record_tool_calls("recipe_node", result)
         
         recipe_data = result['structured_response']
+        recipe_data, violations = enforce_recipe(recipe_data, intent, lambda: get_llm("recipe_node"), "recipe_node")
+        # A recipe that still breaks the constraints is shown, not kept for reuse
+        if library is not None and not violations:
+            try:
+                library.add(recipe_data, intent.dietary_restrictions if intent else (), time.perf_counter() - start)
+            except Exception as e:
+                print(f"⚠️ DEBUG: Could not store recipe in the library: {e}")
         
         return {
             "recipe": recipe_data,
-            "messages": result.get("messages", [])
+            "messages": compact_messages(result.get("messages", []), "recipe_node")
         }
     except Exception as e:
         print(f"Error in recipe_node: {e}")
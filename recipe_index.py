@@ -0,0 +1,306 @@
+"""
+Offline BM25 search over a local recipe / nutrition corpus.
+
+The index is a directory of immutable segments plus a manifest. Each segment
+holds its documents (JSON lines) and an inverted index: a sorted term table
+(UTF-8 bytes plus offsets) whose i-th term owns a slice of the postings
+arrays (document ids and term frequencies). Everything is stored as .npy
+files and memory-mapped on open, and terms are found by binary search, so
+opening the index costs a few milliseconds whatever its size. New documents are written
+as a new segment; `compact` merges segments back into one.
+
+    python recipe_index.py seed                       # index clean-food.csv
+    python recipe_index.py add recipes.jsonl          # {"title", "text"} or Recipe JSON per line
+    python recipe_index.py search "palak paneer"
+    python recipe_index.py compact
+"""
+import argparse
+import csv
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from plurals import singular
+import config
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it me my of on or the this to what with".split()
+)
+
+# Title terms are counted this many times, a light form of field weighting
+TITLE_WEIGHT = 2
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens with stopwords removed and plurals folded."""
+    return [singular(token) for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+class _Segment:
+    """One immutable, memory-mapped segment of the index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._legacy_terms = None
+        if os.path.exists(os.path.join(path, "terms.npy")):
+            self.terms = np.load(os.path.join(path, "terms.npy"), mmap_mode="r")
+            self.term_offsets = np.load(os.path.join(path, "term_offsets.npy"), mmap_mode="r")
+            self.postings = np.load(os.path.join(path, "postings.npy"), mmap_mode="r")
+        else:
+            # Segments written before the memory-mapped term table; `compact` rewrites them
+            with open(os.path.join(path, "terms.json")) as f:
+                self._legacy_terms: Dict[str, List[int]] = json.load(f)
+        self.doc_ids = np.load(os.path.join(path, "doc_ids.npy"), mmap_mode="r")
+        self.tfs = np.load(os.path.join(path, "tfs.npy"), mmap_mode="r")
+        self.doc_lengths = np.load(os.path.join(path, "doc_lengths.npy"), mmap_mode="r")
+        self.doc_offsets = np.load(os.path.join(path, "doc_offsets.npy"), mmap_mode="r")
+        self.size = len(self.doc_lengths)
+        self.total_length = int(self.doc_lengths.sum())
+        with open(os.path.join(path, "docs.jsonl"), "rb") as f:
+            self._docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def span(self, term: str) -> Optional[Tuple[int, int]]:
+        """The term's slice of doc_ids and tfs, or None if the segment lacks it."""
+        if self._legacy_terms is not None:
+            span = self._legacy_terms.get(term)
+            return tuple(span) if span else None
+        key = term.encode("utf-8")
+        low, high = 0, len(self.term_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            found = self.terms[self.term_offsets[middle]:self.term_offsets[middle + 1]].tobytes()
+            if found == key:
+                return int(self.postings[middle]), int(self.postings[middle + 1])
+            if found < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def document(self, local_id: int) -> dict:
+        start, end = int(self.doc_offsets[local_id]), int(self.doc_offsets[local_id + 1])
+        return json.loads(self._docs[start:end])
+
+    def documents(self) -> Iterator[dict]:
+        for local_id in range(self.size):
+            yield self.document(local_id)
+
+    @staticmethod
+    def write(path: str, documents: List[dict]) -> None:
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        offsets = [0]
+        with open(os.path.join(path, "docs.jsonl"), "wb") as f:
+            for local_id, document in enumerate(documents):
+                tokens = tokenize(document["title"]) * TITLE_WEIGHT + tokenize(document["text"])
+                lengths.append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    postings.setdefault(term, []).append((local_id, tf))
+                line = json.dumps(document, ensure_ascii=False).encode() + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+
+        # Sorted by code point, which is also UTF-8 byte order, so span() can bisect the bytes
+        terms = bytearray()
+        term_offsets = [0]
+        starts = [0]
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        for term in sorted(postings):
+            for local_id, tf in postings[term]:
+                doc_ids.append(local_id)
+                tfs.append(tf)
+            terms += term.encode("utf-8")
+            term_offsets.append(len(terms))
+            starts.append(len(doc_ids))
+
+        np.save(os.path.join(path, "terms.npy"), np.frombuffer(bytes(terms), dtype=np.uint8))
+        np.save(os.path.join(path, "term_offsets.npy"), np.asarray(term_offsets, dtype=np.int64))
+        np.save(os.path.join(path, "postings.npy"), np.asarray(starts, dtype=np.int64))
+        np.save(os.path.join(path, "doc_ids.npy"), np.asarray(doc_ids, dtype=np.int32))
+        np.save(os.path.join(path, "tfs.npy"), np.asarray(tfs, dtype=np.float32))
+        np.save(os.path.join(path, "doc_lengths.npy"), np.asarray(lengths, dtype=np.float32))
+        np.save(os.path.join(path, "doc_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+class RecipeIndex:
+    """
+    BM25-ranked inverted index over documents of the form
+    {"title": ..., "text": ..., "source": ...}.
+
+    Args:
+        path: Index directory; created empty if it does not exist
+        k1, b: BM25 term-frequency saturation and length normalisation
+    """
+
+    def __init__(self, path: str = config.RECIPE_INDEX_PATH, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        os.makedirs(path, exist_ok=True)
+        manifest = os.path.join(path, "manifest.json")
+        names = []
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                names = json.load(f)["segments"]
+        self.segments = [_Segment(os.path.join(path, name)) for name in names]
+        self._refresh_stats()
+
+    def _refresh_stats(self) -> None:
+        self.num_docs = sum(segment.size for segment in self.segments)
+        total_length = sum(segment.total_length for segment in self.segments)
+        self.avg_length = total_length / self.num_docs if self.num_docs else 0.0
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    def _write_manifest(self, names: List[str]) -> None:
+        # Written to a temporary file and renamed, so readers never see a partial manifest
+        tmp = os.path.join(self.path, "manifest.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"segments": names}, f)
+        os.replace(tmp, os.path.join(self.path, "manifest.json"))
+
+    def _new_segment(self, documents: List[dict]) -> str:
+        existing = [int(name[4:]) for name in os.listdir(self.path) if name.startswith("seg-")]
+        name = f"seg-{max(existing, default=-1) + 1:05d}"
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        os.makedirs(tmp)
+        _Segment.write(tmp, documents)
+        os.rename(tmp, os.path.join(self.path, name))
+        return name
+
+    def add_documents(self, documents: Iterable[dict]) -> int:
+        """
+        Index new documents as a new segment; existing segments are untouched.
+
+        Returns:
+            Number of documents added
+        """
+        documents = [
+            {"title": doc.get("title", ""), "text": doc.get("text", ""), "source": doc.get("source", "")}
+            for doc in documents
+        ]
+        if not documents:
+            return 0
+        name = self._new_segment(documents)
+        self._write_manifest([os.path.basename(segment.path) for segment in self.segments] + [name])
+        self.segments.append(_Segment(os.path.join(self.path, name)))
+        self._refresh_stats()
+        return len(documents)
+
+    def compact(self) -> None:
+        """Merge all segments into one, which keeps query cost flat after many adds."""
+        if len(self.segments) <= 1:
+            return
+        documents = [document for segment in self.segments for document in segment.documents()]
+        old = [segment.path for segment in self.segments]
+        name = self._new_segment(documents)
+        self._write_manifest([name])
+        self.segments = [_Segment(os.path.join(self.path, name))]
+        self._refresh_stats()
+        for path in old:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[float, dict]]:
+        """
+        Rank documents against the query with BM25.
+
+        Returns:
+            Up to k (score, document) tuples, best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.num_docs:
+            return []
+
+        # Collection-wide document frequencies, so scores are comparable across segments
+        spans = [{term: span for term in terms if (span := segment.span(term))} for segment in self.segments]
+        idf = {}
+        for term in terms:
+            df = sum(found[term][1] - found[term][0] for found in spans if term in found)
+            if df:
+                idf[term] = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+        candidates = []
+        for segment, found in zip(self.segments, spans):
+            scores = None
+            for term, weight in idf.items():
+                span = found.get(term)
+                if span is None:
+                    continue
+                if scores is None:
+                    scores = np.zeros(segment.size, dtype=np.float32)
+                ids = segment.doc_ids[span[0]:span[1]]
+                tf = segment.tfs[span[0]:span[1]]
+                norm = self.k1 * (1 - self.b + self.b * segment.doc_lengths[ids] / self.avg_length)
+                scores[ids] += weight * tf * (self.k1 + 1) / (tf + norm)
+            if scores is None:
+                continue
+            top = np.argpartition(-scores, min(k, segment.size) - 1)[:k]
+            candidates.extend((float(scores[i]), segment, int(i)) for i in top if scores[i] > 0)
+
+        candidates.sort(key=lambda candidate: -candidate[0])
+        return [(score, segment.document(local_id)) for score, segment, local_id in candidates[:k]]
+
+def recipe_document(recipe: dict, source: str = "") -> dict:
+    """Flatten a Recipe-shaped dict (name, ingredients, instructions, ...) into a document."""
+    parts = []
+    if recipe.get("ingredients"):
+        parts.append("Ingredients: " + "; ".join(recipe["ingredients"]))
+    if recipe.get("instructions"):
+        parts.append("Instructions: " + " ".join(recipe["instructions"]))
+    if recipe.get("nutritional_info"):
+        parts.append("Nutrition: " + recipe["nutritional_info"])
+    return {"title": recipe.get("name", ""), "text": " ".join(parts), "source": source}
+
+def documents_from_jsonl(path: str) -> Iterator[dict]:
+    """Read {"title", "text"} documents or Recipe JSON objects, one per line."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if "title" in record:
+                    yield {"source": path, **record}
+                else:
+                    yield recipe_document(record, source=path)
+
+def documents_from_food_csv(path: str = config.FOOD_DATASET_PATH) -> Iterator[dict]:
+    """One nutrition document per food in the dataset the agents already use."""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            food = row.pop("Food")
+            text = ", ".join(f"{column}: {value}" for column, value in row.items() if value)
+            yield {"title": food, "text": f"{food} nutrition facts. {text}", "source": path}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline BM25 recipe index")
+    parser.add_argument("--path", default=config.RECIPE_INDEX_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    seed = commands.add_parser("seed", help="index the food dataset CSV")
+    seed.add_argument("csv", nargs="?", default=config.FOOD_DATASET_PATH)
+    add = commands.add_parser("add", help="index a JSONL file of documents or recipes")
+    add.add_argument("jsonl")
+    search = commands.add_parser("search")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=5)
+    commands.add_parser("compact")
+    args = parser.parse_args()
+
+    index = RecipeIndex(args.path)
+    if args.command == "seed":
+        print(f"Added {index.add_documents(documents_from_food_csv(args.csv))} documents")
+    elif args.command == "add":
+        print(f"Added {index.add_documents(documents_from_jsonl(args.jsonl))} documents")
+    elif args.command == "compact":
+        index.compact()
+        print(f"Compacted {len(index)} documents into one segment")
+    else:
+        for score, document in index.search(args.query, args.k):
+            print(f"{score:7.2f}  {document['title']}: {document['text'][:100]}")
+
+if __name__ == "__main__":
+    main()
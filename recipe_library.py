@@ -0,0 +1,350 @@
+"""
+Persistent library of generated recipes, so a dish asked for again is served
+from disk instead of being regenerated by the recipe agent.
+
+Every Recipe the agent produces is stored in a SQLite database with its
+prep / cook / total times parsed to minutes, its calories and protein per
+serving, the meals it was generated for and the dietary restrictions it
+respects. An FTS5 table indexes names and ingredients. When the Intent asks
+for a specific recipe, recipe_node first calls match(); a close match that
+respects the request's constraints is returned as is. diet_plan_node
+composes plans from candidates() (see plan_composer.py).
+
+A match is "close" when every content word of the request ("palak paneer"
+in "How to make palak paneer") is in the stored name, and those words make
+up at least RECIPE_LIBRARY_MIN_COVERAGE of the name's content words.
+Descriptors such as "classic" or "homemade" are ignored on both sides. So
+"Palak Paneer" and "Classic Palak Paneer" serve "how to make palak paneer",
+while "vegan palak paneer" and "palak paneer soup" do not.
+
+    python recipe_library.py search "paneer spinach" --max-minutes 40
+    python recipe_library.py match "How to make palak paneer"
+    python recipe_library.py stats
+"""
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from constraints import compile_constraints
+from metrics import metrics
+from models import Intent, Recipe
+from nutrition_parser import canonical_nutrient, parse_nutrition
+from plurals import singular
+import config
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_DURATION = re.compile(
+    r"(\d+(?:\.\d+)?)(?:\s*(?:-|to|–)\s*(\d+(?:\.\d+)?))?\s*(h|hr|hrs|hours?|m|mins?|minutes?)?\b"
+)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it me my of on or the this to what with".split()
+)
+# Words of a request that don't name the dish
+REQUEST_WORDS = frozenset(
+    "make making recipe recipes cook cooking prepare want give show need please like would could "
+    "you your dish some tell teach".split()
+)
+# Words of a recipe name that don't change which dish it is
+DESCRIPTORS = frozenset(
+    "classic traditional authentic easy simple homemade home style restaurant quick best perfect ultimate "
+    "delicious creamy healthy".split()
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    name_key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    recipe TEXT NOT NULL,
+    tags TEXT NOT NULL DEFAULT '',
+    prep_minutes INTEGER,
+    cook_minutes INTEGER,
+    total_minutes INTEGER,
+    servings INTEGER,
+    generation_seconds REAL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(name, ingredients, tokenize='porter');
+"""
+
+# Columns added after the first release, created on older databases when opened
+ADDED_COLUMNS = {"calories": "REAL", "protein": "REAL", "meals": "TEXT NOT NULL DEFAULT ''"}
+
+def _terms(text: str) -> List[str]:
+    """Lower-case content words with plurals folded."""
+    return [singular(token) for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+def _dish_terms(name: str) -> List[str]:
+    """A recipe name's content words, without parentheticals, subtitles and descriptors."""
+    name = re.split(r"[(:]| - | – ", name, maxsplit=1)[0]
+    return [term for term in _terms(name) if term not in DESCRIPTORS]
+
+def parse_minutes(text: Optional[str]) -> Optional[int]:
+    """
+    Minutes in a free-text duration such as "15 minutes", "1 hour 30 mins"
+    or "20-25 min" (ranges count as their upper bound). Bare numbers are
+    minutes. Returns None when there is no number.
+    """
+    if not text:
+        return None
+    total, found = 0.0, False
+    for low, high, unit in _DURATION.findall(text.lower()):
+        value = float(high or low)
+        total += value * 60 if unit.startswith("h") else value
+        found = True
+    return round(total) if found else None
+
+def _mentions(text: str, term: str) -> bool:
+    return re.search(rf"\b{re.escape(term.lower())}", text) is not None
+
+def calories_protein(nutritional_info: str) -> Tuple[Optional[float], Optional[float]]:
+    """Calories (kcal) and protein (g) per serving from a Recipe's nutritional_info."""
+    values = {}
+    for name, (value, unit) in parse_nutrition(nutritional_info or "").items():
+        values.setdefault((canonical_nutrient(name), unit), value)
+    protein = values.get(("protein", "g"))
+    if protein is None and ("protein", "mg") in values:
+        protein = values[("protein", "mg")] / 1000
+    return values.get(("calories", "kcal")), protein
+
+class Candidate(NamedTuple):
+    """A stored recipe with the numbers plan composition needs."""
+    recipe_id: int
+    recipe: Recipe
+    calories: float
+    protein: float
+
+class RecipeLibrary:
+    """
+    SQLite-backed recipe store, safe to share between threads.
+
+    Args:
+        path: Database file, created if missing; ":memory:" for a throwaway library
+        min_coverage: Share of a stored name's words the request must cover to match
+    """
+
+    def __init__(self, path: str = config.RECIPE_LIBRARY_PATH,
+                 min_coverage: float = config.RECIPE_LIBRARY_MIN_COVERAGE):
+        self.path = path
+        self.min_coverage = min_coverage
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            # Readers don't block the writer, e.g. batch.py next to the app
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        existing = {row["name"] for row in self._db.execute("PRAGMA table_info(recipes)")}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in existing:
+                self._db.execute(f"ALTER TABLE recipes ADD COLUMN {column} {definition}")
+        self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    def add(self, recipe: Recipe, dietary_restrictions: Iterable[str] = (),
+            generation_seconds: Optional[float] = None, meals: Iterable[str] = ()) -> Optional[int]:
+        """
+        Store a recipe, replacing an earlier one with the same name.
+
+        Args:
+            recipe: The generated recipe
+            dietary_restrictions: Restrictions it was generated for ("vegan", ...)
+            generation_seconds: How long generating it took, reported as time saved on hits
+            meals: Meals it was generated for ("breakfast", ...); kept from the
+                earlier recipe when empty
+
+        Returns:
+            The recipe's row id, or None if its name has no content words
+        """
+        name_key = " ".join(_terms(recipe.name))
+        if not name_key:
+            return None
+        tags = " ".join(sorted({restriction.strip().lower() for restriction in dietary_restrictions
+                                if restriction.strip()}))
+        calories, protein = calories_protein(recipe.nutritional_info)
+        meals = " ".join(sorted({meal.strip().lower() for meal in meals if meal.strip()}))
+        row = (name_key, recipe.name, recipe.model_dump_json(), tags, parse_minutes(recipe.prep_time),
+               parse_minutes(recipe.cook_time), parse_minutes(recipe.total_time), recipe.servings,
+               generation_seconds, time.time(), calories, protein, meals)
+        with self._lock, self._db:
+            old = self._db.execute("SELECT id FROM recipes WHERE name_key = ?", (name_key,)).fetchone()
+            if old:
+                self._db.execute("DELETE FROM recipes_fts WHERE rowid = ?", (old["id"],))
+            recipe_id = self._db.execute(
+                "INSERT INTO recipes (name_key, name, recipe, tags, prep_minutes, cook_minutes, total_minutes, "
+                "servings, generation_seconds, created, calories, protein, meals) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name_key) DO UPDATE SET name = excluded.name, recipe = excluded.recipe, "
+                "tags = excluded.tags, prep_minutes = excluded.prep_minutes, "
+                "cook_minutes = excluded.cook_minutes, total_minutes = excluded.total_minutes, "
+                "servings = excluded.servings, generation_seconds = excluded.generation_seconds, "
+                "created = excluded.created, calories = excluded.calories, protein = excluded.protein, "
+                "meals = CASE WHEN excluded.meals = '' THEN recipes.meals ELSE excluded.meals END RETURNING id",
+                row,
+            ).fetchone()[0]
+            self._db.execute("INSERT INTO recipes_fts (rowid, name, ingredients) VALUES (?, ?, ?)",
+                             (recipe_id, recipe.name, "\n".join(recipe.ingredients)))
+        return recipe_id
+
+    def search(self, text: str, k: int = 10, max_total_minutes: Optional[int] = None) -> List[Tuple[Recipe, int]]:
+        """
+        Full-text search over names and ingredients; name matches rank higher.
+
+        Args:
+            text: Words to look for; a recipe matching any of them is a candidate
+            k: Maximum results
+            max_total_minutes: Only recipes whose parsed total time is at most this
+
+        Returns:
+            (recipe, total_minutes) pairs, best first
+        """
+        terms = list(dict.fromkeys(_terms(text)))
+        if not terms:
+            return []
+        sql = ("SELECT r.recipe, r.total_minutes FROM recipes_fts JOIN recipes r ON r.id = recipes_fts.rowid "
+               "WHERE recipes_fts MATCH ?")
+        params: list = [" OR ".join(f'"{term}"' for term in terms)]
+        if max_total_minutes is not None:
+            sql += " AND r.total_minutes <= ?"
+            params.append(max_total_minutes)
+        sql += " ORDER BY bm25(recipes_fts, 10.0, 1.0) LIMIT ?"
+        params.append(k)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [(Recipe.model_validate_json(row["recipe"]), row["total_minutes"]) for row in rows]
+
+    def match(self, query: str, intent: Optional[Intent] = None) -> Optional[Recipe]:
+        """
+        The stored recipe for a specific-dish request, if there is a close one.
+
+        Args:
+            query: The user's request
+            intent: Its Intent; the recipe must contain specific_foods and pass its
+                constraint checks, and have been generated for the dietary
+                restrictions ingredients can't decide ("keto")
+
+        Returns:
+            The stored Recipe, or None to generate a new one
+        """
+        start = time.perf_counter()
+        wanted = [term for term in dict.fromkeys(_terms(query))
+                  if term not in REQUEST_WORDS and term not in DESCRIPTORS]
+        hit, recipe, best = None, None, 0.0
+        if wanted:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT r.id, r.name, r.recipe, r.tags, r.generation_seconds FROM recipes_fts "
+                    "JOIN recipes r ON r.id = recipes_fts.rowid WHERE recipes_fts MATCH ? "
+                    "ORDER BY bm25(recipes_fts, 10.0, 1.0) LIMIT 20",
+                    # Only names containing every wanted word can match
+                    ("name : (" + " AND ".join(f'"{term}"' for term in wanted) + ")",),
+                ).fetchall()
+            for row in rows:
+                dish = set(_dish_terms(row["name"]))
+                if not dish or not dish.issuperset(wanted):
+                    continue
+                coverage = len(wanted) / len(dish)
+                if coverage >= self.min_coverage and coverage > best:
+                    candidate = Recipe.model_validate_json(row["recipe"])
+                    if self._satisfies(candidate, row["tags"], intent):
+                        hit, recipe, best = row, candidate, coverage
+        metrics.observe("recipe_library_seconds", time.perf_counter() - start)
+        metrics.increment("recipe_library_lookups", result="hit" if hit else "miss")
+        if hit is None:
+            return None
+        with self._lock, self._db:
+            self._db.execute("UPDATE recipes SET hits = hits + 1 WHERE id = ?", (hit["id"],))
+        if hit["generation_seconds"]:
+            metrics.increment("recipe_library_seconds_saved", hit["generation_seconds"])
+        print(f"📚 DEBUG: Serving {hit['name']!r} from the recipe library")
+        return recipe
+
+    def candidates(self, meal: str, intent: Optional[Intent] = None) -> List[Candidate]:
+        """
+        Stored recipes with known calories that could fill one meal of a plan.
+
+        Args:
+            meal: "breakfast", "lunch", "dinner" or "snack". Recipes stored
+                without a meal (single recipe requests) count as lunch or dinner
+            intent: The plan's Intent; recipes must avoid its excluded_ingredients
+                and respect its dietary restrictions (specific_foods apply to the
+                plan as a whole, not to every recipe)
+
+        Returns:
+            Matching recipes, most requested first
+        """
+        sql = ("SELECT id, recipe, tags, calories, protein FROM recipes WHERE calories > 0 "
+               "AND (' ' || meals || ' ' LIKE ?" + (" OR meals = ''" if meal in ("lunch", "dinner") else "") +
+               ") ORDER BY hits DESC, id")
+        with self._lock:
+            rows = self._db.execute(sql, (f"% {meal} %",)).fetchall()
+        candidates = []
+        for row in rows:
+            recipe = Recipe.model_validate_json(row["recipe"])
+            if self._satisfies(recipe, row["tags"], intent, check_foods=False):
+                candidates.append(Candidate(row["id"], recipe, row["calories"], row["protein"] or 0.0))
+        return candidates
+
+    @staticmethod
+    def _satisfies(recipe: Recipe, tags: str, intent: Optional[Intent], check_foods: bool = True) -> bool:
+        if intent is None:
+            return True
+        text = recipe.name.lower() + "\n" + "\n".join(recipe.ingredients).lower()
+        if check_foods and not all(_mentions(text, food) for food in intent.specific_foods if food.strip()):
+            return False
+        # Exclusions and the restrictions ingredients can decide are checked on
+        # the recipe itself; the rest ("keto") need the tag it was stored with
+        matcher = compile_constraints(intent)
+        if matcher is None:
+            return True
+        if matcher.scan([recipe]):
+            return False
+        return {restriction.lower() for restriction in matcher.unchecked}.issubset(tags.split())
+
+    def stats(self) -> dict:
+        """Stored recipes, total hits and the generation time those hits saved."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) AS recipes, COALESCE(SUM(hits), 0) AS hits, "
+                "COALESCE(SUM(hits * generation_seconds), 0) AS seconds_saved FROM recipes"
+            ).fetchone()
+        return dict(row)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Library of generated recipes")
+    parser.add_argument("--path", default=config.RECIPE_LIBRARY_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search", help="full-text search over names and ingredients")
+    search.add_argument("text")
+    search.add_argument("-k", type=int, default=10)
+    search.add_argument("--max-minutes", type=int, help="only recipes ready within this many minutes")
+    match = commands.add_parser("match", help="what recipe_node would serve for a request")
+    match.add_argument("query")
+    commands.add_parser("stats")
+    args = parser.parse_args()
+
+    library = RecipeLibrary(args.path)
+    if args.command == "search":
+        for recipe, minutes in library.search(args.text, args.k, args.max_minutes):
+            print(f"{minutes if minutes is not None else '?':>5} min  {recipe.name}")
+    elif args.command == "match":
+        recipe = library.match(args.query)
+        print(recipe.model_dump_json(indent=2) if recipe else "No close match")
+    else:
+        stats = library.stats()
+        print(f"{stats['recipes']} recipes, {stats['hits']} hits, "
+              f"{stats['seconds_saved']:.0f}s of generation saved")
+
+if __name__ == "__main__":
+    main()
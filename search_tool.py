@@ -0,0 +1,202 @@
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict
+from langchain_core.tools import BaseTool
+from ttl_cache import TTLCache
+import config
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+NO_RESULTS = "No good DuckDuckGo Search Result was found"
+TIMED_OUT = "Search timed out after {timeout:g}s; answer from the dataset and your own knowledge."
+UNAVAILABLE = "Search unavailable ({error}); answer from the dataset and your own knowledge."
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: lower-cased, punctuation dropped, whitespace collapsed."""
+    return _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', query.lower())).strip()
+
+class DuckDuckGoBackend:
+    """
+    DuckDuckGo text search, keeping clients (and their connections) per thread.
+
+    DDGS fixes its timeout when the client is created and takes whole
+    seconds, so each thread keeps one client per whole-second timeout, and
+    a call's remaining deadline is rounded down to at least 1s (capped at
+    the constructor's timeout).
+    """
+
+    def __init__(self, max_results: int, timeout: float):
+        self.max_results = max_results
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def search(self, query: str, timeout: float) -> str:
+        seconds = max(1, int(min(timeout, self.timeout)))
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+        client = clients.get(seconds)
+        if client is None:
+            from duckduckgo_search import DDGS
+            client = clients[seconds] = DDGS(timeout=seconds)
+        results = client.text(query, max_results=self.max_results)
+        return " ".join(result["body"] for result in results) or NO_RESULTS
+
+class SearxBackend:
+    """
+    SearxNG-compatible JSON search (GET url?q=...&format=json) over one pooled
+    HTTP session, so connections are reused across calls and threads.
+    """
+
+    def __init__(self, url: str, max_results: int, pool_size: int):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.max_results = max_results
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def search(self, query: str, timeout: float) -> str:
+        response = self.session.get(self.url, params={"q": query, "format": "json"}, timeout=timeout)
+        response.raise_for_status()
+        results = response.json().get("results", [])[:self.max_results]
+        return " ".join(result.get("content") or result.get("title", "") for result in results) or NO_RESULTS
+
+class LocalIndexBackend:
+    """Offline BM25 search over recipe_index.RecipeIndex; answers in milliseconds."""
+
+    def __init__(self, index, max_results: int, snippet_chars: int = 600):
+        self.index = index
+        self.max_results = max_results
+        self.snippet_chars = snippet_chars
+
+    def search(self, query: str, timeout: float) -> str:
+        hits = self.index.search(query, self.max_results)
+        return "\n\n".join(
+            f"{document['title']}: {document['text'][:self.snippet_chars]}" for _, document in hits
+        ) or NO_RESULTS
+
+class SearchService:
+    """
+    Shared search front-end for every agent: normalised-query cache, a global
+    concurrency limit, a per-call deadline, and coalescing of identical
+    in-flight queries so concurrent users searching the same dish trigger one
+    upstream request.
+    """
+
+    def __init__(self, backend, cache: TTLCache, timeout: float, max_concurrency: int):
+        self.backend = backend
+        self.cache = cache
+        self.timeout = timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stats = dict(calls=0, memory_hits=0, disk_hits=0, coalesced=0, upstream=0,
+                           timeouts=0, errors=0, upstream_seconds=0.0)
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["disk_hits"] + stats["coalesced"]
+        stats["hit_ratio"] = hits / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+    def search(self, query: str) -> str:
+        """Search with caching; failures and timeouts come back as text for the agent."""
+        self._count("calls")
+        deadline = time.monotonic() + self.timeout
+        key = normalize_query(query)
+
+        while True:
+            value, tier = self.cache.get(key)
+            if tier:
+                self._count(f"{tier}_hits")
+                return value
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    break
+            # Another thread is fetching this query: wait for its result
+            if not event.wait(max(0.0, deadline - time.monotonic())):
+                self._count("timeouts")
+                return TIMED_OUT.format(timeout=self.timeout)
+            value, tier = self.cache.get(key)
+            if tier:
+                self._count("coalesced")
+                return value
+            # The leader failed; only retry while there is time left
+            if time.monotonic() >= deadline:
+                self._count("errors")
+                return UNAVAILABLE.format(error="upstream error")
+
+        try:
+            return self._fetch(query, key, deadline)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def _fetch(self, query: str, key: str, deadline: float) -> str:
+        if not self._semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            self._count("timeouts")
+            return TIMED_OUT.format(timeout=self.timeout)
+        try:
+            start = time.monotonic()
+            self._count("upstream")
+            try:
+                value = self.backend.search(query, max(0.1, deadline - start))
+            except Exception as e:
+                timed_out = "timeout" in type(e).__name__.lower() or "timed out" in str(e).lower()
+                self._count("timeouts" if timed_out else "errors")
+                print(f"⚠️ DEBUG: search failed for {query!r}: {e}")
+                if timed_out:
+                    return TIMED_OUT.format(timeout=self.timeout)
+                return UNAVAILABLE.format(error=type(e).__name__)
+            finally:
+                self._count("upstream_seconds", time.monotonic() - start)
+        finally:
+            self._semaphore.release()
+        self.cache.set(key, value)
+        return value
+
+class CachedSearchTool(BaseTool):
+    """Drop-in replacement for DuckDuckGoSearchRun backed by the shared SearchService."""
+
+    name: str = "duckduckgo_search"
+    description: str = (
+        "A wrapper around DuckDuckGo Search. "
+        "Useful for when you need to answer questions about current events. "
+        "Input should be a search query."
+    )
+    service: Any
+
+    def _run(self, query: str, run_manager: Any = None) -> str:
+        return self.service.search(query)
+
+@lru_cache(maxsize=1)
+def get_search_service() -> SearchService:
+    """Process-wide SearchService configured from config.py."""
+    if config.SEARCH_BACKEND == "local":
+        from recipe_index import RecipeIndex, documents_from_food_csv
+        index = RecipeIndex(config.RECIPE_INDEX_PATH)
+        if not len(index):
+            # First run: start from the food dataset; add recipes with `python recipe_index.py add`
+            index.add_documents(documents_from_food_csv(config.FOOD_DATASET_PATH))
+        backend = LocalIndexBackend(index, config.SEARCH_MAX_RESULTS)
+    elif config.SEARCH_URL:
+        backend = SearxBackend(config.SEARCH_URL, config.SEARCH_MAX_RESULTS, config.SEARCH_MAX_CONCURRENCY)
+    else:
+        backend = DuckDuckGoBackend(config.SEARCH_MAX_RESULTS, config.SEARCH_TIMEOUT)
+    cache = TTLCache(config.SEARCH_CACHE_SIZE, config.SEARCH_CACHE_TTL, config.SEARCH_CACHE_PATH)
+    return SearchService(backend, cache, config.SEARCH_TIMEOUT, config.SEARCH_MAX_CONCURRENCY)
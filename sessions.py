@@ -0,0 +1,146 @@
+"""
+Per-session conversation memory for the chat app.
+
+Each Chainlit session gets a Session holding what a follow-up needs: the
+last few messages, the last Intent, and the last turn's results (recipe,
+diet plan, nutritional info, grocery list). A later message such as "make
+it vegan" then starts from them instead of from scratch (see intent_node
+and recipe_node).
+
+Sessions are kept in a SessionStore: an LRU bounded by SESSION_MAX, whose
+entries are dropped after SESSION_IDLE_TTL seconds without a message.
+Workflow checkpoints are not part of a session; each turn runs on its own
+thread and only the final values are kept here.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from langchain_core.messages import BaseMessage, HumanMessage
+from metrics import metrics
+import config
+
+# Final-state keys a follow-up can build on
+RESULT_KEYS = ("recipe", "diet_plan", "nutritional_info", "grocery_list")
+
+class Session:
+    """Conversation memory for one chat session."""
+
+    __slots__ = ("session_id", "messages", "intent", "results", "turns", "last_active")
+
+    def __init__(self, session_id: str, now: float):
+        self.session_id = session_id
+        self.messages: List[BaseMessage] = []
+        self.intent = None
+        self.results: Dict[str, Any] = {}
+        self.turns = 0
+        self.last_active = now
+
+    def turn_inputs(self, query: str) -> Dict[str, Any]:
+        """
+        Workflow input for a new message in this session.
+
+        Args:
+            query: The user's message
+
+        Returns:
+            Initial NutritionistState: the recent history plus the query, and
+            the previous Intent and results for follow-ups
+        """
+        return {
+            "messages": self.messages + [HumanMessage(content=query)],
+            "original_query": query,
+            "previous_intent": self.intent,
+            "previous_results": dict(self.results),
+        }
+
+    def record_turn(self, query: str, final_state: Optional[Dict[str, Any]]) -> None:
+        """
+        Remember a finished turn. The final state's messages (the history,
+        the query and the nodes' answers) become the session's history,
+        trimmed to the last SESSION_MAX_MESSAGES. The Intent and results are
+        replaced only when the turn produced new ones, so a turn blocked by
+        the guardrail leaves the previous request in place, and a turn that
+        only returns a grocery list updates the list and keeps the recipe.
+        """
+        final_state = final_state or {}
+        messages = final_state.get("messages") or self.messages + [HumanMessage(content=query)]
+        messages = messages[-config.SESSION_MAX_MESSAGES:]
+        # Keep the history starting at a user turn
+        while messages and not isinstance(messages[0], HumanMessage):
+            messages = messages[1:]
+        self.messages = messages
+        results = {key: final_state[key] for key in RESULT_KEYS if final_state.get(key)}
+        if any(key in results for key in RESULT_KEYS[:3]):
+            self.results = results
+        else:
+            # e.g. a shopping list follow-up: keep the recipe it was built from
+            self.results.update(results)
+        if final_state.get("intent"):
+            self.intent = final_state["intent"]
+        self.turns += 1
+
+class SessionStore:
+    """
+    Thread-safe LRU of Sessions with idle expiry.
+
+    Args:
+        max_sessions: Sessions kept; the least recently active is evicted beyond this
+        idle_ttl: Seconds without activity after which a session is dropped
+        clock: Time source, injectable for tests and benchmarks
+    """
+
+    def __init__(self, max_sessions: int, idle_ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Session:
+        """The session for an id, created if missing or expired, and marked active."""
+        now = self.clock()
+        with self._lock:
+            self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id, now)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    metrics.increment("sessions_evicted", reason="max_sessions")
+            session.last_active = now
+            self._sessions.move_to_end(session_id)
+            metrics.set_gauge("sessions_active", len(self._sessions))
+            return session
+
+    def discard(self, session_id: str) -> None:
+        """Forget a session, e.g. when its chat ends."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            metrics.set_gauge("sessions_active", len(self._sessions))
+
+    def evict_idle(self) -> int:
+        """Drop sessions idle for longer than idle_ttl; returns how many were dropped."""
+        with self._lock:
+            evicted = self._evict_idle(self.clock())
+            metrics.set_gauge("sessions_active", len(self._sessions))
+            return evicted
+
+    def _evict_idle(self, now: float) -> int:
+        # Ordered by last activity, so the idle ones are at the front
+        evicted = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_active <= self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        if evicted:
+            metrics.increment("sessions_evicted", evicted, reason="idle")
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
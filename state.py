@@ -1,15 +1,63 @@
 from typing import Dict, List, Optional, Any
-from typing_extensions import TypedDict
-from langchain_core.messages import BaseMessage
-from models import Intent, Recipe, DietPlan, NutritionalInfo, Visualization, ClinicalGuardrail
+from typing_extensions import Annotated, TypedDict
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph.message import add_messages
+from models import Intent, Recipe, DietPlan, NutritionalInfo, Visualization, ClinicalGuardrail, GroceryList
 
 class NutritionistState(TypedDict):
     """Enhanced state management for the nutritionist workflow"""
-    messages: List[BaseMessage]
+    # Nodes return only the messages they add; see compact_messages
+    messages: Annotated[List[BaseMessage], add_messages]
+    original_query: Optional[str]
+    # Carried over from the session's previous turn for follow-ups (see sessions.py)
+    previous_intent: Optional[Intent]
+    previous_results: Dict[str, Any]
     intent: Optional[Intent]
     recipe: Optional[Recipe]
     diet_plan: Optional[DietPlan]
     nutritional_info: Optional[NutritionalInfo]
+    grocery_list: Optional[GroceryList]
     visualization: Optional[str]
     clinical_check: Optional[ClinicalGuardrail]
-    metadata: Dict[str, Any]
\ No newline at end of file
+    metadata: Dict[str, Any]
+
+def message_text(message: BaseMessage) -> str:
+    """
+    A message's text: string content as-is, or the text of list content
+    (plain strings and {"type": "text"} blocks) joined, other blocks skipped.
+    """
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(block if isinstance(block, str) else block.get("text", "")
+                   for block in message.content if isinstance(block, str) or block.get("type") == "text")
+
+def get_original_query(state: NutritionistState) -> str:
+    """
+    The user's query for the current request. Falls back to the last human
+    message for callers that don't set original_query.
+    """
+    if state.get("original_query"):
+        return state["original_query"]
+    for message in reversed(state.get("messages") or []):
+        if isinstance(message, HumanMessage):
+            return message_text(message)
+    return ""
+
+def compact_messages(messages: List[BaseMessage], node: str) -> List[BaseMessage]:
+    """
+    The part of a react agent's transcript worth keeping in the state: its
+    final answer as a single AIMessage named after the node. The node's own
+    prompt, tool calls, tool results (raw search pages) and budget notices
+    are dropped, so they never reach a checkpoint.
+
+    Args:
+        messages: The agent's result["messages"]
+        node: Name given to the kept message
+
+    Returns:
+        A list with zero or one AIMessage
+    """
+    for message in reversed(messages):
+        if isinstance(message, AIMessage) and not message.tool_calls and message_text(message).strip():
+            return [AIMessage(content=message_text(message), name=node)]
+    return []
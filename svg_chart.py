@@ -0,0 +1,167 @@
+import math
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+import config
+
+# Seaborn's "deep" palette, so both chart backends look the same
+PALETTE = [
+    "#4C72B0", "#DD8452", "#55A868", "#C44E52", "#8172B3",
+    "#937860", "#DA8BC3", "#8C8C8C", "#CCB974", "#64B5CD",
+]
+
+WIDTH = 960
+HEIGHT = 640
+MARGIN_LEFT = 80
+MARGIN_RIGHT = 30
+MARGIN_TOP = 70
+MARGIN_BOTTOM = 140
+
+def _nice_ticks(max_value: float, count: int = 5) -> List[float]:
+    """
+    Compute evenly spaced, human friendly y-axis ticks from 0 to above max_value.
+    """
+    if max_value <= 0:
+        return [0.0, 1.0]
+    raw_step = max_value / count
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    for multiplier in (1, 2, 2.5, 5, 10):
+        step = multiplier * magnitude
+        if step >= raw_step:
+            break
+    ticks = []
+    value = 0.0
+    while value < max_value + step:
+        ticks.append(round(value, 10))
+        value += step
+    return ticks
+
+def _format_tick(value: float) -> str:
+    return f"{value:g}"
+
+def render_bar_chart_svg(nutrition_data: Dict[str, Tuple[float, str]], title: str) -> str:
+    """
+    Render parsed nutrition data as a standalone SVG bar chart.
+
+    Args:
+        nutrition_data: Dict mapping nutrient names to (value, unit) tuples,
+            as returned by visualization.parse_nutritional_info
+        title: Title for the chart
+
+    Returns:
+        str: The SVG document
+    """
+    names = [name.title() for name in nutrition_data]
+    values = [value for value, _ in nutrition_data.values()]
+    units = [unit for _, unit in nutrition_data.values()]
+
+    plot_width = WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+    plot_height = HEIGHT - MARGIN_TOP - MARGIN_BOTTOM
+    ticks = _nice_ticks(max(values) if values else 0.0)
+    y_max = ticks[-1]
+
+    def y_pos(value: float) -> float:
+        return MARGIN_TOP + plot_height - (value / y_max) * plot_height
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{HEIGHT}" '
+        f'viewBox="0 0 {WIDTH} {HEIGHT}" font-family="DejaVu Sans, Arial, sans-serif">',
+        f'<rect width="{WIDTH}" height="{HEIGHT}" fill="#ffffff"/>',
+        f'<text x="{WIDTH / 2:.1f}" y="{MARGIN_TOP / 2 + 8:.1f}" font-size="20" '
+        f'text-anchor="middle">{escape(title)}</text>',
+    ]
+
+    # Gridlines and y-axis labels
+    for tick in ticks:
+        y = y_pos(tick)
+        parts.append(
+            f'<line x1="{MARGIN_LEFT}" y1="{y:.1f}" x2="{WIDTH - MARGIN_RIGHT}" y2="{y:.1f}" '
+            f'stroke="#e5e5e5" stroke-width="1"/>'
+        )
+        parts.append(
+            f'<text x="{MARGIN_LEFT - 8}" y="{y + 4:.1f}" font-size="12" '
+            f'text-anchor="end">{_format_tick(tick)}</text>'
+        )
+
+    # Bars with value annotations and rotated category labels
+    slot = plot_width / max(len(values), 1)
+    bar_width = slot * 0.7
+    for i, (name, value, unit) in enumerate(zip(names, values, units)):
+        x = MARGIN_LEFT + i * slot + (slot - bar_width) / 2
+        center = x + bar_width / 2
+        y = y_pos(value)
+        parts.append(
+            f'<rect x="{x:.1f}" y="{y:.1f}" width="{bar_width:.1f}" '
+            f'height="{MARGIN_TOP + plot_height - y:.1f}" fill="{PALETTE[i % len(PALETTE)]}"/>'
+        )
+        parts.append(
+            f'<text x="{center:.1f}" y="{y - 6:.1f}" font-size="12" '
+            f'text-anchor="middle">{value:.1f} {escape(unit)}</text>'
+        )
+        label_y = MARGIN_TOP + plot_height + 16
+        parts.append(
+            f'<text x="{center:.1f}" y="{label_y:.1f}" font-size="12" text-anchor="end" '
+            f'transform="rotate(-45 {center:.1f} {label_y:.1f})">{escape(name)}</text>'
+        )
+
+    # Axes and axis titles
+    parts.append(
+        f'<line x1="{MARGIN_LEFT}" y1="{MARGIN_TOP}" x2="{MARGIN_LEFT}" '
+        f'y2="{MARGIN_TOP + plot_height}" stroke="#333333"/>'
+    )
+    parts.append(
+        f'<line x1="{MARGIN_LEFT}" y1="{MARGIN_TOP + plot_height}" x2="{WIDTH - MARGIN_RIGHT}" '
+        f'y2="{MARGIN_TOP + plot_height}" stroke="#333333"/>'
+    )
+    parts.append(
+        f'<text x="{MARGIN_LEFT + plot_width / 2:.1f}" y="{HEIGHT - 12}" font-size="14" '
+        f'text-anchor="middle">Nutrient</text>'
+    )
+    parts.append(
+        f'<text x="20" y="{MARGIN_TOP + plot_height / 2:.1f}" font-size="14" text-anchor="middle" '
+        f'transform="rotate(-90 20 {MARGIN_TOP + plot_height / 2:.1f})">Amount</text>'
+    )
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+def render_text_svg(nutritional_info: str, title: str, line_length: int = 90) -> str:
+    """
+    Render the raw nutritional info string as SVG text when it cannot be parsed.
+    """
+    words = nutritional_info.split()
+    lines, current = [], ""
+    for word in words:
+        if current and len(current) + len(word) + 1 > line_length:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}".strip()
+    if current:
+        lines.append(current)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{HEIGHT}" '
+        f'viewBox="0 0 {WIDTH} {HEIGHT}" font-family="DejaVu Sans, Arial, sans-serif">',
+        f'<rect width="{WIDTH}" height="{HEIGHT}" fill="#ffffff"/>',
+        f'<text x="{WIDTH / 2:.1f}" y="48" font-size="20" text-anchor="middle">{escape(title)}</text>',
+    ]
+    start_y = HEIGHT / 2 - len(lines) * 9
+    for i, line in enumerate(lines):
+        parts.append(
+            f'<text x="{WIDTH / 2:.1f}" y="{start_y + i * 18:.1f}" font-size="14" '
+            f'text-anchor="middle">{escape(line)}</text>'
+        )
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+def save_svg(svg: str, plot_path: Optional[str] = None) -> str:
+    """Write an SVG document to plot_path, or to a new file in config.CHART_DIR, and return its path."""
+    if plot_path is None:
+        fd, plot_path = tempfile.mkstemp(prefix="nutrition_chart_", suffix=".svg", dir=config.CHART_DIR)
+        f = os.fdopen(fd, "w", encoding="utf-8")
+    else:
+        f = open(plot_path, "w", encoding="utf-8")
+    with f:
+        f.write(svg)
+    return plot_path
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Tests share the benchmarks' fakes (benchmarks/fakes.py)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, ROOT)
+
+from fakes import FakeChatModel, install_fake_model
+from models import Intent, Recipe
+
+def make_intent(**fields) -> Intent:
+    """An Intent with empty constraints, overridden by fields."""
+    values = dict(primary_intent="single_recipe", meal_type=[], dietary_restrictions=[],
+                  nutritional_requirements="", health_goals=[], specific_foods=[], excluded_ingredients=[],
+                  time_context="none", recipe_specificity="general_dish")
+    values.update(fields)
+    return Intent(**values)
+
+def make_recipe(name: str, ingredients, nutritional_info: str = "Calories: 400, Protein: 20g") -> Recipe:
+    return Recipe(name=name, ingredients=list(ingredients), instructions=["Cook."], prep_time="10 minutes",
+                  cook_time="20 minutes", total_time="30 minutes", servings=2, nutritional_info=nutritional_info)
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """A FakeChatModel behind every node's get_llm(), undone after the test."""
+    model = FakeChatModel()
+    install_fake_model(model, patch=monkeypatch.setattr)
+    return model
@@ -0,0 +1,155 @@
+from conftest import make_intent as _make_intent, make_recipe
+from constraints import ConstraintMatcher, compile_constraints, enforce_plan, enforce_recipe
+from models import DietPlan, MealPlanDay
+
+def make_intent(restrictions=(), excluded=()):
+    return _make_intent(dietary_restrictions=list(restrictions), excluded_ingredients=list(excluded))
+
+class FakeRepairModel:
+    """Structured-output stand-in that returns the given recipes in order."""
+
+    def __init__(self, *recipes):
+        self.recipes = list(recipes)
+        self.messages = []
+
+    def with_structured_output(self, schema):
+        return self
+
+    def invoke(self, message):
+        self.messages.append(message)
+        return self.recipes.pop(0)
+
+    def batch(self, messages, return_exceptions=False):
+        return [self.invoke(message) for message in messages]
+
+def test_last_ingredient_is_checked():
+    matcher = ConstraintMatcher(restrictions=["vegan"])
+    recipe = make_recipe("Toast", ["2 slices bread", "2 tbsp butter"])
+    assert [(v.line, v.term) for v in matcher.scan([recipe])] == [("2 tbsp butter", "butter")]
+
+def test_single_line():
+    matcher = ConstraintMatcher(restrictions=["vegan"])
+    assert not matcher.allows("2 tbsp butter")
+    assert not matcher.allows("Greek Yogurt")
+    assert matcher.allows("Apples")
+
+def test_rejected_includes_last_name():
+    matcher = ConstraintMatcher(restrictions=["vegan"])
+    assert matcher.rejected(["Paneer", "Apples", "Greek Yogurt"]) == [0, 2]
+
+def test_scan_maps_violations_to_recipes():
+    matcher = ConstraintMatcher(restrictions=["vegan"])
+    recipes = [make_recipe("Dal", ["1 cup lentils", "2 tbsp ghee"]),
+               make_recipe("Salad", ["1 cup spinach", "1 tbsp olive oil"]),
+               make_recipe("Omelette", ["2 eggs", "1 tbsp honey"])]
+    violations = matcher.scan(recipes)
+    assert [(v.recipe, v.term) for v in violations] == [(0, "ghee"), (2, "egg"), (2, "honey")]
+    assert all(v.rule.startswith("vegan") for v in violations)
+
+def test_safe_terms_and_modifiers():
+    matcher = ConstraintMatcher(restrictions=["vegan", "gluten-free"])
+    assert matcher.allows("1 cup coconut milk")
+    assert matcher.allows("2 tbsp peanut butter")
+    assert matcher.allows("1 cup almond flour")
+    assert matcher.allows("2 tbsp vegan butter")
+    assert matcher.allows("200 g gluten-free pasta")
+    assert not matcher.allows("200 g pasta")
+
+def test_word_boundaries_and_plurals():
+    matcher = ConstraintMatcher(restrictions=["vegan"], excluded=["nuts"])
+    assert matcher.allows("1 eggplant, diced")
+    assert matcher.allows("2 tbsp nutritional yeast")
+    assert not matcher.allows("2 eggs")
+    assert not matcher.allows("1/4 cup cashews")
+
+def test_excluded_category_expands_to_members():
+    matcher = ConstraintMatcher(excluded=["dairy"])
+    assert not matcher.allows("100 g paneer")
+    assert not matcher.allows("2 tbsp ghee")
+    assert matcher.allows("1 cup coconut milk")
+
+def test_excluded_ingredient_keeps_its_category_safe_terms():
+    matcher = ConstraintMatcher(excluded=["butter"])
+    assert not matcher.allows("1 tbsp butter")
+    assert matcher.allows("2 tbsp peanut butter")
+
+def test_undecidable_restrictions_are_unchecked():
+    matcher = ConstraintMatcher(restrictions=["keto", "vegetarian"])
+    assert matcher.unchecked == ["keto"]
+    assert not matcher.allows("chicken breast")
+
+def test_no_constraints_compiles_to_none():
+    assert compile_constraints(make_intent()) is None
+    assert compile_constraints(None) is None
+    assert compile_constraints(make_intent(["vegan"])) is compile_constraints(make_intent([" Vegan "]))
+
+def test_enforce_recipe_repairs_violations():
+    intent = make_intent(["vegan"])
+    bad = make_recipe("Palak Paneer", ["200 g spinach", "100 g paneer"])
+    good = make_recipe("Palak Tofu", ["200 g spinach", "100 g tofu"])
+    model = FakeRepairModel(good)
+    recipe, violations = enforce_recipe(bad, intent, lambda: model, "recipe_node")
+    assert recipe is good and violations == []
+    assert "'100 g paneer' contains 'paneer'" in model.messages[0]
+
+def test_enforce_recipe_leaves_compliant_recipe_alone():
+    recipe = make_recipe("Salad", ["1 cup spinach"])
+    assert enforce_recipe(recipe, make_intent(["vegan"]), lambda: None, "recipe_node") == (recipe, [])
+
+def test_enforce_plan_repairs_only_violators_and_drops_failures(monkeypatch):
+    monkeypatch.setattr("config.CONSTRAINT_REPAIR_ATTEMPTS", 1)
+    intent = make_intent(["vegan"])
+    clean = make_recipe("Oats", ["1 cup oats", "1 cup oat milk"])
+    fixable = make_recipe("Ghee Rice", ["1 cup rice", "1 tbsp ghee"])
+    hopeless = make_recipe("Egg Curry", ["4 eggs"])
+    plan = DietPlan(plan_name="Plan", duration="1 day", total_nutritional_info="", shopping_list=[],
+                    daily_plans=[MealPlanDay(day="Day 1", breakfast=[clean], lunch=[fixable], dinner=[hopeless])])
+    fixed = make_recipe("Oil Rice", ["1 cup rice", "1 tbsp olive oil"])
+    model = FakeRepairModel(fixed, make_recipe("Egg Curry", ["4 eggs"]))
+    plan, repaired, dropped = enforce_plan(plan, intent, lambda: model, "diet_plan_node")
+    assert (repaired, dropped) == (1, 1)
+    assert len(model.messages) == 2
+    day = plan.daily_plans[0]
+    assert day.breakfast == [clean] and day.lunch == [fixed] and day.dinner == []
+    assert any("olive oil" in line for line in plan.shopping_list)
+
+def one_day_plan(*dinner):
+    return DietPlan(plan_name="Plan", duration="1 day", total_nutritional_info="", shopping_list=["4 eggs"],
+                    daily_plans=[MealPlanDay(day="Day 1", breakfast=[], lunch=[], dinner=list(dinner))])
+
+def test_enforce_plan_with_no_repair_attempts_only_reports(monkeypatch):
+    monkeypatch.setattr("config.CONSTRAINT_REPAIR_ATTEMPTS", 0)
+    curry = make_recipe("Egg Curry", ["4 eggs"])
+    plan, repaired, dropped = enforce_plan(one_day_plan(curry), make_intent(["vegan"]), lambda: None,
+                                           "diet_plan_node")
+    assert (repaired, dropped) == (0, 0)
+    assert plan.daily_plans[0].dinner == [curry] and plan.shopping_list == ["4 eggs"]
+
+def test_enforce_plan_keeps_recipes_when_the_repair_call_fails(monkeypatch):
+    monkeypatch.setattr("config.CONSTRAINT_REPAIR_ATTEMPTS", 2)
+    curry = make_recipe("Egg Curry", ["4 eggs"])
+
+    class Outage(FakeRepairModel):
+        def batch(self, messages, return_exceptions=False):
+            self.messages.extend(messages)
+            raise RuntimeError("LLM circuit open; upstream is failing")
+
+    model = Outage()
+    plan, repaired, dropped = enforce_plan(one_day_plan(curry), make_intent(["vegan"]), lambda: model,
+                                           "diet_plan_node")
+    assert (repaired, dropped) == (0, 0) and len(model.messages) == 1
+    assert plan.daily_plans[0].dinner == [curry]
+
+def test_enforce_plan_keeps_recipes_whose_repair_raised(monkeypatch):
+    monkeypatch.setattr("config.CONSTRAINT_REPAIR_ATTEMPTS", 1)
+    curry, ghee_rice = make_recipe("Egg Curry", ["4 eggs"]), make_recipe("Ghee Rice", ["1 tbsp ghee"])
+    fixed = make_recipe("Oil Rice", ["1 tbsp olive oil"])
+
+    class PartialOutage(FakeRepairModel):
+        def batch(self, messages, return_exceptions=False):
+            return [TimeoutError("LLM call exceeded 60s"), fixed]
+
+    plan, repaired, dropped = enforce_plan(one_day_plan(curry, ghee_rice), make_intent(["vegan"]),
+                                           lambda: PartialOutage(), "diet_plan_node")
+    assert (repaired, dropped) == (1, 0)
+    assert plan.daily_plans[0].dinner == [curry, fixed]
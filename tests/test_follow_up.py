@@ -0,0 +1,43 @@
+import pytest
+from langchain_core.messages import HumanMessage
+from conftest import make_recipe
+from follow_up import FollowUp, detect_follow_up, follow_up_node, route_follow_up
+
+RECIPE = make_recipe("Palak Paneer", ["2 cups spinach", "200 g paneer", "1/2 cup cream"])
+RECIPE = RECIPE.model_copy(update={"servings": 2})
+PREVIOUS = {"recipe": RECIPE}
+
+@pytest.mark.parametrize("message, expected", [
+    ("Scale this to 6 servings", FollowUp("scale", servings=6)),
+    ("make it for four people please", FollowUp("scale", servings=4)),
+    ("double it", FollowUp("scale", factor=2.0)),
+    ("halve the recipe", FollowUp("scale", factor=0.5)),
+    ("give me the shopping list", FollowUp("shopping_list")),
+    ("what do I need to buy?", FollowUp("shopping_list")),
+    ("show the nutrition chart again", FollowUp("chart")),
+])
+def test_local_follow_ups(message, expected):
+    assert detect_follow_up(message, PREVIOUS) == expected
+
+@pytest.mark.parametrize("message", [
+    "Make it vegan for 4 people",
+    "double the protein",
+    "How to make dal tadka",
+    "Scale this to 0 servings",
+    "give me a shopping list for a 7 day keto plan with more fish",
+])
+def test_messages_needing_the_workflow(message):
+    assert detect_follow_up(message, PREVIOUS) is None
+
+def test_needs_previous_results():
+    assert detect_follow_up("double it", None) is None
+    assert detect_follow_up("double it", {"nutritional_info": object()}) is None
+    assert detect_follow_up("give me the shopping list", {}) is None
+
+def test_scaling_is_answered_without_the_model():
+    state = {"messages": [HumanMessage(content="Scale this to 6 servings")],
+             "original_query": "Scale this to 6 servings", "previous_results": PREVIOUS}
+    assert route_follow_up(state) == "follow_up_node"
+    update = follow_up_node(state)
+    assert update["recipe"].servings == 6
+    assert update["recipe"].ingredients[:2] == ["6 cups spinach", "600 g paneer"]
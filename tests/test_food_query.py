@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from food_query import FoodTable, parse_food_query, run_food_query
+from constraints import ConstraintMatcher
+from conftest import make_intent as _make_intent
+
+NAMES = ["Avocado", "Chickpeas", "Spinach", "Orange", "Greek Yogurt", "Salmon"]
+
+@pytest.fixture
+def table():
+    columns = {
+        "calories": np.array([240.0, 270.0, 7.0, 62.0, 100.0, 208.0]),
+        "protein": np.array([3.0, 14.5, 0.9, 1.2, 17.0, 22.0]),
+        "fiber": np.array([10.0, 12.5, 0.7, 3.1, 0.0, 0.0]),
+        "vitamin c": np.array([15.0, 2.1, 8.4, 70.0, 0.0, 0.0]),
+        "antioxidants": np.array([1900.0, 850.0, 1500.0, 2100.0, 0.0, 0.0]),
+    }
+    return FoodTable(NAMES, columns, np.array([150.0, 164.0, 30.0, 131.0, 170.0, 100.0]), ["1 serving"] * 6)
+
+def make_intent(**fields):
+    return _make_intent(**{"primary_intent": "nutritional_info", "recipe_specificity": "food_category", **fields})
+
+@pytest.mark.parametrize("question, fields", [
+    ("How many calories should I eat to lose weight?", {"health_goals": ["weight loss"]}),
+    ("How much protein do I need per day?", {"nutritional_requirements": "high protein"}),
+    ("Why is fiber important for digestion?", {}),
+    ("Is vitamin C good for colds?", {}),
+])
+def test_advice_questions_go_to_the_agent(table, question, fields):
+    assert parse_food_query(question, make_intent(**fields), table) is None
+
+def test_missing_nutrients_and_unchecked_restrictions_go_to_the_agent(table):
+    assert parse_food_query("Which foods are rich in calcium?", make_intent(), table) is None
+    assert parse_food_query("Top 5 protein foods", make_intent(dietary_restrictions=["keto"]), table) is None
+
+def test_direction_words_rank(table):
+    query = parse_food_query("Which foods are highest in fiber and lowest in calories?", make_intent(), table)
+    assert query.objectives == [("fiber", 1), ("calories", -1)]
+    assert run_food_query(table, query)[0] == 3  # Orange: good fiber at few calories
+
+def test_top_n_ranks_richest_sources(table):
+    query = parse_food_query("Top 2 foods with protein", make_intent(), table)
+    assert query.objectives == [("protein", 1)] and query.k == 2
+    assert run_food_query(table, query) == [5, 4]
+
+def test_threshold_filters(table):
+    query = parse_food_query("Foods with at least 10 g protein under 150 calories", make_intent(), table)
+    assert sorted(query.filters) == [("calories", "<=", 150.0), ("protein", ">=", 10.0)]
+    assert run_food_query(table, query) == [4]
+
+def test_food_lookup(table):
+    query = parse_food_query("How much vitamin C is in an orange?", make_intent(), table)
+    assert query.foods == [3] and not query.objectives
+
+def test_food_outside_the_dataset_goes_to_the_agent(table):
+    assert parse_food_query("How much fiber is in quinoa?", make_intent(specific_foods=["quinoa"]), table) is None
+
+def test_constraints_filter_foods(table):
+    query = parse_food_query("Top 3 protein-rich foods", make_intent(dietary_restrictions=["vegan"]), table)
+    assert run_food_query(table, query, ConstraintMatcher(restrictions=["vegan"])) == [1, 0, 3]
@@ -0,0 +1,63 @@
+import os
+import threading
+
+import pytest
+from food_store import FoodStore, ingest, open_food_store
+
+HEADER = "Food,Quantity,Calories,Protein (g),Fiber (g),Vitamin C (mg),Antioxidant Score\n"
+
+def write_csv(path, *rows):
+    path.write_text(HEADER + "".join(f"{row}\n" for row in rows))
+    return str(path)
+
+@pytest.fixture
+def source(tmp_path):
+    return write_csv(tmp_path / "foods.csv", "Kale,1 cup,33,2.9,2.5,80.4,1770", "Lentils,1 cup,230,18,15.6,3,7282")
+
+def versions(store):
+    return sorted(name for name in os.listdir(os.path.dirname(store)) if ".v" in name)
+
+def test_ingest_swaps_a_symlink_to_a_new_version(tmp_path, source):
+    store = str(tmp_path / "store")
+    ingest(source, store)
+    first = os.readlink(store)
+    opened = FoodStore(store)
+    write_csv(tmp_path / "foods.csv", "Spinach,1 cup,7,0.9,0.7,8.4,1515")
+    ingest(source, store)
+    assert os.path.islink(store) and os.readlink(store) != first
+    assert FoodStore(store)["Food"].tolist() == ["Spinach"]
+    # A store opened before the rebuild keeps reading its own version
+    assert opened["Food"].tolist() == ["Kale", "Lentils"]
+    ingest(source, store)
+    assert len(versions(store)) == 2 and first not in versions(store)
+
+def test_a_store_from_before_versions_is_migrated(tmp_path, source):
+    store = str(tmp_path / "store")
+    os.makedirs(store)
+    ingest(source, store)
+    assert os.path.islink(store) and len(FoodStore(store)) == 2
+
+def test_concurrent_opens_build_the_store_once(tmp_path, source, capsys):
+    store = str(tmp_path / "store")
+    stores = []
+    def open_store():
+        stores.append(open_food_store.__wrapped__(store, source))
+    threads = [threading.Thread(target=open_store) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [len(opened) for opened in stores] == [2] * 4
+    assert capsys.readouterr().out.count("Building food store") == 1
+    assert len(versions(store)) == 1
+
+def test_manifest_and_columns_come_from_the_same_version(tmp_path, source, monkeypatch):
+    store = str(tmp_path / "store")
+    ingest(source, store)
+    old = os.path.realpath(store)
+    write_csv(tmp_path / "foods.csv", "Spinach,1 cup,7,0.9,0.7,8.4,1515")
+    ingest(source, store)
+    # The symlink moved on after the version was resolved
+    monkeypatch.setattr(os.path, "realpath", lambda path: old)
+    opened = FoodStore(store)
+    assert len(opened) == 2 and opened["Food"].tolist() == ["Kale", "Lentils"]
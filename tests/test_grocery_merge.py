@@ -0,0 +1,21 @@
+from grocery_merge import merge_items
+from models import GroceryItem
+
+def item(name, quantity, unit):
+    return GroceryItem(name=name, quantity=quantity, unit=unit)
+
+def lines(items):
+    return [(merged.name, merged.quantity, merged.unit) for merged in merge_items(items)]
+
+def test_names_and_units_merge():
+    assert lines([item("Fresh Tomatoes", 2, ""), item("tomato", 1, ""),
+                  item("Garlic", 2, "cloves"), item("garlic", 1, "clove")]) == [
+        ("Tomatoes", 3, ""), ("Garlic", 3, "cloves")]
+
+def test_weight_and_volume_fold_into_the_first_measure():
+    assert lines([item("milk", 250, "g"), item("milk", 1, "cup")]) == [("milk", 500, "grams")]
+    assert lines([item("milk", 1, "cup"), item("milk", 250, "g")]) == [("milk", 2.25, "cups")]
+
+def test_a_count_listed_first_does_not_pick_the_measure():
+    assert lines([item("butter", 1, "stick"), item("butter", 2, "tbsp"), item("butter", 100, "g")]) == [
+        ("butter", 1, "stick"), ("butter", 0.75, "cups")]
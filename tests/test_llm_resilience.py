@@ -0,0 +1,53 @@
+import contextvars
+import threading
+import time
+
+import pytest
+from llm_resilience import CircuitBreaker, ResilientCaller
+from llm_scheduler import LLMScheduler
+
+REQUEST_ID = contextvars.ContextVar("request_id", default=None)
+
+def make_caller(**options) -> ResilientCaller:
+    options = {"max_attempts": 1, "timeout": 0.05, "breaker": CircuitBreaker(100, 1), **options}
+    return ResilientCaller(**options)
+
+def test_worker_sees_the_callers_context():
+    REQUEST_ID.set("abc")
+    assert make_caller().call("intent", REQUEST_ID.get) == "abc"
+
+def test_abandoned_calls_fail_new_attempts_fast_instead_of_queueing():
+    caller = make_caller(max_workers=2)
+    upstream = threading.Event()
+    for _ in range(2):
+        with pytest.raises(TimeoutError, match="exceeded"):
+            caller.call("recipe", lambda: upstream.wait(5))
+    start = time.monotonic()
+    with pytest.raises(TimeoutError, match="workers are busy"):
+        caller.call("recipe", lambda: "never sent")
+    assert time.monotonic() - start < 0.05
+    upstream.set()
+    deadline = time.monotonic() + 1
+    while caller._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert caller.call("recipe", lambda: "ok") == "ok"
+
+def test_timed_out_request_keeps_its_scheduler_slot_until_it_returns():
+    scheduler = LLMScheduler(rpm=1000, tpm=1_000_000, max_concurrency=2)
+    caller = make_caller(scheduler=scheduler)
+    upstream = threading.Event()
+    with pytest.raises(TimeoutError):
+        caller.call("recipe", lambda: upstream.wait(5), tokens=100)
+    assert scheduler.in_flight == 1
+    upstream.set()
+    deadline = time.monotonic() + 1
+    while scheduler.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler.in_flight == 0
+
+def test_hedge_needs_a_free_slot():
+    scheduler = LLMScheduler(rpm=1000, tpm=1_000_000, max_concurrency=2)
+    first = scheduler.try_acquire(1, 100)
+    assert first is not None and scheduler.in_flight == 1
+    assert scheduler.try_acquire(1, 100) is not None
+    assert scheduler.try_acquire(1, 100) is None
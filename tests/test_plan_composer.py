@@ -0,0 +1,86 @@
+import pytest
+from langchain_core.messages import HumanMessage
+import diet_plan
+from conftest import make_intent, make_recipe
+from models import DietPlan, MealPlanDay
+from plan_composer import compose_plan, plan_targets, requested_days
+from recipe_library import RecipeLibrary
+
+# meal -> (name, calories, protein, main ingredient); about 1800 kcal a day
+RECIPES = {
+    "breakfast": [("Tofu Scramble", 450, 25, "200 g tofu"), ("Overnight Oats", 430, 15, "1 cup oats"),
+                  ("Paneer Paratha", 460, 20, "100 g paneer")],
+    "lunch": [("Lentil Soup", 630, 30, "1 cup lentils"), ("Chickpea Bowl", 620, 25, "1 can chickpeas"),
+              ("Quinoa Salad", 640, 22, "1 cup quinoa")],
+    "dinner": [("Bean Chili", 540, 28, "1 can kidney beans"), ("Veg Stir Fry", 530, 20, "2 cups vegetables"),
+               ("Tempeh Curry", 550, 30, "200 g tempeh")],
+    "snack": [("Hummus Plate", 180, 8, "1/2 cup hummus"), ("Fruit Bowl", 170, 2, "2 cups fruit"),
+              ("Roasted Chickpeas", 190, 9, "1/2 cup chickpeas")],
+}
+
+@pytest.fixture
+def library():
+    library = RecipeLibrary(":memory:")
+    for meal, recipes in RECIPES.items():
+        for name, calories, protein, ingredient in recipes:
+            library.add(make_recipe(name, [ingredient, "1 tbsp olive oil"],
+                                    f"Calories: {calories}, Protein: {protein}g"), meals=[meal])
+    yield library
+    library.close()
+
+def plan_intent(**fields):
+    return make_intent(**{"primary_intent": "diet_plan", "time_context": "weekly_plan", **fields})
+
+def test_requested_days():
+    assert requested_days("a 3-day plan") == 3
+    assert requested_days("plan for five days") == 5
+    assert requested_days("a weekly plan") == 7
+    assert requested_days("2 weeks of meals") == 14
+    assert requested_days("a healthy plan") is None
+
+def test_plan_targets():
+    targets = plan_targets("3-day plan at 1800 calories with at least 120g protein", plan_intent())
+    assert (targets.days, targets.calories, targets.calorie_cap, targets.min_protein) == (3, 1800, False, 120)
+    capped = plan_targets("3-day plan under 1500 calories", plan_intent())
+    assert capped.calorie_cap and capped.calories == 1500
+    per_meal = plan_targets("3-day plan, meals under 500 calories", plan_intent())
+    assert per_meal.meal_cap == 500
+    assert plan_targets("a healthy plan", plan_intent(time_context="none")) is None
+
+def test_compose_fills_every_slot_within_tolerance(library):
+    composition = compose_plan(library, "3-day plan at 1800 calories", plan_intent())
+    assert composition.gaps == [] and composition.from_library == 12
+    previous = set()
+    for slots in composition.days:
+        assert abs(sum(c.calories for c in slots.values()) - 1800) <= 180
+        ids = {c.recipe_id for c in slots.values()}
+        assert len(ids) == 4 and not ids & previous  # no repeats in a day or on consecutive days
+        previous = ids
+
+def test_constraints_leave_gaps_for_the_model(library):
+    intent = plan_intent(excluded_ingredients=["tofu", "oats", "paneer"])
+    composition = compose_plan(library, "3-day plan at 1800 calories", intent)
+    assert [meal for _, meal in composition.gaps] == ["breakfast"] * 3
+    assert "Day 1 breakfast" in composition.gap_request()
+    generated = make_recipe("Chia Pudding", ["3 tbsp chia seeds"], "Calories: 450, Protein: 12g")
+    plan = DietPlan(plan_name="Gaps", duration="3 days", total_nutritional_info="", shopping_list=[],
+                    daily_plans=[MealPlanDay(day=f"Day {day}", breakfast=[generated], lunch=[], dinner=[])
+                                 for day in (1, 2, 3)])
+    assert len(composition.fill(plan)) == 3 and composition.gaps == []
+    assert composition.to_diet_plan().daily_plans[2].breakfast[0].name == "Chia Pudding"
+
+def test_specific_food_missing_from_the_library(library):
+    assert compose_plan(library, "3-day plan with salmon", plan_intent(specific_foods=["salmon"])) is None
+
+def test_diet_plan_node_uses_the_agent_when_composition_fails(fake_model, monkeypatch, library):
+    def broken(*args):
+        raise RuntimeError("composer bug")
+
+    monkeypatch.setattr(diet_plan, "get_recipe_library", lambda: library)
+    monkeypatch.setattr(diet_plan, "compose_plan", broken)
+    monkeypatch.setattr(library, "add", lambda *args, **kwargs: None)
+    query = "3-day plan at 1800 calories"
+    update = diet_plan.diet_plan_node({"messages": [HumanMessage(content=query)], "original_query": query,
+                                       "intent": plan_intent()})
+    assert update.get("diet_plan") is not None and "error" not in update
+    assert fake_model.calls > 0
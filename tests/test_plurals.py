@@ -0,0 +1,18 @@
+import pytest
+from grocery_merge import canonical_name
+from plurals import singular
+from recipe_index import tokenize
+from recipe_library import _terms
+
+@pytest.mark.parametrize("word, expected", [
+    ("tomatoes", "tomato"), ("berries", "berry"), ("peaches", "peach"), ("radishes", "radish"),
+    ("boxes", "box"), ("onions", "onion"), ("hummus", "hummus"), ("swiss", "swiss"), ("anis", "anis"),
+    ("peas", "pea"), ("figs", "fig"), ("oats", "oat"), ("rice", "rice"),
+])
+def test_singular(word, expected):
+    assert singular(word) == expected
+
+def test_every_module_folds_plurals_the_same_way():
+    assert canonical_name("Fresh Peaches") == "peach"
+    assert tokenize("grilled peaches") == ["grilled", "peach"]
+    assert _terms("Grilled Peaches") == ["grilled", "peach"]
@@ -0,0 +1,38 @@
+import json
+import os
+
+from recipe_index import RecipeIndex
+
+DOCUMENTS = [
+    {"title": "Palak Paneer", "text": "Spinach and paneer curry with garlic."},
+    {"title": "Chana Masala", "text": "Chickpeas simmered with tomatoes and garam masala."},
+    {"title": "Crème Brûlée", "text": "Custard with a caramelised sugar crust."},
+]
+
+def test_terms_are_found_by_binary_search(tmp_path):
+    index = RecipeIndex(str(tmp_path))
+    index.add_documents(DOCUMENTS)
+    segment = index.segments[0]
+    assert not os.path.exists(os.path.join(segment.path, "terms.json"))
+    start, end = segment.span("chickpea")
+    assert segment.doc_ids[start:end].tolist() == [1]
+    assert segment.span("garam") is not None and segment.span("paneer") is not None
+    assert segment.span("aaa") is None and segment.span("zzz") is None and segment.span("masalas") is None
+
+def test_search_across_segments_and_after_reopening(tmp_path):
+    index = RecipeIndex(str(tmp_path))
+    index.add_documents(DOCUMENTS[:2])
+    index.add_documents(DOCUMENTS[2:])
+    assert index.search("paneer spinach")[0][1]["title"] == "Palak Paneer"
+    assert RecipeIndex(str(tmp_path)).search("crème brûlée")[0][1]["title"] == "Crème Brûlée"
+
+def test_segments_with_a_json_term_table_still_open(tmp_path):
+    index = RecipeIndex(str(tmp_path))
+    index.add_documents(DOCUMENTS)
+    segment = index.segments[0]
+    legacy = {term: list(segment.span(term)) for term in ("chickpea", "tomato")}
+    for name in ("terms.npy", "term_offsets.npy", "postings.npy"):
+        os.remove(os.path.join(segment.path, name))
+    with open(os.path.join(segment.path, "terms.json"), "w") as f:
+        json.dump(legacy, f)
+    assert RecipeIndex(str(tmp_path)).search("chickpeas")[0][1]["title"] == "Chana Masala"
@@ -0,0 +1,44 @@
+import pytest
+from langchain_core.messages import HumanMessage
+import recipe
+from conftest import make_intent, make_recipe
+from recipe_library import RecipeLibrary
+
+@pytest.fixture
+def library():
+    library = RecipeLibrary(":memory:")
+    yield library
+    library.close()
+
+def specific(**fields):
+    return make_intent(recipe_specificity="specific_recipe", **fields)
+
+def test_match_serves_the_same_dish(library):
+    library.add(make_recipe("Classic Palak Paneer", ["200 g spinach", "100 g paneer"]))
+    assert library.match("How to make palak paneer", specific()).name == "Classic Palak Paneer"
+    assert library.match("How to make palak paneer soup", specific()) is None
+    assert library.match("How to make vegan palak paneer", specific()) is None
+
+def test_match_checks_constraints_on_the_ingredients(library):
+    library.add(make_recipe("Dal Tadka", ["1 cup lentils", "2 tbsp ghee"]))
+    library.add(make_recipe("Chana Masala", ["1 can chickpeas", "1 onion"]))
+    assert library.match("How to make dal tadka", specific(dietary_restrictions=["vegan"])) is None
+    assert library.match("How to make dal tadka", specific(excluded_ingredients=["dairy"])) is None
+    # Ingredients decide "vegan" without a tag; "keto" needs the tag it was stored with
+    assert library.match("How to make chana masala", specific(dietary_restrictions=["vegan"])) is not None
+    assert library.match("How to make chana masala", specific(dietary_restrictions=["keto"])) is None
+
+def test_candidates_by_meal(library):
+    library.add(make_recipe("Overnight Oats", ["1 cup oats", "1 cup milk"]), meals=["breakfast"])
+    library.add(make_recipe("Lentil Soup", ["1 cup lentils"]))
+    assert [c.recipe.name for c in library.candidates("breakfast")] == ["Overnight Oats"]
+    assert [c.recipe.name for c in library.candidates("dinner")] == ["Lentil Soup"]
+    assert library.candidates("breakfast", make_intent(dietary_restrictions=["vegan"])) == []
+
+def test_recipe_node_generates_when_the_library_cannot_open(fake_model, monkeypatch, tmp_path):
+    monkeypatch.setattr(recipe, "get_recipe_library", lambda: RecipeLibrary(str(tmp_path / "missing" / "x.db")))
+    query = "How to make palak paneer"
+    update = recipe.recipe_node({"messages": [HumanMessage(content=query)], "original_query": query,
+                                 "intent": specific()})
+    assert update.get("recipe") is not None and "error" not in update
+    assert fake_model.calls > 0
@@ -0,0 +1,39 @@
+import sys
+import types
+
+import recipe_index  # noqa: F401  imported first, so its defaults keep the real config
+from search_tool import DuckDuckGoBackend, get_search_service
+
+class FakeDDGS:
+    created = []
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        FakeDDGS.created.append(timeout)
+
+    def text(self, query, max_results):
+        return [{"body": f"{query} via {self.timeout}s client"}]
+
+def test_duckduckgo_honours_the_per_call_deadline(monkeypatch):
+    monkeypatch.setitem(sys.modules, "duckduckgo_search", types.SimpleNamespace(DDGS=FakeDDGS))
+    FakeDDGS.created.clear()
+    backend = DuckDuckGoBackend(max_results=3, timeout=8.0)
+    assert backend.search("dal", 8.0) == "dal via 8s client"
+    assert backend.search("dal", 2.7) == "dal via 2s client"
+    assert backend.search("dal", 0.3) == "dal via 1s client"
+    assert backend.search("dal", 30.0) == "dal via 8s client"
+    assert backend.search("dal", 2.1) == "dal via 2s client"
+    assert FakeDDGS.created == [8, 2, 1]
+
+def test_local_index_is_seeded_from_the_configured_dataset(tmp_path, monkeypatch):
+    dataset = tmp_path / "foods.csv"
+    dataset.write_text("Food,Calories\nTestberry,64\n")
+    monkeypatch.setattr("config.SEARCH_BACKEND", "local")
+    monkeypatch.setattr("config.RECIPE_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.setattr("config.FOOD_DATASET_PATH", str(dataset))
+    monkeypatch.setattr("config.SEARCH_CACHE_PATH", "")
+    get_search_service.cache_clear()
+    try:
+        assert get_search_service().search("testberry").startswith("Testberry: Testberry nutrition facts")
+    finally:
+        get_search_service.cache_clear()
@@ -0,0 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import svg_chart
+
+def test_each_chart_gets_its_own_file(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.CHART_DIR", str(tmp_path))
+    documents = [svg_chart.render_text_svg(f"Calories: {calories}", "Chart") for calories in range(8)]
+    with ThreadPoolExecutor(4) as pool:
+        paths = list(pool.map(svg_chart.save_svg, documents))
+    assert len(set(paths)) == 8 and all(path.startswith(str(tmp_path)) for path in paths)
+    for path, document in zip(paths, documents):
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == document
@@ -0,0 +1,78 @@
+"""
+A thread-safe LRU cache with expiring entries, shared by web search
+(search_tool) and the model-call fallback cache (llm_resilience).
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after `ttl` seconds, with an
+    optional SQLite tier so results survive restarts and are shared by
+    processes on the same machine.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, path: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            import sqlite3
+            # The table keeps its original name so existing cache files stay valid
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> tuple:
+        """Return (value, tier) where tier is 'memory', 'disk' or None on a miss."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    return entry[0], 'memory'
+                del self._entries[key]
+            if self._db is None:
+                return None, None
+            row = self._db.execute(
+                "SELECT value, expires FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None, None
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            return value, 'disk'
+
+    def set(self, key: str, value: Any) -> None:
+        expires = self.clock() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, value: Any, expires: float) -> None:
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,36 +1,77 @@
 from dotenv import load_dotenv
-import matplotlib.pyplot as plt
-import operator
-import pandas as pd
-import seaborn as sns
-from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
-from langchain_experimental.tools.python.tool import PythonAstREPLTool
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from langgraph.graph import MessagesState, StateGraph, add_messages, END, START
-from langgraph.prebuilt import create_react_agent
-from langgraph.types import Command
-from typing import Sequence, Literal, TypedDict
-from typing_extensions import Annotated
-import config
-from langgraph.checkpoint.memory import MemorySaver
-import uuid
+from functools import lru_cache
 load_dotenv()
+import config
+
+# Heavy dependencies (the Gemini client, pandas, search and Python tools) are
+# imported inside the functions that need them so that importing a node
+# module stays cheap; see benchmarks/bench_startup.py for the budget.
 
-def get_llm():
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash-001",
-        temperature=0,
+def get_llm(node: str = None):
+    """
+    Chat model for a node, configured from its tier in llm_tiers.json (model,
+    max output tokens, temperature, timeout), behind the shared retry /
+    hedging / circuit-breaker layer (see llm_resilience.py). All nodes share
+    one pooled Gemini client (see llm_pool.py), so calling this per request
+    costs no client setup or new connections.
+
+    Args:
+        node: Calling node; selects its model tier and scheduling priority
+    """
+    from llm_pool import get_chat_model
+    from llm_resilience import ResilientChatModel, get_llm_caller
+    from llm_scheduler import node_priority
+    from llm_tiers import tier_for
+    tier = tier_for(node)
+    return ResilientChatModel(
+        model=get_chat_model(tier.model, tier.temperature, tier.max_output_tokens, tier.timeout,
+                             config.LLM_BASE_URL),
+        caller=get_llm_caller(),
+        priority=node_priority(node),
+        expected_output_tokens=tier.max_output_tokens,
+        timeout=tier.timeout,
     )
 
+@lru_cache(maxsize=1)
 def get_search_tool():
-    return DuckDuckGoSearchRun()
+    """
+    Search tool shared by every agent: cached, rate-limited and time-bounded
+    (see search_tool.py), instead of a fresh DuckDuckGoSearchRun per agent.
+    """
+    from search_tool import CachedSearchTool, get_search_service
+    return CachedSearchTool(service=get_search_service())
+
+@lru_cache(maxsize=1)
+def get_recipe_library():
+    """
+    Process-wide RecipeLibrary (see recipe_library.py), or None when
+    RECIPE_LIBRARY_PATH is empty.
+    """
+    if not config.RECIPE_LIBRARY_PATH:
+        return None
+    from recipe_library import RecipeLibrary
+    return RecipeLibrary(config.RECIPE_LIBRARY_PATH)
 
 def get_python_tool():
+    from langchain_experimental.tools.python.tool import PythonAstREPLTool
     return PythonAstREPLTool()
 
 def get_react_agent(tools: list):
+    from langgraph.prebuilt import create_react_agent
     return create_react_agent(get_llm(), tools, )
 
+@lru_cache(maxsize=1)
+def get_food_dataset_markdown() -> str:
+    """
+    Render the food dataset as the markdown table embedded in the agent
+    prompts: its first FOOD_PROMPT_MAX_ROWS rows, read from the food store
+    (see food_store.py). Built once per process instead of once per request.
+    """
+    import pandas as pd
+    from food_store import open_food_store
+    store = open_food_store()
+    rows = min(len(store), config.FOOD_PROMPT_MAX_ROWS)
+    df = pd.DataFrame({column: (store[column][:rows] if store.kind(column) != "str"
+                                else [store[column][row] for row in range(rows)])
+                       for column in store.columns})
+    return df.to_markdown(index=True)
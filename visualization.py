@@ -1,16 +1,15 @@
-from langgraph.types import Command
 from langchain_core.messages import AIMessage
-import seaborn as sns
-import matplotlib.pyplot as plt
-import pandas as pd
-import re
 from typing import Dict, Tuple, Any, List
+import config
+import svg_chart
+from nutrition_parser import parse_nutrition
 from state import NutritionistState
 
 def parse_nutritional_info(nutritional_info: str) -> Dict[str, Tuple[float, str]]:
     """
     Parse nutritional information string into a dictionary with values and units.
-    Handles various formats including "Approximately X", "X kcal", etc.
+    Handles various formats including "Approximately X", "X kcal", "1,200 mg",
+    ranges like "5-7 g" and µg/IU/% DV units (see nutrition_parser).
     
     Args:
         nutritional_info: String like "Calories: Approximately 476 calories, Protein: 38.15g, ..."
@@ -18,61 +17,69 @@ def parse_nutritional_info(nutritional_info: str) -> Dict[str, Tuple[float, str]
     Returns:
         Dict mapping nutrient names to (value, unit) tuples
     """
-    nutrition_data = {}
-    
-    # Split by commas and process each nutrient
-    nutrients = nutritional_info.split(',')
-    
-    for nutrient in nutrients:
-        nutrient = nutrient.strip()
-        if ':' in nutrient:
-            # Split on colon to get name and value+unit
-            name, value_unit = nutrient.split(':', 1)
-            name = name.strip()
-            value_unit = value_unit.strip()
-            
-            # Clean up the name (remove extra words)
-            name = name.replace('Approximately', '').strip()
-            
-            # More flexible regex to handle various formats
-            # Matches: "Approximately 476 calories", "38.15g", "476 kcal", etc.
-            patterns = [
-                r'(?:approximately\s+)?([\d.]+)\s*([a-zA-Z]+)',  # "Approximately 476 calories"
-                r'([\d.]+)\s*([a-zA-Z]+)',  # "38.15g"
-                r'([\d.]+)',  # Just numbers (assume grams)
-            ]
-            
-            match = None
-            for pattern in patterns:
-                match = re.search(pattern, value_unit.lower())
-                if match:
-                    break
-            
-            if match:
-                value = float(match.group(1))
-                unit = match.group(2) if len(match.groups()) > 1 else 'g'
-                
-                # Standardize unit names
-                unit_mapping = {
-                    'calories': 'kcal',
-                    'calorie': 'kcal',
-                    'kcal': 'kcal',
-                    'grams': 'g',
-                    'gram': 'g',
-                    'g': 'g',
-                    'mg': 'mg',
-                    'milligrams': 'mg',
-                    'milligram': 'mg'
-                }
-                
-                unit = unit_mapping.get(unit.lower(), unit)
-                nutrition_data[name] = (value, unit)
+    return parse_nutrition(nutritional_info)
+
+def _pyplot():
+    """
+    Import matplotlib lazily with the non-interactive Agg backend, so the SVG
+    chart backend never pays for matplotlib/seaborn at startup.
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive backend (fixes matplotlib threading issue)
+    import matplotlib.pyplot as plt
+    return plt
+
+def create_nutrition_chart(nutritional_info: str, title: str = "Nutritional Information") -> str:
+    """
+    Creates a nutrition chart with the backend selected by config.CHART_BACKEND.
+    
+    Args:
+        nutritional_info: String containing nutritional information
+        title: Title for the chart
     
-    return nutrition_data
+    Returns:
+        str: Path to the saved chart
+    """
+    if config.CHART_BACKEND == "matplotlib":
+        return create_nutrition_plot(nutritional_info, title)
+    return create_nutrition_svg(nutritional_info, title)
+
+def create_text_chart(nutritional_info: str, title: str) -> str:
+    """
+    Create a text-based visualization with the backend selected by config.CHART_BACKEND.
+    """
+    if config.CHART_BACKEND == "matplotlib":
+        return create_text_visualization(nutritional_info, title)
+    return svg_chart.save_svg(svg_chart.render_text_svg(nutritional_info, title))
+
+def create_nutrition_svg(nutritional_info: str, title: str = "Nutritional Information") -> str:
+    """
+    Creates a nutrition facts bar chart as SVG without importing matplotlib or seaborn.
+    
+    Args:
+        nutritional_info: String containing nutritional information
+        title: Title for the chart
+    
+    Returns:
+        str: Path to the saved SVG
+    """
+    nutrition_data = parse_nutritional_info(nutritional_info)
+    
+    print(f"🔍 DEBUG: Parsed nutrition data: {nutrition_data}")
+    
+    if not nutrition_data:
+        print(f"⚠️ DEBUG: No parsed data, creating text visualization")
+        return svg_chart.save_svg(svg_chart.render_text_svg(nutritional_info, title))
+    
+    plot_path = svg_chart.save_svg(svg_chart.render_bar_chart_svg(nutrition_data, title))
+    
+    print(f"✅ DEBUG: SVG chart saved to {plot_path}")
+    return plot_path
 
 def create_nutrition_plot(nutritional_info: str, title: str = "Nutritional Information") -> str:
     """
-    Creates a nutrition facts visualization plot from a nutritional info string.
+    Creates a high-resolution nutrition facts plot from a nutritional info string
+    using matplotlib and seaborn.
     
     Args:
         nutritional_info: String containing nutritional information
@@ -103,6 +110,10 @@ def create_nutrition_plot(nutritional_info: str, title: str = "Nutritional Infor
         values.append(value)
         units.append(unit)
     
+    import pandas as pd
+    import seaborn as sns
+    plt = _pyplot()
+    
     # Convert to DataFrame
     df = pd.DataFrame({
         'Nutrient': nutrients,
@@ -112,10 +123,6 @@ def create_nutrition_plot(nutritional_info: str, title: str = "Nutritional Infor
     
     print(f"🔍 DEBUG: DataFrame created with {len(df)} nutrients")
     
-    # Fix matplotlib threading issue by using Agg backend
-    import matplotlib
-    matplotlib.use('Agg')  # Use non-interactive backend
-    
     # Create the plot
     plt.figure(figsize=(12, 8))
     sns.set_theme(style="whitegrid")
@@ -151,8 +158,7 @@ def create_text_visualization(nutritional_info: str, title: str) -> str:
     """
     Create a simple text-based visualization when parsing fails.
     """
-    import matplotlib
-    matplotlib.use('Agg')
+    plt = _pyplot()
     
     plt.figure(figsize=(10, 6))
     plt.text(0.5, 0.5, f"{title}\n\n{nutritional_info}", 
@@ -216,7 +222,7 @@ def visual_node(state: NutritionistState) -> Dict[str, Any]:
         print(f"🔍 DEBUG: Creating plot with nutritional_info: {nutritional_info[:100]}...")
         
         # Create visualization and get plot path
-        plot_path = create_nutrition_plot(nutritional_info, title)
+        plot_path = create_nutrition_chart(nutritional_info, title)
         
         print(f"✅ DEBUG: Plot created successfully at {plot_path}")
         
@@ -232,7 +238,7 @@ def visual_node(state: NutritionistState) -> Dict[str, Any]:
         # Create a fallback text visualization
         try:
             if nutritional_info:
-                plot_path = create_text_visualization(nutritional_info, title)
+                plot_path = create_text_chart(nutritional_info, title)
                 return {
                     "visualization": plot_path,
                     "messages": [AIMessage(content=f"Created text-based nutrition visualization: {plot_path}", name="visual_node")]